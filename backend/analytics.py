@@ -0,0 +1,413 @@
+"""
+Cohort analytics over assessments and prescriptions, backed by NumPy columns.
+
+Assessments and prescriptions are kept in memory as column tables:
+one NumPy array per numeric field plus a bit matrix with one bit per
+(row, term), where the terms are normalized symptoms for assessments and
+medication names for prescriptions. Numeric columns are in SI units
+(weight in kg, height in m), so aggregates never branch on units. Dates
+are stored as day numbers (days since 1970-01-01), so per-day group-bys
+and trailing windows are vectorized sums instead of loops over records.
+
+The tables are built once from the live data files, then extended in place
+by data_access change notifications: inserted records are appended
+(capacity doubles as needed) and doctors' prescription edits overwrite
+their row. Any other change, or a data file changed behind the store's
+back, rebuilds the table on next use. Archived records are not included.
+
+Date bounds are applied at day precision; the time of day is ignored.
+"""
+
+import threading
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import data_access
+
+
+ASSESSMENTS_FILE = 'assessments.json'
+PRESCRIPTIONS_FILE = 'prescriptions.json'
+
+POUND_KG = 0.45359237
+INCH_M = 0.0254
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Day number of records without a recognizable date
+NO_DAY = -1
+
+# Histogram bins: (label, lower edge), each bin reaching the next lower edge
+AGE_BINS = (('0-17', 0), ('18-29', 18), ('30-44', 30), ('45-59', 45), ('60-74', 60), ('75+', 75))
+BMI_BINS = (('underweight', 0), ('normal', 18.5), ('overweight', 25), ('obese', 30))
+
+
+def day_number(value: Any) -> Optional[int]:
+    """
+    Get the day number (days since 1970-01-01) of an ISO 8601 date.
+
+    Args:
+        value: Date or date-time string; a 'YYYY-MM' month means its first day
+
+    Returns:
+        Day number, or None if the value is not a date
+    """
+    if not isinstance(value, str):
+        return None
+    text = value[:10] if len(value) >= 10 else f"{value[:7]}-01"
+    try:
+        return date.fromisoformat(text).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return None
+
+
+def day_string(day: int) -> str:
+    """Get the 'YYYY-MM-DD' date of a day number."""
+    return (date(1970, 1, 1) + timedelta(days=int(day))).isoformat()
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return np.nan
+    return float(value)
+
+
+class _ColumnTable:
+    """
+    Growable column arrays plus a term bit matrix, with rows addressable by record key.
+
+    Arrays are allocated with spare capacity that doubles when full, so
+    appending a row is amortized O(1); column() returns views of the filled
+    part.
+    """
+
+    def __init__(self, columns: Dict[str, Tuple[Any, Any]]):
+        """
+        Initialize an empty table.
+
+        Args:
+            columns: Column name -> (NumPy dtype, value of missing entries)
+        """
+        self._specs = columns
+        self.size = 0
+        self.rows = {}
+        self.vocabulary = []
+        self.codes = {}
+        self._arrays = {name: np.full(16, fill, dtype) for name, (dtype, fill) in columns.items()}
+        self._bits = np.zeros((16, 1), np.uint8)
+
+    def column(self, name: str) -> np.ndarray:
+        return self._arrays[name][:self.size]
+
+    def term_bits(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Get the (rows x terms) 0/1 matrix of the given rows (default all)."""
+        packed = self._bits[:self.size] if rows is None else self._bits[:self.size][rows]
+        return np.unpackbits(packed, axis=1, count=len(self.vocabulary), bitorder='little')
+
+    def append(self, key: Any, values: Dict[str, Any], terms: List[str]) -> None:
+        if self.size == len(self._bits):
+            self._reserve(2 * self.size)
+        self.rows[key] = self.size
+        self.size += 1
+        self.set_row(self.size - 1, values, terms)
+
+    def set_row(self, row: int, values: Dict[str, Any], terms: List[str]) -> None:
+        for name, value in values.items():
+            self._arrays[name][row] = value
+        self._bits[row] = 0
+        for term in terms:
+            code = self.codes.get(term)
+            if code is None:
+                code = self.codes[term] = len(self.vocabulary)
+                self.vocabulary.append(term)
+                if code >= 8 * self._bits.shape[1]:
+                    self._bits = np.concatenate([self._bits, np.zeros_like(self._bits)], axis=1)
+            self._bits[row, code >> 3] |= np.uint8(1 << (code & 7))
+
+    def _reserve(self, capacity: int) -> None:
+        for name, (dtype, fill) in self._specs.items():
+            grown = np.full(capacity, fill, dtype)
+            grown[:self.size] = self._arrays[name][:self.size]
+            self._arrays[name] = grown
+        bits = np.zeros((capacity, self._bits.shape[1]), np.uint8)
+        bits[:self.size] = self._bits[:self.size]
+        self._bits = bits
+
+
+def _assessment_row(record: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Get the column values and symptom terms of an assessment."""
+    weight = _number(record.get('weight'))
+    weight_kg = {'kg': weight, 'lbs': weight * POUND_KG}.get(record.get('weightUnit'), np.nan)
+    height = _number(record.get('height'))
+    height_m = {'cm': height / 100, 'inches': height * INCH_M}.get(record.get('heightUnit'), np.nan)
+    day = day_number(record.get('assessmentDate'))
+    symptoms = record.get('symptoms')
+    terms = [str(symptom).strip().lower() for symptom in symptoms] if isinstance(symptoms, list) else []
+    return {
+        'day': NO_DAY if day is None else day,
+        'age': _number(record.get('age')),
+        'weight_kg': weight_kg,
+        'height_m': height_m,
+    }, [term for term in dict.fromkeys(terms) if term]
+
+
+def _prescription_row(record: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Get the column values and medication terms of a prescription."""
+    day = day_number(record.get('generatedDate'))
+    medications = record.get('medications')
+    names = []
+    for medication in medications if isinstance(medications, list) else ():
+        name = medication.get('name') if isinstance(medication, dict) else medication
+        if isinstance(name, str) and name.strip():
+            names.append(name.strip().lower())
+    return {
+        'day': NO_DAY if day is None else day,
+        'reviewed': bool(record.get('lastModifiedBy')),
+    }, list(dict.fromkeys(names))
+
+
+# Tables: data file -> (column specs, record key field, row builder)
+TABLES = {
+    ASSESSMENTS_FILE: ({
+        'day': (np.int32, NO_DAY),
+        'age': (np.float64, np.nan),
+        'weight_kg': (np.float64, np.nan),
+        'height_m': (np.float64, np.nan),
+    }, 'assessmentID', _assessment_row),
+    PRESCRIPTIONS_FILE: ({
+        'day': (np.int32, NO_DAY),
+        'reviewed': (np.bool_, False),
+    }, 'prescriptionID', _prescription_row),
+}
+
+
+def _distribution(values: np.ndarray, bins: Tuple[Tuple[str, float], ...]) -> Dict[str, Any]:
+    """Summarize values: count, mean, percentiles and a histogram over bins."""
+    values = values[np.isfinite(values) & (values > 0)]
+    summary = {'count': int(values.size)}
+    if values.size:
+        p10, median, p90 = np.percentile(values, [10, 50, 90])
+        summary.update(mean=round(float(values.mean()), 2), median=round(float(median), 2),
+                       p10=round(float(p10), 2), p90=round(float(p90), 2))
+    edges = np.array([edge for _, edge in bins], dtype=np.float64)
+    counts = np.bincount(np.searchsorted(edges, values, side='right') - 1, minlength=len(bins))
+    summary['histogram'] = {label: int(count) for (label, _), count in zip(bins, counts)}
+    return summary
+
+
+def _ranked_terms(table: _ColumnTable, counts: np.ndarray, top: int) -> List[Tuple[int, int]]:
+    """Get (term code, count) of the top terms by count, ties by term."""
+    order = sorted(np.flatnonzero(counts), key=lambda code: (-int(counts[code]), table.vocabulary[code]))
+    return [(int(code), int(counts[code])) for code in order[:top]]
+
+
+class CohortAnalytics:
+    """Column store of assessments and prescriptions, kept current via change notifications."""
+
+    def __init__(self):
+        """Initialize empty tables; they are built on first use."""
+        self._lock = threading.RLock()
+        self._tables = {}
+        self._signatures = {}
+        data_access.add_change_listener(self._on_change)
+
+    def symptom_counts(self, since: Optional[str] = None, until: Optional[str] = None, window: int = 1,
+                       top: int = 10, max_days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Count assessments and symptoms per day.
+
+        Days run from since (or the first assessment) up to until (or the
+        last assessment), including days without assessments. With a window
+        of N days, each day's counts cover that day and the N-1 before it.
+
+        Args:
+            since: Inclusive lower bound on the assessment date
+            until: Exclusive upper bound on the assessment date
+            window: Trailing window in days
+            top: Number of most frequent symptoms to report
+            max_days: Most days the result may cover (None for no limit)
+
+        Returns:
+            Dictionary with days, assessments (count per day) and symptoms
+            (the top symptoms, each with its total and counts per day)
+
+        Raises:
+            ValueError: If the days run over max_days
+        """
+        with self._lock:
+            table = self._table(ASSESSMENTS_FILE)
+            days = table.column('day')
+            rows = self._rows_in_range(days, since, until)
+            selected = days[rows]
+            if selected.size:
+                first = day_number(since) if since is not None else int(selected.min())
+                last = day_number(until) - 1 if until is not None else int(selected.max())
+            else:
+                first = day_number(since) if since is not None and until is not None else 0
+                last = day_number(until) - 1 if since is not None and until is not None else -1
+            span = max(0, last - first + 1)
+            if max_days is not None and span > max_days:
+                raise ValueError(f'The range can cover at most {max_days} days')
+
+            # Group-by day: counts[d, t] = assessments on day first + d with term t
+            offsets = selected - first
+            per_day = np.bincount(offsets, minlength=span)[:span] if span else np.zeros(0, np.int64)
+            counts = np.zeros((span, len(table.vocabulary)), np.int64)
+            if selected.size and span:
+                order = np.argsort(offsets, kind='stable')
+                present, starts = np.unique(offsets[order], return_index=True)
+                bits = table.term_bits(rows[order])
+                counts[present] = np.add.reduceat(bits, starts, axis=0, dtype=np.int64)
+            ranked = [(table.vocabulary[code], code, total)
+                      for code, total in _ranked_terms(table, counts.sum(axis=0), top)]
+
+        if window > 1:
+            per_day = self._trailing(per_day, window)
+            counts = self._trailing(counts, window)
+        return {
+            'window': window,
+            'days': [day_string(first + offset) for offset in range(span)],
+            'assessments': per_day.tolist(),
+            'symptoms': [
+                {'symptom': symptom, 'total': total, 'counts': counts[:, code].tolist()}
+                for symptom, code, total in ranked
+            ],
+        }
+
+    def demographics(self, since: Optional[str] = None, until: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Summarize the age and BMI of assessed patients.
+
+        Args:
+            since: Inclusive lower bound on the assessment date
+            until: Exclusive upper bound on the assessment date
+
+        Returns:
+            Dictionary with the assessment count and age and bmi summaries
+            (count, mean, median, p10, p90 and a histogram)
+        """
+        with self._lock:
+            table = self._table(ASSESSMENTS_FILE)
+            rows = self._rows_in_range(table.column('day'), since, until)
+            ages = table.column('age')[rows]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                bmi = table.column('weight_kg')[rows] / np.square(table.column('height_m')[rows])
+        return {
+            'assessments': int(rows.size),
+            'age': _distribution(ages, AGE_BINS),
+            'bmi': _distribution(bmi, BMI_BINS),
+        }
+
+    def prescription_mix(self, since: Optional[str] = None, until: Optional[str] = None,
+                         top: int = 10) -> Dict[str, Any]:
+        """
+        Summarize prescriptions: review share and most prescribed medications.
+
+        Args:
+            since: Inclusive lower bound on the generated date
+            until: Exclusive upper bound on the generated date
+            top: Number of most prescribed medications to report
+
+        Returns:
+            Dictionary with prescription and reviewed counts and the top
+            medications with the number of prescriptions naming each
+        """
+        with self._lock:
+            table = self._table(PRESCRIPTIONS_FILE)
+            rows = self._rows_in_range(table.column('day'), since, until)
+            reviewed = int(np.count_nonzero(table.column('reviewed')[rows]))
+            totals = table.term_bits(rows).sum(axis=0, dtype=np.int64)
+            ranked = [(table.vocabulary[code], total) for code, total in _ranked_terms(table, totals, top)]
+        return {
+            'prescriptions': int(rows.size),
+            'reviewed': reviewed,
+            'medications': [{'medication': name, 'count': count} for name, count in ranked],
+        }
+
+    def preload(self) -> None:
+        """Build the tables now rather than on first use (e.g., during warm-up)."""
+        with self._lock:
+            for filename in TABLES:
+                self._table(filename)
+
+    @staticmethod
+    def _trailing(counts: np.ndarray, window: int) -> np.ndarray:
+        """Sum counts over a trailing window along the first (day) axis."""
+        cumulative = np.concatenate([np.zeros((1,) + counts.shape[1:], counts.dtype), np.cumsum(counts, axis=0)])
+        ends = np.arange(1, len(counts) + 1)
+        return cumulative[ends] - cumulative[np.maximum(ends - window, 0)]
+
+    @staticmethod
+    def _rows_in_range(days: np.ndarray, since: Optional[str], until: Optional[str]) -> np.ndarray:
+        """Get the indices of dated rows within [since, until)."""
+        mask = days != NO_DAY
+        if since is not None:
+            mask &= days >= day_number(since)
+        if until is not None:
+            mask &= days < day_number(until)
+        return np.flatnonzero(mask)
+
+    def _table(self, filename: str) -> _ColumnTable:
+        """Get a table, rebuilding it if the data file changed behind its back."""
+        signature = data_access.data_signature(filename, missing_ok=True)
+        table = self._tables.get(filename)
+        if table is not None and signature is not None and signature == self._signatures.get(filename):
+            return table
+
+        # Signature taken before reading: a write racing the read forces another rebuild
+        self._signatures[filename] = signature
+        try:
+            records = data_access.read_json_snapshot(filename) if signature is not None else ()
+        except FileNotFoundError:
+            records = ()
+        columns, key_field, build_row = TABLES[filename]
+        table = _ColumnTable(columns)
+        table._reserve(max(16, len(records)))
+        for record in records:
+            table.append(record.get(key_field), *build_row(record))
+        self._tables[filename] = table
+        return table
+
+    def _on_change(self, filename: str, operation: str, records: List[Dict[str, Any]],
+                   signature: data_access.WriteSignature) -> None:
+        """Apply a data_access change notification to the tables."""
+        if filename not in TABLES:
+            return
+        with self._lock:
+            table = self._tables.get(filename)
+            if table is None or self._signatures.get(filename) is None:
+                return
+            _, key_field, build_row = TABLES[filename]
+            if self._signatures[filename] == signature.after:
+                # Already built from the files this write produced
+                return
+            if self._signatures[filename] != signature.before:
+                # The table missed a write; rebuild on next use
+                self._signatures[filename] = None
+                return
+            if operation == 'insert':
+                for record in records:
+                    table.append(record.get(key_field), *build_row(record))
+            elif operation == 'update' and all(record.get(key_field) in table.rows for record in records):
+                for record in records:
+                    table.set_row(table.rows[record[key_field]], *build_row(record))
+            else:
+                # Rebuild on next use
+                self._signatures[filename] = None
+                return
+            self._signatures[filename] = signature.after
+
+
+# Global instance
+_analytics = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics() -> CohortAnalytics:
+    """Get or create the cohort analytics instance."""
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = CohortAnalytics()
+        return _analytics
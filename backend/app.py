@@ -4,22 +4,146 @@ import bcrypt
 import re
 import jwt
 import os
-from datetime import datetime, timezone, timedelta
-from data_access import generate_id, add_record, find_by_id, find_all_by_field, update_record, read_json_file
+import atexit
+import hmac
+from datetime import date, datetime, timezone, timedelta
+from data_access import generate_id, add_record, find_by_id, find_all_by_field, update_record, transaction, recover_journals, get_profile, dump_profile
 from bedrock_service import get_bedrock_service
+from history_service import get_history_service
+from compression import Compressor
+from assignment_service import get_assignment_engine
+from triage_service import get_triage_queue
+from search_service import get_search_index
+from analytics import get_analytics
+from outbreak import get_spike_detector
+from rollups import get_rollup_store, DIMENSIONS as ROLLUP_DIMENSIONS
+from symptom_vocabulary import get_symptom_vocabulary
+from models import Patient, Assessment, Prescription, Assignment
+import metrics
+import sampling_profiler
+from warmup import get_warmup, warmup_mode
 
 app = Flask(__name__)
+metrics.init_app(app)
 CORS(app)
+Compressor(app)
 
 # Secret key for JWT token generation from environment variable
 SECRET_KEY = os.getenv('SECRET_KEY')
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY environment variable is not set. Please set it in your .env file.")
 
+# Finish any multi-file commit interrupted by a crash before serving requests
+recover_journals()
+
+# Write the data store profile on shutdown when DATA_ACCESS_PROFILE=1
+PROFILE_DUMP_FILE = os.getenv('DATA_ACCESS_PROFILE_FILE')
+if PROFILE_DUMP_FILE:
+    atexit.register(dump_profile, PROFILE_DUMP_FILE)
+
+# Count assessments for symptom spike detection (backfilled from the stored ones) and roll up writes for reports
+get_spike_detector()
+get_rollup_store()
+
+# Build the Bedrock client and data indexes before the first requests need them
+get_warmup().start(warmup_mode())
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return {'status': 'ok', 'message': 'Patient Assessment System API is running'}
 
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """
+    Liveness probe: the process is up and serving requests.
+    
+    Returns:
+        200: {"status": "ok"}
+    """
+    return jsonify({'status': 'ok'}), 200
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness probe: warm-up has finished and requests will be served at full speed.
+    
+    Returns:
+        200: {"status": "ready", "warmup": {...}}
+        503: {"status": "warming_up", "warmup": {...}}
+    """
+    status = get_warmup().status()
+    if status['ready']:
+        return jsonify({'status': 'ready', 'warmup': status}), 200
+    return jsonify({'status': 'warming_up', 'warmup': status}), 503
+
+@app.route('/api/metrics/data-access', methods=['GET'])
+def data_access_profile():
+    """
+    Get per-file data store profiling data (lock wait/hold, bytes, parse and
+    serialize times). Empty unless profiling is enabled with DATA_ACCESS_PROFILE=1.
+    
+    Returns:
+        200: {"enabled": bool, "files": {filename: statistics}}
+    """
+    return jsonify(get_profile()), 200
+
+@app.route('/api/admin/profile', methods=['POST'])
+def capture_profile():
+    """
+    Sample all request threads for a while and return their collapsed stacks.
+    
+    Requires the ADMIN_TOKEN environment variable to be set and sent in the
+    X-Admin-Token header. The request blocks for the sampling duration.
+    
+    Expected JSON body (all optional):
+    {
+        "seconds": 10,
+        "intervalMs": 5,
+        "requestsOnly": true,
+        "format": "collapsed"  // or "json" for stacks plus a component summary
+    }
+    
+    Returns:
+        200: Collapsed stacks (text/plain) or {"collapsed": str, "summary": {...}}
+        400: Invalid parameters
+        403: Missing or wrong admin token, or profiling disabled
+        409: Another profile is already running
+    """
+    admin_token = os.getenv('ADMIN_TOKEN')
+    provided = request.headers.get('X-Admin-Token', '')
+    if not admin_token or not hmac.compare_digest(provided.encode('utf-8'), admin_token.encode('utf-8')):
+        return jsonify({
+            'error': 'Forbidden',
+            'message': 'Admin token required'
+        }), 403
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = float(data.get('seconds', 10))
+        interval = float(data.get('intervalMs', sampling_profiler.DEFAULT_INTERVAL * 1000)) / 1000
+    except (TypeError, ValueError):
+        return jsonify({
+            'error': 'Validation error',
+            'message': 'seconds and intervalMs must be numbers'
+        }), 400
+    if not 0 < seconds <= sampling_profiler.MAX_SECONDS or not 0.001 <= interval <= 1:
+        return jsonify({
+            'error': 'Validation error',
+            'message': f'seconds must be in (0, {sampling_profiler.MAX_SECONDS}] and intervalMs in [1, 1000]'
+        }), 400
+    
+    try:
+        profiler = sampling_profiler.profile_for(seconds, interval, bool(data.get('requestsOnly', True)))
+    except RuntimeError as e:
+        return jsonify({
+            'error': 'Conflict',
+            'message': str(e)
+        }), 409
+    
+    if data.get('format') == 'json':
+        return jsonify({'collapsed': profiler.collapsed(), 'summary': profiler.summary()}), 200
+    return profiler.collapsed(), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
 @app.route('/api/patients/register', methods=['POST'])
 def register_patient():
     """
@@ -80,20 +204,21 @@ def register_patient():
             }), 400
         
         # Hash password using bcrypt
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        with metrics.timer('bcrypt_duration_seconds', operation='hash'):
+            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
         
         # Generate unique Patient_ID
         patient_id = generate_id()
         
         # Create patient record
-        patient_record = {
-            'patientID': patient_id,
-            'firstName': first_name,
-            'lastName': last_name,
-            'email': email,
-            'passwordHash': password_hash.decode('utf-8'),
-            'registrationDate': datetime.now(timezone.utc).isoformat()
-        }
+        patient_record = Patient(
+            patient_id=patient_id,
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            password_hash=password_hash.decode('utf-8'),
+            registration_date=datetime.now(timezone.utc).isoformat()
+        )
         
         # Store patient record
         add_record('patients.json', patient_record)
@@ -160,7 +285,10 @@ def unified_login():
             patient = patients[0]
             password_hash = patient.get('passwordHash', '')
             
-            if bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')):
+            with metrics.timer('bcrypt_duration_seconds', operation='check'):
+                password_valid = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+            
+            if password_valid:
                 # Generate JWT token for patient
                 token_payload = {
                     'userID': patient['patientID'],
@@ -190,7 +318,10 @@ def unified_login():
             doctor = doctors[0]
             password_hash = doctor.get('passwordHash', '')
             
-            if bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')):
+            with metrics.timer('bcrypt_duration_seconds', operation='check'):
+                password_valid = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+            
+            if password_valid:
                 # Generate JWT token for doctor
                 token_payload = {
                     'userID': doctor['doctorID'],
@@ -236,7 +367,8 @@ def validate_token(token):
         Dict with userID and userType if valid, None otherwise
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        with metrics.timer('jwt_verify_duration_seconds'):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
         return {
             'userID': payload.get('userID'),
             'userType': payload.get('userType', 'patient')  # Default to patient for backward compatibility
@@ -246,15 +378,71 @@ def validate_token(token):
     except jwt.InvalidTokenError:
         return None
 
+# since/until query parameters: ISO 8601 date or date-time at any precision, in UTC
+HISTORY_DATE_PATTERN = re.compile(r'^(\d{4}-\d{2}(?:-\d{2}(?:T\d{2}(?::\d{2}(?::\d{2}(?:\.\d+)?)?)?)?)?)(?:Z|\+00:00)?$')
+
+def _include_archived():
+    """Check whether the request asks for archived records (?includeArchived=true)."""
+    return request.args.get('includeArchived', '').lower() in ('1', 'true', 'yes')
+
+def _date_bounds():
+    """
+    Parse the since and until query parameters.
+    
+    Returns:
+        Dictionary with since and until (None when not given)
+    
+    Raises:
+        ValueError: If a date is not ISO 8601 or not a calendar date
+    """
+    bounds = {'since': None, 'until': None}
+    for name in bounds:
+        value = request.args.get(name)
+        if value:
+            match = HISTORY_DATE_PATTERN.match(value)
+            if not match:
+                raise ValueError(f'{name} must be an ISO 8601 UTC date (e.g., 2024-02 or 2024-02-01T10:00:00Z)')
+            bound = match.group(1)
+            try:
+                # The pattern admits days that do not exist (e.g., 2024-02-30); a bare month means its first day
+                date.fromisoformat(bound[:10] if len(bound) >= 10 else f"{bound}-01")
+            except ValueError:
+                raise ValueError(f'{name} is not a calendar date: {value}')
+            # Stored dates are UTC; without the suffix the bound compares correctly at any precision
+            bounds[name] = bound
+    return bounds
+
+def _history_range():
+    """
+    Parse the since, until and limit query parameters of the history endpoints.
+    
+    Returns:
+        Dictionary of get_history keyword arguments
+    
+    Raises:
+        ValueError: If a date is not ISO 8601 or limit is not a positive integer
+    """
+    history_range = dict(_date_bounds(), limit=None)
+    limit = request.args.get('limit')
+    if limit:
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValueError('limit must be a positive integer')
+        history_range['limit'] = int(limit)
+    return history_range
+
 @app.route('/api/doctors/patients', methods=['GET'])
 def get_doctor_patients():
     """
     Get all patients assigned to a doctor with their complete history.
     
     Requires authentication via Bearer token in Authorization header.
+    Archived assessments are included with ?includeArchived=true. Optional
+    since (inclusive) and until (exclusive) ISO 8601 dates and limit (most
+    recent N) narrow the history.
     
     Returns:
         200: List of patients with their assessments and prescriptions
+        400: Invalid since, until or limit
         401: Unauthorized
         403: Forbidden (not a doctor)
     """
@@ -284,14 +472,25 @@ def get_doctor_patients():
             }), 403
 
         doctor_id = user_info['userID']
+        include_archived = _include_archived()
+        try:
+            history_range = _history_range()
+        except ValueError as e:
+            return jsonify({
+                'error': 'Validation error',
+                'message': str(e)
+            }), 400
 
         # Get all assignments for this doctor
         assignments = find_all_by_field('assignments.json', 'doctorID', doctor_id)
         
-        # Get unique patient IDs
-        patient_ids = list(set([a['patientID'] for a in assignments]))
+        # Get unique patient IDs, those with unreviewed prescriptions first (most urgent first)
+        triage_queue = get_triage_queue()
+        queued = triage_queue.top(doctor_id, triage_queue.pending_count(doctor_id))
+        patient_ids = list(dict.fromkeys([item['patientID'] for item in queued] + [a['patientID'] for a in assignments]))
         
         # Build patient data with history
+        history_service = get_history_service()
         patients_data = []
         for patient_id in patient_ids:
             # Get patient info
@@ -299,55 +498,16 @@ def get_doctor_patients():
             if not patient:
                 continue
             
-            # Get assessments
-            assessments = find_all_by_field('assessments.json', 'patientID', patient_id)
-            
-            # Get prescriptions
-            prescriptions = find_all_by_field('prescriptions.json', 'patientID', patient_id)
-            
-            # Create prescription map
-            prescription_map = {}
-            for prescription in prescriptions:
-                assessment_id = prescription.get('assessmentID')
-                if assessment_id:
-                    prescription_map[assessment_id] = prescription
-            
-            # Format history
-            history = []
-            for assessment in assessments:
-                assessment_id = assessment.get('assessmentID')
-                history_entry = {
-                    'assessmentID': assessment_id,
-                    'assessmentDate': assessment.get('assessmentDate'),
-                    'weight': assessment.get('weight'),
-                    'weightUnit': assessment.get('weightUnit'),
-                    'height': assessment.get('height'),
-                    'heightUnit': assessment.get('heightUnit'),
-                    'age': assessment.get('age'),
-                    'symptoms': assessment.get('symptoms', []),
-                    'followUpResponses': assessment.get('followUpResponses', [])
-                }
-                
-                if assessment_id in prescription_map:
-                    prescription = prescription_map[assessment_id]
-                    history_entry['prescription'] = {
-                        'prescriptionID': prescription.get('prescriptionID'),
-                        'medications': prescription.get('medications', []),
-                        'instructions': prescription.get('instructions'),
-                        'generatedDate': prescription.get('generatedDate')
-                    }
-                
-                history.append(history_entry)
-            
-            # Sort history by date
-            history.sort(key=lambda x: x.get('assessmentDate', ''), reverse=True)
+            # Get pre-built history (already joined and sorted, most recent first)
+            history = history_service.get_history(patient_id, include_archived=include_archived, **history_range)
             
             patients_data.append({
                 'patientID': patient_id,
                 'firstName': patient.get('firstName'),
                 'lastName': patient.get('lastName'),
                 'email': patient.get('email'),
-                'assessmentCount': len(assessments),
+                # All of the patient's assessments, not only the rows returned for since/until/limit
+                'assessmentCount': history_service.count_assessments(patient_id, include_archived=include_archived),
                 'history': history
             })
         
@@ -363,22 +523,20 @@ def get_doctor_patients():
             'message': str(e)
         }), 500
 
-@app.route('/api/prescriptions/<prescription_id>', methods=['PUT'])
-def update_prescription(prescription_id):
+@app.route('/api/doctors/triage', methods=['GET'])
+def get_doctor_triage():
     """
-    Update a prescription (doctor can edit AI-generated prescription).
+    Get a doctor's most urgent unreviewed AI prescriptions.
     
-    Expected JSON body:
-    {
-        "medications": [...],
-        "instructions": "..."
-    }
+    Requires authentication via Bearer token in Authorization header.
+    Items are ranked by waiting time boosted by symptom severity; the
+    optional limit query parameter sets how many are returned (default 10).
     
     Returns:
-        200: Prescription updated successfully
+        200: Pending count and the most urgent queue items
+        400: Invalid limit
         401: Unauthorized
         403: Forbidden (not a doctor)
-        404: Prescription not found
     """
     try:
         # Validate authentication
@@ -402,34 +560,29 @@ def update_prescription(prescription_id):
         if user_info['userType'] != 'doctor':
             return jsonify({
                 'error': 'Forbidden',
-                'message': 'Only doctors can edit prescriptions'
+                'message': 'Only doctors can access this endpoint'
             }), 403
 
-        data = request.get_json()
-        
-        # Find prescription
-        prescriptions = find_all_by_field('prescriptions.json', 'prescriptionID', prescription_id)
-        if not prescriptions:
+        try:
+            limit = int(request.args.get('limit', '10'))
+            if limit < 1:
+                raise ValueError('limit must be positive')
+        except ValueError:
             return jsonify({
-                'error': 'Not found',
-                'message': 'Prescription not found'
-            }), 404
-        
-        # Update prescription
-        updates = {}
-        if 'medications' in data:
-            updates['medications'] = data['medications']
-        if 'instructions' in data:
-            updates['instructions'] = data['instructions']
-        
-        updates['lastModifiedBy'] = user_info['userID']
-        updates['lastModifiedDate'] = datetime.now(timezone.utc).isoformat()
-        
-        updated_prescription = update_record('prescriptions.json', 'prescriptionID', prescription_id, updates)
+                'error': 'Validation error',
+                'message': 'limit must be a positive integer'
+            }), 400
+
+        doctor_id = user_info['userID']
+        triage_queue = get_triage_queue()
+        queue = triage_queue.top(doctor_id, limit)
+        for item in queue:
+            del item['doctorID']
         
         return jsonify({
-            'message': 'Prescription updated successfully',
-            'prescription': updated_prescription
+            'doctorID': doctor_id,
+            'pendingCount': triage_queue.pending_count(doctor_id),
+            'queue': queue
         }), 200
         
     except Exception as e:
@@ -438,18 +591,25 @@ def update_prescription(prescription_id):
             'message': str(e)
         }), 500
 
-@app.route('/api/patients/<patient_id>/history', methods=['GET'])
-def get_patient_history(patient_id):
-    """
-    Retrieve patient history including assessments and prescriptions.
+# Search results per page: default and maximum
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
 
+@app.route('/api/doctors/search', methods=['GET'])
+def search_doctor_patients():
+    """
+    Search a doctor's patients by symptom, medication or name.
+    
     Requires authentication via Bearer token in Authorization header.
-
+    Query parameters: q (required; every term must match), since (inclusive)
+    and until (exclusive) ISO 8601 dates bounding the matching assessments,
+    page (from 1) and pageSize (default 20, at most 100).
+    
     Returns:
-        200: Patient history with assessments and prescriptions
-        401: Unauthorized (missing or invalid token)
-        403: Forbidden (token patient_id doesn't match requested patient_id)
-        404: Patient not found
+        200: Ranked page of matching patients
+        400: Missing query or invalid dates or paging
+        401: Unauthorized
+        403: Forbidden (not a doctor)
     """
     try:
         # Validate authentication
@@ -469,99 +629,90 @@ def get_patient_history(patient_id):
                 'message': 'Invalid or expired token'
             }), 401
 
-        # Verify the authenticated patient is requesting their own history
-        if user_info['userType'] == 'patient' and user_info['userID'] != patient_id:
+        # Verify user is a doctor
+        if user_info['userType'] != 'doctor':
             return jsonify({
                 'error': 'Forbidden',
-                'message': 'You can only access your own patient history'
+                'message': 'Only doctors can access this endpoint'
             }), 403
 
-        # Verify patient exists
-        patient = find_by_id('patients.json', 'patientID', patient_id)
-        if not patient:
+        query = request.args.get('q', '').strip()
+        page = request.args.get('page', '1')
+        page_size = request.args.get('pageSize', str(SEARCH_PAGE_SIZE))
+        try:
+            if not query:
+                raise ValueError('q is required')
+            if not page.isdigit() or int(page) < 1:
+                raise ValueError('page must be a positive integer')
+            if not page_size.isdigit() or not 1 <= int(page_size) <= SEARCH_MAX_PAGE_SIZE:
+                raise ValueError(f'pageSize must be an integer from 1 to {SEARCH_MAX_PAGE_SIZE}')
+            bounds = _date_bounds()
+        except ValueError as e:
             return jsonify({
-                'error': 'Not found',
-                'message': 'Patient not found'
-            }), 404
-
-        # Read assessments for this patient
-        assessments = find_all_by_field('assessments.json', 'patientID', patient_id)
-
-        # Read all prescriptions for this patient
-        prescriptions = find_all_by_field('prescriptions.json', 'patientID', patient_id)
-
-        # Create a map of assessment_id to prescription for quick lookup
-        prescription_map = {}
-        for prescription in prescriptions:
-            assessment_id = prescription.get('assessmentID')
-            if assessment_id:
-                prescription_map[assessment_id] = prescription
-
-        # Format history data
-        history = []
-        for assessment in assessments:
-            assessment_id = assessment.get('assessmentID')
-
-            # Build history entry
-            history_entry = {
-                'assessmentID': assessment_id,
-                'assessmentDate': assessment.get('assessmentDate'),
-                'weight': assessment.get('weight'),
-                'weightUnit': assessment.get('weightUnit'),
-                'height': assessment.get('height'),
-                'heightUnit': assessment.get('heightUnit'),
-                'age': assessment.get('age'),
-                'symptoms': assessment.get('symptoms', []),
-                'followUpResponses': assessment.get('followUpResponses', [])
-            }
-
-            # Add prescription if it exists
-            if assessment_id in prescription_map:
-                prescription = prescription_map[assessment_id]
-                history_entry['prescription'] = {
-                    'prescriptionID': prescription.get('prescriptionID'),
-                    'medications': prescription.get('medications', []),
-                    'instructions': prescription.get('instructions'),
-                    'generatedDate': prescription.get('generatedDate')
-                }
-
-            history.append(history_entry)
-
-        # Sort history by assessment date (most recent first)
-        history.sort(key=lambda x: x.get('assessmentDate', ''), reverse=True)
+                'error': 'Validation error',
+                'message': str(e)
+            }), 400
 
+        doctor_id = user_info['userID']
+        page = int(page)
+        page_size = int(page_size)
+        results = get_search_index().search(doctor_id, query, **bounds)
+        
         return jsonify({
-            'patientID': patient_id,
-            'history': history
+            'doctorID': doctor_id,
+            'query': query,
+            'total': len(results),
+            'page': page,
+            'pageSize': page_size,
+            'results': results[(page - 1) * page_size:page * page_size]
         }), 200
-
+        
     except Exception as e:
         return jsonify({
             'error': 'Internal server error',
             'message': str(e)
         }), 500
 
+# Analytics query parameters: name -> (default, maximum)
+ANALYTICS_LIMITS = {'window': (1, 366), 'top': (10, 100)}
 
-@app.route('/api/assessments', methods=['POST'])
-def create_assessment():
+def _analytics_params(*names):
     """
-    Create a new health assessment and generate prescription.
+    Parse the since and until query parameters plus integer analytics parameters.
     
-    Expected JSON body:
-    {
-        "patientID": "patient-uuid",
-        "weight": 70,
-        "weightUnit": "kg",
-        "height": 175,
-        "heightUnit": "cm",
-        "age": 30,
-        "symptoms": ["headache", "fever"]
-    }
+    Args:
+        *names: Integer parameters to parse (keys of ANALYTICS_LIMITS)
     
     Returns:
-        201: Assessment created with prescription and doctor assignment
-        400: Validation error
+        Dictionary of keyword arguments for the analytics queries
+    
+    Raises:
+        ValueError: If a date is not ISO 8601 or an integer is out of range
+    """
+    params = _date_bounds()
+    for name in names:
+        default, maximum = ANALYTICS_LIMITS[name]
+        value = request.args.get(name, str(default))
+        if not value.isdigit() or not 1 <= int(value) <= maximum:
+            raise ValueError(f'{name} must be an integer from 1 to {maximum}')
+        params[name] = int(value)
+    return params
+
+@app.route('/api/analytics/symptoms', methods=['GET'])
+def symptom_analytics():
+    """
+    Get assessment and symptom counts per day.
+    
+    Requires a doctor's Bearer token. Query parameters: since (inclusive) and
+    until (exclusive) ISO 8601 dates, window (trailing days each count
+    covers, default 1) and top (symptoms reported, default 10). Without
+    since or until the days run from the first or to the last assessment.
+    
+    Returns:
+        200: Days, assessments per day and the top symptoms with counts per day
+        400: Invalid parameters or days over 366
         401: Unauthorized
+        403: Forbidden (not a doctor)
     """
     try:
         # Validate authentication
@@ -581,148 +732,23 @@ def create_assessment():
                 'message': 'Invalid or expired token'
             }), 401
 
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['patientID', 'weight', 'weightUnit', 'height', 'heightUnit', 'age', 'symptoms']
-        missing_fields = [field for field in required_fields if field not in data]
-        
-        if missing_fields:
-            return jsonify({
-                'error': 'Validation error',
-                'message': f'Missing required fields: {", ".join(missing_fields)}'
-            }), 400
-        
-        # Verify authenticated patient matches request (only for patients, doctors can create for any patient)
-        if user_info['userType'] == 'patient' and user_info['userID'] != data['patientID']:
+        # Verify user is a doctor
+        if user_info['userType'] != 'doctor':
             return jsonify({
                 'error': 'Forbidden',
-                'message': 'You can only create assessments for yourself'
+                'message': 'Only doctors can access this endpoint'
             }), 403
-        
-        # Validate data types and values
+
         try:
-            weight = float(data['weight'])
-            height = float(data['height'])
-            age = int(data['age'])
-            
-            if weight <= 0 or height <= 0 or age <= 0:
-                raise ValueError("Values must be positive")
-        except (ValueError, TypeError):
+            params = _analytics_params('window', 'top')
+            counts = get_analytics().symptom_counts(max_days=REPORT_MAX_DAYS, **params)
+        except ValueError as e:
             return jsonify({
                 'error': 'Validation error',
-                'message': 'Weight, height, and age must be positive numbers'
+                'message': str(e)
             }), 400
-        
-        # Validate units
-        if data['weightUnit'] not in ['kg', 'lbs']:
-            return jsonify({
-                'error': 'Validation error',
-                'message': 'Weight unit must be "kg" or "lbs"'
-            }), 400
-        
-        if data['heightUnit'] not in ['cm', 'inches']:
-            return jsonify({
-                'error': 'Validation error',
-                'message': 'Height unit must be "cm" or "inches"'
-            }), 400
-        
-        # Validate symptoms
-        symptoms = data['symptoms']
-        if not isinstance(symptoms, list) or len(symptoms) == 0:
-            return jsonify({
-                'error': 'Validation error',
-                'message': 'Symptoms must be a non-empty list'
-            }), 400
-        
-        # Create assessment
-        assessment_id = generate_id()
-        assessment_record = {
-            'assessmentID': assessment_id,
-            'patientID': data['patientID'],
-            'weight': weight,
-            'weightUnit': data['weightUnit'],
-            'height': height,
-            'heightUnit': data['heightUnit'],
-            'age': age,
-            'symptoms': symptoms,
-            'followUpResponses': [],
-            'assessmentDate': datetime.now(timezone.utc).isoformat()
-        }
-        
-        add_record('assessments.json', assessment_record)
-        
-        # Generate prescription using Amazon Bedrock LLM
-        bedrock_service = get_bedrock_service()
-        prescription_data = bedrock_service.generate_prescription(
-            symptoms=symptoms,
-            age=age,
-            weight=weight,
-            weight_unit=data['weightUnit'],
-            height=height,
-            height_unit=data['heightUnit']
-        )
-        
-        medications = prescription_data['medications']
-        instructions = prescription_data['instructions']
-        
-        prescription_id = generate_id()
-        prescription_record = {
-            'prescriptionID': prescription_id,
-            'assessmentID': assessment_id,
-            'patientID': data['patientID'],
-            'medications': medications,
-            'instructions': instructions,
-            'generatedDate': datetime.now(timezone.utc).isoformat(),
-            'generatedBy': 'AI-Bedrock'
-        }
-        
-        add_record('prescriptions.json', prescription_record)
-        
-        # Assign a doctor (get all doctors from database)
-        try:
-            doctors = read_json_file('doctors.json')
-        except:
-            doctors = []
-        
-        if not doctors:
-            # Fallback if no doctors in system
-            doctors = [{'doctorID': 'd001', 'firstName': 'Dr.', 'lastName': 'Smith', 'specialization': 'General Practice'}]
-        
-        # Simple selection: use first doctor for MVP
-        selected_doctor = doctors[0]
-        
-        token_id = generate_id()
-        assignment_record = {
-            'assignmentID': generate_id(),
-            'assessmentID': assessment_id,
-            'patientID': data['patientID'],
-            'doctorID': selected_doctor['doctorID'],
-            'doctorName': f"{selected_doctor['firstName']} {selected_doctor['lastName']}",
-            'tokenID': token_id,
-            'assignmentDate': datetime.now(timezone.utc).isoformat()
-        }
-        
-        add_record('assignments.json', assignment_record)
-        
-        # Return complete response
-        return jsonify({
-            'message': 'Assessment created successfully',
-            'assessment': {
-                'assessmentID': assessment_id,
-                'assessmentDate': assessment_record['assessmentDate']
-            },
-            'prescription': {
-                'prescriptionID': prescription_id,
-                'medications': medications,
-                'instructions': prescription_record['instructions']
-            },
-            'doctorAssignment': {
-                'doctorName': assignment_record['doctorName'],
-                'tokenID': token_id,
-                'specialization': selected_doctor.get('specialization', 'General Practice') if selected_doctor else 'General Practice'
-            }
-        }), 201
+
+        return jsonify(counts), 200
         
     except Exception as e:
         return jsonify({
@@ -730,6 +756,612 @@ def create_assessment():
             'message': str(e)
         }), 500
 
+@app.route('/api/analytics/demographics', methods=['GET'])
+def demographic_analytics():
+    """
+    Get age and BMI distributions of assessed patients.
+    
+    Requires a doctor's Bearer token. Optional since (inclusive) and until
+    (exclusive) ISO 8601 dates bound the assessments.
+    
+    Returns:
+        200: Assessment count and age and BMI summaries with histograms
+        400: Invalid dates
+        401: Unauthorized
+        403: Forbidden (not a doctor)
+    """
+    try:
+        # Validate authentication
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Missing or invalid authorization header'
+            }), 401
+
+        token = auth_header.split(' ')[1]
+        user_info = validate_token(token)
+
+        if not user_info:
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Invalid or expired token'
+            }), 401
+
+        # Verify user is a doctor
+        if user_info['userType'] != 'doctor':
+            return jsonify({
+                'error': 'Forbidden',
+                'message': 'Only doctors can access this endpoint'
+            }), 403
+
+        try:
+            params = _analytics_params()
+        except ValueError as e:
+            return jsonify({
+                'error': 'Validation error',
+                'message': str(e)
+            }), 400
+
+        return jsonify(get_analytics().demographics(**params)), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/analytics/prescriptions', methods=['GET'])
+def prescription_analytics():
+    """
+    Get the prescription mix: reviewed share and most prescribed medications.
+    
+    Requires a doctor's Bearer token. Query parameters: since (inclusive) and
+    until (exclusive) ISO 8601 dates on the generated date, and top
+    (medications reported, default 10).
+    
+    Returns:
+        200: Prescription and reviewed counts and the top medications
+        400: Invalid parameters
+        401: Unauthorized
+        403: Forbidden (not a doctor)
+    """
+    try:
+        # Validate authentication
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Missing or invalid authorization header'
+            }), 401
+
+        token = auth_header.split(' ')[1]
+        user_info = validate_token(token)
+
+        if not user_info:
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Invalid or expired token'
+            }), 401
+
+        # Verify user is a doctor
+        if user_info['userType'] != 'doctor':
+            return jsonify({
+                'error': 'Forbidden',
+                'message': 'Only doctors can access this endpoint'
+            }), 403
+
+        try:
+            params = _analytics_params('top')
+        except ValueError as e:
+            return jsonify({
+                'error': 'Validation error',
+                'message': str(e)
+            }), 400
+
+        return jsonify(get_analytics().prescription_mix(**params)), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/analytics/outbreaks', methods=['GET'])
+def outbreak_alerts():
+    """
+    Get symptoms whose recent count spikes above their baseline.
+    
+    Requires a doctor's Bearer token. Counts cover assessments stored since
+    the server started (see outbreak.py).
+    
+    Returns:
+        200: Window and baseline coverage plus the current alerts, highest score first
+        401: Unauthorized
+        403: Forbidden (not a doctor)
+    """
+    try:
+        # Validate authentication
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Missing or invalid authorization header'
+            }), 401
+
+        token = auth_header.split(' ')[1]
+        user_info = validate_token(token)
+
+        if not user_info:
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Invalid or expired token'
+            }), 401
+
+        # Verify user is a doctor
+        if user_info['userType'] != 'doctor':
+            return jsonify({
+                'error': 'Forbidden',
+                'message': 'Only doctors can access this endpoint'
+            }), 403
+
+        return jsonify(get_spike_detector().summary()), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
+
+# Daily reports: days returned by default and at most
+REPORT_DEFAULT_DAYS = 30
+REPORT_MAX_DAYS = 366
+
+@app.route('/api/reports/daily', methods=['GET'])
+def daily_report():
+    """
+    Get precomputed daily rollup rows.
+    
+    Requires a doctor's Bearer token. Query parameters: since (inclusive)
+    and until (exclusive) ISO 8601 dates at day precision (default: the
+    last 30 days), dimension (all, doctor or symptom; default all) and key
+    (a doctor ID or symptom).
+    
+    Returns:
+        200: Rows per day with assessment, prescription and review counts
+        400: Invalid parameters or a range over 366 days
+        401: Unauthorized
+        403: Forbidden (not a doctor)
+    """
+    try:
+        # Validate authentication
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Missing or invalid authorization header'
+            }), 401
+
+        token = auth_header.split(' ')[1]
+        user_info = validate_token(token)
+
+        if not user_info:
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Invalid or expired token'
+            }), 401
+
+        # Verify user is a doctor
+        if user_info['userType'] != 'doctor':
+            return jsonify({
+                'error': 'Forbidden',
+                'message': 'Only doctors can access this endpoint'
+            }), 403
+
+        dimension = request.args.get('dimension', 'all')
+        try:
+            bounds = _date_bounds()
+            if dimension not in ROLLUP_DIMENSIONS:
+                raise ValueError(f"dimension must be one of: {', '.join(ROLLUP_DIMENSIONS)}")
+            # Bounds apply per day: a month means its first day, a time of day is ignored
+            days = {name: value[:10] if len(value) >= 10 else f'{value[:7]}-01'
+                    for name, value in bounds.items() if value}
+            until = datetime.strptime(days['until'], '%Y-%m-%d').date() if 'until' in days else \
+                datetime.now(timezone.utc).date() + timedelta(days=1)
+            since = datetime.strptime(days['since'], '%Y-%m-%d').date() if 'since' in days else \
+                until - timedelta(days=REPORT_DEFAULT_DAYS)
+            if (until - since).days > REPORT_MAX_DAYS:
+                raise ValueError(f'The range can cover at most {REPORT_MAX_DAYS} days')
+        except ValueError as e:
+            return jsonify({
+                'error': 'Validation error',
+                'message': str(e)
+            }), 400
+
+        rows = get_rollup_store().rows(since.isoformat(), until.isoformat(), dimension, request.args.get('key'))
+        
+        return jsonify({
+            'since': since.isoformat(),
+            'until': until.isoformat(),
+            'dimension': dimension,
+            'rows': rows
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/prescriptions/<prescription_id>', methods=['PUT'])
+def update_prescription(prescription_id):
+    """
+    Update a prescription (doctor can edit AI-generated prescription).
+    
+    Expected JSON body:
+    {
+        "medications": [...],
+        "instructions": "..."
+    }
+    
+    Returns:
+        200: Prescription updated successfully
+        401: Unauthorized
+        403: Forbidden (not a doctor)
+        404: Prescription not found
+    """
+    try:
+        # Validate authentication
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Missing or invalid authorization header'
+            }), 401
+
+        token = auth_header.split(' ')[1]
+        user_info = validate_token(token)
+
+        if not user_info:
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Invalid or expired token'
+            }), 401
+
+        # Verify user is a doctor
+        if user_info['userType'] != 'doctor':
+            return jsonify({
+                'error': 'Forbidden',
+                'message': 'Only doctors can edit prescriptions'
+            }), 403
+
+        data = request.get_json()
+        
+        # Find prescription
+        prescriptions = find_all_by_field('prescriptions.json', 'prescriptionID', prescription_id)
+        if not prescriptions:
+            return jsonify({
+                'error': 'Not found',
+                'message': 'Prescription not found'
+            }), 404
+        
+        # Update prescription
+        updates = {}
+        if 'medications' in data:
+            updates['medications'] = data['medications']
+        if 'instructions' in data:
+            updates['instructions'] = data['instructions']
+        
+        updates['lastModifiedBy'] = user_info['userID']
+        updates['lastModifiedDate'] = datetime.now(timezone.utc).isoformat()
+        
+        updated_prescription = update_record('prescriptions.json', 'prescriptionID', prescription_id, updates)
+        
+        return jsonify({
+            'message': 'Prescription updated successfully',
+            'prescription': updated_prescription
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/patients/<patient_id>/history', methods=['GET'])
+def get_patient_history(patient_id):
+    """
+    Retrieve patient history including assessments and prescriptions.
+
+    Requires authentication via Bearer token in Authorization header.
+    Archived assessments are included with ?includeArchived=true. Optional
+    since (inclusive) and until (exclusive) ISO 8601 dates and limit (most
+    recent N) narrow the history.
+
+    Returns:
+        200: Patient history with assessments and prescriptions
+        400: Invalid since, until or limit
+        401: Unauthorized (missing or invalid token)
+        403: Forbidden (token patient_id doesn't match requested patient_id)
+        404: Patient not found
+    """
+    try:
+        # Validate authentication
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Missing or invalid authorization header'
+            }), 401
+
+        token = auth_header.split(' ')[1]
+        user_info = validate_token(token)
+
+        if not user_info:
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'Invalid or expired token'
+            }), 401
+
+        # Verify the authenticated patient is requesting their own history
+        if user_info['userType'] == 'patient' and user_info['userID'] != patient_id:
+            return jsonify({
+                'error': 'Forbidden',
+                'message': 'You can only access your own patient history'
+            }), 403
+
+        # Verify patient exists
+        patient = find_by_id('patients.json', 'patientID', patient_id)
+        if not patient:
+            return jsonify({
+                'error': 'Not found',
+                'message': 'Patient not found'
+            }), 404
+
+        try:
+            history_range = _history_range()
+        except ValueError as e:
+            return jsonify({
+                'error': 'Validation error',
+                'message': str(e)
+            }), 400
+
+        # Get pre-built history (already joined and sorted, most recent first)
+        history = get_history_service().get_history(patient_id, include_archived=_include_archived(), **history_range)
+
+        return jsonify({
+            'patientID': patient_id,
+            'history': history
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
+
+
+def prepare_assessment(auth_header, data):
+    """
+    Authenticate and validate an assessment request and build its record.
+    
+    Shared by the synchronous view and the asynchronous ASGI endpoint.
+    
+    Args:
+        auth_header: Authorization header value (may be None)
+        data: Parsed JSON body (may be None)
+    
+    Returns:
+        (assessment_record, None) if valid, otherwise (None, (error_body, status_code))
+    """
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None, ({
+            'error': 'Unauthorized',
+            'message': 'Missing or invalid authorization header'
+        }, 401)
+
+    token = auth_header.split(' ')[1]
+    user_info = validate_token(token)
+
+    if not user_info:
+        return None, ({
+            'error': 'Unauthorized',
+            'message': 'Invalid or expired token'
+        }, 401)
+
+    if not isinstance(data, dict):
+        return None, ({
+            'error': 'Validation error',
+            'message': 'Request body must be a JSON object'
+        }, 400)
+    
+    # Validate required fields
+    required_fields = ['patientID', 'weight', 'weightUnit', 'height', 'heightUnit', 'age', 'symptoms']
+    missing_fields = [field for field in required_fields if field not in data]
+    
+    if missing_fields:
+        return None, ({
+            'error': 'Validation error',
+            'message': f'Missing required fields: {", ".join(missing_fields)}'
+        }, 400)
+    
+    # Verify authenticated patient matches request (only for patients, doctors can create for any patient)
+    if user_info['userType'] == 'patient' and user_info['userID'] != data['patientID']:
+        return None, ({
+            'error': 'Forbidden',
+            'message': 'You can only create assessments for yourself'
+        }, 403)
+    
+    # Validate data types and values
+    try:
+        weight = float(data['weight'])
+        height = float(data['height'])
+        age = int(data['age'])
+        
+        if weight <= 0 or height <= 0 or age <= 0:
+            raise ValueError("Values must be positive")
+    except (ValueError, TypeError):
+        return None, ({
+            'error': 'Validation error',
+            'message': 'Weight, height, and age must be positive numbers'
+        }, 400)
+    
+    # Validate units
+    if data['weightUnit'] not in ['kg', 'lbs']:
+        return None, ({
+            'error': 'Validation error',
+            'message': 'Weight unit must be "kg" or "lbs"'
+        }, 400)
+    
+    if data['heightUnit'] not in ['cm', 'inches']:
+        return None, ({
+            'error': 'Validation error',
+            'message': 'Height unit must be "cm" or "inches"'
+        }, 400)
+    
+    # Validate symptoms
+    symptoms = data['symptoms']
+    if not isinstance(symptoms, list) or len(symptoms) == 0:
+        return None, ({
+            'error': 'Validation error',
+            'message': 'Symptoms must be a non-empty list'
+        }, 400)
+    
+    assessment_record = {
+        'assessmentID': generate_id(),
+        'patientID': data['patientID'],
+        'weight': weight,
+        'weightUnit': data['weightUnit'],
+        'height': height,
+        'heightUnit': data['heightUnit'],
+        'age': age,
+        'symptoms': symptoms,
+        'symptomIDs': get_symptom_vocabulary().encode(symptoms),
+        'followUpResponses': [],
+        'assessmentDate': datetime.now(timezone.utc).isoformat()
+    }
+    return assessment_record, None
+
+def commit_assessment(assessment_record, prescription_data, specialization=None):
+    """
+    Assign a doctor and store an assessment with its prescription and assignment.
+    
+    Args:
+        assessment_record: Record built by prepare_assessment
+        prescription_data: Dictionary with medications and instructions
+        specialization: Optional requested doctor specialization
+    
+    Returns:
+        Response body for a created assessment
+    """
+    assessment_id = assessment_record['assessmentID']
+    medications = prescription_data['medications']
+    instructions = prescription_data['instructions']
+    
+    prescription_id = generate_id()
+    prescription_record = Prescription(
+        prescription_id=prescription_id,
+        assessment_id=assessment_id,
+        patient_id=assessment_record['patientID'],
+        medications=medications,
+        instructions=instructions,
+        generated_date=datetime.now(timezone.utc).isoformat(),
+        generated_by='AI-Bedrock'
+    )
+    
+    # Assign a doctor using the configured load-balancing strategy
+    assignment_engine = get_assignment_engine()
+    selected_doctor = assignment_engine.assign(
+        assessment_id,
+        symptoms=assessment_record['symptoms'],
+        specialization=specialization
+    )
+    
+    token_id = generate_id()
+    assignment_record = Assignment(
+        assignment_id=generate_id(),
+        assessment_id=assessment_id,
+        patient_id=assessment_record['patientID'],
+        doctor_id=selected_doctor['doctorID'],
+        doctor_name=f"{selected_doctor['firstName']} {selected_doctor['lastName']}",
+        token_id=token_id,
+        assignment_date=datetime.now(timezone.utc).isoformat()
+    )
+    
+    # Commit assessment, prescription and assignment together
+    try:
+        with transaction() as txn:
+            txn.add_record('assessments.json', Assessment.from_dict(assessment_record))
+            txn.add_record('prescriptions.json', prescription_record)
+            txn.add_record('assignments.json', assignment_record)
+    except Exception:
+        assignment_engine.release(assessment_id)
+        raise
+    
+    return {
+        'message': 'Assessment created successfully',
+        'assessment': {
+            'assessmentID': assessment_id,
+            'assessmentDate': assessment_record['assessmentDate']
+        },
+        'prescription': {
+            'prescriptionID': prescription_id,
+            'medications': medications,
+            'instructions': prescription_record.instructions
+        },
+        'doctorAssignment': {
+            'doctorName': assignment_record.doctor_name,
+            'tokenID': token_id,
+            'specialization': selected_doctor.get('specialization', 'General Practice') if selected_doctor else 'General Practice'
+        }
+    }
+
+@app.route('/api/assessments', methods=['POST'])
+def create_assessment():
+    """
+    Create a new health assessment and generate prescription.
+    
+    Expected JSON body:
+    {
+        "patientID": "patient-uuid",
+        "weight": 70,
+        "weightUnit": "kg",
+        "height": 175,
+        "heightUnit": "cm",
+        "age": 30,
+        "symptoms": ["headache", "fever"],
+        "specialization": "Cardiology"  (optional, used by the specialization assignment strategy)
+    }
+    
+    Returns:
+        201: Assessment created with prescription and doctor assignment
+        400: Validation error
+        401: Unauthorized
+    """
+    try:
+        data = request.get_json(silent=True)
+        assessment_record, error = prepare_assessment(request.headers.get('Authorization'), data)
+        if error:
+            return jsonify(error[0]), error[1]
+        
+        # Generate prescription using Amazon Bedrock LLM
+        bedrock_service = get_bedrock_service()
+        prescription_data = bedrock_service.generate_prescription(
+            symptoms=assessment_record['symptoms'],
+            age=assessment_record['age'],
+            weight=assessment_record['weight'],
+            weight_unit=assessment_record['weightUnit'],
+            height=assessment_record['height'],
+            height_unit=assessment_record['heightUnit']
+        )
+        
+        return jsonify(commit_assessment(assessment_record, prescription_data, data.get('specialization'))), 201
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
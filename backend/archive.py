@@ -0,0 +1,310 @@
+"""
+Cold archive of old assessments and prescriptions, partitioned by month.
+
+Records older than a configurable age are moved out of the live data files
+into read-only, gzip-compressed monthly partitions under DATA_DIR/archive
+(e.g. archive/assessments/2024-01.json.gz). The live files then only hold
+recent activity, so the read-modify-write of every insert no longer
+re-parses and rewrites years of history.
+
+Archived records are only read when asked for: find_all_by_field(...,
+include_archived=True) and the history endpoints with includeArchived=true
+scan the live files first and then the cold partitions. Records cannot be
+updated or deleted once archived.
+
+Archiving writes each partition before removing its records from the live
+files, so a crash in between leaves a record in both tiers; readers prefer
+the live copy, and the next run finishes the move.
+
+File locks only cover one process, so run it with the server stopped
+(e.g., from a nightly maintenance job):
+    python archive.py --months 12
+    python archive.py --status
+
+Configuration (environment variables):
+    ARCHIVE_AFTER_MONTHS: Age in whole months after which records are archived (default 12)
+    ARCHIVE_CACHE_PARTITIONS: Decompressed partitions kept in memory (default 12)
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import data_access
+
+
+# Archived data files: (record ID field, date field partitions are keyed by)
+ARCHIVED_FILES = {
+    'assessments.json': ('assessmentID', 'assessmentDate'),
+    'prescriptions.json': ('prescriptionID', 'generatedDate'),
+}
+
+# Directory (inside DATA_DIR) holding one subdirectory of partitions per data file
+ARCHIVE_DIR = 'archive'
+
+PARTITION_SUFFIX = '.json.gz'
+
+_MONTH_PATTERN = re.compile(r'^\d{4}-\d{2}')
+
+# Decompressed partitions: path -> (stat signature, records), least recently used first
+_partition_cache = OrderedDict()
+_partition_cache_lock = threading.Lock()
+
+# Serializes archive runs, which read-modify-write partitions
+_archive_lock = threading.Lock()
+
+
+def partition_month(value: Any) -> Optional[str]:
+    """Get the 'YYYY-MM' partition of an ISO date string, or None if it is not one."""
+    if isinstance(value, str) and _MONTH_PATTERN.match(value):
+        return value[:7]
+    return None
+
+
+def cutoff_month(months: int, now: Optional[datetime] = None) -> str:
+    """
+    Get the first month that stays live when archiving records older than a number of months.
+
+    Args:
+        months: Whole months to keep live besides the current one
+        now: Current time (defaults to now, UTC)
+
+    Returns:
+        'YYYY-MM' month; records of earlier months are archived
+    """
+    now = now or datetime.now(timezone.utc)
+    index = now.year * 12 + now.month - 1 - months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _partition_dir(filename: str) -> str:
+    return os.path.join(data_access.DATA_DIR, ARCHIVE_DIR, os.path.splitext(filename)[0])
+
+
+def _partition_path(filename: str, month: str) -> str:
+    return os.path.join(_partition_dir(filename), f"{month}{PARTITION_SUFFIX}")
+
+
+def cold_partitions(filename: str) -> List[str]:
+    """
+    List the archived months of a data file.
+
+    Args:
+        filename: Name of an archived data file (e.g., 'assessments.json')
+
+    Returns:
+        'YYYY-MM' months, oldest first
+    """
+    try:
+        names = os.listdir(_partition_dir(filename))
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-len(PARTITION_SUFFIX)] for name in names if name.endswith(PARTITION_SUFFIX))
+
+
+def read_partition(filename: str, month: str) -> tuple:
+    """
+    Read the records of one archived month.
+
+    Decompressed partitions are cached (ARCHIVE_CACHE_PARTITIONS, least
+    recently used evicted first) and shared between callers, so they must
+    not be modified.
+
+    Args:
+        filename: Name of an archived data file (e.g., 'assessments.json')
+        month: 'YYYY-MM' month
+
+    Returns:
+        Tuple of archived records
+
+    Raises:
+        FileNotFoundError: If the month is not archived
+    """
+    path = _partition_path(filename, month)
+    signature = data_access._stat_signature(path)
+    with _partition_cache_lock:
+        cached = _partition_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            _partition_cache.move_to_end(path)
+            return cached[1]
+
+    with gzip.open(path, 'rb') as f:
+        records = tuple(json.loads(f.read()))
+
+    max_partitions = int(os.getenv('ARCHIVE_CACHE_PARTITIONS', '12'))
+    with _partition_cache_lock:
+        if max_partitions > 0:
+            _partition_cache[path] = (signature, records)
+            _partition_cache.move_to_end(path)
+            while len(_partition_cache) > max_partitions:
+                _partition_cache.popitem(last=False)
+    return records
+
+
+def find_archived(filename: str, field: str, value: Any, since: Optional[str] = None,
+                  until: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Find all archived records of a data file matching a field value.
+
+    With date bounds, only partitions whose month overlaps [since, until)
+    are read; records are not filtered by date within a partition.
+
+    Args:
+        filename: Name of the data file (e.g., 'assessments.json')
+        field: Name of the field to match (e.g., 'patientID')
+        value: Value to match
+        since: Optional inclusive lower bound on the date (ISO 8601)
+        until: Optional exclusive upper bound on the date (ISO 8601)
+
+    Returns:
+        Matching records, oldest partition first (empty for files that are not archived)
+    """
+    if filename not in ARCHIVED_FILES:
+        return []
+    matches = []
+    for month in cold_partitions(filename):
+        if (since is not None and month < since[:7]) or (until is not None and month > until[:7]):
+            continue
+        try:
+            records = read_partition(filename, month)
+        except FileNotFoundError:
+            continue
+        matches.extend(record for record in records if record.get(field) == value)
+    return matches
+
+
+def merge_archived(filename: str, live: List[Dict[str, Any]], archived: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Append archived records to live ones, skipping records still present live.
+
+    Args:
+        filename: Name of the data file (e.g., 'assessments.json')
+        live: Records from the live data file
+        archived: Records from the cold partitions
+
+    Returns:
+        Live records followed by archived records not found among them
+    """
+    if filename not in ARCHIVED_FILES or not archived:
+        return live
+    key_field = ARCHIVED_FILES[filename][0]
+    live_keys = {record.get(key_field) for record in live}
+    return live + [record for record in archived if record.get(key_field) not in live_keys]
+
+
+def _write_partition(path: str, records: List[Dict[str, Any]]) -> None:
+    """Atomically replace a partition file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+            f.write(json.dumps(records).encode('utf-8'))
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temp_path, path)
+
+
+def archive_file(filename: str, before_month: str) -> int:
+    """
+    Move the records of a data file dated before a month into the cold tier.
+
+    Records without a recognizable date or ID stay live. Records that change
+    in the live file while the run is in progress stay live too, and are
+    archived by a later run.
+
+    Args:
+        filename: Name of an archived data file (e.g., 'assessments.json')
+        before_month: 'YYYY-MM' month; records of earlier months are moved
+
+    Returns:
+        Number of records moved
+
+    Raises:
+        ValueError: If the data file is not archived
+    """
+    if filename not in ARCHIVED_FILES:
+        raise ValueError(f"Data file is not archived: {filename}")
+    key_field, date_field = ARCHIVED_FILES[filename]
+
+    try:
+        live = data_access.read_json_snapshot(filename)
+    except FileNotFoundError:
+        return 0
+
+    by_month = {}
+    for record in live:
+        month = partition_month(record.get(date_field))
+        if month is not None and month < before_month and record.get(key_field) is not None:
+            by_month.setdefault(month, []).append(record)
+    if not by_month:
+        return 0
+
+    with _archive_lock:
+        moved = {}
+        for month, records in sorted(by_month.items()):
+            try:
+                existing = read_partition(filename, month)
+            except FileNotFoundError:
+                existing = ()
+            keys = {record[key_field] for record in records}
+            # Records archived by an interrupted run are replaced by their live version
+            _write_partition(_partition_path(filename, month),
+                             [record for record in existing if record.get(key_field) not in keys] + records)
+            for record in records:
+                moved[record[key_field]] = record
+
+        removed = data_access.extract_records(filename, lambda record: moved.get(record.get(key_field)) == record)
+    return len(removed)
+
+
+def archive_old_records(months: Optional[int] = None, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Archive records of every archived data file older than a number of months.
+
+    Args:
+        months: Whole months to keep live besides the current one (defaults
+            to the ARCHIVE_AFTER_MONTHS environment variable, then 12)
+        now: Current time (defaults to now, UTC)
+
+    Returns:
+        Dictionary of data file name -> number of records moved
+    """
+    if months is None:
+        months = int(os.getenv('ARCHIVE_AFTER_MONTHS', '12'))
+    before_month = cutoff_month(months, now)
+    return {filename: archive_file(filename, before_month) for filename in ARCHIVED_FILES}
+
+
+def main(argv=None) -> int:
+    """Archive old records, or print the archived partitions."""
+    parser = argparse.ArgumentParser(description='Move old assessments and prescriptions to the compressed archive.')
+    parser.add_argument('--months', type=int, default=None,
+                        help='Whole months to keep live (default: $ARCHIVE_AFTER_MONTHS or 12)')
+    parser.add_argument('--data-dir', default=data_access.DATA_DIR, help='Data directory')
+    parser.add_argument('--status', action='store_true', help='Print archived partitions and exit')
+    args = parser.parse_args(argv)
+
+    data_access.DATA_DIR = args.data_dir
+    if args.status:
+        for filename in ARCHIVED_FILES:
+            months = cold_partitions(filename)
+            records = sum(len(read_partition(filename, month)) for month in months)
+            print(f"{filename}: {len(months)} partition(s), {records} record(s)"
+                  + (f", {months[0]} to {months[-1]}" if months else ''))
+        return 0
+
+    data_access.recover_journals()
+    for filename, moved in archive_old_records(args.months).items():
+        print(f"{filename}: {moved} record(s) archived")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+ASGI entry point serving assessment creation asynchronously.
+
+POST /api/assessments is handled natively on the event loop: the Bedrock
+call is awaited on the Bedrock service's executor and the data store commit
+runs on a separate thread pool, so a waiting request holds a coroutine
+rather than a worker thread and one process can keep thousands of
+assessments in flight. Every other request is passed to the Flask app
+through asgiref's WSGI adapter.
+
+Run with any ASGI server, for example:
+    uvicorn asgi:application --port 5000
+
+Configuration (environment variables):
+    ASYNC_STORE_WORKERS: Threads for data store I/O (default 8)
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from asgiref.wsgi import WsgiToAsgi
+
+import app as app_module
+import metrics
+
+
+ASSESSMENTS_PATH = '/api/assessments'
+
+# Data store writes are blocking file I/O, kept off the event loop
+_store_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ASYNC_STORE_WORKERS', '8')),
+    thread_name_prefix='store-io'
+)
+
+_wsgi_application = WsgiToAsgi(app_module.app)
+
+
+async def _read_body(receive) -> bytes:
+    """Read the full request body from the ASGI receive channel."""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def _send_json(send, body: Dict[str, Any], status: int) -> None:
+    """Send a JSON response, with the same CORS header the Flask app adds."""
+    payload = json.dumps(body).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode('ascii')),
+            (b'access-control-allow-origin', b'*'),
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes):
+    """Get a request header value by lower-case name."""
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def create_assessment(auth_header, body: bytes) -> Tuple[Dict[str, Any], int]:
+    """
+    Create an assessment without blocking the event loop.
+
+    Mirrors the POST /api/assessments Flask view.
+
+    Args:
+        auth_header: Authorization header value (may be None)
+        body: Raw JSON request body
+
+    Returns:
+        (response body, status code)
+    """
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+
+    try:
+        assessment_record, error = app_module.prepare_assessment(auth_header, data)
+        if error:
+            return error
+
+        prescription_data = await app_module.get_bedrock_service().generate_prescription_async(
+            symptoms=assessment_record['symptoms'],
+            age=assessment_record['age'],
+            weight=assessment_record['weight'],
+            weight_unit=assessment_record['weightUnit'],
+            height=assessment_record['height'],
+            height_unit=assessment_record['heightUnit']
+        )
+
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            _store_executor, app_module.commit_assessment,
+            assessment_record, prescription_data, data.get('specialization')
+        )
+        return response, 201
+
+    except Exception as e:
+        return {
+            'error': 'Internal server error',
+            'message': str(e)
+        }, 500
+
+
+async def _lifespan(receive, send) -> None:
+    """Handle server start-up and shutdown; pending data store writes finish first."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            _store_executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send) -> None:
+    """ASGI application: native async assessments, everything else via Flask."""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+
+    if scope['type'] == 'http' and scope['path'] == ASSESSMENTS_PATH and scope['method'] == 'POST':
+        started = time.perf_counter()
+        body = await _read_body(receive)
+        response, status = await create_assessment(_header(scope['headers'], b'authorization'), body)
+        await _send_json(send, response, status)
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                        method='POST', route=ASSESSMENTS_PATH, status=status)
+        return
+
+    await _wsgi_application(scope, receive, send)
@@ -0,0 +1,314 @@
+"""
+Doctor assignment engine with load balancing.
+
+Assigns each new assessment to a doctor using a selectable strategy:
+
+    least_loaded: Doctor with the fewest open assignments (default)
+    round_robin: Doctors in turn, regardless of load
+    specialization: Least-loaded doctor whose specialization matches the
+        assessment, falling back to least-loaded overall
+
+An assignment is open until a doctor reviews (updates) the prescription of
+its assessment, or the prescription leaves the live file (archive.py moves
+old prescriptions, reviewed or not, out of doctors' reach). Per-doctor open counts are kept in memory in min-heaps that
+are updated on every assignment, so selection costs O(log D) for D doctors.
+The engine follows data_access change notifications, so assignments and
+reviews written elsewhere in the process are reflected in the load counts;
+writes by other processes are detected from the data files' signatures
+(data_access.data_signature) and force a reload.
+"""
+
+import heapq
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import data_access
+from symptom_vocabulary import get_symptom_vocabulary
+
+
+DOCTORS_FILE = 'doctors.json'
+ASSIGNMENTS_FILE = 'assignments.json'
+PRESCRIPTIONS_FILE = 'prescriptions.json'
+
+SOURCE_FILES = (DOCTORS_FILE, ASSIGNMENTS_FILE, PRESCRIPTIONS_FILE)
+
+STRATEGIES = ('least_loaded', 'round_robin', 'specialization')
+
+DEFAULT_SPECIALIZATION = 'General Practice'
+
+# Fallback if no doctors in system
+FALLBACK_DOCTOR = {'doctorID': 'd001', 'firstName': 'Dr.', 'lastName': 'Smith', 'specialization': DEFAULT_SPECIALIZATION}
+
+# Canonical symptom names routed to a specialization by the 'specialization' strategy
+SYMPTOM_SPECIALIZATIONS = {
+    'chest pain': 'Cardiology',
+    'palpitations': 'Cardiology',
+    'rash': 'Dermatology',
+    'itching': 'Dermatology',
+    'acne': 'Dermatology',
+    'joint pain': 'Orthopedics',
+    'back pain': 'Orthopedics',
+    'fracture': 'Orthopedics',
+    'anxiety': 'Psychiatry',
+    'depression': 'Psychiatry',
+    'insomnia': 'Psychiatry',
+    'ear pain': 'ENT',
+    'sore throat': 'ENT',
+    'sinus': 'ENT',
+    'stomach pain': 'Gastroenterology',
+    'diarrhea': 'Gastroenterology',
+    'vomiting': 'Gastroenterology',
+}
+
+
+def infer_specialization(symptoms: List[str]) -> str:
+    """
+    Infer the specialization best suited to a list of symptoms.
+
+    Args:
+        symptoms: List of patient symptoms
+
+    Returns:
+        Specialization name (General Practice if nothing matches)
+    """
+    vocabulary = get_symptom_vocabulary()
+    for concept_id in vocabulary.encode(symptoms):
+        specialization = SYMPTOM_SPECIALIZATIONS.get(vocabulary.name(concept_id))
+        if specialization:
+            return specialization
+    return DEFAULT_SPECIALIZATION
+
+
+class _LoadHeap:
+    """
+    Min-heap of (load, doctorID) with lazy deletion.
+
+    Each load change pushes a fresh entry; stale entries are discarded when
+    they reach the top, so updates and selection are both O(log D).
+    """
+
+    def __init__(self, doctor_ids: List[str], loads: Dict[str, int]):
+        self._loads = loads
+        self._heap = [(loads[doctor_id], doctor_id) for doctor_id in doctor_ids]
+        self._members = set(doctor_ids)
+        heapq.heapify(self._heap)
+
+    def push(self, doctor_id: str) -> None:
+        if doctor_id in self._members:
+            heapq.heappush(self._heap, (self._loads[doctor_id], doctor_id))
+            # Keep stale entries bounded
+            if len(self._heap) > 4 * len(self._members) + 16:
+                self._heap = [(self._loads[doctor_id], doctor_id) for doctor_id in self._members]
+                heapq.heapify(self._heap)
+
+    def peek(self) -> Optional[str]:
+        while self._heap:
+            load, doctor_id = self._heap[0]
+            if self._loads.get(doctor_id) == load:
+                return doctor_id
+            heapq.heappop(self._heap)
+        return None
+
+
+class DoctorAssignmentEngine:
+    """Selects a doctor for each new assessment and tracks per-doctor load."""
+
+    def __init__(self, strategy: Optional[str] = None):
+        """
+        Initialize the engine; doctors and loads are loaded on first use.
+
+        Args:
+            strategy: One of STRATEGIES (defaults to the ASSIGNMENT_STRATEGY
+                environment variable, then 'least_loaded')
+
+        Raises:
+            ValueError: If the strategy is unknown
+        """
+        strategy = strategy or os.getenv('ASSIGNMENT_STRATEGY', 'least_loaded')
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown assignment strategy: {strategy}")
+        self.strategy = strategy
+        self._lock = threading.RLock()
+        self._loaded_dir = None
+        # Signatures of the data files the load counts match
+        self._signatures = {}
+        self._doctors = {}
+        self._doctor_order = []
+        self._loads = {}
+        self._open = {}
+        self._heap = None
+        self._specialization_heaps = {}
+        self._next_index = 0
+        data_access.add_change_listener(self._on_change)
+
+    def assign(self, assessment_id: str, symptoms: Optional[List[str]] = None,
+               specialization: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Select a doctor for an assessment and count it against their load.
+
+        Args:
+            assessment_id: ID of the assessment being assigned
+            symptoms: Patient symptoms, used to infer a specialization
+            specialization: Requested specialization (overrides inference)
+
+        Returns:
+            Doctor record of the selected doctor
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if not self._doctor_order:
+                return FALLBACK_DOCTOR
+
+            if self.strategy == 'round_robin':
+                doctor_id = self._doctor_order[self._next_index % len(self._doctor_order)]
+                self._next_index += 1
+            elif self.strategy == 'specialization':
+                wanted = specialization or infer_specialization(symptoms or [])
+                heap = self._specialization_heaps.get(wanted.lower())
+                doctor_id = heap.peek() if heap else None
+                if doctor_id is None:
+                    doctor_id = self._heap.peek()
+            else:
+                doctor_id = self._heap.peek()
+
+            self._open_assignment(assessment_id, doctor_id)
+            return self._doctors[doctor_id]
+
+    def release(self, assessment_id: str) -> None:
+        """
+        Release an assignment, e.g. when its records could not be stored.
+
+        Args:
+            assessment_id: ID of the assessment whose assignment to release
+        """
+        with self._lock:
+            if self._loaded_dir is not None:
+                self._close_assignment(assessment_id)
+
+    def get_loads(self) -> Dict[str, int]:
+        """
+        Get the number of open assignments per doctor.
+
+        Returns:
+            Dictionary of doctorID to open assignment count
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._loads)
+
+    def preload(self) -> None:
+        """Load doctors and loads now rather than on first use (e.g., during warm-up)."""
+        with self._lock:
+            self._ensure_loaded()
+
+    def invalidate(self) -> None:
+        """Drop cached doctors and loads so they are reloaded on next use."""
+        with self._lock:
+            self._loaded_dir = None
+
+    def _ensure_loaded(self) -> None:
+        """Load doctors and open assignment counts if missing or stale."""
+        data_dir = data_access.DATA_DIR
+        signatures = {filename: data_access.data_signature(filename, missing_ok=True) for filename in SOURCE_FILES}
+        if self._loaded_dir == data_dir and self._signatures == signatures:
+            return
+
+        doctors = [d for d in self._read_or_empty(DOCTORS_FILE) if d.get('doctorID')]
+        # Assignments of reviewed prescriptions, or of prescriptions no longer live (archived), are closed
+        unreviewed = set(
+            p.get('assessmentID') for p in self._read_or_empty(PRESCRIPTIONS_FILE)
+            if not p.get('lastModifiedBy')
+        )
+
+        self._doctors = {d['doctorID']: d for d in doctors}
+        self._doctor_order = [d['doctorID'] for d in doctors]
+        self._loads = {doctor_id: 0 for doctor_id in self._doctor_order}
+        self._open = {}
+        for assignment in self._read_or_empty(ASSIGNMENTS_FILE):
+            assessment_id = assignment.get('assessmentID')
+            doctor_id = assignment.get('doctorID')
+            if doctor_id in self._loads and assessment_id in unreviewed:
+                self._open[assessment_id] = doctor_id
+                self._loads[doctor_id] += 1
+
+        self._heap = _LoadHeap(self._doctor_order, self._loads)
+        by_specialization = {}
+        for doctor in doctors:
+            key = (doctor.get('specialization') or DEFAULT_SPECIALIZATION).lower()
+            by_specialization.setdefault(key, []).append(doctor['doctorID'])
+        self._specialization_heaps = {
+            key: _LoadHeap(doctor_ids, self._loads) for key, doctor_ids in by_specialization.items()
+        }
+        # The directory and signatures read at the start, so a switch or write mid-load forces a reload
+        self._loaded_dir = data_dir
+        self._signatures = signatures
+
+    @staticmethod
+    def _read_or_empty(filename: str) -> List[Dict[str, Any]]:
+        try:
+            return data_access.read_json_file(filename)
+        except FileNotFoundError:
+            return []
+
+    def _set_load(self, doctor_id: str, load: int) -> None:
+        self._loads[doctor_id] = load
+        self._heap.push(doctor_id)
+        key = (self._doctors[doctor_id].get('specialization') or DEFAULT_SPECIALIZATION).lower()
+        self._specialization_heaps[key].push(doctor_id)
+
+    def _open_assignment(self, assessment_id: str, doctor_id: str) -> None:
+        if assessment_id in self._open or doctor_id not in self._loads:
+            return
+        self._open[assessment_id] = doctor_id
+        self._set_load(doctor_id, self._loads[doctor_id] + 1)
+
+    def _close_assignment(self, assessment_id: str) -> None:
+        doctor_id = self._open.pop(assessment_id, None)
+        if doctor_id in self._loads:
+            self._set_load(doctor_id, max(0, self._loads[doctor_id] - 1))
+
+    def _on_change(self, filename: str, operation: str, records: List[Dict[str, Any]],
+                   signature: data_access.WriteSignature) -> None:
+        """Apply a data_access change notification to the load counts."""
+        if filename not in (DOCTORS_FILE, ASSIGNMENTS_FILE, PRESCRIPTIONS_FILE):
+            return
+
+        with self._lock:
+            if self._loaded_dir is None:
+                return
+            if self._loaded_dir == data_access.DATA_DIR and self._signatures.get(filename) == signature.after:
+                # Already loaded from the files this write produced
+                return
+            # Another signature than the one before the write means a write the counts have not seen
+            if (self._loaded_dir != data_access.DATA_DIR or filename == DOCTORS_FILE
+                    or self._signatures.get(filename) != signature.before):
+                self.invalidate()
+            elif filename == ASSIGNMENTS_FILE:
+                if operation == 'insert':
+                    for assignment in records:
+                        self._open_assignment(assignment.get('assessmentID'), assignment.get('doctorID'))
+                else:
+                    self.invalidate()
+            elif operation == 'update':
+                for prescription in records:
+                    if prescription.get('lastModifiedBy'):
+                        self._close_assignment(prescription.get('assessmentID'))
+            elif operation != 'insert':
+                self.invalidate()
+            if self._loaded_dir is not None:
+                self._signatures[filename] = signature.after
+
+
+# Global instance
+_assignment_engine = None
+_assignment_engine_lock = threading.Lock()
+
+
+def get_assignment_engine() -> DoctorAssignmentEngine:
+    """Get or create the assignment engine instance."""
+    global _assignment_engine
+    with _assignment_engine_lock:
+        if _assignment_engine is None:
+            _assignment_engine = DoctorAssignmentEngine()
+        return _assignment_engine
@@ -1,29 +1,193 @@
 """
 Amazon Bedrock service for AI-powered prescription generation.
+
+boto3 is imported when the first client is built rather than at module
+import, since loading it dominates application start-up time.
+
+Clients are held in a bounded BedrockClientPool shared between threads,
+which also caps the number of concurrent Bedrock calls. Configuration
+(environment variables):
+    BEDROCK_POOL_SIZE: Maximum clients / concurrent calls (default 4)
+    BEDROCK_POOL_TIMEOUT: Seconds to wait for a free client (default 30)
 """
 
+import asyncio
+import functools
 import json
-import boto3
 import os
-from typing import List, Dict, Any
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import List, Dict, Any, Callable, Optional
+from bedrock_stub import StubBedrockClient, stub_enabled
+from symptom_vocabulary import get_symptom_vocabulary
+import metrics
+
+
+class BedrockClientPool:
+    """
+    Bounded pool of Bedrock clients.
+    
+    Up to size clients are built on demand and lent to any thread, so
+    short-lived request and worker threads reuse clients instead of building
+    their own. At most size calls are in flight, and callers beyond that
+    wait for a free client.
+    """
+    
+    def __init__(self, factory: Callable[[], Any], size: int = 4):
+        """
+        Initialize an empty pool.
+        
+        Args:
+            factory: Callable building a new client
+            size: Maximum number of clients
+        
+        Raises:
+            ValueError: If size is not positive
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.created = 0
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+    
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """
+        Borrow a client, building one if the pool is not yet full.
+        
+        Args:
+            timeout: Maximum seconds to wait for a free client (None waits indefinitely)
+        
+        Returns:
+            Client, to be given back with release()
+        
+        Raises:
+            TimeoutError: If no client became free in time
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            build = self.created < self.size
+            if build:
+                self.created += 1
+        if build:
+            try:
+                return self.factory()
+            except BaseException:
+                with self._lock:
+                    self.created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No Bedrock client available")
+    
+    def release(self, client: Any) -> None:
+        """Give back a client obtained from acquire()."""
+        self._idle.put(client)
+    
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """Context manager borrowing a client for the duration of the block."""
+        client = self.acquire(timeout)
+        try:
+            yield client
+        finally:
+            self.release(client)
+    
+    @asynccontextmanager
+    async def lease_async(self, timeout: Optional[float] = None):
+        """Async context manager; waits for a client without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, self.acquire, timeout)
+        try:
+            # Shielded, so a cancelled caller leaves the future to finish and hand over the client
+            client = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(self._release_abandoned)
+            raise
+        try:
+            yield client
+        finally:
+            self.release(client)
+    
+    def _release_abandoned(self, future: asyncio.Future) -> None:
+        """Give back a client acquired for a lease_async caller that was cancelled while waiting."""
+        if not future.cancelled() and future.exception() is None:
+            self.release(future.result())
 
 
 class BedrockService:
     """Service for interacting with Amazon Bedrock LLM."""
     
-    def __init__(self):
-        """Initialize Bedrock client."""
+    def __init__(self, pool_size: Optional[int] = None):
+        """
+        Initialize the client pool and build its first client.
+        
+        Args:
+            pool_size: Maximum clients / concurrent calls (default BEDROCK_POOL_SIZE)
+        """
         self.region = os.getenv('AWS_REGION', 'us-east-1')
         self.model_id = os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
         
+        self.max_pool_connections = int(os.getenv('BEDROCK_MAX_POOL_CONNECTIONS', '10'))
+        self.pool_size = pool_size or int(os.getenv('BEDROCK_POOL_SIZE', '4'))
+        self.pool_timeout = float(os.getenv('BEDROCK_POOL_TIMEOUT', '30'))
+        
+        self.pool = None
+        self._executor = None
+        self._executor_lock = threading.Lock()
         try:
-            self.client = boto3.client(
-                service_name='bedrock-runtime',
-                region_name=self.region
-            )
+            self._set_pool(self._create_client)
         except Exception as e:
             print(f"Warning: Failed to initialize Bedrock client: {e}")
-            self.client = None
+    
+    def _set_pool(self, factory: Callable[[], Any]) -> None:
+        """Replace the pool, building one client up front to fail fast."""
+        pool = BedrockClientPool(factory, self.pool_size)
+        primary = pool.acquire()
+        pool.release(primary)
+        self._primary = primary
+        self.pool = pool
+    
+    @property
+    def client(self):
+        """A pooled client, or None if no client could be built."""
+        return self._primary if self.pool is not None else None
+    
+    @client.setter
+    def client(self, client) -> None:
+        """Serve every lease from the given (thread-safe) client; None disables Bedrock."""
+        if client is None:
+            self.pool = None
+        else:
+            self._set_pool(lambda: client)
+    
+    def _create_client(self):
+        """
+        Build the Bedrock runtime client (or the local stub).
+        
+        Credentials are resolved here rather than on the first request, so
+        that building the service up front also moves the credential lookup
+        out of the request path.
+        """
+        if stub_enabled():
+            return StubBedrockClient()
+        
+        import boto3
+        from botocore.config import Config
+        
+        session = boto3.session.Session(region_name=self.region)
+        session.get_credentials()
+        return session.client(
+            service_name='bedrock-runtime',
+            config=Config(max_pool_connections=self.max_pool_connections)
+        )
     
     def generate_prescription(
         self, 
@@ -48,7 +212,7 @@ class BedrockService:
         Returns:
             Dictionary with medications list and instructions
         """
-        if not self.client:
+        if self.pool is None:
             return self._fallback_prescription(symptoms)
         
         try:
@@ -56,10 +220,12 @@ class BedrockService:
             prompt = self._build_prompt(symptoms, age, weight, weight_unit, height, height_unit)
             
             # Call Bedrock
-            response = self._invoke_bedrock(prompt)
+            with metrics.timer('bedrock_stage_duration_seconds', stage='invoke'):
+                response = self._invoke_bedrock(prompt)
             
             # Parse response
-            prescription = self._parse_response(response)
+            with metrics.timer('bedrock_stage_duration_seconds', stage='parse'):
+                prescription = self._parse_response(response)
             
             return prescription
             
@@ -67,6 +233,70 @@ class BedrockService:
             print(f"Error generating prescription with Bedrock: {e}")
             return self._fallback_prescription(symptoms)
     
+    async def generate_prescription_async(
+        self,
+        symptoms: List[str],
+        age: int,
+        weight: float,
+        weight_unit: str,
+        height: float,
+        height_unit: str
+    ) -> Dict[str, Any]:
+        """
+        Generate a prescription without blocking the event loop.
+        
+        The blocking Bedrock call runs on the service's own executor, one
+        thread per pooled client, so any number of awaiting callers queue
+        there without tying up the loop's default executor.
+        
+        Args:
+            Same as generate_prescription
+        
+        Returns:
+            Dictionary with medications list and instructions
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(
+            self.generate_prescription, symptoms, age, weight, weight_unit, height, height_unit
+        ))
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get or create the executor running calls for async callers."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='bedrock-async')
+            return self._executor
+    
+    def generate_prescriptions(self, assessments: List[Dict[str, Any]],
+                               max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Generate prescriptions for several assessments in parallel.
+        
+        Each assessment uses the API field names ('symptoms', 'age', 'weight',
+        'weightUnit', 'height', 'heightUnit'). A failed generation yields the
+        fallback prescription for that assessment only.
+        
+        Args:
+            assessments: Assessment data to generate prescriptions for
+            max_workers: Worker threads (default: the pool size)
+        
+        Returns:
+            Prescriptions in the same order as the assessments
+        """
+        if not assessments:
+            return []
+        
+        def generate(assessment: Dict[str, Any]) -> Dict[str, Any]:
+            return self.generate_prescription(
+                assessment['symptoms'], assessment['age'],
+                assessment['weight'], assessment.get('weightUnit', 'kg'),
+                assessment['height'], assessment.get('heightUnit', 'cm')
+            )
+        
+        workers = min(max_workers or self.pool_size, len(assessments))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bedrock') as executor:
+            return list(executor.map(generate, assessments))
+    
     def _build_prompt(
         self, 
         symptoms: List[str], 
@@ -125,11 +355,12 @@ Important:
             ]
         }
         
-        # Invoke the model
-        response = self.client.invoke_model(
-            modelId=self.model_id,
-            body=json.dumps(request_body)
-        )
+        # Invoke the model on a pooled client
+        with self.pool.lease(self.pool_timeout) as client:
+            response = client.invoke_model(
+                modelId=self.model_id,
+                body=json.dumps(request_body)
+            )
         
         # Parse response
         response_body = json.loads(response['body'].read())
@@ -168,7 +399,7 @@ Important:
     
     def _fallback_prescription(self, symptoms: List[str]) -> Dict[str, Any]:
         """Fallback prescription when Bedrock is unavailable."""
-        # Simple symptom-to-medication mapping
+        # Simple mapping from canonical symptom names to medications
         symptom_medications = {
             'headache': {'name': 'Ibuprofen', 'dosage': '200mg', 'frequency': 'Every 6 hours', 'duration': '3 days'},
             'fever': {'name': 'Acetaminophen', 'dosage': '500mg', 'frequency': 'Every 4-6 hours', 'duration': '5 days'},
@@ -179,10 +410,11 @@ Important:
         }
         
         medications = []
-        for symptom in symptoms:
-            symptom_lower = symptom.lower()
-            if symptom_lower in symptom_medications:
-                medications.append(symptom_medications[symptom_lower])
+        vocabulary = get_symptom_vocabulary()
+        for concept_id in vocabulary.encode(symptoms):
+            medication = symptom_medications.get(vocabulary.name(concept_id))
+            if medication and medication not in medications:
+                medications.append(medication)
         
         if not medications:
             medications.append({
@@ -200,10 +432,12 @@ Important:
 
 # Global instance
 _bedrock_service = None
+_bedrock_service_lock = threading.Lock()
 
 def get_bedrock_service() -> BedrockService:
     """Get or create Bedrock service instance."""
     global _bedrock_service
-    if _bedrock_service is None:
-        _bedrock_service = BedrockService()
-    return _bedrock_service
+    with _bedrock_service_lock:
+        if _bedrock_service is None:
+            _bedrock_service = BedrockService()
+        return _bedrock_service
@@ -0,0 +1,84 @@
+"""
+Local stand-in for the Amazon Bedrock runtime client.
+
+Mimics the parts of the boto3 'bedrock-runtime' client used by
+BedrockService, returning a Claude 3 style response after a configurable
+delay and failing at a configurable rate. Used for load testing and local
+development without network access or AWS credentials.
+
+Enable it by setting BEDROCK_STUB=1. Configuration (environment variables):
+    BEDROCK_STUB_LATENCY_MS: Mean response latency in milliseconds (default 800)
+    BEDROCK_STUB_JITTER_MS: Uniform jitter added around the mean (default 200)
+    BEDROCK_STUB_FAILURE_RATE: Fraction of calls that raise (default 0.0)
+"""
+
+import io
+import json
+import os
+import random
+import time
+from typing import Any, Dict, Optional
+
+
+STUB_PRESCRIPTION = {
+    'medications': [
+        {'name': 'Acetaminophen', 'dosage': '500mg', 'frequency': 'Every 6 hours', 'duration': '3 days'}
+    ],
+    'instructions': 'Rest, stay hydrated and take medications as directed. '
+                    'This is a preliminary recommendation; doctor review is required.'
+}
+
+
+class StubBedrockError(Exception):
+    """Simulated Bedrock failure."""
+
+
+class StubBedrockClient:
+    """Drop-in replacement for boto3's bedrock-runtime client."""
+
+    def __init__(self, latency_ms: Optional[float] = None, jitter_ms: Optional[float] = None,
+                 failure_rate: Optional[float] = None, seed: Optional[int] = None):
+        """
+        Initialize the stub; unset arguments are read from the environment.
+
+        Args:
+            latency_ms: Mean response latency in milliseconds
+            jitter_ms: Uniform jitter around the mean in milliseconds
+            failure_rate: Fraction of calls that raise StubBedrockError
+            seed: Optional random seed for reproducible runs
+        """
+        self.latency_ms = float(os.getenv('BEDROCK_STUB_LATENCY_MS', '800')) if latency_ms is None else latency_ms
+        self.jitter_ms = float(os.getenv('BEDROCK_STUB_JITTER_MS', '200')) if jitter_ms is None else jitter_ms
+        self.failure_rate = float(os.getenv('BEDROCK_STUB_FAILURE_RATE', '0')) if failure_rate is None else failure_rate
+        self._random = random.Random(seed)
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        """
+        Simulate InvokeModel for an Anthropic Claude 3 model.
+
+        Args:
+            modelId: Model identifier (ignored)
+            body: JSON request body (ignored)
+
+        Returns:
+            Response dictionary with a readable 'body' stream
+
+        Raises:
+            StubBedrockError: At the configured failure rate
+        """
+        delay_ms = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        time.sleep(max(0.0, delay_ms) / 1000)
+
+        if self._random.random() < self.failure_rate:
+            raise StubBedrockError("Simulated Bedrock failure")
+
+        response_body = {
+            'content': [{'type': 'text', 'text': json.dumps(STUB_PRESCRIPTION)}],
+            'stop_reason': 'end_turn'
+        }
+        return {'body': io.BytesIO(json.dumps(response_body).encode('utf-8'))}
+
+
+def stub_enabled() -> bool:
+    """Check whether the Bedrock stub is enabled via BEDROCK_STUB."""
+    return os.getenv('BEDROCK_STUB', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,314 @@
+"""
+Benchmark suite for data_access operations across data sizes.
+
+Generates synthetic patients, assessments and prescriptions in a temporary
+data directory and measures latency and throughput of read_json_file,
+find_by_id, find_all_by_field, add_record and update_record at each size.
+Results are emitted as JSON and can be saved as, or compared against, a
+stored baseline. benchmarks/baseline_data_access.json is the committed
+reference (default sizes, with the machine it was recorded on); latencies
+depend on the hardware, so record your own baseline on the machine you
+compare on before judging regressions.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_data_access
+    python -m benchmarks.bench_data_access --sizes 1000 10000 100000 1000000
+    python -m benchmarks.bench_data_access --output results.json --save-baseline
+    python -m benchmarks.bench_data_access --baseline benchmarks/baseline_data_access.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_access
+
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_data_access.json')
+DEFAULT_THRESHOLD = 1.25
+
+SYMPTOMS = ['headache', 'fever', 'cough', 'sore throat', 'fatigue', 'nausea', 'rash', 'back pain']
+MEDICATIONS = ['Ibuprofen', 'Acetaminophen', 'Dextromethorphan', 'Throat Lozenges', 'Multivitamin', 'Ondansetron']
+FIRST_NAMES = ['John', 'Jane', 'Alice', 'Bob', 'Priya', 'Rahul', 'Mei', 'Omar']
+LAST_NAMES = ['Doe', 'Smith', 'Johnson', 'Sharma', 'Patel', 'Chen', 'Khan', 'Garcia']
+
+
+def generate_patients(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Generate synthetic patient records."""
+    return [
+        {
+            'patientID': f'patient-{i:08d}',
+            'firstName': rng.choice(FIRST_NAMES),
+            'lastName': rng.choice(LAST_NAMES),
+            'email': f'patient{i}@example.com',
+            'passwordHash': '$2b$12$' + 'x' * 53,
+            'registrationDate': '2024-01-01T00:00:00+00:00'
+        }
+        for i in range(count)
+    ]
+
+
+def generate_assessments(count: int, patient_ids: List[str], rng: random.Random) -> List[Dict[str, Any]]:
+    """Generate synthetic assessment records spread over the given patients."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            'assessmentID': f'assessment-{i:08d}',
+            'patientID': rng.choice(patient_ids),
+            'weight': round(rng.uniform(40, 120), 1),
+            'weightUnit': 'kg',
+            'height': round(rng.uniform(140, 200), 1),
+            'heightUnit': 'cm',
+            'age': rng.randint(1, 95),
+            'symptoms': rng.sample(SYMPTOMS, rng.randint(1, 3)),
+            'followUpResponses': [],
+            'assessmentDate': (start + timedelta(minutes=i)).isoformat()
+        }
+        for i in range(count)
+    ]
+
+
+def generate_prescriptions(assessments: List[Dict[str, Any]], rng: random.Random) -> List[Dict[str, Any]]:
+    """Generate one synthetic prescription per assessment."""
+    return [
+        {
+            'prescriptionID': f'prescription-{i:08d}',
+            'assessmentID': assessment['assessmentID'],
+            'patientID': assessment['patientID'],
+            'medications': [
+                {'name': name, 'dosage': '200mg', 'frequency': 'Every 6 hours', 'duration': '3 days'}
+                for name in rng.sample(MEDICATIONS, rng.randint(1, 3))
+            ],
+            'instructions': 'Take medications as directed. Consult a doctor if symptoms persist or worsen.',
+            'generatedDate': assessment['assessmentDate'],
+            'generatedBy': 'AI-Bedrock'
+        }
+        for i, assessment in enumerate(assessments)
+    ]
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (seconds) into milliseconds and ops/sec."""
+    ordered = sorted(samples)
+    total = sum(ordered)
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, int(round(p * (len(ordered) - 1)))))
+        return ordered[index] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.mean(ordered) * 1000,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'max_ms': ordered[-1] * 1000,
+        'ops_per_sec': len(ordered) / total if total > 0 else float('inf')
+    }
+
+
+def _measure(operation: Callable[[int], Any], repeat: int) -> Dict[str, float]:
+    """Time repeat calls of operation(iteration)."""
+    samples = []
+    for iteration in range(repeat):
+        started = time.perf_counter()
+        operation(iteration)
+        samples.append(time.perf_counter() - started)
+    return _summarize(samples)
+
+
+def run_size(size: int, repeat: int, seed: int = 42) -> Dict[str, Dict[str, float]]:
+    """
+    Benchmark all operations against collections of the given size.
+
+    The patients collection holds size/10 records; assessments and
+    prescriptions hold size records each.
+
+    Args:
+        size: Number of assessment (and prescription) records
+        repeat: Number of timed calls per operation
+        seed: Random seed for data generation and lookups
+
+    Returns:
+        Dictionary of operation name to latency summary
+    """
+    rng = random.Random(seed)
+    patients = generate_patients(max(1, size // 10), rng)
+    patient_ids = [p['patientID'] for p in patients]
+    assessments = generate_assessments(size, patient_ids, rng)
+    prescriptions = generate_prescriptions(assessments, rng)
+
+    temp_dir = tempfile.mkdtemp(prefix='bench_data_access_')
+    original_dir = data_access.DATA_DIR
+    data_access.DATA_DIR = temp_dir
+    try:
+        data_access.write_json_file('patients.json', patients)
+        data_access.write_json_file('assessments.json', assessments)
+        data_access.write_json_file('prescriptions.json', prescriptions)
+        del patients, prescriptions
+
+        lookup_ids = [rng.choice(assessments)['assessmentID'] for _ in range(repeat)]
+        lookup_patients = [rng.choice(patient_ids) for _ in range(repeat)]
+        update_ids = [f"prescription-{rng.randrange(size):08d}" for _ in range(repeat)]
+        del assessments
+
+        return {
+            'read_json_file': _measure(
+                lambda i: data_access.read_json_file('assessments.json'), repeat),
+            'find_by_id': _measure(
+                lambda i: data_access.find_by_id('assessments.json', 'assessmentID', lookup_ids[i]), repeat),
+            'find_all_by_field': _measure(
+                lambda i: data_access.find_all_by_field('assessments.json', 'patientID', lookup_patients[i]), repeat),
+            'add_record': _measure(
+                lambda i: data_access.add_record('assessments.json', {
+                    'assessmentID': f'bench-{i}', 'patientID': lookup_patients[i], 'symptoms': ['fever'],
+                    'assessmentDate': datetime.now(timezone.utc).isoformat()
+                }), repeat),
+            'update_record': _measure(
+                lambda i: data_access.update_record('prescriptions.json', 'prescriptionID', update_ids[i],
+                                                    {'instructions': f'Updated {i}'}), repeat),
+        }
+    finally:
+        data_access.DATA_DIR = original_dir
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def run_benchmarks(sizes: List[int], repeat: int, seed: int = 42, log: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Run the benchmark suite for every size.
+
+    Write operations rewrite the whole file, so their repeat count is capped
+    for large sizes to keep runs practical.
+
+    Args:
+        sizes: Record counts to benchmark
+        repeat: Number of timed calls per operation
+        seed: Random seed
+        log: Optional progress callback
+
+    Returns:
+        Machine-readable results dictionary
+    """
+    results = {}
+    for size in sizes:
+        if log:
+            log(f"Benchmarking {size} records...")
+        size_repeat = repeat if size < 100000 else max(1, min(repeat, 3))
+        results[str(size)] = run_size(size, size_repeat, seed)
+
+    return {
+        'suite': 'data_access',
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results
+    }
+
+
+def compare_to_baseline(current: Dict[str, Any], baseline: Dict[str, Any],
+                        threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare p50 latencies against a baseline run.
+
+    Only sizes and operations present in both runs are compared.
+
+    Args:
+        current: Results from run_benchmarks
+        baseline: Baseline results from run_benchmarks
+        threshold: Ratio of current to baseline p50 above which an
+            operation counts as a regression
+
+    Returns:
+        List of comparison rows with size, operation, both p50 values,
+        ratio and a regression flag
+    """
+    rows = []
+    for size, operations in current['results'].items():
+        baseline_operations = baseline.get('results', {}).get(size)
+        if not baseline_operations:
+            continue
+        for operation, summary in operations.items():
+            if operation not in baseline_operations:
+                continue
+            baseline_p50 = baseline_operations[operation]['p50_ms']
+            ratio = summary['p50_ms'] / baseline_p50 if baseline_p50 > 0 else float('inf')
+            rows.append({
+                'size': int(size),
+                'operation': operation,
+                'baseline_p50_ms': baseline_p50,
+                'current_p50_ms': summary['p50_ms'],
+                'ratio': ratio,
+                'regression': ratio > threshold
+            })
+    return rows
+
+
+def _print_table(results: Dict[str, Any], comparison: List[Dict[str, Any]]) -> None:
+    """Print a human-readable summary to stderr."""
+    ratios = {(row['size'], row['operation']): row for row in comparison}
+    print(f"{'size':>9} {'operation':<18} {'p50 ms':>10} {'p95 ms':>10} {'ops/s':>10} {'vs base':>8}", file=sys.stderr)
+    for size, operations in results['results'].items():
+        for operation, summary in operations.items():
+            row = ratios.get((int(size), operation))
+            versus = f"{row['ratio']:.2f}x{'!' if row['regression'] else ''}" if row else '-'
+            print(f"{size:>9} {operation:<18} {summary['p50_ms']:>10.3f} {summary['p95_ms']:>10.3f} "
+                  f"{summary['ops_per_sec']:>10.1f} {versus:>8}", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns 1 if a regression was found."""
+    parser = argparse.ArgumentParser(description='Benchmark data_access operations across data sizes.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Record counts to benchmark (default: 1000 10000 100000)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed calls per operation (default: 20)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='p50 ratio counted as a regression (default: 1.25)')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.repeat, args.seed,
+                             log=lambda message: print(message, file=sys.stderr))
+
+    comparison = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            comparison = compare_to_baseline(results, json.load(f), args.threshold)
+        results['comparison'] = comparison
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline}; record one with --save-baseline", file=sys.stderr)
+
+    _print_table(results, comparison)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+
+    return 1 if any(row['regression'] for row in comparison) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
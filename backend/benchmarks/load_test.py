@@ -0,0 +1,446 @@
+"""
+End-to-end load generator for the Flask API.
+
+Drives a weighted mix of register, login, assessment, history and
+doctor-dashboard requests at a target request rate (open loop: requests are
+scheduled on a fixed timeline, so a slow server cannot slow the load down)
+and reports p50/p95/p99 latency, throughput and error rate per endpoint.
+Latency is measured from each request's scheduled start, so queueing delay
+in the generator counts against the server.
+
+With --serve, the app is started in-process on a free port over a temporary
+data directory seeded with doctors, and Bedrock is replaced by the local stub
+(see bedrock_stub.py), so no network or AWS credentials are needed.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test --serve --rate 20 --duration 30
+    python -m benchmarks.load_test --serve --stub-latency-ms 1500 --stub-failure-rate 0.05
+    python -m benchmarks.load_test --base-url http://localhost:5000/api \\
+        --doctor-email doctor@example.com --doctor-password secret --output results.json
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+DEFAULT_MIX = 'register=1,login=2,assessment=2,history=4,doctor=1'
+ENDPOINTS = ('register', 'login', 'assessment', 'history', 'doctor')
+
+SEED_DOCTOR_PASSWORD = 'loadtest-doctor-password'
+SYMPTOMS = ['headache', 'fever', 'cough', 'sore throat', 'fatigue', 'nausea']
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """
+    Parse a traffic mix such as 'login=2,history=4' into endpoint weights.
+
+    Raises:
+        ValueError: If an endpoint is unknown or a weight is invalid
+    """
+    weights = {}
+    for part in mix.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        weights[name] = float(weight) if weight else 1.0
+        if weights[name] < 0:
+            raise ValueError(f"Negative weight for {name}")
+    if not any(weights.values()):
+        raise ValueError("Traffic mix has no positive weights")
+    return weights
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class ResultRecorder:
+    """Thread-safe collector of per-endpoint latencies and outcomes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._errors = {}
+        self._statuses = {}
+
+    def record(self, endpoint: str, latency: float, status: int, ok: bool) -> None:
+        with self._lock:
+            self._latencies.setdefault(endpoint, []).append(latency)
+            if not ok:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+            statuses = self._statuses.setdefault(endpoint, {})
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        """Summarize results per endpoint (latencies in milliseconds)."""
+        with self._lock:
+            result = {}
+            for endpoint, latencies in sorted(self._latencies.items()):
+                ordered = sorted(latencies)
+                errors = self._errors.get(endpoint, 0)
+                result[endpoint] = {
+                    'requests': len(ordered),
+                    'errors': errors,
+                    'error_rate': errors / len(ordered),
+                    'throughput_rps': len(ordered) / elapsed if elapsed > 0 else 0.0,
+                    'p50_ms': percentile(ordered, 0.50) * 1000,
+                    'p95_ms': percentile(ordered, 0.95) * 1000,
+                    'p99_ms': percentile(ordered, 0.99) * 1000,
+                    'max_ms': ordered[-1] * 1000,
+                    'statuses': dict(self._statuses.get(endpoint, {}))
+                }
+            return result
+
+
+class ApiClient:
+    """Minimal JSON client for the API using only the standard library."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None,
+                token: Optional[str] = None) -> Tuple[int, Any]:
+        """
+        Send a request and return (status code, decoded JSON body or None).
+
+        Connection failures are returned as status 0.
+        """
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(f"{self.base_url}{path}", data=data, method=method)
+        request.add_header('Accept', 'application/json')
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        if token:
+            request.add_header('Authorization', f'Bearer {token}')
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, self._decode(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, self._decode(e.read())
+        except (urllib.error.URLError, OSError):
+            return 0, None
+
+    @staticmethod
+    def _decode(raw: bytes) -> Any:
+        try:
+            return json.loads(raw) if raw else None
+        except ValueError:
+            return None
+
+
+class LoadTest:
+    """Open-loop load test against a running API."""
+
+    def __init__(self, client: ApiClient, mix: Dict[str, float], rate: float, duration: float,
+                 concurrency: int, users: int, doctor_credentials: Optional[Tuple[str, str]] = None,
+                 seed: int = 42):
+        """
+        Initialize the load test.
+
+        Args:
+            client: API client
+            mix: Endpoint weights from parse_mix
+            rate: Target requests per second
+            duration: Test duration in seconds
+            concurrency: Number of worker threads issuing requests
+            users: Number of patients registered before the test
+            doctor_credentials: (email, password) for doctor traffic; doctor
+                traffic is dropped from the mix without it
+            seed: Random seed for the request sequence
+        """
+        self.client = client
+        self.mix = dict(mix)
+        self.rate = rate
+        self.duration = duration
+        self.concurrency = concurrency
+        self.user_count = users
+        self.doctor_credentials = doctor_credentials
+        self.recorder = ResultRecorder()
+        self._random = random.Random(seed)
+        self._users = []
+        self._users_lock = threading.Lock()
+        self._doctor_token = None
+        self._counter = 0
+
+    def setup(self) -> None:
+        """Register and log in the initial patients and the doctor."""
+        for _ in range(self.user_count):
+            user = self._register()
+            if user and self._login(user):
+                self._users.append(user)
+        if not self._users:
+            raise RuntimeError("Could not register any patients; is the API reachable?")
+
+        if self.doctor_credentials:
+            status, body = self.client.request('POST', '/login', {
+                'email': self.doctor_credentials[0], 'password': self.doctor_credentials[1]
+            })
+            if status == 200 and body.get('userType') == 'doctor':
+                self._doctor_token = body['token']
+        if not self._doctor_token:
+            self.mix.pop('doctor', None)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the test and return the results.
+
+        Returns:
+            Dictionary with configuration, per-endpoint summaries and totals
+        """
+        self.setup()
+
+        endpoints = [name for name, weight in self.mix.items() if weight > 0]
+        weights = [self.mix[name] for name in endpoints]
+        total = int(self.rate * self.duration)
+        schedule = queue.Queue()
+
+        workers = [threading.Thread(target=self._worker, args=(schedule,), daemon=True)
+                   for _ in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+
+        started = time.perf_counter()
+        for i in range(total):
+            scheduled = started + i / self.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # Each request gets its own seeded stream, so its choices do not depend on which worker runs it
+            schedule.put((self._random.choices(endpoints, weights)[0], scheduled, self._random.getrandbits(64)))
+
+        for _ in workers:
+            schedule.put(None)
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        endpoints_summary = self.recorder.summary(elapsed)
+        requests = sum(s['requests'] for s in endpoints_summary.values())
+        errors = sum(s['errors'] for s in endpoints_summary.values())
+        return {
+            'config': {
+                'rate': self.rate,
+                'duration': self.duration,
+                'concurrency': self.concurrency,
+                'users': self.user_count,
+                'mix': self.mix
+            },
+            'elapsed_s': elapsed,
+            'total': {
+                'requests': requests,
+                'errors': errors,
+                'error_rate': errors / requests if requests else 0.0,
+                'throughput_rps': requests / elapsed if elapsed > 0 else 0.0
+            },
+            'endpoints': endpoints_summary
+        }
+
+    def _worker(self, schedule: queue.Queue) -> None:
+        while True:
+            item = schedule.get()
+            if item is None:
+                return
+            endpoint, scheduled, seed = item
+            status, ok = getattr(self, f'_do_{endpoint}')(random.Random(seed))
+            self.recorder.record(endpoint, time.perf_counter() - scheduled, status, ok)
+
+    def _next_id(self) -> int:
+        with self._users_lock:
+            self._counter += 1
+            return self._counter
+
+    def _random_user(self, rng: random.Random) -> Dict[str, Any]:
+        with self._users_lock:
+            return rng.choice(self._users)
+
+    def _new_user(self) -> Dict[str, Any]:
+        user_number = self._next_id()
+        return {
+            'firstName': 'Load',
+            'lastName': f'Tester{user_number}',
+            'email': f'load.{os.getpid()}.{time.time_ns()}.{user_number}@example.com',
+            'password': 'loadtest-password'
+        }
+
+    def _register(self) -> Optional[Dict[str, Any]]:
+        user = self._new_user()
+        status, body = self.client.request('POST', '/patients/register', user)
+        if status != 201:
+            return None
+        user['patientID'] = body['patientID']
+        return user
+
+    def _login(self, user: Dict[str, Any]) -> bool:
+        status, body = self.client.request('POST', '/login', {'email': user['email'], 'password': user['password']})
+        if status != 200:
+            return False
+        user['token'] = body['token']
+        return True
+
+    def _do_register(self, rng: random.Random) -> Tuple[int, bool]:
+        status, _ = self.client.request('POST', '/patients/register', self._new_user())
+        return status, status == 201
+
+    def _do_login(self, rng: random.Random) -> Tuple[int, bool]:
+        user = self._random_user(rng)
+        status, _ = self.client.request('POST', '/login', {'email': user['email'], 'password': user['password']})
+        return status, status == 200
+
+    def _do_assessment(self, rng: random.Random) -> Tuple[int, bool]:
+        user = self._random_user(rng)
+        status, _ = self.client.request('POST', '/assessments', {
+            'patientID': user['patientID'],
+            'weight': round(rng.uniform(45, 110), 1),
+            'weightUnit': 'kg',
+            'height': round(rng.uniform(150, 195), 1),
+            'heightUnit': 'cm',
+            'age': rng.randint(5, 90),
+            'symptoms': rng.sample(SYMPTOMS, rng.randint(1, 3))
+        }, token=user['token'])
+        return status, status == 201
+
+    def _do_history(self, rng: random.Random) -> Tuple[int, bool]:
+        user = self._random_user(rng)
+        status, _ = self.client.request('GET', f"/patients/{user['patientID']}/history", token=user['token'])
+        return status, status == 200
+
+    def _do_doctor(self, rng: random.Random) -> Tuple[int, bool]:
+        status, _ = self.client.request('GET', '/doctors/patients', token=self._doctor_token)
+        return status, status == 200
+
+
+def serve_app(doctors: int = 3) -> Tuple[Any, str, str]:
+    """
+    Start the app in-process on a free port over a fresh data directory.
+
+    Bedrock is replaced by the local stub unless BEDROCK_STUB is already set.
+
+    Args:
+        doctors: Number of doctors to seed
+
+    Returns:
+        Tuple of (server, base URL, data directory); call server.shutdown()
+        and remove the directory when done
+    """
+    os.environ.setdefault('BEDROCK_STUB', '1')
+    os.environ.setdefault('SECRET_KEY', 'load-test-secret-key-not-for-production-use')
+
+    import bcrypt
+    import logging
+    from werkzeug.serving import make_server
+    import data_access
+    from app import app
+
+    data_dir = tempfile.mkdtemp(prefix='load_test_')
+    data_access.DATA_DIR = data_dir
+    password_hash = bcrypt.hashpw(SEED_DOCTOR_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    data_access.write_json_file('doctors.json', [
+        {
+            'doctorID': f'doctor-{i}',
+            'firstName': 'Dr.',
+            'lastName': f'Load{i}',
+            'email': f'doctor{i}@loadtest.example.com',
+            'passwordHash': password_hash,
+            'specialization': 'General Practice'
+        }
+        for i in range(doctors)
+    ])
+    for filename in ('patients.json', 'assessments.json', 'prescriptions.json', 'assignments.json'):
+        data_access.write_json_file(filename, [])
+
+    # Per-request access logs would drown the report
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api", data_dir
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Print a human-readable report to stderr."""
+    print(f"{'endpoint':<12} {'reqs':>6} {'err%':>6} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}",
+          file=sys.stderr)
+    for endpoint, s in results['endpoints'].items():
+        print(f"{endpoint:<12} {s['requests']:>6} {s['error_rate'] * 100:>5.1f}% {s['throughput_rps']:>7.1f} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}", file=sys.stderr)
+    total = results['total']
+    print(f"{'total':<12} {total['requests']:>6} {total['error_rate'] * 100:>5.1f}% {total['throughput_rps']:>7.1f}",
+          file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Load test the Patient Assessment System API.')
+    parser.add_argument('--base-url', default='http://localhost:5000/api', help='API base URL')
+    parser.add_argument('--serve', action='store_true',
+                        help='Start the app in-process with seeded doctors and the Bedrock stub')
+    parser.add_argument('--rate', type=float, default=10.0, help='Target requests per second (default: 10)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Test duration in seconds (default: 30)')
+    parser.add_argument('--concurrency', type=int, default=32, help='Worker threads (default: 32)')
+    parser.add_argument('--users', type=int, default=10, help='Patients registered up front (default: 10)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Traffic mix (default: {DEFAULT_MIX})')
+    parser.add_argument('--doctor-email', help='Doctor account for dashboard traffic')
+    parser.add_argument('--doctor-password', help='Doctor password for dashboard traffic')
+    parser.add_argument('--stub-latency-ms', type=float, help='Bedrock stub mean latency (with --serve)')
+    parser.add_argument('--stub-failure-rate', type=float, help='Bedrock stub failure rate (with --serve)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    if args.stub_latency_ms is not None:
+        os.environ['BEDROCK_STUB_LATENCY_MS'] = str(args.stub_latency_ms)
+    if args.stub_failure_rate is not None:
+        os.environ['BEDROCK_STUB_FAILURE_RATE'] = str(args.stub_failure_rate)
+
+    server = data_dir = None
+    base_url = args.base_url
+    doctor_credentials = None
+    if args.doctor_email and args.doctor_password:
+        doctor_credentials = (args.doctor_email, args.doctor_password)
+    if args.serve:
+        server, base_url, data_dir = serve_app()
+        doctor_credentials = doctor_credentials or ('doctor0@loadtest.example.com', SEED_DOCTOR_PASSWORD)
+
+    try:
+        load_test = LoadTest(ApiClient(base_url), parse_mix(args.mix), args.rate, args.duration,
+                             args.concurrency, args.users, doctor_credentials, args.seed)
+        results = load_test.run()
+    finally:
+        if server is not None:
+            server.shutdown()
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    print_report(results)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
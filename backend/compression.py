@@ -0,0 +1,187 @@
+"""
+Response compression for API payloads.
+
+Compresses JSON and text responses with brotli or gzip, negotiated from the
+request's Accept-Encoding header. Responses get a strong ETag computed over
+the uncompressed body, which is used both to answer conditional requests
+with 304 Not Modified and to cache compressed bodies, so an unchanged
+payload is only compressed once.
+
+Brotli is used only when the optional 'brotli' package is installed.
+
+Configuration (Flask config, with environment variable defaults):
+    COMPRESS_MIN_SIZE: Minimum body size in bytes to compress (default 500)
+    COMPRESS_LEVEL: gzip level 1-9 (default 6)
+    COMPRESS_BROTLI_QUALITY: brotli quality 0-11 (default 5)
+    COMPRESS_CACHE_SIZE: Number of compressed bodies to cache (default 256)
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header into a map of coding to quality value.
+
+    Args:
+        header: Raw Accept-Encoding header value
+
+    Returns:
+        Dictionary of lowercase coding names to q-values
+    """
+    encodings = {}
+    if not header:
+        return encodings
+
+    for part in header.split(','):
+        params = part.strip().split(';')
+        coding = params[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[coding] = quality
+    return encodings
+
+
+def choose_encoding(header: Optional[str]) -> Optional[str]:
+    """
+    Choose the best supported content coding for an Accept-Encoding header.
+
+    Brotli is preferred over gzip when both are equally acceptable.
+
+    Args:
+        header: Raw Accept-Encoding header value
+
+    Returns:
+        'br', 'gzip', or None if no supported coding is acceptable
+    """
+    encodings = parse_accept_encoding(header)
+    wildcard = encodings.get('*', 0.0)
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    best = None
+    best_quality = 0.0
+    for coding in supported:
+        quality = encodings.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _CompressedBodyCache:
+    """Bounded LRU cache of compressed bodies keyed by (ETag, coding)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Tuple[str, str], body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class Compressor:
+    """Flask extension that compresses responses and manages ETags."""
+
+    def __init__(self, app: Optional[Flask] = None):
+        """Initialize the compressor, optionally binding it to an app."""
+        self.cache = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        """Register configuration defaults and the after_request hook."""
+        app.config.setdefault('COMPRESS_MIN_SIZE', int(os.getenv('COMPRESS_MIN_SIZE', '500')))
+        app.config.setdefault('COMPRESS_LEVEL', int(os.getenv('COMPRESS_LEVEL', '6')))
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', int(os.getenv('COMPRESS_BROTLI_QUALITY', '5')))
+        app.config.setdefault('COMPRESS_CACHE_SIZE', int(os.getenv('COMPRESS_CACHE_SIZE', '256')))
+        self.cache = _CompressedBodyCache(app.config['COMPRESS_CACHE_SIZE'])
+        app.after_request(self.after_request)
+        app.extensions['compressor'] = self
+
+    def compress(self, body: bytes, coding: str, config) -> bytes:
+        """Compress a body with the given coding."""
+        if coding == 'br':
+            return brotli.compress(body, quality=config['COMPRESS_BROTLI_QUALITY'])
+        return gzip.compress(body, compresslevel=config['COMPRESS_LEVEL'])
+
+    def after_request(self, response: Response) -> Response:
+        """Add an ETag, answer conditional requests and compress the body."""
+        if (
+            request.method not in ('GET', 'HEAD')
+            or response.status_code != 200
+            or response.direct_passthrough
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers
+        ):
+            return response
+
+        config = current_app.config
+
+        body = response.get_data()
+        response.vary.add('Accept-Encoding')
+
+        etag, _ = response.get_etag()
+        if etag is None:
+            etag = hashlib.sha1(body).hexdigest()
+
+        coding = None
+        if len(body) >= config['COMPRESS_MIN_SIZE']:
+            coding = choose_encoding(request.headers.get('Accept-Encoding'))
+
+        # Each coding is a distinct representation and needs its own ETag
+        representation_etag = f"{etag}-{coding}" if coding else etag
+        response.set_etag(representation_etag)
+
+        if request.if_none_match.contains(representation_etag):
+            return Response(status=304, headers={
+                'ETag': response.headers['ETag'],
+                'Vary': response.headers['Vary']
+            })
+
+        if coding is None:
+            return response
+
+        compressed = self.cache.get((etag, coding))
+        if compressed is None:
+            compressed = self.compress(body, coding, config)
+            self.cache.put((etag, coding), compressed)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = coding
+        return response
@@ -3,55 +3,319 @@ Data access utility functions for JSON-based storage.
 
 This module provides thread-safe functions for reading and writing JSON files,
 ID generation, and file locking for concurrent access safety.
+
+Each file is guarded by a reader-writer lock with writer preference, so
+concurrent reads proceed in parallel while writers are never starved.
+read_json_snapshot() goes further and serves an immutable, cached version of
+a file without taking any lock; writers swap in a new version atomically.
+
+Inserts spanning several files can be committed together with transaction().
+A committing transaction first writes a journal of its staged records, then
+replaces each file atomically, then removes the journal; recover_journals()
+finishes any transaction interrupted by a crash. The committing process holds
+an advisory lock (fcntl) on its journal, so recovery started by another
+process (e.g., a server worker starting up) skips transactions still in
+progress.
+
+Assessments, prescriptions and assignments can be hash-partitioned by
+patientID into N shard files each (see SHARD_KEYS and reshard()). Callers
+keep using the logical filename: reads combine the shards, and each write
+locks and rewrites only the shard(s) it touches, so writes for patients in
+different shards proceed in parallel. The shard count of each collection is
+recorded in a manifest in DATA_DIR; without one every collection is a
+single file.
+
+Profiling (off by default; enable with DATA_ACCESS_PROFILE=1 or
+enable_profiling()) collects per-file lock wait and hold times, bytes read
+and written, and read/parse/serialize/write durations. Query it with
+get_profile() or write it out with dump_profile().
 """
 
+import glob
 import json
 import os
+import secrets
+import tempfile
+import time
 import uuid
+import zlib
 import threading
-from typing import Any, List, Dict, Optional
-from contextlib import contextmanager
+from typing import Any, Callable, List, Dict, NamedTuple, Optional, Union
+from contextlib import contextmanager, ExitStack
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+import metrics
+from models import Record
 
 
 # Base directory for data files
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 
-# Thread lock for file access
+# Reader-writer lock per file path
 _file_locks = {}
 _locks_lock = threading.Lock()
 
+# Immutable snapshots per file path: (stat signature, tuple of records)
+_snapshots = {}
+
+# Callbacks notified after every successful write
+_change_listeners = []
+
+# Prefix of journal files written by committing transactions
+JOURNAL_PREFIX = '.journal-'
+
+# Mode of the data files (temporary files are created private to their owner)
+FILE_MODE = 0o644
+
+# Collections that can be sharded, and the field records are routed by
+SHARD_KEYS = {
+    'assessments.json': 'patientID',
+    'prescriptions.json': 'patientID',
+    'assignments.json': 'patientID',
+}
+
+# Manifest (inside DATA_DIR) recording the shard count of each sharded collection
+SHARD_MANIFEST = '.shards.json'
+
+# Layout lock per sharded collection: held shared by every access that
+# resolves shard paths, exclusively by reshard()
+_layout_locks = {}
+
+# Parsed manifests per manifest path: (stat signature, counts)
+_manifests = {}
+_manifest_lock = threading.Lock()
+
+# Combined snapshots of sharded collections: (shard snapshots, records)
+_combined_snapshots = {}
+
+# generate_id() state: last millisecond used and the counter within it
+_ID_COUNTER_BITS = 12
+_id_lock = threading.Lock()
+_id_last_ms = 0
+_id_counter = 0
+
+# Opt-in profiling: per-file timing and byte counters
+_profiling = os.getenv('DATA_ACCESS_PROFILE', '').lower() in ('1', 'true', 'yes')
+_profile_stats = {}
+_profile_lock = threading.Lock()
+
+
+class ReadWriteLock:
+    """
+    Reader-writer lock with writer preference.
+    
+    Any number of readers may hold the lock together; a writer holds it
+    alone. Once a writer is waiting, new readers queue behind it so a steady
+    stream of reads cannot starve writes. Not reentrant.
+    
+    Time spent waiting to acquire the lock is recorded in the
+    datastore_lock_wait_seconds metric under the lock's name.
+    """
+    
+    def __init__(self, name: str = ''):
+        """
+        Initialize an unlocked lock.
+        
+        Args:
+            name: Label for lock wait metrics (e.g., 'assessments.json')
+        """
+        self.name = name
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        # Acquisition times for hold-time profiling: reader thread ident -> time
+        self._read_acquired = {}
+        self._write_acquired = None
+    
+    def acquire_read(self) -> None:
+        """Acquire the lock shared, waiting while a writer holds or awaits it."""
+        started = time.perf_counter()
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+            acquired = time.perf_counter()
+            if _profiling:
+                self._read_acquired[threading.get_ident()] = acquired
+        metrics.observe('datastore_lock_wait_seconds', acquired - started, file=self.name, mode='read')
+        if _profiling:
+            _profile_timing(self.name, 'lockWaitRead', acquired - started)
+    
+    def release_read(self) -> None:
+        """Release a shared hold."""
+        with self._cond:
+            acquired = self._read_acquired.pop(threading.get_ident(), None)
+            if acquired is not None:
+                _profile_timing(self.name, 'lockHoldRead', time.perf_counter() - acquired)
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+    
+    def acquire_write(self) -> None:
+        """Acquire the lock exclusively."""
+        started = time.perf_counter()
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+            acquired = time.perf_counter()
+            self._write_acquired = acquired if _profiling else None
+        metrics.observe('datastore_lock_wait_seconds', acquired - started, file=self.name, mode='write')
+        if _profiling:
+            _profile_timing(self.name, 'lockWaitWrite', acquired - started)
+    
+    def release_write(self) -> None:
+        """Release an exclusive hold."""
+        with self._cond:
+            if self._write_acquired is not None:
+                _profile_timing(self.name, 'lockHoldWrite', time.perf_counter() - self._write_acquired)
+                self._write_acquired = None
+            self._writer = False
+            self._cond.notify_all()
+    
+    @contextmanager
+    def read_locked(self):
+        """Context manager holding the lock shared."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+    
+    @contextmanager
+    def write_locked(self):
+        """Context manager holding the lock exclusively."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
 
-def _get_file_lock(file_path: str) -> threading.Lock:
+def _get_file_lock(file_path: str) -> ReadWriteLock:
     """Get or create a lock for a specific file path."""
     with _locks_lock:
         if file_path not in _file_locks:
-            _file_locks[file_path] = threading.Lock()
+            _file_locks[file_path] = ReadWriteLock(os.path.basename(file_path))
         return _file_locks[file_path]
 
 
+def _get_layout_lock(filename: str) -> ReadWriteLock:
+    """Get or create the layout lock of a sharded collection."""
+    key = os.path.join(DATA_DIR, filename)
+    with _locks_lock:
+        if key not in _layout_locks:
+            _layout_locks[key] = ReadWriteLock(f"{filename}:layout")
+        return _layout_locks[key]
+
+
+def _read_manifest() -> Dict[str, int]:
+    """Read the shard manifest, cached until the file changes."""
+    manifest_path = os.path.join(DATA_DIR, SHARD_MANIFEST)
+    try:
+        signature = _stat_signature(manifest_path)
+    except FileNotFoundError:
+        return {}
+    cached = _manifests.get(manifest_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(manifest_path, 'r') as f:
+        counts = json.load(f)
+    _manifests[manifest_path] = (signature, counts)
+    return counts
+
+
+def shard_count(filename: str) -> int:
+    """
+    Get the number of shards a collection is stored in.
+    
+    Args:
+        filename: Name of the JSON file (e.g., 'assessments.json')
+    
+    Returns:
+        Shard count (1 for unsharded collections)
+    """
+    if filename not in SHARD_KEYS:
+        return 1
+    return _read_manifest().get(filename, 1)
+
+
+def _shard_index(value: Any, count: int) -> int:
+    """Route a shard key value to a shard; stable across processes."""
+    if count == 1 or value is None:
+        return 0
+    return zlib.crc32(str(value).encode('utf-8')) % count
+
+
+def _shard_paths(filename: str, count: int) -> List[str]:
+    """
+    Get the file paths of a collection's shards.
+    
+    A single shard is the plain data file; otherwise shard files carry their
+    index and the shard count (e.g., 'assessments.shard-3-of-8.json'), so the
+    files of two layouts never collide.
+    """
+    if count == 1:
+        return [os.path.join(DATA_DIR, filename)]
+    stem, ext = os.path.splitext(filename)
+    return [os.path.join(DATA_DIR, f"{stem}.shard-{index}-of-{count}{ext}") for index in range(count)]
+
+
+def _shard_path_for(filename: str, record: Dict[str, Any], count: int) -> str:
+    """Get the path of the shard a record belongs in."""
+    if count == 1:
+        return os.path.join(DATA_DIR, filename)
+    return _shard_paths(filename, count)[_shard_index(record.get(SHARD_KEYS[filename]), count)]
+
+
+@contextmanager
+def _collection_layout(filename: str):
+    """
+    Keep a collection's shard layout fixed while its files are accessed.
+    
+    Yields:
+        The collection's shard count
+    """
+    if filename not in SHARD_KEYS:
+        yield 1
+        return
+    with _get_layout_lock(filename).read_locked():
+        yield shard_count(filename)
+
+
 @contextmanager
 def file_lock(file_path: str, mode: str = 'r'):
     """
     Context manager for file locking to ensure thread-safe file access.
     Uses threading locks for cross-platform compatibility.
     
+    Read-only mode takes the file's lock shared; any other mode takes it
+    exclusively.
+    
     Args:
         file_path: Path to the file to lock
         mode: File open mode ('r' for read, 'r+' for read/write)
     
     Yields:
-        File object with exclusive lock
+        File object with the lock held
     """
     lock = _get_file_lock(file_path)
-    lock.acquire()
-    try:
+    held = lock.read_locked() if mode == 'r' else lock.write_locked()
+    with held:
         file_obj = open(file_path, mode)
         try:
             yield file_obj
         finally:
             file_obj.close()
-    finally:
-        lock.release()
 
 
 def read_json_file(filename: str) -> List[Dict[str, Any]]:
@@ -68,20 +332,176 @@ def read_json_file(filename: str) -> List[Dict[str, Any]]:
         FileNotFoundError: If the file doesn't exist
         json.JSONDecodeError: If the file contains invalid JSON
     """
-    file_path = os.path.join(DATA_DIR, filename)
+    with _collection_layout(filename) as count:
+        data = None
+        for file_path in _shard_paths(filename, count):
+            if os.path.exists(file_path):
+                with _get_file_lock(file_path).read_locked():
+                    records = _load_json_file(file_path)
+                if data is None:
+                    data = records
+                else:
+                    data.extend(records)
+    
+    if data is None:
+        raise FileNotFoundError(f"Data file not found: {filename}")
+    return data
+
+
+def read_json_snapshot(filename: str) -> tuple:
+    """
+    Read an immutable snapshot of a JSON file, normally without locking.
+    
+    Snapshots are cached per file and replaced atomically by every write
+    made through this module. A cached snapshot is served lock-free as long
+    as the file on disk is unchanged; otherwise the file is re-read under a
+    shared lock. The records are shared between callers and must not be
+    modified.
+    
+    For a sharded collection, the shard snapshots are combined; the shard
+    layout is checked again afterwards, so a concurrent reshard() causes a
+    retry rather than a partial result.
+    
+    Args:
+        filename: Name of the JSON file (e.g., 'assessments.json')
+    
+    Returns:
+        Tuple of records from the JSON file
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file contains invalid JSON
+    """
+    count = shard_count(filename)
+    if count == 1:
+        try:
+            return _read_file_snapshot(os.path.join(DATA_DIR, filename))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Data file not found: {filename}")
+    
+    while True:
+        parts = []
+        for file_path in _shard_paths(filename, count):
+            try:
+                parts.append(_read_file_snapshot(file_path))
+            except FileNotFoundError:
+                parts.append(None)
+        current_count = shard_count(filename)
+        if current_count == count:
+            break
+        count = current_count
+    
+    if all(part is None for part in parts):
+        raise FileNotFoundError(f"Data file not found: {filename}")
+    
+    key = os.path.join(DATA_DIR, filename)
+    cached = _combined_snapshots.get(key)
+    if cached is not None and len(cached[0]) == len(parts) and all(a is b for a, b in zip(cached[0], parts)):
+        return cached[1]
+    records = tuple(record for part in parts if part for record in part)
+    _combined_snapshots[key] = (parts, records)
+    return records
+
+
+def _read_file_snapshot(file_path: str) -> tuple:
+    """Read the cached snapshot of one file, re-reading it if it changed."""
+    signature = _stat_signature(file_path)
+    
+    snapshot = _snapshots.get(file_path)
+    if snapshot is not None and snapshot[0] == signature:
+        return snapshot[1]
+    
+    with _get_file_lock(file_path).read_locked():
+        records, signature = _load_json_version(file_path)
+        records = tuple(records)
+        _snapshots[file_path] = (signature, records)
+        return records
+
+
+def _signature_of(stat: os.stat_result) -> tuple:
+    """Identify a file version by inode, modification time and size."""
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _stat_signature(file_path: str) -> tuple:
+    return _signature_of(os.stat(file_path))
+
+
+class WriteSignature(NamedTuple):
+    """Signatures (see data_signature) of a collection just before and just after a write."""
+    before: Optional[tuple]
+    after: Optional[tuple]
+
+
+def data_signature(filename: str, missing_ok: bool = False) -> Optional[tuple]:
+    """
+    Identify the on-disk version of a collection, across all its shards.
+    
+    The signature changes whenever any shard is rewritten or the collection
+    is resharded; a missing shard is represented by None.
+    
+    Args:
+        filename: Name of the JSON file (e.g., 'assessments.json')
+        missing_ok: Return None instead of raising if no file exists
+    
+    Returns:
+        Tuple of per-shard (inode, mtime_ns, size) signatures
+    
+    Raises:
+        FileNotFoundError: If no file of the collection exists and missing_ok is False
+    """
+    return _collection_signature(filename, shard_count(filename), {}, 0, missing_ok)
+
+
+def _collection_signature(filename: str, count: int, written: Dict[str, tuple], side: int,
+                          missing_ok: bool = True) -> Optional[tuple]:
+    """
+    Combine shard signatures into a collection signature.
     
-    if not os.path.exists(file_path):
+    Args:
+        filename: Name of the JSON file
+        count: Shard count of the collection
+        written: File path -> (signature before, signature after) of the shards just written
+        side: 0 for the signatures before the write, 1 for those after it
+        missing_ok: Return None instead of raising if no file exists
+    """
+    signatures = []
+    for file_path in _shard_paths(filename, count):
+        if file_path in written:
+            signatures.append(written[file_path][side])
+            continue
+        try:
+            signatures.append(_stat_signature(file_path))
+        except FileNotFoundError:
+            signatures.append(None)
+    if all(signature is None for signature in signatures):
+        if missing_ok:
+            return None
         raise FileNotFoundError(f"Data file not found: {filename}")
+    return tuple(signatures)
+
+
+def _write_signature(filename: str, count: int, written: Dict[str, tuple]) -> WriteSignature:
+    """
+    Get the signature of a collection before and after a write.
     
-    with file_lock(file_path, 'r') as f:
-        data = json.load(f)
-        return data if isinstance(data, list) else []
+    Shards untouched by the write get one stat for both sides: if another
+    process changes one meanwhile, a listener's signature no longer matches
+    and it reloads rather than missing the change.
+    """
+    before = _collection_signature(filename, count, written, 0)
+    after = tuple(written[path][1] if path in written else signature
+                  for path, signature in zip(_shard_paths(filename, count), before or (None,) * count))
+    return WriteSignature(before, after)
 
 
 def write_json_file(filename: str, data: List[Dict[str, Any]]) -> None:
     """
     Write data to a JSON file with file locking.
     
+    Change listeners are notified with a 'replace' operation, since the
+    whole file content may have changed.
+    
     Args:
         filename: Name of the JSON file (e.g., 'patients.json')
         data: List of records to write to the file
@@ -89,42 +509,382 @@ def write_json_file(filename: str, data: List[Dict[str, Any]]) -> None:
     Raises:
         IOError: If the file cannot be written
     """
-    file_path = os.path.join(DATA_DIR, filename)
-    
+    signature = _write_json_file(filename, data)
+    _notify_change(filename, 'replace', data, signature)
+
+
+def _write_json_file(filename: str, data: List[Dict[str, Any]]) -> WriteSignature:
+    """Write data to a JSON file with file locking, without notifying listeners."""
     # Ensure data directory exists
     os.makedirs(DATA_DIR, exist_ok=True)
     
-    # Use r+ mode to lock existing file, or create new file
-    if os.path.exists(file_path):
-        with file_lock(file_path, 'r+') as f:
-            f.seek(0)
-            json.dump(data, f, indent=2)
-            f.truncate()
-    else:
-        # For new files, use write mode with lock
-        lock = _get_file_lock(file_path)
-        lock.acquire()
+    with _collection_layout(filename) as count:
+        if count == 1:
+            shards = {os.path.join(DATA_DIR, filename): data}
+        else:
+            shards = {file_path: [] for file_path in _shard_paths(filename, count)}
+            for record in data:
+                shards[_shard_path_for(filename, record, count)].append(record)
+        
+        with ExitStack() as stack:
+            for file_path in sorted(shards):
+                stack.enter_context(_get_file_lock(file_path).write_locked())
+            written = {}
+            for file_path, records in shards.items():
+                try:
+                    before = _stat_signature(file_path)
+                except FileNotFoundError:
+                    before = None
+                written[file_path] = (before, _dump_json_file(file_path, records))
+            return _write_signature(filename, count, written)
+
+
+def _load_json_file(file_path: str) -> List[Dict[str, Any]]:
+    """Load records from a JSON file; the caller must hold its lock."""
+    return _load_json_version(file_path)[0]
+
+
+def _load_json_version(file_path: str) -> tuple:
+    """Load records from a JSON file with the signature of the version read; the caller must hold its lock."""
+    name = os.path.basename(file_path)
+    started = time.perf_counter()
+    with open(file_path, 'rb') as f:
+        signature = _signature_of(os.fstat(f.fileno()))
+        raw = f.read()
+    read_done = time.perf_counter()
+    data = json.loads(raw)
+    parse_done = time.perf_counter()
+    
+    _record_stage(name, 'read', read_done - started)
+    _record_stage(name, 'parse', parse_done - read_done)
+    if _profiling:
+        _profile_bytes(name, 'bytesRead', len(raw))
+    return (data if isinstance(data, list) else [], signature)
+
+
+def _dump_json_file(file_path: str, data: Any) -> tuple:
+    """
+    Atomically replace a JSON file; the caller must hold its write lock.
+    
+    The data is written to a temporary file which then replaces the target,
+    so a crash never leaves a partially written file behind. The file's
+    snapshot is swapped for the new content.
+    
+    Returns:
+        Signature of the version written (renaming keeps inode, mtime and size)
+    """
+    name = os.path.basename(file_path)
+    started = time.perf_counter()
+    raw = json.dumps(data, indent=2).encode('utf-8')
+    serialize_done = time.perf_counter()
+    
+    # A unique name per write, so writers in other processes never share a temporary file
+    fd, temp_path = tempfile.mkstemp(prefix=f"{name}.", suffix='.tmp', dir=os.path.dirname(file_path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+            os.chmod(temp_path, FILE_MODE)
+            signature = _signature_of(os.fstat(f.fileno()))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        _remove_if_exists(temp_path)
+        raise
+    
+    _record_stage(name, 'serialize', serialize_done - started)
+    _record_stage(name, 'write', time.perf_counter() - serialize_done)
+    if _profiling:
+        _profile_bytes(name, 'bytesWritten', len(raw))
+    if isinstance(data, list):
+        _snapshots[file_path] = (signature, tuple(data))
+    return signature
+
+
+def _remove_if_exists(file_path: str) -> None:
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+def _write_journal(content: Dict[str, Any]):
+    """
+    Write a transaction journal, locked before it becomes visible.
+    
+    Returns:
+        The journal's path and its open file, which holds the lock until closed
+    """
+    fd, temp_path = tempfile.mkstemp(prefix=JOURNAL_PREFIX, suffix='.tmp', dir=DATA_DIR)
+    f = os.fdopen(fd, 'wb')
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        f.write(json.dumps(content).encode('utf-8'))
+        f.flush()
+        os.fsync(fd)
+        journal_path = os.path.join(DATA_DIR, f"{JOURNAL_PREFIX}{uuid.uuid4()}.json")
+        os.replace(temp_path, journal_path)
+    except BaseException:
+        f.close()
+        _remove_if_exists(temp_path)
+        raise
+    return journal_path, f
+
+
+def _record_stage(name: str, stage: str, seconds: float) -> None:
+    """Record a read, parse, serialize or write duration for a data file."""
+    metrics.observe('datastore_stage_duration_seconds', seconds, stage=stage, file=name)
+    if _profiling:
+        _profile_timing(name, stage, seconds)
+
+
+def _profile_entry(name: str) -> Dict[str, Any]:
+    """Get or create the profile counters for a file; caller holds _profile_lock."""
+    entry = _profile_stats.get(name)
+    if entry is None:
+        entry = _profile_stats[name] = {'bytesRead': 0, 'bytesWritten': 0, 'timings': {}}
+    return entry
+
+
+def _profile_timing(name: str, kind: str, seconds: float) -> None:
+    """Add a duration to a file's profile."""
+    with _profile_lock:
+        timings = _profile_entry(name)['timings']
+        timing = timings.get(kind)
+        if timing is None:
+            timing = timings[kind] = {'count': 0, 'totalSeconds': 0.0, 'maxSeconds': 0.0}
+        timing['count'] += 1
+        timing['totalSeconds'] += seconds
+        if seconds > timing['maxSeconds']:
+            timing['maxSeconds'] = seconds
+
+
+def _profile_bytes(name: str, kind: str, count: int) -> None:
+    """Add a byte count to a file's profile."""
+    with _profile_lock:
+        _profile_entry(name)[kind] += count
+
+
+def enable_profiling(enabled: bool = True) -> None:
+    """
+    Turn per-file profiling on or off.
+    
+    Collected data is kept when profiling is turned off; use
+    reset_profile() to clear it.
+    
+    Args:
+        enabled: Whether to collect profiling data
+    """
+    global _profiling
+    _profiling = enabled
+
+
+def profiling_enabled() -> bool:
+    """Check whether per-file profiling is on."""
+    return _profiling
+
+
+def reset_profile() -> None:
+    """Clear all collected profiling data."""
+    with _profile_lock:
+        _profile_stats.clear()
+
+
+def get_profile() -> Dict[str, Any]:
+    """
+    Get collected profiling data per data file.
+    
+    Each file reports bytesRead, bytesWritten and, per timing kind
+    (lockWaitRead, lockWaitWrite, lockHoldRead, lockHoldWrite, read, parse,
+    serialize, write), count, totalSeconds, meanSeconds and maxSeconds.
+    Files are ordered by total lock wait plus hold time, largest first, so
+    the most contended file comes first.
+    
+    Returns:
+        Dictionary with 'enabled' and 'files' (filename -> statistics)
+    """
+    with _profile_lock:
+        files = {}
+        for name, entry in _profile_stats.items():
+            timings = {}
+            for kind, timing in entry['timings'].items():
+                timings[kind] = dict(timing, meanSeconds=timing['totalSeconds'] / timing['count'])
+            files[name] = {'bytesRead': entry['bytesRead'], 'bytesWritten': entry['bytesWritten'], 'timings': timings}
+    
+    def lock_seconds(item):
+        return sum(timing['totalSeconds'] for kind, timing in item[1]['timings'].items() if kind.startswith('lock'))
+    
+    return {
+        'enabled': _profiling,
+        'files': dict(sorted(files.items(), key=lock_seconds, reverse=True))
+    }
+
+
+def dump_profile(path: str) -> Dict[str, Any]:
+    """
+    Write collected profiling data to a JSON file.
+    
+    Args:
+        path: Output file path
+    
+    Returns:
+        The profile that was written, as returned by get_profile()
+    """
+    profile = get_profile()
+    profile['dumpedAt'] = time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    return profile
+
+
+def _paths_holding(filename: str, count: int, id_field: str, id_value: str) -> List[str]:
+    """
+    Get the existing shard files of a collection that may hold a record.
+    
+    Lookups by the shard key go to one shard; other lookups check the shard
+    snapshots, so only shards holding a match are locked and rewritten.
+    
+    Raises:
+        FileNotFoundError: If no file of the collection exists
+    """
+    paths = [file_path for file_path in _shard_paths(filename, count) if os.path.exists(file_path)]
+    if not paths:
+        raise FileNotFoundError(f"Data file not found: {filename}")
+    if count == 1:
+        return paths
+    if id_field == SHARD_KEYS[filename]:
+        routed = _shard_paths(filename, count)[_shard_index(id_value, count)]
+        return [routed] if routed in paths else []
+    
+    holding = []
+    for file_path in paths:
         try:
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
-        finally:
-            lock.release()
+            snapshot = _read_file_snapshot(file_path)
+        except FileNotFoundError:
+            continue
+        if any(record.get(id_field) == id_value for record in snapshot):
+            holding.append(file_path)
+    return holding
+
+
+def add_change_listener(listener: Callable[[str, str, List[Dict[str, Any]], WriteSignature], None]) -> None:
+    """
+    Register a callback invoked after each successful write.
+    
+    The listener is called as listener(filename, operation, records, signature)
+    where operation is one of 'insert', 'update', 'delete' or 'replace'. For
+    'insert', 'update' and 'delete', records holds the affected records;
+    for 'replace' it holds the full new file content. signature holds the
+    data_signature of the collection just before and just after this write,
+    taken from the file versions read and written: a listener whose state
+    matches neither missed a write (e.g., by another process) and should
+    reload instead of applying the records.
+    
+    Args:
+        listener: Callable to notify
+    """
+    with _locks_lock:
+        if listener not in _change_listeners:
+            _change_listeners.append(listener)
+
+
+def remove_change_listener(listener: Callable[[str, str, List[Dict[str, Any]], WriteSignature], None]) -> None:
+    """
+    Unregister a callback previously added with add_change_listener.
+    
+    Args:
+        listener: Callable to remove
+    """
+    with _locks_lock:
+        if listener in _change_listeners:
+            _change_listeners.remove(listener)
+
+
+def _notify_change(filename: str, operation: str, records: List[Dict[str, Any]], signature: WriteSignature) -> None:
+    """Notify change listeners; a failing listener never fails the write."""
+    with _locks_lock:
+        listeners = list(_change_listeners)
+    for listener in listeners:
+        try:
+            listener(filename, operation, records, signature)
+        except Exception as e:
+            print(f"Warning: Change listener failed for {filename}: {e}")
 
 
 def generate_id(prefix: str = "") -> str:
     """
-    Generate a unique ID using UUID4.
+    Generate a unique, time-ordered ID in the UUIDv7 layout (RFC 9562).
+    
+    The first 48 bits are the creation time in Unix milliseconds, followed
+    by a 12-bit counter and 62 random bits, so IDs sort by creation time as
+    plain strings. Within a process IDs are strictly increasing: IDs created
+    in the same millisecond (or while the clock steps back) take the next
+    counter value. The random bits keep IDs from different processes unique.
     
     Args:
         prefix: Optional prefix for the ID (e.g., 'patient', 'assessment')
     
     Returns:
-        Unique ID string (UUID4 format with optional prefix)
+        Unique ID string (UUID format with optional prefix)
     """
-    unique_id = str(uuid.uuid4())
+    global _id_last_ms, _id_counter
+    with _id_lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _id_last_ms:
+            _id_last_ms = now_ms
+            # Random start leaves room for increments while hiding the ID rate
+            _id_counter = secrets.randbits(_ID_COUNTER_BITS - 1)
+        else:
+            _id_counter += 1
+            if _id_counter >> _ID_COUNTER_BITS:
+                # Counter exhausted within one millisecond: borrow the next one
+                _id_last_ms += 1
+                _id_counter = 0
+        value = (_id_last_ms << 80) | (0x7 << 76) | (_id_counter << 64) | (0b10 << 62) | secrets.randbits(62)
+    
+    unique_id = str(uuid.UUID(int=value))
     return f"{prefix}_{unique_id}" if prefix else unique_id
 
 
+def id_timestamp(record_id: str) -> Optional[float]:
+    """
+    Get the creation time embedded in an ID from generate_id().
+    
+    Args:
+        record_id: ID, with or without prefix
+    
+    Returns:
+        Unix timestamp in seconds, or None for IDs without a timestamp (e.g.,
+        random UUID4 IDs created by earlier versions)
+    """
+    try:
+        value = uuid.UUID(record_id.rsplit('_', 1)[-1])
+    except (AttributeError, ValueError):
+        return None
+    if value.version != 7:
+        return None
+    return (value.int >> 80) / 1000
+
+
+def min_id_at(timestamp: float) -> str:
+    """
+    Get the smallest ID generate_id() can produce at or after a time.
+    
+    IDs compare as strings in creation order, so this bounds time-range
+    lookups over ID-keyed data: ids created at or after timestamp are >=
+    min_id_at(timestamp).
+    
+    Args:
+        timestamp: Unix timestamp in seconds
+    
+    Returns:
+        Lower-bound ID string (without prefix)
+    """
+    milliseconds = max(0, int(timestamp * 1000))
+    return str(uuid.UUID(int=(milliseconds << 80) | (0x7 << 76) | (0b10 << 62)))
+
+
 def find_by_id(filename: str, id_field: str, id_value: str) -> Optional[Dict[str, Any]]:
     """
     Find a record by ID in a JSON file.
@@ -136,15 +896,17 @@ def find_by_id(filename: str, id_field: str, id_value: str) -> Optional[Dict[str
     
     Returns:
         Record dictionary if found, None otherwise
+    
+    Records come from the file's shared snapshot and must not be modified.
     """
-    data = read_json_file(filename)
+    data = read_json_snapshot(filename)
     for record in data:
         if record.get(id_field) == id_value:
             return record
     return None
 
 
-def find_all_by_field(filename: str, field: str, value: Any) -> List[Dict[str, Any]]:
+def find_all_by_field(filename: str, field: str, value: Any, include_archived: bool = False) -> List[Dict[str, Any]]:
     """
     Find all records matching a field value in a JSON file.
     
@@ -152,29 +914,101 @@ def find_all_by_field(filename: str, field: str, value: Any) -> List[Dict[str, A
         filename: Name of the JSON file (e.g., 'assessments.json')
         field: Name of the field to match (e.g., 'patientID')
         value: Value to match
+        include_archived: Also scan the file's cold archive partitions (see
+            archive); archived matches follow the live ones
     
     Returns:
         List of matching records
+    
+    Records come from the file's shared snapshot and must not be modified.
     """
-    data = read_json_file(filename)
-    return [record for record in data if record.get(field) == value]
+    try:
+        data = read_json_snapshot(filename)
+    except FileNotFoundError:
+        if not include_archived:
+            raise
+        data = ()
+    matches = [record for record in data if record.get(field) == value]
+    if include_archived:
+        # Imported here: archive builds on this module
+        import archive
+        matches = archive.merge_archived(filename, matches, archive.find_archived(filename, field, value))
+    return matches
 
 
-def add_record(filename: str, record: Dict[str, Any]) -> Dict[str, Any]:
+def find_by_date_range(filename: str, since: Optional[str] = None, until: Optional[str] = None,
+                       limit: Optional[int] = None, newest_first: bool = False,
+                       field: Optional[str] = None, value: Any = None) -> List[Dict[str, Any]]:
+    """
+    Find the records of a JSON file dated within a range, using its sorted date index.
+    
+    Only assessments (by assessmentDate) and prescriptions (by generatedDate)
+    are indexed (see date_index). Dates compare as ISO 8601 strings, so
+    bounds may be given at any precision (e.g., '2024-02').
+    
+    Args:
+        filename: Name of the JSON file (e.g., 'assessments.json')
+        since: Inclusive lower bound on the date
+        until: Exclusive upper bound on the date
+        limit: Maximum number of records to return
+        newest_first: Return the latest records first (with limit, the latest N)
+        field: Optional field the records must also match (e.g., 'patientID')
+        value: Value of field to match
+    
+    Returns:
+        Matching records in date order (an empty list if the file doesn't exist)
+    
+    Raises:
+        KeyError: If the file has no date index
+    
+    Records are shared with the index and must not be modified.
+    """
+    # Imported here: date_index builds on this module
+    import date_index
+    return date_index.get_date_index(filename).query(since, until, limit, newest_first, field, value)
+
+
+def latest_by_field(filename: str, field: str) -> Dict[Any, Dict[str, Any]]:
+    """
+    Find the latest record of a JSON file for each value of a field.
+    
+    Args:
+        filename: Name of an indexed JSON file (e.g., 'assessments.json')
+        field: Field to group by (e.g., 'patientID')
+    
+    Returns:
+        Dictionary of field value -> record with the latest date
+    
+    Raises:
+        KeyError: If the file has no date index
+    
+    Records are shared with the index and must not be modified.
+    """
+    import date_index
+    return date_index.get_date_index(filename).latest_by(field)
+
+
+def add_record(filename: str, record: Union[Dict[str, Any], Record]) -> Dict[str, Any]:
     """
     Add a new record to a JSON file.
     
     Args:
         filename: Name of the JSON file (e.g., 'patients.json')
-        record: Record dictionary to add
+        record: Record dictionary or model to add
     
     Returns:
-        The added record
+        The added record dictionary
+    
+    Raises:
+        ValueError: If a record model fails validation
+    
+    The read-modify-write runs as a single-record transaction, so concurrent
+    inserts into the same file are never lost. A single file needs no
+    journal: it is replaced atomically.
     """
-    data = read_json_file(filename)
-    data.append(record)
-    write_json_file(filename, data)
-    return record
+    with transaction() as txn:
+        added = txn.add_record(filename, record)
+    return added
 
 
 def update_record(filename: str, id_field: str, id_value: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -189,14 +1023,32 @@ def update_record(filename: str, id_field: str, id_value: str, updates: Dict[str
     
     Returns:
         Updated record if found, None otherwise
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If the update would move a record to another shard
     """
-    data = read_json_file(filename)
-    for record in data:
-        if record.get(id_field) == id_value:
-            record.update(updates)
-            write_json_file(filename, data)
-            return record
-    return None
+    with _collection_layout(filename) as count:
+        shard_key = SHARD_KEYS.get(filename)
+        for file_path in _paths_holding(filename, count, id_field, id_value):
+            with _get_file_lock(file_path).write_locked():
+                data, before = _load_json_version(file_path)
+                for record in data:
+                    if record.get(id_field) == id_value:
+                        if (count > 1 and shard_key in updates
+                                and _shard_index(updates[shard_key], count) != _shard_index(record.get(shard_key), count)):
+                            raise ValueError(f"Cannot change {shard_key} of a sharded record")
+                        record.update(updates)
+                        written = {file_path: (before, _dump_json_file(file_path, data))}
+                        break
+                else:
+                    continue
+            break
+        else:
+            return None
+        signature = _write_signature(filename, count, written)
+    _notify_change(filename, 'update', [record], signature)
+    return record
 
 
 def delete_record(filename: str, id_field: str, id_value: str) -> bool:
@@ -210,12 +1062,306 @@ def delete_record(filename: str, id_field: str, id_value: str) -> bool:
     
     Returns:
         True if record was deleted, False if not found
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    deleted = []
+    written = {}
+    with _collection_layout(filename) as count:
+        for file_path in _paths_holding(filename, count, id_field, id_value):
+            with _get_file_lock(file_path).write_locked():
+                data, before = _load_json_version(file_path)
+                matches = [record for record in data if record.get(id_field) == id_value]
+                if matches:
+                    kept = [record for record in data if record.get(id_field) != id_value]
+                    written[file_path] = (before, _dump_json_file(file_path, kept))
+                    deleted.extend(matches)
+        if not deleted:
+            return False
+        signature = _write_signature(filename, count, written)
+    _notify_change(filename, 'delete', deleted, signature)
+    return True
+
+
+def extract_records(filename: str, predicate: Callable[[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
+    """
+    Remove and return every record of a JSON file matching a predicate.
+    
+    Each shard is rewritten only if it holds a match. Change listeners are
+    notified with a 'delete' of the removed records.
+    
+    Args:
+        filename: Name of the JSON file (e.g., 'assessments.json')
+        predicate: Called with each record; True removes it
+    
+    Returns:
+        Removed records
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    removed = []
+    written = {}
+    with _collection_layout(filename) as count:
+        paths = [file_path for file_path in _shard_paths(filename, count) if os.path.exists(file_path)]
+        if not paths:
+            raise FileNotFoundError(f"Data file not found: {filename}")
+        for file_path in paths:
+            with _get_file_lock(file_path).write_locked():
+                kept = []
+                matches = []
+                data, before = _load_json_version(file_path)
+                for record in data:
+                    (matches if predicate(record) else kept).append(record)
+                if matches:
+                    written[file_path] = (before, _dump_json_file(file_path, kept))
+                    removed.extend(matches)
+        if not removed:
+            return removed
+        signature = _write_signature(filename, count, written)
+    _notify_change(filename, 'delete', removed, signature)
+    return removed
+
+
+class Transaction:
+    """
+    Unit of work that stages inserts across files and commits them together.
+    
+    Staged records are written with one read and one write per file (per
+    shard, for sharded collections: only the shards receiving records are
+    locked), under one lock acquisition sequence (sorted by path, so
+    concurrent transactions cannot deadlock).
+    
+    Each file is replaced atomically, but the files are replaced one after
+    another: concurrent readers may see some of the staged records before
+    the rest. When more than one file is written, a journal is kept during
+    the commit, so recover_journals() completes a commit interrupted by a
+    crash and, after recovery, either all staged records are stored or none.
     """
-    data = read_json_file(filename)
-    original_length = len(data)
-    data = [record for record in data if record.get(id_field) != id_value]
     
-    if len(data) < original_length:
-        write_json_file(filename, data)
-        return True
-    return False
+    def __init__(self):
+        """Initialize an empty transaction."""
+        self._inserts = {}
+        self._committed = False
+    
+    def add_record(self, filename: str, record: Union[Dict[str, Any], Record]) -> Dict[str, Any]:
+        """
+        Stage a new record for insertion into a JSON file.
+        
+        Record models are validated and converted to dictionaries here.
+        
+        Args:
+            filename: Name of the JSON file (e.g., 'assessments.json')
+            record: Record dictionary or model to add
+        
+        Returns:
+            The staged record dictionary
+        
+        Raises:
+            RuntimeError: If the transaction was already committed
+            ValueError: If a record model fails validation
+        """
+        if self._committed:
+            raise RuntimeError("Transaction already committed")
+        if isinstance(record, Record):
+            record.validate()
+            record = record.to_dict()
+        self._inserts.setdefault(filename, []).append(record)
+        return record
+    
+    def rollback(self) -> None:
+        """Discard all staged records."""
+        self._inserts = {}
+    
+    def commit(self) -> None:
+        """
+        Commit all staged records.
+        
+        Missing files are created. Change listeners are notified with one
+        'insert' per file, in the order the files were first staged, once
+        all files have been written.
+        
+        Raises:
+            RuntimeError: If the transaction was already committed
+            IOError: If a file cannot be written (a multi-file commit's journal is kept for recovery)
+        """
+        if self._committed:
+            raise RuntimeError("Transaction already committed")
+        self._committed = True
+        if not self._inserts:
+            return
+        
+        os.makedirs(DATA_DIR, exist_ok=True)
+        with ExitStack() as stack:
+            counts = {filename: stack.enter_context(_collection_layout(filename)) for filename in sorted(self._inserts)}
+            staged = {}
+            for filename, records in self._inserts.items():
+                for record in records:
+                    staged.setdefault(_shard_path_for(filename, record, counts[filename]), []).append(record)
+            
+            for file_path in sorted(staged):
+                stack.enter_context(_get_file_lock(file_path).write_locked())
+            
+            current = {}
+            written = {}
+            for file_path in staged:
+                current[file_path], before = _load_json_version(file_path) if os.path.exists(file_path) else ([], None)
+                written[file_path] = (before, None)
+            
+            # A single file is replaced atomically, so only multi-file commits need a journal.
+            # Journal entries name the files written, i.e. shards of sharded collections
+            journal_path = None
+            if len(staged) > 1:
+                journal_path, journal = _write_journal({
+                    os.path.basename(file_path): {'baseLength': len(current[file_path]), 'records': records}
+                    for file_path, records in staged.items()
+                })
+                stack.callback(journal.close)
+            
+            for file_path, records in staged.items():
+                written[file_path] = (written[file_path][0], _dump_json_file(file_path, current[file_path] + records))
+            
+            if journal_path is not None:
+                # Removed before its lock is released, so recovery never replays a committed journal
+                os.remove(journal_path)
+            signatures = {filename: _write_signature(filename, counts[filename], written) for filename in self._inserts}
+        
+        for filename, records in self._inserts.items():
+            _notify_change(filename, 'insert', records, signatures[filename])
+
+
+@contextmanager
+def transaction():
+    """
+    Context manager that commits staged inserts on successful exit.
+    
+    If the block raises, nothing is written.
+    
+    Yields:
+        Transaction to stage records on
+    """
+    txn = Transaction()
+    try:
+        yield txn
+    except BaseException:
+        txn.rollback()
+        raise
+    txn.commit()
+
+
+def recover_journals() -> int:
+    """
+    Finish transactions interrupted by a crash.
+    
+    Each journal records, per file, the file length before the commit and
+    the records to append. Files still at their original length get the
+    records appended; files already written are left alone. Called at
+    application startup; journals of transactions still committing in
+    another process are locked by it and skipped, and journals removed by
+    another process meanwhile are ignored.
+    
+    Returns:
+        Number of journals recovered
+    """
+    recovered = 0
+    for journal_path in sorted(glob.glob(os.path.join(DATA_DIR, f"{JOURNAL_PREFIX}*.json"))):
+        try:
+            f = open(journal_path, 'rb')
+        except FileNotFoundError:
+            continue
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                try:
+                    # The committer removes its journal before unlocking it
+                    if os.stat(journal_path).st_ino != os.fstat(f.fileno()).st_ino:
+                        continue
+                except FileNotFoundError:
+                    continue
+            try:
+                journal = json.loads(f.read())
+            except ValueError:
+                # Journal itself was not fully written, so no data file was touched
+                _remove_if_exists(journal_path)
+                continue
+            if fcntl is None:
+                # Nothing to hold: close it so it can be removed (Windows cannot remove open files)
+                f.close()
+            
+            for filename, entry in journal.items():
+                file_path = os.path.join(DATA_DIR, filename)
+                with _get_file_lock(file_path).write_locked():
+                    data = _load_json_file(file_path) if os.path.exists(file_path) else []
+                    if len(data) == entry['baseLength']:
+                        _dump_json_file(file_path, data + entry['records'])
+                    elif len(data) != entry['baseLength'] + len(entry['records']):
+                        print(f"Warning: Cannot recover {filename} from {journal_path}: unexpected length")
+            
+            _remove_if_exists(journal_path)
+            recovered += 1
+        finally:
+            f.close()
+    return recovered
+
+
+def reshard(filename: str, count: int) -> int:
+    """
+    Redistribute a sharded collection over a new number of shards.
+    
+    All records are routed to new shard files, the manifest is switched to
+    the new count, then the old files are removed. Readers and writers of the
+    collection wait while it runs; a crash before the manifest switch leaves
+    the old layout in use, and one after it only leaves stale old files.
+    
+    Args:
+        filename: Name of a collection listed in SHARD_KEYS
+        count: New shard count (1 for a single file)
+    
+    Returns:
+        Number of records redistributed
+    
+    Raises:
+        ValueError: If the collection cannot be sharded or count < 1
+    """
+    if filename not in SHARD_KEYS:
+        raise ValueError(f"Collection cannot be sharded: {filename}")
+    if count < 1:
+        raise ValueError("Shard count must be at least 1")
+    
+    os.makedirs(DATA_DIR, exist_ok=True)
+    key_field = SHARD_KEYS[filename]
+    with _get_layout_lock(filename).write_locked():
+        old_paths = _shard_paths(filename, shard_count(filename))
+        new_paths = _shard_paths(filename, count)
+        with ExitStack() as stack:
+            for file_path in sorted(set(old_paths) | set(new_paths)):
+                stack.enter_context(_get_file_lock(file_path).write_locked())
+            
+            records = []
+            for file_path in old_paths:
+                if os.path.exists(file_path):
+                    records.extend(_load_json_file(file_path))
+            
+            shards = [[] for _ in new_paths]
+            for record in records:
+                shards[_shard_index(record.get(key_field), count)].append(record)
+            for file_path, shard in zip(new_paths, shards):
+                _dump_json_file(file_path, shard)
+            
+            with _manifest_lock:
+                manifest = dict(_read_manifest())
+                if count == 1:
+                    manifest.pop(filename, None)
+                else:
+                    manifest[filename] = count
+                _dump_json_file(os.path.join(DATA_DIR, SHARD_MANIFEST), manifest)
+            
+            for file_path in old_paths:
+                if file_path not in new_paths and os.path.exists(file_path):
+                    os.remove(file_path)
+                    _snapshots.pop(file_path, None)
+    return len(records)
@@ -0,0 +1,216 @@
+"""
+Sorted date indexes over the assessment and prescription data files.
+
+A DateIndex keeps a data file's records ordered by their date field
+(assessmentDate, generatedDate) in parallel sorted lists, so time-range
+queries bisect to the range and only touch the records they return. The
+index is built once from the data file and then follows data_access change
+notifications; like the record_store mirrors, it is rebuilt whenever the
+file's signature shows it was changed some other way (e.g., by another
+server process).
+
+Query it through data_access.find_by_date_range() and
+data_access.latest_by_field(). The outbreak detector backfills its window
+from it on start-up.
+
+Dates are compared as ISO 8601 strings, so a bound may be given at any
+precision ('2024-02', '2024-02-01', '2024-02-01T10:00:00'). Records without
+a date sort before all others and never fall inside a range with a lower
+bound.
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, List, Optional
+
+import data_access
+
+
+# Indexed data files: filename -> (date field, key field)
+DATE_FIELDS = {
+    'assessments.json': ('assessmentDate', 'assessmentID'),
+    'prescriptions.json': ('generatedDate', 'prescriptionID'),
+}
+
+
+class DateIndex:
+    """Records of one data file in ascending date order, kept current via change notifications."""
+
+    def __init__(self, filename: str, date_field: str, key_field: str):
+        """
+        Initialize an empty index; it is built on first access.
+
+        Args:
+            filename: Name of the JSON file (e.g., 'assessments.json')
+            date_field: Field records are ordered by (e.g., 'assessmentDate')
+            key_field: Record ID field, used to apply updates and deletes
+        """
+        self.filename = filename
+        self.date_field = date_field
+        self.key_field = key_field
+        self._lock = threading.RLock()
+        self._loaded_dir = None
+        # Signature of the data file version the index matches
+        self._signature = None
+        self._dates = []
+        self._records = []
+        # Indexed date of each record key, to locate the old version on update
+        self._date_by_key = {}
+        data_access.add_change_listener(self._on_change)
+
+    def query(self, since: Optional[str] = None, until: Optional[str] = None, limit: Optional[int] = None,
+              newest_first: bool = False, field: Optional[str] = None, value: Any = None) -> List[Dict[str, Any]]:
+        """
+        Get the records dated within a range.
+
+        Records with equal dates keep the order they were stored in (reversed
+        when newest_first is set). Records are shared with the index and must
+        not be modified.
+
+        Args:
+            since: Inclusive lower bound on the date
+            until: Exclusive upper bound on the date
+            limit: Maximum number of records to return
+            newest_first: Return the latest records first (with limit, the latest N)
+            field: Optional field the records must also match (e.g., 'patientID')
+            value: Value of field to match
+
+        Returns:
+            Matching records in date order
+        """
+        with self._lock:
+            self._ensure_current()
+            dates = self._dates
+            low = bisect.bisect_left(dates, since) if since is not None else 0
+            high = bisect.bisect_left(dates, until) if until is not None else len(dates)
+            if since is not None:
+                # Undated records sort first as '' and are never inside a bounded range
+                low = max(low, bisect.bisect_right(dates, ''))
+            positions = range(high - 1, low - 1, -1) if newest_first else range(low, high)
+
+            results = []
+            if limit is not None and limit <= 0:
+                return results
+            for position in positions:
+                record = self._records[position]
+                if field is not None and record.get(field) != value:
+                    continue
+                results.append(record)
+                if limit is not None and len(results) >= limit:
+                    break
+            return results
+
+    def latest_by(self, field: str) -> Dict[Any, Dict[str, Any]]:
+        """
+        Get the latest record for each value of a field.
+
+        Args:
+            field: Field to group by (e.g., 'patientID')
+
+        Returns:
+            Dictionary of field value -> latest record carrying it
+        """
+        with self._lock:
+            self._ensure_current()
+            latest = {}
+            for record in reversed(self._records):
+                group = record.get(field)
+                if group is not None and group not in latest:
+                    latest[group] = record
+            return latest
+
+    def invalidate(self) -> None:
+        """Drop the index so it is rebuilt from the data file on next access."""
+        with self._lock:
+            self._loaded_dir = None
+            self._signature = None
+            self._dates = []
+            self._records = []
+            self._date_by_key = {}
+
+    def _ensure_current(self) -> None:
+        """Rebuild the index if it is missing or the data file changed behind its back."""
+        data_dir = data_access.DATA_DIR
+        signature = data_access.data_signature(self.filename, missing_ok=True)
+        if self._loaded_dir == data_dir and signature == self._signature:
+            return
+        # Signature taken before reading: a write racing the read forces another rebuild
+        self._loaded_dir = data_dir
+        self._signature = signature
+        try:
+            records = data_access.read_json_snapshot(self.filename) if signature is not None else ()
+        except FileNotFoundError:
+            records = ()
+        # sorted() is stable, so equal dates keep file order
+        ordered = sorted(records, key=self._date_of)
+        self._dates = [self._date_of(record) for record in ordered]
+        self._records = ordered
+        self._date_by_key = {record.get(self.key_field): date for record, date in zip(ordered, self._dates)}
+
+    def _date_of(self, record: Dict[str, Any]) -> str:
+        date = record.get(self.date_field)
+        return date if isinstance(date, str) else ''
+
+    def _insert(self, record: Dict[str, Any]) -> None:
+        date = self._date_of(record)
+        position = bisect.bisect_right(self._dates, date)
+        self._dates.insert(position, date)
+        self._records.insert(position, record)
+        self._date_by_key[record.get(self.key_field)] = date
+
+    def _remove(self, key: Any) -> None:
+        """Remove the indexed version of a record, located by its key among records of its date."""
+        date = self._date_by_key.pop(key, None)
+        if date is None:
+            return
+        position = bisect.bisect_left(self._dates, date)
+        while position < len(self._dates) and self._dates[position] == date:
+            if self._records[position].get(self.key_field) == key:
+                del self._dates[position]
+                del self._records[position]
+                return
+            position += 1
+
+    def _on_change(self, filename: str, operation: str, records: List[Dict[str, Any]],
+                   signature: data_access.WriteSignature) -> None:
+        """Apply a data_access change notification to the index."""
+        if filename != self.filename:
+            return
+        with self._lock:
+            if self._loaded_dir is None:
+                return
+            if self._loaded_dir == data_access.DATA_DIR and self._signature == signature.after:
+                # Already built from the file this write produced
+                return
+            # Another signature than the one before the write means a write the index has not seen
+            if (operation == 'replace' or self._loaded_dir != data_access.DATA_DIR
+                    or self._signature != signature.before
+                    or any(record.get(self.key_field) is None for record in records)):
+                self.invalidate()
+                return
+            for record in records:
+                if operation in ('update', 'delete'):
+                    self._remove(record[self.key_field])
+                if operation in ('insert', 'update'):
+                    self._insert(record)
+            self._signature = signature.after
+
+
+# Indexes per data file
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_date_index(filename: str) -> DateIndex:
+    """
+    Get or create the date index for a data file listed in DATE_FIELDS.
+
+    Raises:
+        KeyError: If the file has no date index
+    """
+    with _indexes_lock:
+        index = _indexes.get(filename)
+        if index is None:
+            date_field, key_field = DATE_FIELDS[filename]
+            index = _indexes[filename] = DateIndex(filename, date_field, key_field)
+        return index
@@ -0,0 +1,399 @@
+"""
+Patient history service backed by a materialized per-patient timeline.
+
+The timeline keeps each patient's assessments sorted by assessment date,
+with prescriptions indexed by assessment, as compact slotted records (see
+models). It is kept up to date incrementally through data_access change
+notifications, so history endpoints only convert the patient's records to
+entries, without any join or sort per request. Writes by other processes
+(e.g., other server workers) send no notification; they are detected from
+the data files' signatures (data_access.data_signature), checked on every
+access, and force a rebuild.
+
+With HISTORY_STORE=mmap the view is not kept in memory; each request instead
+looks up the patient's assessments and their prescriptions in memory-mapped,
+indexed mirrors of the data files (see record_store), so memory use stays
+flat however large the files grow.
+
+Both stores cover the live data files only; records moved to the cold
+archive (see archive) are added per request when include_archived is set.
+"""
+
+import bisect
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import archive
+import data_access
+import record_store
+from models import Assessment, Prescription
+
+
+HISTORY_STORES = ('memory', 'mmap')
+
+ASSESSMENTS_FILE = 'assessments.json'
+PRESCRIPTIONS_FILE = 'prescriptions.json'
+
+SOURCE_FILES = (ASSESSMENTS_FILE, PRESCRIPTIONS_FILE)
+
+
+def build_prescription_summary(prescription: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the prescription part of a history entry."""
+    return {
+        'prescriptionID': prescription.get('prescriptionID'),
+        'medications': prescription.get('medications', []),
+        'instructions': prescription.get('instructions'),
+        'generatedDate': prescription.get('generatedDate')
+    }
+
+
+def build_history_entry(assessment: Dict[str, Any], prescription: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build a history entry from an assessment and its optional prescription.
+
+    Args:
+        assessment: Assessment record
+        prescription: Prescription record for the assessment, if any
+
+    Returns:
+        History entry dictionary as returned by the history endpoints
+    """
+    history_entry = {
+        'assessmentID': assessment.get('assessmentID'),
+        'assessmentDate': assessment.get('assessmentDate'),
+        'weight': assessment.get('weight'),
+        'weightUnit': assessment.get('weightUnit'),
+        'height': assessment.get('height'),
+        'heightUnit': assessment.get('heightUnit'),
+        'age': assessment.get('age'),
+        'symptoms': assessment.get('symptoms', []),
+        'followUpResponses': assessment.get('followUpResponses', [])
+    }
+
+    if prescription is not None:
+        history_entry['prescription'] = build_prescription_summary(prescription)
+
+    return history_entry
+
+
+def in_date_range(date: Optional[str], since: Optional[str] = None, until: Optional[str] = None) -> bool:
+    """
+    Check whether an ISO 8601 date string lies in [since, until).
+
+    Bounds compare as strings, so they may be given at any precision;
+    a missing date is only in an unbounded-below range.
+    """
+    date = date or ''
+    if since is not None and (not date or date < since):
+        return False
+    return until is None or date < until
+
+
+def build_entry_from_records(assessment: Assessment, prescription: Optional[Prescription] = None) -> Dict[str, Any]:
+    """
+    Build a history entry from record models; same result as build_history_entry.
+
+    Args:
+        assessment: Assessment record
+        prescription: Prescription record for the assessment, if any
+
+    Returns:
+        History entry dictionary as returned by the history endpoints
+    """
+    history_entry = {
+        'assessmentID': assessment.assessment_id,
+        'assessmentDate': assessment.assessment_date,
+        'weight': assessment.weight,
+        'weightUnit': assessment.weight_unit,
+        'height': assessment.height,
+        'heightUnit': assessment.height_unit,
+        'age': assessment.age,
+        'symptoms': assessment.symptoms if assessment.symptoms is not None else [],
+        'followUpResponses': assessment.follow_up_responses if assessment.follow_up_responses is not None else []
+    }
+
+    if prescription is not None:
+        history_entry['prescription'] = {
+            'prescriptionID': prescription.prescription_id,
+            'medications': prescription.medications if prescription.medications is not None else [],
+            'instructions': prescription.instructions,
+            'generatedDate': prescription.generated_date
+        }
+
+    return history_entry
+
+
+class _Timeline:
+    """
+    Assessments of one patient, kept in ascending assessment date order.
+
+    Ties are inserted before existing assessments so that newest_first() keeps
+    insertion order for equal dates, like a stable descending sort.
+    """
+
+    __slots__ = ('dates', 'assessments')
+
+    def __init__(self):
+        self.dates = []
+        self.assessments = []
+
+    def insert(self, assessment: Assessment) -> None:
+        date = assessment.assessment_date or ''
+        index = bisect.bisect_left(self.dates, date)
+        self.dates.insert(index, date)
+        self.assessments.insert(index, assessment)
+
+    def newest_first(self, since: Optional[str] = None, until: Optional[str] = None,
+                     limit: Optional[int] = None) -> List[Assessment]:
+        """Get assessments dated in [since, until), newest first, at most limit of them."""
+        dates = self.dates
+        low = bisect.bisect_left(dates, since) if since is not None else 0
+        if since is not None:
+            # Undated assessments sort first as '' and never fall inside a bounded range
+            low = max(low, bisect.bisect_right(dates, ''))
+        high = bisect.bisect_left(dates, until) if until is not None else len(dates)
+        if limit is not None:
+            low = max(low, high - max(limit, 0))
+        return self.assessments[low:high][::-1]
+
+
+class HistoryService:
+    """Materialized view of patient histories (assessments joined with prescriptions)."""
+
+    def __init__(self, store: Optional[str] = None):
+        """
+        Initialize an empty view; it is loaded on first access.
+
+        Args:
+            store: 'memory' for the materialized view or 'mmap' for indexed
+                lookups per request (defaults to the HISTORY_STORE environment
+                variable, then 'memory')
+
+        Raises:
+            ValueError: If the store is unknown
+        """
+        store = store or os.getenv('HISTORY_STORE', 'memory')
+        if store not in HISTORY_STORES:
+            raise ValueError(f"Unknown history store: {store}")
+        self.store = store
+        self._lock = threading.RLock()
+        self._loaded_dir = None
+        # Signatures of the data files the view matches
+        self._signatures = {}
+        self._timelines = {}
+        self._assessments = {}
+        self._prescriptions = {}
+        data_access.add_change_listener(self._on_change)
+
+    def get_history(self, patient_id: str, include_archived: bool = False, since: Optional[str] = None,
+                    until: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get a patient's history, most recent assessment first.
+
+        Entries are built per call, and only for the assessments returned,
+        so callers may modify them freely.
+
+        Args:
+            patient_id: Patient ID
+            include_archived: Also include assessments from the cold archive
+            since: Inclusive lower bound on the assessment date (ISO 8601, any precision)
+            until: Exclusive upper bound on the assessment date
+            limit: Maximum number of entries (the most recent ones)
+
+        Returns:
+            List of history entries (empty if the patient has no assessments)
+        """
+        if self.store == 'mmap':
+            entries = self._lookup_history(patient_id, since, until, limit)
+        else:
+            with self._lock:
+                self._ensure_loaded()
+                timeline = self._timelines.get(patient_id)
+                prescriptions = self._prescriptions
+                entries = [build_entry_from_records(assessment, prescriptions.get(assessment.assessment_id))
+                           for assessment in timeline.newest_first(since, until, limit)] if timeline else []
+
+        if include_archived:
+            archived = self._archived_history(patient_id, {entry['assessmentID'] for entry in entries}, since, until)
+            if archived:
+                entries = sorted(entries + archived, key=lambda entry: entry.get('assessmentDate') or '', reverse=True)
+                if limit is not None:
+                    entries = entries[:limit]
+        return entries
+
+    def count_assessments(self, patient_id: str, include_archived: bool = False) -> int:
+        """
+        Count all of a patient's assessments, regardless of the range or limit of a history request.
+
+        Args:
+            patient_id: Patient ID
+            include_archived: Also count assessments from the cold archive
+
+        Returns:
+            Number of assessments
+        """
+        if self.store == 'mmap':
+            live = record_store.get_mirror(ASSESSMENTS_FILE).find('patientID', patient_id)
+            live_ids = [assessment.get('assessmentID') for assessment in live]
+        else:
+            with self._lock:
+                self._ensure_loaded()
+                timeline = self._timelines.get(patient_id)
+                live_ids = [assessment.assessment_id for assessment in timeline.assessments] if timeline else []
+
+        count = len(live_ids)
+        if include_archived:
+            archived_ids = {assessment.get('assessmentID')
+                            for assessment in archive.find_archived(ASSESSMENTS_FILE, 'patientID', patient_id)}
+            count += len(archived_ids - set(live_ids))
+        return count
+
+    def preload(self) -> None:
+        """Build the view now rather than on first access (e.g., during warm-up)."""
+        if self.store == 'mmap':
+            self._lookup_history('')
+            return
+        with self._lock:
+            self._ensure_loaded()
+
+    @staticmethod
+    def _lookup_history(patient_id: str, since: Optional[str] = None, until: Optional[str] = None,
+                        limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Build a patient's history from the indexed mirrors, newest first."""
+        assessments = [assessment for assessment in record_store.get_mirror(ASSESSMENTS_FILE).find('patientID', patient_id)
+                       if in_date_range(assessment.get('assessmentDate'), since, until)]
+        assessments.sort(key=lambda assessment: assessment.get('assessmentDate') or '', reverse=True)
+        if limit is not None:
+            assessments = assessments[:max(limit, 0)]
+
+        prescriptions = record_store.get_mirror(PRESCRIPTIONS_FILE)
+        entries = []
+        for assessment in assessments:
+            # The most recently stored prescription wins, as in the materialized view
+            matches = prescriptions.find('assessmentID', assessment.get('assessmentID'))
+            entries.append(build_history_entry(assessment, matches[-1] if matches else None))
+        return entries
+
+    @staticmethod
+    def _archived_history(patient_id: str, live_ids: set, since: Optional[str] = None,
+                          until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Build history entries for a patient's archived assessments not in live_ids."""
+        assessments = [assessment for assessment in archive.find_archived(ASSESSMENTS_FILE, 'patientID', patient_id,
+                                                                          since, until)
+                       if assessment.get('assessmentID') not in live_ids
+                       and in_date_range(assessment.get('assessmentDate'), since, until)]
+        if not assessments:
+            return []
+
+        # The most recently stored prescription wins, and live ones win over archived copies
+        prescriptions = {}
+        for prescription in archive.find_archived(PRESCRIPTIONS_FILE, 'patientID', patient_id):
+            prescriptions[prescription.get('assessmentID')] = prescription
+        try:
+            live_prescriptions = data_access.find_all_by_field(PRESCRIPTIONS_FILE, 'patientID', patient_id)
+        except FileNotFoundError:
+            live_prescriptions = []
+        for prescription in live_prescriptions:
+            prescriptions[prescription.get('assessmentID')] = prescription
+        return [build_history_entry(assessment, prescriptions.get(assessment.get('assessmentID')))
+                for assessment in assessments]
+
+    def invalidate(self) -> None:
+        """Drop the view so it is rebuilt from the data files on next access."""
+        with self._lock:
+            self._loaded_dir = None
+            self._timelines = {}
+            self._assessments = {}
+            self._prescriptions = {}
+
+    def _ensure_loaded(self) -> None:
+        """Build the view from the data files if it is missing or stale."""
+        data_dir = data_access.DATA_DIR
+        signatures = {filename: data_access.data_signature(filename, missing_ok=True) for filename in SOURCE_FILES}
+        if self._loaded_dir == data_dir and self._signatures == signatures:
+            return
+
+        self.invalidate()
+        assessments = self._read_or_empty(ASSESSMENTS_FILE)
+        prescriptions = self._read_or_empty(PRESCRIPTIONS_FILE)
+
+        for prescription in prescriptions:
+            self._set_prescription(prescription)
+
+        for assessment in assessments:
+            self._add_assessment(assessment)
+
+        # The directory and signatures read at the start, so a switch or write mid-load forces a reload
+        self._loaded_dir = data_dir
+        self._signatures = signatures
+
+    @staticmethod
+    def _read_or_empty(filename: str) -> List[Dict[str, Any]]:
+        try:
+            return data_access.read_json_file(filename)
+        except FileNotFoundError:
+            return []
+
+    def _add_assessment(self, data: Dict[str, Any]) -> None:
+        assessment = Assessment.from_dict(data)
+        self._assessments[assessment.assessment_id] = assessment
+        timeline = self._timelines.get(assessment.patient_id)
+        if timeline is None:
+            timeline = self._timelines[assessment.patient_id] = _Timeline()
+        timeline.insert(assessment)
+
+    def _set_prescription(self, data: Dict[str, Any]) -> None:
+        prescription = Prescription.from_dict(data)
+        if prescription.assessment_id:
+            self._prescriptions[prescription.assessment_id] = prescription
+
+    def _on_change(self, filename: str, operation: str, records: List[Dict[str, Any]],
+                   signature: data_access.WriteSignature) -> None:
+        """Apply a data_access change notification to the view."""
+        if filename not in (ASSESSMENTS_FILE, PRESCRIPTIONS_FILE) or self.store != 'memory':
+            return
+
+        with self._lock:
+            if self._loaded_dir is None:
+                return
+            if self._loaded_dir == data_access.DATA_DIR and self._signatures.get(filename) == signature.after:
+                # Already loaded from the files this write produced
+                return
+            # Another signature than the one before the write means a write the view has not seen
+            if (operation not in ('insert', 'update') or self._loaded_dir != data_access.DATA_DIR
+                    or self._signatures.get(filename) != signature.before):
+                self.invalidate()
+                return
+
+            try:
+                if filename == PRESCRIPTIONS_FILE:
+                    for prescription in records:
+                        self._set_prescription(prescription)
+                elif operation == 'insert':
+                    for assessment in records:
+                        # A concurrent load may already have picked it up from disk
+                        if assessment.get('assessmentID') not in self._assessments:
+                            self._add_assessment(assessment)
+                else:
+                    # Updated assessments may move in the timeline; rebuild
+                    self.invalidate()
+                    return
+            except Exception:
+                self.invalidate()
+                raise
+            self._signatures[filename] = signature.after
+
+
+# Global instance
+_history_service = None
+_history_service_lock = threading.Lock()
+
+
+def get_history_service() -> HistoryService:
+    """Get or create the history service instance."""
+    global _history_service
+    with _history_service_lock:
+        if _history_service is None:
+            _history_service = HistoryService()
+        return _history_service
@@ -0,0 +1,202 @@
+"""
+Lightweight latency metrics with a Prometheus text-format exporter.
+
+Histograms use fixed cumulative buckets and a per-histogram lock, so an
+observation costs a bisect and a few additions; cheap enough to leave
+enabled in production. Set METRICS_ENABLED=0 to turn recording off.
+
+Recorded metrics:
+    http_request_duration_seconds{method, route, status}
+    datastore_stage_duration_seconds{stage, file}  (read, parse, serialize, write)
+    datastore_lock_wait_seconds{file, mode}
+    bcrypt_duration_seconds{operation}  (hash, check)
+    jwt_verify_duration_seconds
+    bedrock_stage_duration_seconds{stage}  (invoke, parse)
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+
+# Bucket upper bounds in seconds, from 100us to 30s
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+HELP = {
+    'http_request_duration_seconds': 'HTTP request latency by route.',
+    'datastore_stage_duration_seconds': 'JSON data store read, parse, serialize and write time.',
+    'datastore_lock_wait_seconds': 'Time spent waiting for data file locks.',
+    'bcrypt_duration_seconds': 'Password hashing and verification time.',
+    'jwt_verify_duration_seconds': 'JWT verification time.',
+    'bedrock_stage_duration_seconds': 'Bedrock invoke and response parse time.',
+}
+
+ENABLED = os.getenv('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one observation in seconds."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[list, float, int]:
+        """Return (per-bucket counts, sum, count) consistently."""
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def _labels_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def get_histogram(name: str, **labels) -> Histogram:
+    """Get or create the histogram for a metric name and label set."""
+    key = (name, _labels_key(labels))
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(key, Histogram())
+    return histogram
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """
+    Record a duration for a metric.
+
+    Args:
+        name: Metric name (e.g., 'bcrypt_duration_seconds')
+        seconds: Duration to record
+        **labels: Label values for the series
+    """
+    if ENABLED:
+        get_histogram(name, **labels).observe(seconds)
+
+
+@contextmanager
+def timer(name: str, **labels):
+    """
+    Context manager recording the duration of its block.
+
+    The duration is recorded even if the block raises.
+
+    Args:
+        name: Metric name
+        **labels: Label values for the series
+    """
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def reset() -> None:
+    """Drop all recorded metrics."""
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def render_prometheus() -> str:
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Returns:
+        Metrics text (version 0.0.4)
+    """
+    with _histograms_lock:
+        items = sorted(_histograms.items())
+
+    lines = []
+    current_name = None
+    for (name, labels), histogram in items:
+        if name != current_name:
+            current_name = name
+            lines.append(f'# HELP {name} {HELP.get(name, name)}')
+            lines.append(f'# TYPE {name} histogram')
+
+        counts, total, count = histogram.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(histogram.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{_format_labels(labels, (("le", repr(bound)),))} {cumulative}')
+        lines.append(f'{name}_bucket{_format_labels(labels, (("le", "+Inf"),))} {count}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {total!r}')
+        lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app) -> None:
+    """
+    Record per-route request latency and expose GET /api/metrics.
+
+    Call before registering other after_request hooks, so the recorded
+    status is the one finally sent.
+
+    Args:
+        app: Flask application
+    """
+    # Imported here so storage modules can record metrics without Flask
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.teardown_request
+    def _record_request_latency(exc=None):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = g.pop('metrics_status', 500 if exc is not None else 0)
+        observe('http_request_duration_seconds', time.perf_counter() - started,
+                method=request.method, route=rule, status=status)
+
+    @app.after_request
+    def _remember_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics_endpoint():
+        return Response(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
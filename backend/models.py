@@ -0,0 +1,246 @@
+"""
+Compact record models for the JSON data files.
+
+Each model is a __slots__ class, so a record held in memory costs a fixed
+set of attribute slots instead of a per-record dict with its own key table.
+from_dict() and to_dict() convert to and from the JSON representation using
+the camelCase keys of the data files; keys a model does not know are kept in
+'extra' so nothing is lost on a round trip. Attributes that are None are
+left out of to_dict().
+
+from_dict() does not validate, since records read from the data files are
+trusted; call validate() on records built from user input.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+
+class Record:
+    """Base class for slotted record models."""
+
+    __slots__ = ('extra',)
+
+    # (attribute name, JSON key) pairs, in JSON output order
+    FIELDS: Tuple[Tuple[str, str], ...] = ()
+
+    # Attributes that must be set for validate() to pass
+    REQUIRED: Tuple[str, ...] = ()
+
+    # JSON key of the record ID
+    KEY = ''
+
+    def __init__(self, extra: Optional[Dict[str, Any]] = None, **values):
+        """
+        Initialize a record from attribute values; missing attributes are None.
+
+        Args:
+            extra: JSON keys not covered by FIELDS
+            **values: Attribute values by attribute name
+
+        Raises:
+            TypeError: If an unknown attribute is given
+        """
+        for attribute, _ in self.FIELDS:
+            setattr(self, attribute, values.pop(attribute, None))
+        if values:
+            raise TypeError(f"Unknown {type(self).__name__} fields: {', '.join(sorted(values))}")
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Record':
+        """
+        Build a record from its JSON representation.
+
+        Args:
+            data: Record dictionary as stored in the data files
+
+        Returns:
+            Record instance
+        """
+        record = cls.__new__(cls)
+        for attribute, key in cls.FIELDS:
+            setattr(record, attribute, data.get(key))
+        extra = None
+        if len(data) > len(cls.FIELDS) or any(key not in cls._KEYS for key in data):
+            extra = {key: value for key, value in data.items() if key not in cls._KEYS} or None
+        record.extra = extra
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the record to its JSON representation.
+
+        Returns:
+            Record dictionary as stored in the data files
+        """
+        data = {}
+        for attribute, key in self.FIELDS:
+            value = getattr(self, attribute)
+            if value is not None:
+                data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def validate(self) -> None:
+        """
+        Check that required fields are set.
+
+        Raises:
+            ValueError: If a required field is missing
+        """
+        missing = [key for attribute, key in self.FIELDS if attribute in self.REQUIRED and getattr(self, attribute) is None]
+        if missing:
+            raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    @property
+    def key(self) -> Optional[str]:
+        """The record ID."""
+        return getattr(self, self._KEY_ATTRIBUTE)
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.key!r})"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._KEYS = frozenset(key for _, key in cls.FIELDS)
+        cls._KEY_ATTRIBUTE = next((attribute for attribute, key in cls.FIELDS if key == cls.KEY), 'extra')
+
+
+class Patient(Record):
+    """Registered patient."""
+
+    __slots__ = ('patient_id', 'first_name', 'last_name', 'email', 'password_hash', 'registration_date')
+
+    FIELDS = (
+        ('patient_id', 'patientID'),
+        ('first_name', 'firstName'),
+        ('last_name', 'lastName'),
+        ('email', 'email'),
+        ('password_hash', 'passwordHash'),
+        ('registration_date', 'registrationDate'),
+    )
+    REQUIRED = ('patient_id', 'first_name', 'last_name', 'email', 'password_hash')
+    KEY = 'patientID'
+
+
+class Doctor(Record):
+    """Doctor who reviews assessments."""
+
+    __slots__ = ('doctor_id', 'first_name', 'last_name', 'email', 'password_hash', 'specialization')
+
+    FIELDS = (
+        ('doctor_id', 'doctorID'),
+        ('first_name', 'firstName'),
+        ('last_name', 'lastName'),
+        ('email', 'email'),
+        ('password_hash', 'passwordHash'),
+        ('specialization', 'specialization'),
+    )
+    REQUIRED = ('doctor_id', 'first_name', 'last_name', 'email')
+    KEY = 'doctorID'
+
+
+class Assessment(Record):
+    """Health assessment submitted by a patient."""
+
+    __slots__ = ('assessment_id', 'patient_id', 'weight', 'weight_unit', 'height', 'height_unit', 'age',
+                 'symptoms', 'symptom_ids', 'follow_up_responses', 'assessment_date')
+
+    FIELDS = (
+        ('assessment_id', 'assessmentID'),
+        ('patient_id', 'patientID'),
+        ('weight', 'weight'),
+        ('weight_unit', 'weightUnit'),
+        ('height', 'height'),
+        ('height_unit', 'heightUnit'),
+        ('age', 'age'),
+        ('symptoms', 'symptoms'),
+        ('symptom_ids', 'symptomIDs'),
+        ('follow_up_responses', 'followUpResponses'),
+        ('assessment_date', 'assessmentDate'),
+    )
+    REQUIRED = ('assessment_id', 'patient_id', 'weight', 'weight_unit', 'height', 'height_unit', 'age',
+                'symptoms', 'assessment_date')
+    KEY = 'assessmentID'
+
+    def validate(self) -> None:
+        """
+        Check required fields, units and value ranges.
+
+        Raises:
+            ValueError: If the assessment is invalid
+        """
+        super().validate()
+        if self.weight <= 0 or self.height <= 0 or self.age <= 0:
+            raise ValueError("Weight, height, and age must be positive numbers")
+        if self.weight_unit not in ('kg', 'lbs'):
+            raise ValueError('Weight unit must be "kg" or "lbs"')
+        if self.height_unit not in ('cm', 'inches'):
+            raise ValueError('Height unit must be "cm" or "inches"')
+        if not isinstance(self.symptoms, list) or not self.symptoms:
+            raise ValueError("Symptoms must be a non-empty list")
+
+
+class Prescription(Record):
+    """Prescription generated for an assessment, possibly revised by a doctor."""
+
+    __slots__ = ('prescription_id', 'assessment_id', 'patient_id', 'medications', 'instructions',
+                 'generated_date', 'generated_by', 'last_modified_by', 'last_modified_date')
+
+    FIELDS = (
+        ('prescription_id', 'prescriptionID'),
+        ('assessment_id', 'assessmentID'),
+        ('patient_id', 'patientID'),
+        ('medications', 'medications'),
+        ('instructions', 'instructions'),
+        ('generated_date', 'generatedDate'),
+        ('generated_by', 'generatedBy'),
+        ('last_modified_by', 'lastModifiedBy'),
+        ('last_modified_date', 'lastModifiedDate'),
+    )
+    REQUIRED = ('prescription_id', 'assessment_id', 'patient_id', 'medications', 'instructions')
+    KEY = 'prescriptionID'
+
+    def validate(self) -> None:
+        """
+        Check required fields and the medications list.
+
+        Raises:
+            ValueError: If the prescription is invalid
+        """
+        super().validate()
+        if not isinstance(self.medications, list):
+            raise ValueError("Medications must be a list")
+
+
+class Assignment(Record):
+    """Assignment of an assessment to a doctor."""
+
+    __slots__ = ('assignment_id', 'assessment_id', 'patient_id', 'doctor_id', 'doctor_name', 'token_id',
+                 'assignment_date')
+
+    FIELDS = (
+        ('assignment_id', 'assignmentID'),
+        ('assessment_id', 'assessmentID'),
+        ('patient_id', 'patientID'),
+        ('doctor_id', 'doctorID'),
+        ('doctor_name', 'doctorName'),
+        ('token_id', 'tokenID'),
+        ('assignment_date', 'assignmentDate'),
+    )
+    REQUIRED = ('assignment_id', 'assessment_id', 'patient_id', 'doctor_id')
+    KEY = 'assignmentID'
+
+
+# Model of each data file
+MODELS = {
+    'patients.json': Patient,
+    'doctors.json': Doctor,
+    'assessments.json': Assessment,
+    'prescriptions.json': Prescription,
+    'assignments.json': Assignment,
+}
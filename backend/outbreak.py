@@ -0,0 +1,286 @@
+"""
+Streaming detection of symptom spikes (e.g., a fever cluster).
+
+New assessments are counted as they are stored, through data_access change
+notifications; the data files are never rescanned. Counts are kept per
+time bucket (one hour) in a ring covering the detection window plus the
+baseline period before it. Each bucket holds a count-min sketch of symptom
+counts, so memory is fixed however many distinct symptoms appear: a
+symptom's count over any run of buckets is the minimum, across sketch
+rows, of its summed counters, which never undercounts and overcounts only
+through hash collisions with other symptoms.
+
+Whenever an assessment is counted, each of its symptoms is compared with
+its baseline: the expected window count is the symptom's hourly rate over
+the baseline period times the window length, and a symptom alerts when its
+window count reaches OUTBREAK_MIN_COUNT and exceeds the expectation by
+OUTBREAK_THRESHOLD standard deviations (Poisson). Alerts are dropped once
+the condition no longer holds.
+
+On start-up, get_spike_detector() backfills the ring with the stored
+assessments dated within the window and baseline period, read in date order
+through the sorted date index (data_access.find_by_date_range), so a restart
+keeps the baseline. No alerts are raised until the counted assessments span
+at least a day of baseline.
+
+Configuration (environment variables):
+    OUTBREAK_WINDOW_HOURS: Detection window in hours (default 24)
+    OUTBREAK_BASELINE_DAYS: Baseline period before the window, in days (default 7)
+    OUTBREAK_MIN_COUNT: Minimum window count for an alert (default 5)
+    OUTBREAK_THRESHOLD: Standard deviations above the baseline for an alert (default 3)
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import data_access
+
+
+ASSESSMENTS_FILE = 'assessments.json'
+
+BUCKET_SECONDS = 3600
+
+# Count-min sketch dimensions (rows, counters per row)
+SKETCH_DEPTH = 4
+SKETCH_WIDTH = 1024
+
+# Baseline buckets that must have been observed before alerts are raised
+MIN_BASELINE_BUCKETS = 24
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    """Get the POSIX time of an ISO 8601 date, or None if it is not one."""
+    if not isinstance(value, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _bucket_iso(bucket: int) -> str:
+    return datetime.fromtimestamp(bucket * BUCKET_SECONDS, timezone.utc).isoformat()
+
+
+class SpikeDetector:
+    """Rolling per-symptom counts in count-min sketches, compared against a baseline."""
+
+    def __init__(self, window_hours: Optional[int] = None, baseline_days: Optional[int] = None,
+                 min_count: Optional[int] = None, threshold: Optional[float] = None):
+        """
+        Initialize an empty detector and start counting new assessments.
+
+        Args:
+            window_hours: Detection window in hours (defaults to OUTBREAK_WINDOW_HOURS, then 24)
+            baseline_days: Baseline period in days (defaults to OUTBREAK_BASELINE_DAYS, then 7)
+            min_count: Minimum window count for an alert (defaults to OUTBREAK_MIN_COUNT, then 5)
+            threshold: Standard deviations above the baseline for an alert
+                (defaults to OUTBREAK_THRESHOLD, then 3)
+        """
+        self.window_buckets = window_hours or int(os.getenv('OUTBREAK_WINDOW_HOURS', '24'))
+        self.baseline_buckets = 24 * (baseline_days or int(os.getenv('OUTBREAK_BASELINE_DAYS', '7')))
+        self.min_count = min_count or int(os.getenv('OUTBREAK_MIN_COUNT', '5'))
+        self.threshold = threshold or float(os.getenv('OUTBREAK_THRESHOLD', '3'))
+        self._lock = threading.Lock()
+        size = self.window_buckets + self.baseline_buckets
+        self._sketches = np.zeros((size, SKETCH_DEPTH, SKETCH_WIDTH), np.int32)
+        self._totals = np.zeros(size, np.int64)
+        self._first_bucket = None
+        self._last_bucket = None
+        self._alerts = {}
+        data_access.add_change_listener(self._on_change)
+
+    def record(self, symptoms: List[Any], timestamp: Optional[float] = None) -> None:
+        """
+        Count one assessment's symptoms and update the alerts they affect.
+
+        Assessments older than the baseline period are ignored.
+
+        Args:
+            symptoms: Symptoms of the assessment
+            timestamp: POSIX time of the assessment (defaults to now)
+        """
+        bucket = int((time.time() if timestamp is None else timestamp) // BUCKET_SECONDS)
+        terms = list(dict.fromkeys(str(symptom).strip().lower() for symptom in symptoms))
+        terms = [term for term in terms if term]
+        with self._lock:
+            self._advance(bucket)
+            if bucket <= self._last_bucket - len(self._totals):
+                return
+            slot = bucket % len(self._totals)
+            self._totals[slot] += 1
+            rows = np.arange(SKETCH_DEPTH)
+            for term in terms:
+                self._sketches[slot, rows, self._columns(term)] += 1
+            for term in terms:
+                self._evaluate(term)
+
+    def backfill(self, now: Optional[float] = None) -> int:
+        """
+        Count the stored assessments dated within the window and baseline period.
+
+        Args:
+            now: POSIX time ending the window (defaults to now)
+
+        Returns:
+            Number of assessments counted
+        """
+        end = int((time.time() if now is None else now) // BUCKET_SECONDS) + 1
+        # Stored dates are UTC; without an offset the bounds compare correctly as strings
+        since, until = (datetime.fromtimestamp(bucket * BUCKET_SECONDS, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+                        for bucket in (end - len(self._totals), end))
+        counted = 0
+        for record in data_access.find_by_date_range(ASSESSMENTS_FILE, since=since, until=until):
+            symptoms = record.get('symptoms')
+            timestamp = _timestamp(record.get('assessmentDate'))
+            if isinstance(symptoms, list) and timestamp is not None:
+                self.record(symptoms, timestamp)
+                counted += 1
+        return counted
+
+    def alerts(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Get the symptoms currently spiking.
+
+        Args:
+            now: POSIX time to evaluate at (defaults to now)
+
+        Returns:
+            Alerts, highest score first, each with symptom, windowCount,
+            expectedCount, score and detectedAt
+        """
+        with self._lock:
+            self._advance(int((time.time() if now is None else now) // BUCKET_SECONDS))
+            for symptom in list(self._alerts):
+                self._evaluate(symptom)
+            alerts = [dict(alert) for alert in self._alerts.values()]
+        alerts.sort(key=lambda alert: alert['score'], reverse=True)
+        return alerts
+
+    def window_count(self, symptom: str, now: Optional[float] = None) -> int:
+        """
+        Get the estimated count of a symptom in the detection window.
+
+        Args:
+            symptom: Symptom to count
+            now: POSIX time ending the window (defaults to now)
+
+        Returns:
+            Estimated number of assessments with the symptom (never an undercount)
+        """
+        with self._lock:
+            self._advance(int((time.time() if now is None else now) // BUCKET_SECONDS))
+            return self._count(str(symptom).strip().lower(), self._window_slots())
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get the current alerts with the detector's coverage.
+
+        Args:
+            now: POSIX time to evaluate at (defaults to now)
+
+        Returns:
+            Dictionary with windowHours, baselineHours (observed so far, up to
+            the baseline period), windowAssessments and alerts
+        """
+        alerts = self.alerts(now)
+        with self._lock:
+            return {
+                'windowHours': self.window_buckets,
+                'baselineHours': len(self._baseline_slots()),
+                'windowAssessments': int(self._totals[self._window_slots()].sum()),
+                'alerts': alerts,
+            }
+
+    @staticmethod
+    def _columns(term: str) -> np.ndarray:
+        """Sketch counter of a term in each row, from independent 16-bit slices of one hash."""
+        digest = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=2 * SKETCH_DEPTH).digest(), 'little')
+        return np.array([(digest >> (16 * row)) % SKETCH_WIDTH for row in range(SKETCH_DEPTH)])
+
+    def _advance(self, bucket: int) -> None:
+        """Move the ring forward to a bucket, clearing the buckets it reuses."""
+        if self._last_bucket is None:
+            self._first_bucket = self._last_bucket = bucket
+            return
+        if bucket <= self._last_bucket:
+            return
+        size = len(self._totals)
+        for stale in range(self._last_bucket + 1, min(bucket, self._last_bucket + size) + 1):
+            self._sketches[stale % size] = 0
+            self._totals[stale % size] = 0
+        self._last_bucket = bucket
+
+    def _window_slots(self) -> np.ndarray:
+        buckets = np.arange(self._last_bucket - self.window_buckets + 1, self._last_bucket + 1)
+        return buckets % len(self._totals)
+
+    def _baseline_slots(self) -> np.ndarray:
+        end = self._last_bucket - self.window_buckets + 1
+        start = max(end - self.baseline_buckets, self._first_bucket)
+        return np.arange(start, end) % len(self._totals) if start < end else np.zeros(0, np.int64)
+
+    def _count(self, term: str, slots: np.ndarray) -> int:
+        if not slots.size:
+            return 0
+        cells = self._sketches[slots[:, None], np.arange(SKETCH_DEPTH), self._columns(term)]
+        return int(cells.sum(axis=0).min())
+
+    def _evaluate(self, symptom: str) -> None:
+        """Raise, refresh or drop the alert of a symptom."""
+        baseline_slots = self._baseline_slots()
+        window_count = self._count(symptom, self._window_slots())
+        if len(baseline_slots) < MIN_BASELINE_BUCKETS or window_count < self.min_count:
+            self._alerts.pop(symptom, None)
+            return
+        expected = self._count(symptom, baseline_slots) * self.window_buckets / len(baseline_slots)
+        score = (window_count - expected) / math.sqrt(max(expected, 1.0))
+        if score < self.threshold:
+            self._alerts.pop(symptom, None)
+            return
+        previous = self._alerts.get(symptom)
+        self._alerts[symptom] = {
+            'symptom': symptom,
+            'windowCount': window_count,
+            'expectedCount': round(expected, 2),
+            'score': round(score, 2),
+            'detectedAt': previous['detectedAt'] if previous else _bucket_iso(self._last_bucket),
+        }
+
+    def _on_change(self, filename: str, operation: str, records: List[Dict[str, Any]],
+                   signature: data_access.WriteSignature) -> None:
+        """Count newly stored assessments."""
+        if filename != ASSESSMENTS_FILE or operation != 'insert':
+            return
+        for record in records:
+            symptoms = record.get('symptoms')
+            if isinstance(symptoms, list):
+                self.record(symptoms, _timestamp(record.get('assessmentDate')))
+
+
+# Global instance
+_spike_detector = None
+_spike_detector_lock = threading.Lock()
+
+
+def get_spike_detector() -> SpikeDetector:
+    """Get or create the spike detector instance."""
+    global _spike_detector
+    with _spike_detector_lock:
+        if _spike_detector is None:
+            _spike_detector = SpikeDetector()
+            try:
+                _spike_detector.backfill()
+            except Exception as e:
+                print(f"Warning: Could not backfill symptom counts: {e}")
+        return _spike_detector
@@ -0,0 +1,519 @@
+"""
+Memory-mapped, offset-indexed record store.
+
+Records are kept one per line in a JSON Lines file that is only ever
+appended to: an update appends the new version and a delete appends a
+tombstone. An in-memory index maps each record key to the offset of its
+latest line, and each secondary field value to the keys carrying it. A
+lookup slices the needed lines out of a read-only memory map and decodes
+only those, so the memory used per lookup does not grow with the file.
+
+The index is checkpointed to a sidecar file ('<file>.idx'). On open the
+checkpoint is loaded and only lines appended after it are scanned. The
+file is compacted once superseded lines outnumber live records.
+
+Several processes (e.g., server workers) may share a store. Every
+operation holds an advisory lock on '<file>.lock' (exclusive for writes,
+shared for lookups) and first catches up with the file: lines appended by
+another process are indexed, and a file rewritten by another process
+(compaction or rebuild) is reopened from its checkpoint. Locking needs
+fcntl; without it (e.g., on Windows) a store must not be shared between
+processes.
+
+IndexedMirror keeps such a store in sync with one of the JSON data files
+through data_access change notifications. The JSON files stay the source
+of truth; a mirror is rebuilt whenever it cannot tell that it is current.
+"""
+
+import json
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+import data_access
+
+
+INDEX_VERSION = 1
+
+# Key of tombstone lines marking a deleted record
+TOMBSTONE_FIELD = '__deleted__'
+
+# Mutations between index checkpoints
+CHECKPOINT_EVERY = 1000
+
+# Superseded lines tolerated before compacting (and at least this many)
+COMPACT_MIN_GARBAGE = 1000
+
+# Mirrored data files: filename -> (key field, secondary index fields)
+MIRRORED_FILES = {
+    'assessments.json': ('assessmentID', ('patientID',)),
+    'prescriptions.json': ('prescriptionID', ('assessmentID', 'patientID')),
+}
+
+# Directory (inside DATA_DIR) holding mirrors and their indexes
+MIRROR_DIR = '.index'
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    return json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class RecordStore:
+    """Append-only JSON Lines file with a key index and secondary indexes."""
+
+    def __init__(self, path: str, key_field: str, index_fields: Iterable[str] = (), meta: Any = None):
+        """
+        Open a store, creating an empty one if the file does not exist.
+
+        Args:
+            path: Path of the JSON Lines file
+            key_field: Field uniquely identifying a record
+            index_fields: Fields to index for find()
+            meta: Initial value of the caller-defined metadata kept in the checkpoint
+        """
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.key_field = key_field
+        self.index_fields = tuple(index_fields)
+        self.meta = meta
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._mmap = None
+        self._mapped_size = 0
+        self._mutations = 0
+        # Inode of the file the index describes; another process replacing the file changes it
+        self._inode = None
+        self._reset_index()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._locked(exclusive=True):
+            pass
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _reset_index(self) -> None:
+        self._offsets = {}
+        self._secondary = {field: {} for field in self.index_fields}
+        self._garbage = 0
+        self._indexed_size = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest version of a record by key.
+
+        Args:
+            key: Value of the key field
+
+        Returns:
+            Decoded record, or None if absent
+        """
+        with self._locked():
+            offset = self._offsets.get(key)
+            return None if offset is None else self._read_at(offset)
+
+    def find(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        """
+        Find all records whose indexed field equals a value.
+
+        Args:
+            field: Key field or one of the index fields
+            value: Value to match
+
+        Returns:
+            Matching records in first-insertion order
+
+        Raises:
+            KeyError: If the field is not indexed
+        """
+        if field == self.key_field:
+            record = self.get(value)
+            return [record] if record is not None else []
+        with self._locked():
+            keys = self._secondary[field].get(value, {})
+            return [self._read_at(self._offsets[key]) for key in keys]
+
+    def put(self, record: Dict[str, Any]) -> None:
+        """Insert or replace a record (by its key field)."""
+        self.put_many([record])
+
+    def put_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Insert or replace several records with a single append."""
+        with self._locked(exclusive=True):
+            lines = [(record, _encode(record)) for record in records]
+            if not lines:
+                return
+            offset = self._indexed_size
+            with open(self.path, 'ab') as f:
+                f.write(b''.join(line for _, line in lines))
+            for record, line in lines:
+                self._index_record(record, offset)
+                offset += len(line)
+            self._indexed_size = offset
+            self._after_mutation(len(lines))
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete a record by key.
+
+        Returns:
+            True if the record existed
+        """
+        with self._locked(exclusive=True):
+            if key not in self._offsets:
+                return False
+            line = _encode({TOMBSTONE_FIELD: key})
+            with open(self.path, 'ab') as f:
+                f.write(line)
+            self._unindex(key)
+            self._garbage += 2
+            self._indexed_size += len(line)
+            self._after_mutation(1)
+            return True
+
+    def replace_all(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Replace the whole store content, rewriting the file compactly."""
+        # Later duplicates win but keep the position of the first occurrence
+        latest = {}
+        for record in records:
+            latest[record[self.key_field]] = record
+        
+        with self._locked(exclusive=True):
+            self._close_map()
+            self._reset_index()
+            temp_path = f"{self.path}.tmp"
+            offset = 0
+            with open(temp_path, 'wb') as f:
+                for record in latest.values():
+                    line = _encode(record)
+                    f.write(line)
+                    self._index_record(record, offset)
+                    offset += len(line)
+            os.replace(temp_path, self.path)
+            self._inode = os.stat(self.path).st_ino
+            self._indexed_size = offset
+            self.checkpoint()
+
+    def compact(self) -> None:
+        """Rewrite the file with only the live version of each record."""
+        with self._locked(exclusive=True):
+            records = [self._read_at(offset) for offset in self._offsets.values()]
+            self.replace_all(records)
+
+    def checkpoint(self) -> None:
+        """Write the index to the sidecar file."""
+        with self._locked(exclusive=True):
+            index = {
+                'version': INDEX_VERSION,
+                'keyField': self.key_field,
+                'indexFields': list(self.index_fields),
+                'size': self._indexed_size,
+                'garbage': self._garbage,
+                'meta': self.meta,
+                'offsets': self._offsets,
+                'secondary': {field: {value: list(keys) for value, keys in values.items()}
+                              for field, values in self._secondary.items()}
+            }
+            temp_path = f"{self.index_path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(index, f, separators=(',', ':'))
+            os.replace(temp_path, self.index_path)
+            self._mutations = 0
+
+    def close(self) -> None:
+        """Checkpoint the index and release the memory map and lock file."""
+        with self._lock:
+            # A store whose file was removed (e.g., with its data directory) has nothing to checkpoint
+            if os.path.exists(self.path):
+                self.checkpoint()
+            self._close_map()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False):
+        """
+        Hold the thread lock and the file lock, catching up with other processes' writes first.
+
+        Nested calls reuse the outermost lock, so a shared-locked operation
+        must not call an exclusive one.
+        """
+        with self._lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            if fcntl is not None:
+                if self._lock_file is None:
+                    self._lock_file = open(f"{self.path}.lock", 'a+b')
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._lock_depth = 1
+            try:
+                self._sync(exclusive)
+                yield
+            finally:
+                self._lock_depth = 0
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _sync(self, exclusive: bool) -> None:
+        """Bring the index up to date with the file, which another process may have changed."""
+        if exclusive and not os.path.exists(self.path):
+            open(self.path, 'wb').close()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._indexed_size:
+            # New, or rewritten by another process: start over from its checkpoint
+            self._close_map()
+            self._reset_index()
+            self._inode = stat.st_ino
+            self._load_index(truncate=exclusive)
+        elif stat.st_size > self._indexed_size:
+            self._scan_from(self._indexed_size, truncate=exclusive)
+
+    def _index_record(self, record: Dict[str, Any], offset: int) -> None:
+        key = record.get(TOMBSTONE_FIELD)
+        if key is not None:
+            self._unindex(key)
+            self._garbage += 2
+            return
+
+        key = record[self.key_field]
+        previous = None
+        if key in self._offsets:
+            previous = self._read_at(self._offsets[key])
+            self._garbage += 1
+        self._offsets[key] = offset
+        for field in self.index_fields:
+            value = record.get(field)
+            if previous is not None:
+                if previous.get(field) == value:
+                    continue  # Unchanged value keeps its place in the index
+                self._unindex_value(field, previous.get(field), key)
+            if value is not None:
+                self._secondary[field].setdefault(value, {})[key] = None
+
+    def _unindex(self, key: str) -> None:
+        offset = self._offsets.pop(key, None)
+        if offset is not None:
+            self._unindex_secondary(key, self._read_at(offset))
+
+    def _unindex_secondary(self, key: str, record: Dict[str, Any]) -> None:
+        for field in self.index_fields:
+            self._unindex_value(field, record.get(field), key)
+
+    def _unindex_value(self, field: str, value: Any, key: str) -> None:
+        keys = self._secondary[field].get(value)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._secondary[field][value]
+
+    def _after_mutation(self, count: int) -> None:
+        self._mutations += count
+        if self._garbage > max(COMPACT_MIN_GARBAGE, len(self._offsets)):
+            self.compact()
+        elif self._mutations >= CHECKPOINT_EVERY:
+            self.checkpoint()
+
+    def _read_at(self, offset: int) -> Dict[str, Any]:
+        """Decode the line starting at offset."""
+        if offset >= self._mapped_size:
+            self._remap()
+        end = self._mmap.find(b'\n', offset)
+        if end == -1:
+            # The line was completed after the file was mapped
+            self._remap()
+            end = self._mmap.find(b'\n', offset)
+        return json.loads(self._mmap[offset:end if end != -1 else self._mapped_size])
+
+    def _remap(self) -> None:
+        self._close_map()
+        size = os.path.getsize(self.path)
+        if size:
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped_size = size
+
+    def _close_map(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._mapped_size = 0
+
+    def _load_index(self, truncate: bool) -> None:
+        """Load the checkpoint if it matches, then index lines appended since."""
+        size = os.path.getsize(self.path)
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if (index['version'] != INDEX_VERSION or index['keyField'] != self.key_field
+                    or index['indexFields'] != list(self.index_fields) or index['size'] > size):
+                raise ValueError("Index does not match the store")
+            self._offsets = index['offsets']
+            self._secondary = {field: {value: dict.fromkeys(keys) for value, keys in values.items()}
+                               for field, values in index['secondary'].items()}
+            self._garbage = index['garbage']
+            self._indexed_size = index['size']
+            self.meta = index.get('meta')
+        except (OSError, ValueError, KeyError):
+            self._reset_index()
+
+        if self._indexed_size < size:
+            self._scan_from(self._indexed_size, truncate)
+
+    def _scan_from(self, offset: int, truncate: bool) -> None:
+        """
+        Index every complete line from offset to the end of the file.
+
+        An incomplete final line is left by a writer that crashed, since
+        appends hold the exclusive lock; it is only cut off under the
+        exclusive lock (truncate), before the next append.
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Torn final write
+                self._index_record(json.loads(line), offset)
+                offset += len(line)
+        if truncate and offset < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+        self._indexed_size = offset
+
+
+class IndexedMirror:
+    """
+    RecordStore copy of a JSON data file, kept current via change notifications.
+
+    The mirror records the data file's signature (data_access.data_signature,
+    covering every shard) after each change it applies; if the files on disk
+    have a different signature (e.g., a file was written outside data_access,
+    the collection was resharded, or the data directory changed), the mirror
+    is rebuilt from the JSON data on next access.
+    """
+
+    def __init__(self, filename: str, key_field: str, index_fields: Tuple[str, ...]):
+        """
+        Initialize the mirror; the store is opened on first access.
+
+        Args:
+            filename: Mirrored data file (e.g., 'assessments.json')
+            key_field: Field uniquely identifying a record
+            index_fields: Fields to index
+        """
+        self.filename = filename
+        self.key_field = key_field
+        self.index_fields = index_fields
+        self._lock = threading.RLock()
+        self._store = None
+        self._store_dir = None
+        data_access.add_change_listener(self._on_change)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a record by key, or None."""
+        with self._lock:
+            store = self._ensure_current()
+            return store.get(key) if store else None
+
+    def find(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        """Find records by an indexed field, in insertion order."""
+        with self._lock:
+            store = self._ensure_current()
+            return store.find(field, value) if store else []
+
+    @staticmethod
+    def _meta(signature: Optional[tuple]) -> Optional[List[Any]]:
+        """Convert a data_access signature to the JSON form stored as the store's meta."""
+        if signature is None:
+            return None
+        return [list(shard) if shard else None for shard in signature]
+
+    def _source_signature(self) -> Optional[List[Any]]:
+        return self._meta(data_access.data_signature(self.filename, missing_ok=True))
+
+    def _open_store(self) -> RecordStore:
+        data_dir = data_access.DATA_DIR
+        if self._store is None or self._store_dir != data_dir:
+            if self._store is not None:
+                self._store.close()
+            path = os.path.join(data_dir, MIRROR_DIR, self.filename.replace('.json', '.jsonl'))
+            self._store = RecordStore(path, self.key_field, self.index_fields)
+            self._store_dir = data_dir
+        return self._store
+
+    def _ensure_current(self) -> Optional[RecordStore]:
+        """Open the store, rebuilding it if the data file changed behind its back."""
+        signature = self._source_signature()
+        if signature is None:
+            return None
+        store = self._open_store()
+        if store.meta != signature:
+            try:
+                records = data_access.read_json_file(self.filename)
+            except FileNotFoundError:
+                return None
+            # Signature taken before reading: a write racing the read forces another rebuild
+            store.meta = signature
+            store.replace_all(r for r in records if r.get(self.key_field) is not None)
+        return store
+
+    def _on_change(self, filename: str, operation: str, records: List[Dict[str, Any]],
+                   signature: data_access.WriteSignature) -> None:
+        """Apply a data_access change notification to the mirror."""
+        if filename != self.filename:
+            return
+        with self._lock:
+            if self._store is None or self._store_dir != data_access.DATA_DIR:
+                return
+            meta = self._store.meta
+            if meta == self._meta(signature.after):
+                # Already rebuilt from the file this write produced
+                return
+            if meta != self._meta(signature.before) and operation != 'replace':
+                # The mirror missed a write; it is rebuilt on next access
+                return
+            keyed = [r for r in records if r.get(self.key_field) is not None]
+            self._store.meta = self._meta(signature.after)
+            if operation in ('insert', 'update'):
+                self._store.put_many(keyed)
+            elif operation == 'delete':
+                for record in keyed:
+                    self._store.delete(record[self.key_field])
+            else:
+                self._store.replace_all(keyed)
+
+
+# Mirrors per data file
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_mirror(filename: str) -> IndexedMirror:
+    """
+    Get or create the mirror for a data file listed in MIRRORED_FILES.
+
+    Raises:
+        KeyError: If the file is not mirrored
+    """
+    with _mirrors_lock:
+        mirror = _mirrors.get(filename)
+        if mirror is None:
+            key_field, index_fields = MIRRORED_FILES[filename]
+            mirror = _mirrors[filename] = IndexedMirror(filename, key_field, index_fields)
+        return mirror
@@ -0,0 +1,51 @@
+"""
+Command-line tool to change the shard count of the sharded data files.
+
+Assessments, prescriptions and assignments are hash-partitioned by patientID
+(see data_access.SHARD_KEYS). This tool redistributes their records over a
+new number of shard files and updates the shard manifest in the data
+directory. File locks only cover one process, so stop the server first:
+    python reshard.py 8                       # all sharded collections
+    python reshard.py 8 assessments.json      # one collection
+    python reshard.py --status
+"""
+
+import argparse
+import sys
+
+import data_access
+
+
+def main(argv=None) -> int:
+    """Reshard the requested collections, or print their shard counts."""
+    parser = argparse.ArgumentParser(description='Change the shard count of the sharded data files.')
+    parser.add_argument('count', type=int, nargs='?', help='New shard count (1 for a single file)')
+    parser.add_argument('collections', nargs='*', help='Collections to reshard (default: all sharded collections)')
+    parser.add_argument('--data-dir', default=data_access.DATA_DIR, help='Data directory')
+    parser.add_argument('--status', action='store_true', help='Print shard counts and exit')
+    args = parser.parse_args(argv)
+
+    data_access.DATA_DIR = args.data_dir
+    collections = args.collections or sorted(data_access.SHARD_KEYS)
+    unknown = [name for name in collections if name not in data_access.SHARD_KEYS]
+    if unknown:
+        parser.error(f"not a sharded collection: {', '.join(unknown)}")
+
+    if args.status:
+        for name in collections:
+            print(f"{name}: {data_access.shard_count(name)} shard(s)")
+        return 0
+
+    if args.count is None or args.count < 1:
+        parser.error('a shard count of at least 1 is required')
+
+    data_access.recover_journals()
+    for name in collections:
+        previous = data_access.shard_count(name)
+        moved = data_access.reshard(name, args.count)
+        print(f"{name}: {previous} -> {args.count} shard(s), {moved} record(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
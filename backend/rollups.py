@@ -0,0 +1,524 @@
+"""
+Precomputed daily rollups for the reporting endpoints.
+
+Per-day aggregates are kept for three dimensions: all activity, each
+doctor and each symptom. Every row counts:
+
+    assessments: Assessments submitted (doctor rows: assigned to the doctor)
+    prescriptions: AI prescriptions generated
+    reviewed: Prescriptions modified by a doctor, counted on the day of the review
+    reviewSeconds: Total time from generation to review of the timed reviews
+    timedReviews: Reviews whose generation and review dates are both known
+
+Rows live in one JSON partition per month (DATA_DIR/rollups/YYYY-MM.json)
+and are updated by data_access change notifications as assessments,
+prescriptions and assignments are written, so reports read a few
+pre-aggregated rows instead of scanning the raw collections. Changed
+partitions are written SAVE_DELAY seconds after the first change, so the
+assessment, prescription and assignment of one submission share a single
+save; rollups of the last moments before a crash can be lost, and the
+backfill restores them. A partition also remembers the review counted for
+each prescription generated that month, so a prescription edited again
+moves its review instead of counting it twice.
+
+Several server processes can share the partitions. Each one keeps the
+changes it has rolled up since its last save, and saves by replaying them
+onto the partitions as currently stored, holding an advisory lock (fcntl)
+on the rollup directory, so no process overwrites the counts of another.
+Partitions saved by another process are reloaded, with the pending changes
+replayed onto them, before rows are read. Without fcntl (Windows), run a
+single server process.
+
+Rollups are history: archiving or deleting records does not change them.
+Rebuild them from the live and archived data with the backfill command,
+with the server stopped:
+    python rollups.py --backfill
+    python rollups.py --status
+"""
+
+import argparse
+import atexit
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+import data_access
+
+
+ASSESSMENTS_FILE = 'assessments.json'
+PRESCRIPTIONS_FILE = 'prescriptions.json'
+ASSIGNMENTS_FILE = 'assignments.json'
+
+# Directory (inside DATA_DIR) holding the monthly partitions
+ROLLUP_DIR = 'rollups'
+
+# File (inside ROLLUP_DIR) locked while partitions are saved
+LOCK_FILE = '.lock'
+
+DIMENSIONS = ('all', 'doctor', 'symptom')
+
+# Metrics of a row, in the order rows store them
+METRICS = ('assessments', 'prescriptions', 'reviewed', 'reviewSeconds', 'timedReviews')
+
+# Seconds changed partitions wait in memory before being written
+SAVE_DELAY = 1.0
+
+# Assessments whose symptoms are kept for the prescriptions committed with them
+RECENT_ASSESSMENTS = 1024
+
+_DAY_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+
+def record_day(value: Any) -> Optional[str]:
+    """Get the 'YYYY-MM-DD' day of an ISO 8601 date string, or None if it is not one."""
+    if isinstance(value, str) and _DAY_PATTERN.match(value):
+        return value[:10]
+    return None
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    if not isinstance(value, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _symptom_keys(symptoms: Any) -> List[str]:
+    keys = [str(symptom).strip().lower() for symptom in symptoms] if isinstance(symptoms, list) else []
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+def _empty_partition() -> Dict[str, Any]:
+    return {'rows': {}, 'reviews': {}}
+
+
+class RollupStore:
+    """Monthly rollup partitions, updated from data_access change notifications."""
+
+    def __init__(self):
+        """Initialize the store; partitions are loaded when first used."""
+        self._lock = threading.RLock()
+        self._partitions = {}
+        # Signature of the file each partition was loaded from (None if there was none)
+        self._signatures = {}
+        self._loaded_dir = None
+        # Changes rolled up since the last save, as (method, arguments), replayed when saving
+        self._pending = []
+        self._save_timer = None
+        # Assessment ID -> symptom keys of the latest inserted assessments
+        self._recent_symptoms = OrderedDict()
+        # Set while backfilling, so partitions start empty instead of being loaded
+        self._rebuilding = False
+        data_access.add_change_listener(self._on_change)
+
+    def rows(self, since: str, until: str, dimension: str = 'all', key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the rollup rows of a dimension for a range of days.
+
+        Args:
+            since: First day ('YYYY-MM-DD'), inclusive
+            until: Last day ('YYYY-MM-DD'), exclusive
+            dimension: One of DIMENSIONS
+            key: Doctor ID or symptom to restrict the rows to (None for all keys)
+
+        Returns:
+            Rows ordered by day then key, each with day, dimension, key, the
+            METRICS and averageReviewMinutes (None without timed reviews)
+
+        Raises:
+            ValueError: If the dimension is unknown
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown rollup dimension: {dimension}")
+        results = []
+        with self._lock:
+            self._check_directory()
+            self._refresh()
+            day = date.fromisoformat(since)
+            end = date.fromisoformat(until)
+            while day < end:
+                day_rows = self._partition(day.isoformat()[:7])['rows'].get(day.isoformat(), {}).get(dimension, {})
+                keys = [key] if key is not None else sorted(day_rows)
+                for row_key in keys:
+                    values = day_rows.get(row_key)
+                    if values is not None:
+                        row = dict(zip(METRICS, values), day=day.isoformat(), dimension=dimension, key=row_key)
+                        row['averageReviewMinutes'] = (round(row['reviewSeconds'] / row['timedReviews'] / 60, 1)
+                                                       if row['timedReviews'] else None)
+                        results.append(row)
+                day += timedelta(days=1)
+        return results
+
+    def backfill(self, assessments: Iterable[Dict[str, Any]], prescriptions: Iterable[Dict[str, Any]],
+                 assignments: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Replace all partitions with rollups computed from complete collections.
+
+        Args:
+            assessments: Every assessment
+            prescriptions: Every prescription
+            assignments: Every assignment
+
+        Returns:
+            Dictionary with the number of partitions and records rolled up
+        """
+        with self._lock:
+            self._cancel_save()
+            self._loaded_dir = data_access.DATA_DIR
+            self._partitions = {}
+            self._signatures = {}
+            self._pending = []
+            self._recent_symptoms.clear()
+            self._rebuilding = True
+            try:
+                counts = self._roll_up(assessments, prescriptions, assignments)
+            finally:
+                self._rebuilding = False
+
+            directory = self._directory()
+            os.makedirs(directory, exist_ok=True)
+            with self._directory_lock(directory):
+                for name in os.listdir(directory):
+                    if name.endswith('.json') and name[:-5] not in self._partitions:
+                        os.remove(os.path.join(directory, name))
+                for month in self._partitions:
+                    self._save(month)
+            counts['partitions'] = len(self._partitions)
+            return counts
+
+    def _roll_up(self, assessments: Iterable[Dict[str, Any]], prescriptions: Iterable[Dict[str, Any]],
+                 assignments: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Add complete collections to the partitions in memory."""
+        symptoms_by_assessment = {}
+        counts = {'assessments': 0, 'prescriptions': 0, 'assignments': 0}
+        for assessment in assessments:
+            symptoms_by_assessment[assessment.get('assessmentID')] = _symptom_keys(assessment.get('symptoms'))
+            self._add_assessment(assessment)
+            counts['assessments'] += 1
+        for prescription in prescriptions:
+            self._add_prescription(prescription, symptoms_by_assessment.get(prescription.get('assessmentID'), []))
+            counts['prescriptions'] += 1
+        for assignment in assignments:
+            self._add_assignment(assignment)
+            counts['assignments'] += 1
+        return counts
+
+    def months(self) -> List[str]:
+        """List the months with a stored partition, oldest first."""
+        try:
+            names = os.listdir(self._directory())
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith('.json'))
+
+    def _directory(self) -> str:
+        return os.path.join(data_access.DATA_DIR, ROLLUP_DIR)
+
+    def _check_directory(self) -> None:
+        """Drop the partitions in memory, after saving them, if DATA_DIR has changed."""
+        if self._loaded_dir != data_access.DATA_DIR:
+            self.flush()
+            self._partitions = {}
+            self._signatures = {}
+            self._recent_symptoms.clear()
+            self._loaded_dir = data_access.DATA_DIR
+
+    def _partition_path(self, month: str) -> str:
+        return os.path.join(self._loaded_dir, ROLLUP_DIR, f"{month}.json")
+
+    def _partition(self, month: str) -> Dict[str, Any]:
+        """Get a month's partition, loading it on first use."""
+        partition = self._partitions.get(month)
+        if partition is None and self._rebuilding:
+            partition = self._partitions[month] = _empty_partition()
+        elif partition is None:
+            try:
+                with open(self._partition_path(month), 'r', encoding='utf-8') as f:
+                    signature = data_access._signature_of(os.fstat(f.fileno()))
+                    partition = json.load(f)
+            except FileNotFoundError:
+                signature, partition = None, _empty_partition()
+            self._partitions[month] = partition
+            self._signatures[month] = signature
+        return partition
+
+    def _refresh(self) -> None:
+        """Reload the partitions if another process has saved any, replaying the pending changes onto them."""
+        for month, signature in self._signatures.items():
+            try:
+                current = data_access._stat_signature(self._partition_path(month))
+            except FileNotFoundError:
+                current = None
+            if current != signature:
+                break
+        else:
+            return
+        self._replay()
+
+    def _replay(self) -> set:
+        """Reload the partitions from their files and apply the pending changes; returns the months changed."""
+        self._partitions = {}
+        self._signatures = {}
+        changed = set()
+        for method, args in self._pending:
+            changed |= method(*args)
+        return changed - {None}
+
+    def flush(self) -> None:
+        """Write the changes rolled up since the last save, merged with those saved by other processes."""
+        with self._lock:
+            self._cancel_save()
+            if not self._pending:
+                return
+            if not os.path.isdir(self._loaded_dir):
+                # The data directory was removed meanwhile (e.g., a test's): there is nothing to save into
+                self._pending = []
+                return
+            directory = os.path.join(self._loaded_dir, ROLLUP_DIR)
+            try:
+                try:
+                    os.mkdir(directory)
+                except FileExistsError:
+                    pass
+                with self._directory_lock(directory):
+                    for month in sorted(self._replay()):
+                        self._save(month)
+            except OSError as e:
+                print(f"Warning: Could not save rollups: {e}")
+                # Reload what was saved when next read
+                self._partitions = {}
+                self._signatures = {}
+            finally:
+                self._pending = []
+
+    @staticmethod
+    @contextmanager
+    def _directory_lock(directory: str):
+        """Hold the rollup directory's advisory lock, serializing saves across processes."""
+        with open(os.path.join(directory, LOCK_FILE), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def _cancel_save(self) -> None:
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+    def _schedule_save(self) -> None:
+        """Start the save timer if changes are pending and it is not running."""
+        if self._pending and self._save_timer is None:
+            self._save_timer = threading.Timer(SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save(self, month: str) -> None:
+        """Atomically write a month's partition into the directory it was loaded from."""
+        path = self._partition_path(month)
+        # A unique name per save, so processes saving the same month never share a temporary file
+        fd, temp_path = tempfile.mkstemp(prefix=f"{month}.", suffix='.tmp', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._partitions[month], f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+                os.chmod(temp_path, data_access.FILE_MODE)
+                signature = data_access._signature_of(os.fstat(f.fileno()))
+            os.replace(temp_path, path)
+        except BaseException:
+            data_access._remove_if_exists(temp_path)
+            raise
+        self._signatures[month] = signature
+
+    def _add(self, day: Optional[str], dimension: str, key: str, metric: str, amount: float = 1) -> Optional[str]:
+        """Add to one metric of a row; returns the month changed, if any."""
+        if day is None:
+            return None
+        dimensions = self._partition(day[:7])['rows'].setdefault(day, {})
+        values = dimensions.setdefault(dimension, {}).setdefault(key, [0] * len(METRICS))
+        values[METRICS.index(metric)] += amount
+        return day[:7]
+
+    def _add_assessment(self, assessment: Dict[str, Any]) -> set:
+        day = record_day(assessment.get('assessmentDate'))
+        changed = {self._add(day, 'all', '', 'assessments')}
+        for symptom in _symptom_keys(assessment.get('symptoms')):
+            changed.add(self._add(day, 'symptom', symptom, 'assessments'))
+        return changed
+
+    def _add_assignment(self, assignment: Dict[str, Any]) -> set:
+        doctor_id = assignment.get('doctorID')
+        if doctor_id is None:
+            return set()
+        return {self._add(record_day(assignment.get('assignmentDate')), 'doctor', doctor_id, 'assessments')}
+
+    def _add_prescription(self, prescription: Dict[str, Any], symptoms: List[str]) -> set:
+        day = record_day(prescription.get('generatedDate'))
+        changed = {self._add(day, 'all', '', 'prescriptions')}
+        for symptom in symptoms:
+            changed.add(self._add(day, 'symptom', symptom, 'prescriptions'))
+        if prescription.get('lastModifiedBy'):
+            changed |= self._set_review(prescription, symptoms)
+        return changed
+
+    def _set_review(self, prescription: Dict[str, Any], symptoms: Optional[List[str]]) -> set:
+        """
+        Count a prescription's review, replacing the review counted for it before.
+
+        Args:
+            prescription: Reviewed prescription
+            symptoms: Symptoms of its assessment (None to reuse those of the
+                previous review, looking them up if there was none)
+        """
+        prescription_id = prescription.get('prescriptionID')
+        review_day = record_day(prescription.get('lastModifiedDate'))
+        owner = record_day(prescription.get('generatedDate')) or review_day
+        if prescription_id is None or owner is None:
+            return set()
+        reviews = self._partition(owner[:7])['reviews']
+        changed = {owner[:7]}
+
+        previous = reviews.pop(prescription_id, None)
+        if previous is not None:
+            changed |= self._apply_review(*previous, sign=-1)
+            if symptoms is None:
+                symptoms = previous[3]
+        if symptoms is None:
+            symptoms = self._assessment_symptoms(prescription.get('assessmentID'))
+
+        generated = _timestamp(prescription.get('generatedDate'))
+        modified = _timestamp(prescription.get('lastModifiedDate'))
+        seconds = max(0.0, modified - generated) if generated is not None and modified is not None else None
+        review = [review_day, prescription['lastModifiedBy'], seconds, symptoms]
+        reviews[prescription_id] = review
+        return changed | self._apply_review(*review)
+
+    def _apply_review(self, day: Optional[str], doctor_id: str, seconds: Optional[float], symptoms: List[str],
+                      sign: int = 1) -> set:
+        changed = set()
+        for dimension, key in [('all', ''), ('doctor', doctor_id)] + [('symptom', symptom) for symptom in symptoms]:
+            changed.add(self._add(day, dimension, key, 'reviewed', sign))
+            if seconds is not None:
+                changed.add(self._add(day, dimension, key, 'reviewSeconds', sign * seconds))
+                changed.add(self._add(day, dimension, key, 'timedReviews', sign))
+        return changed
+
+    def _remember_symptoms(self, assessment: Dict[str, Any]) -> None:
+        self._recent_symptoms[assessment.get('assessmentID')] = _symptom_keys(assessment.get('symptoms'))
+        while len(self._recent_symptoms) > RECENT_ASSESSMENTS:
+            self._recent_symptoms.popitem(last=False)
+
+    def _assessment_symptoms(self, assessment_id: Any) -> List[str]:
+        """
+        Get the symptoms of an assessment by ID.
+
+        Assessments are notified before the prescriptions committed with
+        them, so new prescriptions find theirs among the recent ones; older
+        assessments (reviews of old prescriptions) are read from the data file.
+        """
+        if assessment_id is None:
+            return []
+        symptoms = self._recent_symptoms.get(assessment_id)
+        if symptoms is not None:
+            return symptoms
+        assessment = data_access.find_by_id(ASSESSMENTS_FILE, 'assessmentID', assessment_id)
+        return _symptom_keys(assessment.get('symptoms')) if assessment else []
+
+    def _on_change(self, filename: str, operation: str, records: List[Dict[str, Any]],
+                   signature: data_access.WriteSignature) -> None:
+        """Roll up newly written records."""
+        if filename not in (ASSESSMENTS_FILE, PRESCRIPTIONS_FILE, ASSIGNMENTS_FILE):
+            return
+        with self._lock:
+            self._check_directory()
+            for record in records:
+                if operation == 'insert' and filename == ASSESSMENTS_FILE:
+                    self._remember_symptoms(record)
+                    change = (self._add_assessment, (record,))
+                elif operation == 'insert' and filename == ASSIGNMENTS_FILE:
+                    change = (self._add_assignment, (record,))
+                elif operation == 'insert':
+                    change = (self._add_prescription, (record, self._assessment_symptoms(record.get('assessmentID'))))
+                elif operation == 'update' and filename == PRESCRIPTIONS_FILE and record.get('lastModifiedBy'):
+                    change = (self._set_review, (record, None))
+                else:
+                    continue
+                method, args = change
+                if method(*args) - {None}:
+                    self._pending.append(change)
+            self._schedule_save()
+
+
+# Global instance
+_rollup_store = None
+_rollup_store_lock = threading.Lock()
+
+
+def get_rollup_store() -> RollupStore:
+    """Get or create the rollup store instance."""
+    global _rollup_store
+    with _rollup_store_lock:
+        if _rollup_store is None:
+            _rollup_store = RollupStore()
+            atexit.register(_rollup_store.flush)
+        return _rollup_store
+
+
+def _all_records(filename: str) -> List[Dict[str, Any]]:
+    """Read a collection's live records followed by its archived ones."""
+    import archive
+    try:
+        live = data_access.read_json_file(filename)
+    except FileNotFoundError:
+        live = []
+    if filename not in archive.ARCHIVED_FILES:
+        return live
+    archived = [record for month in archive.cold_partitions(filename) for record in archive.read_partition(filename, month)]
+    return archive.merge_archived(filename, live, archived)
+
+
+def main(argv=None) -> int:
+    """Rebuild the rollups from the data files, or print the stored partitions."""
+    parser = argparse.ArgumentParser(description='Rebuild or inspect the daily reporting rollups.')
+    parser.add_argument('--data-dir', default=data_access.DATA_DIR, help='Data directory')
+    parser.add_argument('--backfill', action='store_true',
+                        help='Recompute every partition from the live and archived records')
+    parser.add_argument('--status', action='store_true', help='Print stored partitions and exit')
+    args = parser.parse_args(argv)
+
+    data_access.DATA_DIR = args.data_dir
+    store = get_rollup_store()
+    if args.backfill:
+        data_access.recover_journals()
+        counts = store.backfill(_all_records(ASSESSMENTS_FILE), _all_records(PRESCRIPTIONS_FILE),
+                                _all_records(ASSIGNMENTS_FILE))
+        print(f"Rolled up {counts['assessments']} assessment(s), {counts['prescriptions']} prescription(s) and "
+              f"{counts['assignments']} assignment(s) into {counts['partitions']} partition(s)")
+        return 0
+
+    months = store.months()
+    print(f"{len(months)} partition(s)" + (f", {months[0]} to {months[-1]}" if months else ''))
+    if not args.status:
+        print("Use --backfill to rebuild the rollups")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
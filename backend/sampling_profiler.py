@@ -0,0 +1,256 @@
+"""
+Low-overhead sampling profiler for a running server.
+
+A background thread snapshots every thread's Python stack with
+sys._current_frames() at a fixed interval and counts identical stacks. The
+result is returned in the collapsed-stack format ("frame;frame;frame count")
+read by flamegraph.pl, speedscope and similar tools, together with a summary
+attributing samples to data_access, bcrypt, jwt and bedrock_service.
+
+bcrypt runs as native code without Python frames of its own, so a leaf frame
+whose current source line calls into bcrypt gets a synthetic "bcrypt:<native>"
+frame added.
+
+The app exposes the profiler at POST /api/admin/profile (requires the
+ADMIN_TOKEN environment variable and a matching X-Admin-Token header). This
+module also works as a CLI against a running server:
+    python sampling_profiler.py --url http://localhost:5000 --seconds 10 --output profile.folded
+"""
+
+import argparse
+import json
+import linecache
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib import request as urllib_request
+
+
+# Modules time is attributed to, matched on the top-level module name
+COMPONENTS = ('data_access', 'bcrypt', 'jwt', 'bedrock_service')
+
+# Leaf source-line markers of native calls that have no Python frame
+NATIVE_CALLS = {'bcrypt.': 'bcrypt:<native>'}
+
+DEFAULT_INTERVAL = 0.005
+MAX_SECONDS = 60
+
+
+def _frame_label(frame) -> str:
+    """Label a frame as module:function."""
+    module = frame.f_globals.get('__name__') or os.path.basename(frame.f_code.co_filename)
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def _native_leaf(frame) -> Optional[str]:
+    """Return a synthetic frame for a native call made on the frame's current line."""
+    # A frame caught between instructions may have no line number
+    if frame.f_lineno is None:
+        return None
+    line = linecache.getline(frame.f_code.co_filename, frame.f_lineno)
+    for marker, label in NATIVE_CALLS.items():
+        if marker in line:
+            return label
+    return None
+
+
+def _is_request_stack(labels: Tuple[str, ...]) -> bool:
+    """Check whether a stack is serving a Flask request."""
+    return any(label == 'flask.app:wsgi_app' for label in labels)
+
+
+def attribute(labels: Tuple[str, ...]) -> str:
+    """
+    Attribute a stack to the innermost frame belonging to a component.
+
+    Args:
+        labels: Frame labels from outermost to innermost
+
+    Returns:
+        Component name, or 'other'
+    """
+    for label in reversed(labels):
+        top_level = label.split(':', 1)[0].split('.', 1)[0]
+        if top_level in COMPONENTS:
+            return top_level
+    return 'other'
+
+
+class SamplingProfiler:
+    """Samples all thread stacks at a fixed interval."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, requests_only: bool = True,
+                 exclude_threads: Iterable[int] = ()):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+            requests_only: Only count threads that are serving a Flask request,
+                which leaves out idle server and worker threads
+            exclude_threads: Identifiers of threads never to sample (e.g., the
+                one waiting for the profile); the sampler thread is always left out
+        """
+        self.interval = interval
+        self.requests_only = requests_only
+        self.exclude_threads = frozenset(exclude_threads)
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self) -> None:
+        """Take one sample of every other thread's stack."""
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or thread_id in self.exclude_threads:
+                continue
+            labels = []
+            native = _native_leaf(frame)
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.reverse()
+            if native:
+                labels.append(native)
+            stack = tuple(labels)
+            if self.requests_only and not _is_request_stack(stack):
+                continue
+            self.stacks[stack] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        next_sample = started
+        while not self._stop.is_set():
+            self.sample()
+            next_sample += self.interval
+            self._stop.wait(max(0.0, next_sample - time.perf_counter()))
+        self.duration = time.perf_counter() - started
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self) -> str:
+        """
+        Render stacks in collapsed format, most frequent first.
+
+        Returns:
+            One "frame;frame;frame count" line per distinct stack
+        """
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize samples per component.
+
+        Returns:
+            Dictionary with sample counts, duration and per-component
+            stack samples and share of all stack samples
+        """
+        by_component = Counter()
+        for stack, count in self.stacks.items():
+            by_component[attribute(stack)] += count
+        total = sum(by_component.values())
+        return {
+            'samples': self.samples,
+            'stackSamples': total,
+            'intervalSeconds': self.interval,
+            'durationSeconds': self.duration,
+            'components': {
+                name: {'samples': count, 'share': count / total}
+                for name, count in by_component.most_common()
+            }
+        }
+
+
+_profile_lock = threading.Lock()
+
+
+def profile_for(seconds: float, interval: float = DEFAULT_INTERVAL, requests_only: bool = True) -> SamplingProfiler:
+    """
+    Run the profiler for a number of seconds, blocking the caller.
+
+    Only one profile runs at a time per process. The calling thread is not
+    sampled: it only waits, and would otherwise count as a busy request.
+
+    Args:
+        seconds: Sampling duration, capped at MAX_SECONDS
+        interval: Seconds between samples
+        requests_only: Only count threads serving a Flask request
+
+    Returns:
+        The stopped profiler
+
+    Raises:
+        RuntimeError: If another profile is already running
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        profiler = SamplingProfiler(interval, requests_only, exclude_threads=(threading.get_ident(),))
+        profiler.start()
+        try:
+            time.sleep(min(seconds, MAX_SECONDS))
+        finally:
+            profiler.stop()
+        return profiler
+    finally:
+        _profile_lock.release()
+
+
+def main(argv=None) -> int:
+    """Fetch a profile from a running server and save it."""
+    parser = argparse.ArgumentParser(description='Capture a sampling profile from a running API server.')
+    parser.add_argument('--url', default='http://localhost:5000', help='Server base URL')
+    parser.add_argument('--seconds', type=float, default=10, help='Sampling duration (default: 10)')
+    parser.add_argument('--interval-ms', type=float, default=DEFAULT_INTERVAL * 1000,
+                        help='Sampling interval in milliseconds (default: 5)')
+    parser.add_argument('--all-threads', action='store_true', help='Include threads not serving a request')
+    parser.add_argument('--token', default=os.getenv('ADMIN_TOKEN'), help='Admin token (default: $ADMIN_TOKEN)')
+    parser.add_argument('--output', default='profile.folded', help='Collapsed stacks output file')
+    args = parser.parse_args(argv)
+
+    if not args.token:
+        parser.error('an admin token is required (--token or ADMIN_TOKEN)')
+
+    body = json.dumps({
+        'seconds': args.seconds,
+        'intervalMs': args.interval_ms,
+        'requestsOnly': not args.all_threads,
+        'format': 'json'
+    }).encode('utf-8')
+    req = urllib_request.Request(
+        args.url.rstrip('/') + '/api/admin/profile', data=body, method='POST',
+        headers={'Content-Type': 'application/json', 'X-Admin-Token': args.token}
+    )
+    with urllib_request.urlopen(req, timeout=args.seconds + 30) as response:
+        result = json.loads(response.read().decode('utf-8'))
+
+    with open(args.output, 'w') as f:
+        f.write(result['collapsed'])
+
+    summary = result['summary']
+    print(f"{summary['samples']} samples over {summary['durationSeconds']:.1f}s, "
+          f"{summary['stackSamples']} request stacks -> {args.output}", file=sys.stderr)
+    for name, component in summary['components'].items():
+        print(f"  {name:<16} {component['share']:>6.1%}  ({component['samples']} samples)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
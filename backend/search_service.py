@@ -0,0 +1,319 @@
+"""
+Search over symptoms, medications and patient names.
+
+A SearchIndex keeps inverted indexes from normalized terms to the records
+that contain them:
+
+    symptoms: term -> assessmentIDs whose symptoms contain it
+    medications: term -> assessmentIDs whose prescriptions name it
+    patient names: prefix trie of first and last name terms -> patientIDs
+
+Text is normalized to lowercase alphanumeric terms, so 'Chest Pain' is
+indexed as 'chest' and 'pain'. Symptom and medication terms match exactly;
+name terms match as prefixes ('jo' finds Joan and Johnson).
+
+Searches are scoped to a doctor's assignments, which are indexed too, and
+every query term must match a patient, through a name or an assessment.
+The index is built from the live data files on first use and follows
+data_access change notifications; writes by other processes are detected
+from the data files' signatures (data_access.data_signature) and force a
+rebuild. Archived records are not searched.
+"""
+
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import data_access
+from history_service import in_date_range
+
+
+ASSESSMENTS_FILE = 'assessments.json'
+PRESCRIPTIONS_FILE = 'prescriptions.json'
+ASSIGNMENTS_FILE = 'assignments.json'
+PATIENTS_FILE = 'patients.json'
+
+SOURCE_FILES = (PATIENTS_FILE, ASSESSMENTS_FILE, PRESCRIPTIONS_FILE, ASSIGNMENTS_FILE)
+
+_TERM_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def normalize_terms(text: Any) -> List[str]:
+    """
+    Split text into normalized search terms.
+
+    Args:
+        text: Text to split (non-strings yield no terms)
+
+    Returns:
+        Lowercase alphanumeric terms, without duplicates, in order
+    """
+    if not isinstance(text, str):
+        return []
+    return list(dict.fromkeys(_TERM_PATTERN.findall(text.lower())))
+
+
+def medication_terms(medications: Any) -> List[str]:
+    """
+    Get the normalized terms of the medication names of a prescription.
+
+    Args:
+        medications: Medications list (dicts with a name, or plain names)
+
+    Returns:
+        Normalized terms, without duplicates
+    """
+    terms = []
+    for medication in medications if isinstance(medications, list) else ():
+        terms.extend(normalize_terms(medication.get('name') if isinstance(medication, dict) else medication))
+    return list(dict.fromkeys(terms))
+
+
+class _TrieNode:
+    """Prefix trie node; ids holds every ID with a term passing through the node."""
+
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children = {}
+        self.ids = set()
+
+
+def _intersect(postings: Iterable, scope: set) -> set:
+    """Intersect postings (a set or dict) with a scope, iterating the smaller one."""
+    if len(postings) > len(scope):
+        return {key for key in scope if key in postings}
+    return {key for key in postings if key in scope}
+
+
+class SearchIndex:
+    """Inverted indexes over symptoms, medications and patient names, kept current via change notifications."""
+
+    def __init__(self):
+        """Initialize an empty index; it is built on first use."""
+        self._lock = threading.RLock()
+        self._loaded_dir = None
+        # Signatures of the data files the index matches
+        self._signatures = {}
+        self._symptoms = {}
+        # term -> {assessmentID: number of its prescriptions naming the term}
+        self._medications = {}
+        # prescriptionID -> (assessmentID, medication terms), to apply edits
+        self._prescription_terms = {}
+        self._assessment_info = {}
+        self._names = _TrieNode()
+        self._patient_names = {}
+        self._doctor_assessments = {}
+        self._doctor_patients = {}
+        data_access.add_change_listener(self._on_change)
+
+    def search(self, doctor_id: str, query: str, since: Optional[str] = None,
+               until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find a doctor's patients matching every term of a query.
+
+        A term matches a patient whose first or last name starts with it, or
+        one of their assessments assigned to the doctor whose symptoms or
+        prescribed medications contain it. Date bounds apply to assessment
+        matches only.
+
+        Patients are ranked by score (one point per matching name plus one
+        per matching assessment, summed over terms), then by their latest
+        matching assessment.
+
+        Args:
+            doctor_id: ID of the doctor whose assignments are searched
+            query: Free text query
+            since: Inclusive lower bound on the assessment date
+            until: Exclusive upper bound on the assessment date
+
+        Returns:
+            Ranked results, each with patientID, firstName, lastName, score,
+            lastMatchDate and the matching assessmentIDs (newest first)
+        """
+        terms = normalize_terms(query)
+        with self._lock:
+            self._ensure_loaded()
+            assessments = self._doctor_assessments.get(doctor_id, set())
+            patients = self._doctor_patients.get(doctor_id, set())
+            if not terms or not patients:
+                return []
+
+            candidates = None
+            scores = {}
+            matches = {}
+            for term in terms:
+                matched = set()
+                hits = _intersect(self._symptoms.get(term, ()), assessments)
+                hits |= _intersect(self._medications.get(term, ()), assessments)
+                for assessment_id in hits:
+                    if assessment_id not in self._assessment_info:
+                        # Prescription whose assessment is not stored
+                        continue
+                    patient_id, date = self._assessment_info[assessment_id]
+                    if (since is not None or until is not None) and not in_date_range(date, since, until):
+                        continue
+                    matched.add(patient_id)
+                    scores[patient_id] = scores.get(patient_id, 0) + 1
+                    matches.setdefault(patient_id, set()).add(assessment_id)
+                for patient_id in _intersect(self._prefix_ids(term), patients):
+                    matched.add(patient_id)
+                    scores[patient_id] = scores.get(patient_id, 0) + 1
+                candidates = matched if candidates is None else candidates & matched
+                if not candidates:
+                    return []
+
+            results = []
+            for patient_id in candidates:
+                first_name, last_name = self._patient_names.get(patient_id, (None, None))
+                assessment_ids = sorted(matches.get(patient_id, ()),
+                                        key=lambda assessment_id: self._assessment_info[assessment_id][1] or '',
+                                        reverse=True)
+                results.append({
+                    'patientID': patient_id,
+                    'firstName': first_name,
+                    'lastName': last_name,
+                    'score': scores[patient_id],
+                    'lastMatchDate': self._assessment_info[assessment_ids[0]][1] if assessment_ids else None,
+                    'assessmentIDs': assessment_ids,
+                })
+        # Stable sorts: score, then latest match, then patientID
+        results.sort(key=lambda result: result['patientID'] or '')
+        results.sort(key=lambda result: result['lastMatchDate'] or '', reverse=True)
+        results.sort(key=lambda result: result['score'], reverse=True)
+        return results
+
+    def preload(self) -> None:
+        """Build the index now rather than on first use (e.g., during warm-up)."""
+        with self._lock:
+            self._ensure_loaded()
+
+    def invalidate(self) -> None:
+        """Drop the index so it is rebuilt on next use."""
+        with self._lock:
+            self._loaded_dir = None
+
+    def _ensure_loaded(self) -> None:
+        """Build the index from the data files if missing or stale."""
+        data_dir = data_access.DATA_DIR
+        signatures = {filename: data_access.data_signature(filename, missing_ok=True) for filename in SOURCE_FILES}
+        if self._loaded_dir == data_dir and self._signatures == signatures:
+            return
+
+        self._symptoms = {}
+        self._medications = {}
+        self._prescription_terms = {}
+        self._assessment_info = {}
+        self._names = _TrieNode()
+        self._patient_names = {}
+        self._doctor_assessments = {}
+        self._doctor_patients = {}
+        for filename in SOURCE_FILES:
+            self._apply_inserts(filename, self._read_or_empty(filename))
+        # The directory and signatures read at the start, so a switch or write mid-load forces a reload
+        self._loaded_dir = data_dir
+        self._signatures = signatures
+
+    @staticmethod
+    def _read_or_empty(filename: str) -> List[Dict[str, Any]]:
+        try:
+            return data_access.read_json_snapshot(filename)
+        except FileNotFoundError:
+            return []
+
+    def _prefix_ids(self, prefix: str) -> set:
+        node = self._names
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.ids
+
+    def _add_name_terms(self, patient_id: str, terms: List[str]) -> None:
+        for term in terms:
+            node = self._names
+            for char in term:
+                node = node.children.setdefault(char, _TrieNode())
+                node.ids.add(patient_id)
+
+    def _add_prescription(self, prescription: Dict[str, Any]) -> None:
+        prescription_id = prescription.get('prescriptionID')
+        assessment_id = prescription.get('assessmentID')
+        terms = medication_terms(prescription.get('medications'))
+        self._prescription_terms[prescription_id] = (assessment_id, terms)
+        for term in terms:
+            postings = self._medications.setdefault(term, {})
+            postings[assessment_id] = postings.get(assessment_id, 0) + 1
+
+    def _remove_prescription(self, prescription_id: str) -> None:
+        assessment_id, terms = self._prescription_terms.pop(prescription_id, (None, ()))
+        for term in terms:
+            postings = self._medications[term]
+            postings[assessment_id] -= 1
+            if not postings[assessment_id]:
+                del postings[assessment_id]
+                if not postings:
+                    del self._medications[term]
+
+    def _apply_inserts(self, filename: str, records: List[Dict[str, Any]]) -> None:
+        """Index new records."""
+        for record in records:
+            if filename == PATIENTS_FILE:
+                patient_id = record.get('patientID')
+                self._patient_names[patient_id] = (record.get('firstName'), record.get('lastName'))
+                self._add_name_terms(patient_id, normalize_terms(record.get('firstName'))
+                                     + normalize_terms(record.get('lastName')))
+            elif filename == ASSESSMENTS_FILE:
+                assessment_id = record.get('assessmentID')
+                self._assessment_info[assessment_id] = (record.get('patientID'), record.get('assessmentDate'))
+                symptoms = record.get('symptoms')
+                for symptom in symptoms if isinstance(symptoms, list) else ():
+                    for term in normalize_terms(symptom):
+                        self._symptoms.setdefault(term, set()).add(assessment_id)
+            elif filename == PRESCRIPTIONS_FILE:
+                self._add_prescription(record)
+            else:
+                doctor_id = record.get('doctorID')
+                self._doctor_assessments.setdefault(doctor_id, set()).add(record.get('assessmentID'))
+                self._doctor_patients.setdefault(doctor_id, set()).add(record.get('patientID'))
+
+    def _on_change(self, filename: str, operation: str, records: List[Dict[str, Any]],
+                   signature: data_access.WriteSignature) -> None:
+        """Apply a data_access change notification to the index."""
+        if filename not in SOURCE_FILES:
+            return
+
+        with self._lock:
+            if self._loaded_dir is None:
+                return
+            if self._loaded_dir == data_access.DATA_DIR and self._signatures.get(filename) == signature.after:
+                # Already loaded from the files this write produced
+                return
+            # Another signature than the one before the write means a write the index has not seen
+            if self._loaded_dir != data_access.DATA_DIR or self._signatures.get(filename) != signature.before:
+                self.invalidate()
+            elif operation == 'insert':
+                self._apply_inserts(filename, records)
+            elif filename == PRESCRIPTIONS_FILE and operation == 'update':
+                # Doctors may edit the medications
+                for prescription in records:
+                    self._remove_prescription(prescription.get('prescriptionID'))
+                    self._add_prescription(prescription)
+            else:
+                self.invalidate()
+            if self._loaded_dir is not None:
+                self._signatures[filename] = signature.after
+
+
+# Global instance
+_search_index = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Get or create the search index instance."""
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex()
+        return _search_index
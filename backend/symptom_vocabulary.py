@@ -0,0 +1,222 @@
+"""
+Canonical symptom vocabulary.
+
+Patients describe symptoms in free text ("Headaches", "sore-throat",
+"short of breath and diarrhoea"). The vocabulary maps such text to
+canonical concepts, each with a stable integer ID: synonyms and spelling
+variants are listed per concept, and text is matched on normalized words
+(lowercase, punctuation removed, a trailing plural 's' tolerated), so
+multi-word phrases are found anywhere in a symptom.
+
+The phrases are loaded once into a word trie; a symptom is scanned left to
+right taking the longest phrase at each word, so its cost is linear in its
+length whatever the vocabulary size. Words that start no phrase ("mild",
+"and", "since yesterday") are skipped.
+
+Negated phrases are skipped too: a NEGATIONS word ("no fever", "denies
+chest pain", "without a cough") negates every phrase after it up to the
+end of its clause, which ends at sentence punctuation or a CLAUSE_ENDS word
+("no fever but a cough" names only the cough).
+
+Concept IDs are stored with each new assessment (symptomIDs, next to the
+original symptoms) and are never reused or renumbered: add new concepts
+with new IDs. Prefer appending synonyms; remove one only if it names the
+concept wrongly too often (as the bare 'temperature' did, matching
+"temperature of 37").
+"""
+
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# (concept ID, canonical name, synonyms and spelling variants)
+CONCEPTS = (
+    (1, 'fever', ('feverish', 'pyrexia', 'febrile', 'high temperature', 'raised temperature',
+                  'elevated temperature', 'running a temperature')),
+    (2, 'high fever', ('very high temperature', 'hyperpyrexia')),
+    (3, 'headache', ('head ache', 'head pain', 'cephalalgia')),
+    (4, 'severe headache', ('migraine', 'migraines', 'bad headache', 'terrible headache')),
+    (5, 'cough', ('coughing', 'dry cough', 'wet cough')),
+    (6, 'sore throat', ('throat pain', 'painful throat', 'scratchy throat', 'pharyngitis')),
+    (7, 'fatigue', ('tiredness', 'tired', 'exhaustion', 'exhausted', 'lethargy', 'fatigued')),
+    (8, 'nausea', ('nauseous', 'nauseated', 'nausia', 'queasy', 'feeling sick')),
+    (9, 'vomiting', ('vomit', 'throwing up', 'threw up', 'emesis')),
+    (10, 'diarrhea', ('diarrhoea', 'diarhea', 'diarrea', 'loose stools', 'runny stools')),
+    (11, 'stomach pain', ('abdominal pain', 'stomach ache', 'stomachache', 'tummy ache', 'belly pain')),
+    (12, 'chest pain', ('chest tightness', 'tight chest', 'chest ache')),
+    (13, 'shortness of breath', ('short of breath', 'difficulty breathing', 'trouble breathing',
+                                 'breathlessness', 'breathless', 'dyspnea', 'dyspnoea')),
+    (14, 'palpitations', ('palpitation', 'racing heart', 'heart racing', 'pounding heart')),
+    (15, 'dizziness', ('dizzy', 'lightheaded', 'light headed', 'vertigo')),
+    (16, 'fainting', ('fainted', 'faint', 'passed out', 'passing out', 'syncope', 'blackout')),
+    (17, 'seizure', ('seizures', 'convulsion', 'convulsions', 'fits')),
+    (18, 'confusion', ('confused', 'disoriented', 'disorientation')),
+    (19, 'rash', ('skin rash', 'hives', 'spots')),
+    (20, 'itching', ('itchy', 'itchiness', 'itch', 'pruritus')),
+    (21, 'acne', ('pimples', 'breakout', 'breakouts')),
+    (22, 'joint pain', ('aching joints', 'sore joints', 'arthralgia')),
+    (23, 'back pain', ('backache', 'back ache', 'sore back', 'lower back pain')),
+    (24, 'fracture', ('broken bone', 'broken arm', 'broken leg', 'broken wrist')),
+    (25, 'anxiety', ('anxious', 'panic', 'panic attack', 'nervousness')),
+    (26, 'depression', ('depressed', 'low mood', 'feeling down')),
+    (27, 'insomnia', ('sleeplessness', 'trouble sleeping', 'cannot sleep', 'cant sleep', 'can t sleep')),
+    (28, 'ear pain', ('earache', 'ear ache', 'sore ear', 'otalgia')),
+    (29, 'sinus', ('sinus pain', 'sinus pressure', 'sinusitis', 'blocked nose', 'stuffy nose',
+                   'nasal congestion', 'congestion')),
+    (30, 'runny nose', ('running nose', 'rhinorrhea', 'rhinorrhoea')),
+    (31, 'muscle pain', ('muscle ache', 'muscle aches', 'body aches', 'myalgia', 'sore muscles')),
+    (32, 'chills', ('shivering', 'shivers', 'rigors')),
+)
+
+# Words negating the phrases after them; 'doesn', 'don', ... are what remains of "doesn't", "don't", ...
+NEGATIONS = frozenset(('no', 'not', 'never', 'nor', 'without', 'denies', 'denied', 'deny', 'negative',
+                       'doesn', 'don', 'didn', 'isn', 'hasn', 'haven', 'hadn', 'wasn'))
+
+# Words ending the clause of a negation
+CLAUSE_ENDS = frozenset(('but', 'however', 'although', 'though', 'except', 'yet'))
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_CLAUSE_BREAK = re.compile(r'[.;:!?]')
+
+
+def normalize_words(text: Any) -> List[str]:
+    """
+    Split symptom text into lowercase words, dropping punctuation.
+
+    Args:
+        text: Symptom text (non-strings are converted with str())
+
+    Returns:
+        Words of the text, in order
+    """
+    return _NON_WORD.sub(' ', str(text).lower()).split()
+
+
+class SymptomVocabulary:
+    """Word trie of symptom phrases mapping free text to concept IDs."""
+
+    def __init__(self, concepts: Iterable[Tuple[int, str, Iterable[str]]] = CONCEPTS):
+        """
+        Load the concepts into the lookup structures.
+
+        Args:
+            concepts: (concept ID, canonical name, synonyms) triples
+
+        Raises:
+            ValueError: If a concept ID is repeated or a phrase names two concepts
+        """
+        self._names = {}
+        # Each node is a dict of word -> child node; the None key holds the concept ID of a phrase ending there
+        self._root = {}
+        for concept_id, name, synonyms in concepts:
+            if concept_id in self._names:
+                raise ValueError(f"Duplicate symptom concept ID: {concept_id}")
+            self._names[concept_id] = name
+            for phrase in (name,) + tuple(synonyms):
+                self._add_phrase(normalize_words(phrase), concept_id)
+
+    def _add_phrase(self, words: List[str], concept_id: int) -> None:
+        node = self._root
+        for word in words:
+            node = node.setdefault(word, {})
+        if node.get(None, concept_id) != concept_id:
+            raise ValueError(f"Symptom phrase {' '.join(words)!r} names concepts {node[None]} and {concept_id}")
+        node[None] = concept_id
+
+    @staticmethod
+    def _child(node: Dict[Any, Any], word: str) -> Optional[Dict[Any, Any]]:
+        """Follow a word, or its singular if only that is known ('headaches' -> 'headache')."""
+        child = node.get(word)
+        if child is None and len(word) > 3 and word.endswith('s'):
+            child = node.get(word[:-1])
+        return child
+
+    def lookup(self, text: Any) -> List[int]:
+        """
+        Get the concepts named in one symptom.
+
+        Args:
+            text: Free-text symptom
+
+        Returns:
+            Concept IDs in the order they appear, without repeats or negated
+            ones (empty if none is recognized)
+        """
+        found = []
+        for clause in _CLAUSE_BREAK.split(str(text)):
+            words = normalize_words(clause)
+            negated = False
+            position = 0
+            while position < len(words):
+                node = self._root
+                match, match_end = None, position
+                for end in range(position, len(words)):
+                    node = self._child(node, words[end])
+                    if node is None:
+                        break
+                    if None in node:
+                        match, match_end = node[None], end + 1
+                if match is None:
+                    if words[position] in NEGATIONS:
+                        negated = True
+                    elif words[position] in CLAUSE_ENDS:
+                        negated = False
+                    position += 1
+                    continue
+                if not negated and match not in found:
+                    found.append(match)
+                position = match_end
+        return found
+
+    def encode(self, symptoms: Any) -> List[int]:
+        """
+        Get the concepts named in a list of symptoms.
+
+        Args:
+            symptoms: List of free-text symptoms
+
+        Returns:
+            Concept IDs in the order they appear, without repeats
+        """
+        if not isinstance(symptoms, list):
+            return []
+        return list(dict.fromkeys(concept_id for symptom in symptoms for concept_id in self.lookup(symptom)))
+
+    def name(self, concept_id: int) -> Optional[str]:
+        """
+        Get the canonical name of a concept.
+
+        Args:
+            concept_id: Concept ID
+
+        Returns:
+            Canonical name, or None if the ID is unknown
+        """
+        return self._names.get(concept_id)
+
+    def canonical_names(self, text: Any) -> List[str]:
+        """
+        Get the canonical names of the concepts named in one symptom.
+
+        Args:
+            text: Free-text symptom
+
+        Returns:
+            Canonical names in the order they appear (empty if none is recognized)
+        """
+        return [self._names[concept_id] for concept_id in self.lookup(text)]
+
+
+# Global instance
+_symptom_vocabulary = None
+_symptom_vocabulary_lock = threading.Lock()
+
+
+def get_symptom_vocabulary() -> SymptomVocabulary:
+    """Get or create the symptom vocabulary instance."""
+    global _symptom_vocabulary
+    with _symptom_vocabulary_lock:
+        if _symptom_vocabulary is None:
+            _symptom_vocabulary = SymptomVocabulary()
+        return _symptom_vocabulary
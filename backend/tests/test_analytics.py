@@ -0,0 +1,202 @@
+"""
+Unit tests for the NumPy column store analytics and its endpoints.
+"""
+
+import os
+import sys
+# Set environment variable BEFORE importing app
+TEST_SECRET_KEY = 'test-secret-key-for-unit-tests-only'
+os.environ['SECRET_KEY'] = TEST_SECRET_KEY
+
+import pytest
+import json
+import jwt
+import tempfile
+import shutil
+from datetime import datetime, timezone, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_access
+from data_access import write_json_file, add_record, update_record
+from analytics import CohortAnalytics, day_number, day_string
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory with assessments over three days."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    write_json_file('assessments.json', [
+        {'assessmentID': 'a1', 'weight': 70, 'weightUnit': 'kg', 'height': 175, 'heightUnit': 'cm', 'age': 30,
+         'symptoms': ['Fever', 'cough'], 'assessmentDate': '2024-01-10T10:00:00Z'},
+        {'assessmentID': 'a2', 'weight': 220, 'weightUnit': 'lbs', 'height': 70, 'heightUnit': 'inches', 'age': 62,
+         'symptoms': ['fever'], 'assessmentDate': '2024-01-12T09:00:00Z'},
+        {'assessmentID': 'a3', 'weight': 50, 'weightUnit': 'kg', 'height': 170, 'heightUnit': 'cm', 'age': 15,
+         'symptoms': ['rash'], 'assessmentDate': '2024-01-12T11:00:00Z'},
+    ])
+    write_json_file('prescriptions.json', [
+        {'prescriptionID': 'rx1', 'assessmentID': 'a1', 'medications': [{'name': 'Ibuprofen'}, {'name': 'Rest'}],
+         'generatedDate': '2024-01-10T10:01:00Z'},
+        {'prescriptionID': 'rx2', 'assessmentID': 'a2', 'medications': [{'name': 'ibuprofen'}],
+         'generatedDate': '2024-01-12T09:01:00Z', 'lastModifiedBy': 'd1'},
+    ])
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def analytics(temp_data_dir):
+    """Create a column store and unregister its change listener afterwards."""
+    cohort_analytics = CohortAnalytics()
+    yield cohort_analytics
+    data_access.remove_change_listener(cohort_analytics._on_change)
+
+
+class TestDayNumbers:
+    """Tests for day number conversion."""
+
+    def test_round_trip(self):
+        """Test that dates, date-times and months convert to day numbers."""
+        assert day_number('1970-01-02T10:00:00Z') == 1
+        assert day_string(day_number('2024-02-29')) == '2024-02-29'
+        assert day_number('2024-02') == day_number('2024-02-01')
+
+    def test_invalid(self):
+        """Test that non-dates have no day number."""
+        assert day_number('soon') is None
+        assert day_number(None) is None
+
+
+class TestCohortAnalytics:
+    """Tests for CohortAnalytics class."""
+
+    def test_symptom_counts_per_day(self, analytics):
+        """Test per-day counts, including days without assessments."""
+        counts = analytics.symptom_counts()
+        assert counts['days'] == ['2024-01-10', '2024-01-11', '2024-01-12']
+        assert counts['assessments'] == [1, 0, 2]
+        assert counts['symptoms'][0] == {'symptom': 'fever', 'total': 2, 'counts': [1, 0, 1]}
+        assert [symptom['symptom'] for symptom in counts['symptoms']] == ['fever', 'cough', 'rash']
+
+    def test_window_and_range(self, analytics):
+        """Test trailing window sums and date bounds."""
+        counts = analytics.symptom_counts(since='2024-01-11', until='2024-01-14', window=2, top=1)
+        assert counts['days'] == ['2024-01-11', '2024-01-12', '2024-01-13']
+        assert counts['assessments'] == [0, 2, 2]
+        assert counts['symptoms'] == [{'symptom': 'fever', 'total': 1, 'counts': [0, 1, 1]}]
+
+    def test_max_days(self, analytics):
+        """Test that explicit and implicit ranges over max_days are rejected."""
+        assert len(analytics.symptom_counts(max_days=3)['days']) == 3
+        with pytest.raises(ValueError):
+            analytics.symptom_counts(max_days=2)
+        with pytest.raises(ValueError):
+            analytics.symptom_counts(since='2024-01-11', until='2024-01-15', max_days=3)
+        with pytest.raises(ValueError):
+            analytics.symptom_counts(since='2023-01-01', max_days=366)
+
+    def test_demographics_in_si_units(self, analytics):
+        """Test that BMI is computed from converted units and binned."""
+        demographics = analytics.demographics()
+        assert demographics['assessments'] == 3
+        assert demographics['age']['histogram']['0-17'] == 1
+        assert demographics['age']['median'] == 30
+        # 220 lbs at 70 inches is a BMI of about 31.6
+        assert demographics['bmi']['histogram'] == {'underweight': 1, 'normal': 1, 'overweight': 0, 'obese': 1}
+
+    def test_prescription_mix(self, analytics):
+        """Test review counts and medication frequencies."""
+        mix = analytics.prescription_mix()
+        assert mix['prescriptions'] == 2
+        assert mix['reviewed'] == 1
+        assert mix['medications'] == [{'medication': 'ibuprofen', 'count': 2}, {'medication': 'rest', 'count': 1}]
+
+    def test_incremental_refresh(self, analytics):
+        """Test that inserts are appended and prescription edits overwrite their row."""
+        analytics.preload()
+        for i in range(40):
+            add_record('assessments.json', {'assessmentID': f'b{i}', 'age': 40, 'symptoms': [f'symptom {i}', 'fever'],
+                                            'assessmentDate': '2024-01-13T10:00:00Z'})
+        update_record('prescriptions.json', 'prescriptionID', 'rx1', {'medications': [{'name': 'Naproxen'}],
+                                                                      'lastModifiedBy': 'd1'})
+        counts = analytics.symptom_counts(since='2024-01-13', until='2024-01-14')
+        assert counts['assessments'] == [40]
+        assert counts['symptoms'][0] == {'symptom': 'fever', 'total': 40, 'counts': [40]}
+        mix = analytics.prescription_mix()
+        assert mix['reviewed'] == 2
+        assert {'medication': 'naproxen', 'count': 1} in mix['medications']
+
+    def test_rewritten_file_is_reloaded(self, analytics):
+        """Test that a replaced data file rebuilds the table."""
+        analytics.preload()
+        write_json_file('assessments.json', [])
+        assert analytics.symptom_counts()['days'] == []
+        assert analytics.demographics()['assessments'] == 0
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    from app import app
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def _auth(user_type='doctor'):
+    token = jwt.encode({
+        'userID': 'd1',
+        'userType': user_type,
+        'exp': datetime.now(timezone.utc) + timedelta(hours=1)
+    }, TEST_SECRET_KEY, algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+class TestAnalyticsEndpoints:
+    """Tests for the /api/analytics endpoints."""
+
+    def test_symptoms(self, client, temp_data_dir):
+        """Test the windowed symptom counts endpoint."""
+        response = client.get('/api/analytics/symptoms?window=3&top=1', headers=_auth())
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['assessments'] == [1, 1, 3]
+        assert data['symptoms'][0]['symptom'] == 'fever'
+
+    def test_demographics_and_prescriptions(self, client, temp_data_dir):
+        """Test the demographics and prescription mix endpoints."""
+        response = client.get('/api/analytics/demographics?since=2024-01-11', headers=_auth())
+        assert json.loads(response.data)['assessments'] == 2
+        response = client.get('/api/analytics/prescriptions', headers=_auth())
+        assert json.loads(response.data)['reviewed'] == 1
+
+    @pytest.mark.parametrize('query', ['window=0', 'top=101', 'since=last-week', 'since=2024-13-01',
+                                       'until=2024-02-30', 'since=2024-13'])
+    def test_invalid_parameters(self, client, temp_data_dir, query):
+        """Test that out-of-range parameters are rejected."""
+        response = client.get(f'/api/analytics/symptoms?{query}', headers=_auth())
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('query', ['since=2024-13-01', 'until=2024-02-30', 'since=2024-13'])
+    def test_invalid_demographics_dates(self, client, temp_data_dir, query):
+        """Test that dates that are not calendar days are rejected."""
+        response = client.get(f'/api/analytics/demographics?{query}', headers=_auth())
+        assert response.status_code == 400
+
+    def test_range_over_cap(self, client, temp_data_dir):
+        """Test that ranges over 366 days are rejected, including the implicit one."""
+        response = client.get('/api/analytics/symptoms?since=0001-01-01&until=9999-01-01', headers=_auth())
+        assert response.status_code == 400
+        add_record('assessments.json', {'assessmentID': 'a4', 'symptoms': ['cough'],
+                                        'assessmentDate': '2021-01-10T10:00:00Z'})
+        response = client.get('/api/analytics/symptoms', headers=_auth())
+        assert response.status_code == 400
+        response = client.get('/api/analytics/symptoms?since=2024-01-01', headers=_auth())
+        assert response.status_code == 200
+
+    def test_patient_forbidden(self, client, temp_data_dir):
+        """Test that patients cannot read analytics."""
+        response = client.get('/api/analytics/demographics', headers=_auth('patient'))
+        assert response.status_code == 403
@@ -0,0 +1,171 @@
+"""
+Unit tests for the monthly cold archive.
+"""
+
+import os
+# Set environment variable BEFORE importing app
+TEST_SECRET_KEY = 'test-secret-key-for-unit-tests-only'
+os.environ['SECRET_KEY'] = TEST_SECRET_KEY
+
+import sys
+import gzip
+import json
+import shutil
+import tempfile
+import jwt
+import pytest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import archive
+import data_access
+from app import app
+from data_access import write_json_file, read_json_file, find_all_by_field, add_record
+from history_service import HistoryService
+
+
+NOW = datetime(2024, 12, 15, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+def assessment(assessment_id, date, patient_id='p1'):
+    return {'assessmentID': assessment_id, 'patientID': patient_id, 'assessmentDate': date, 'symptoms': ['fever']}
+
+
+def prescription(prescription_id, assessment_id, date, patient_id='p1'):
+    return {'prescriptionID': prescription_id, 'assessmentID': assessment_id, 'patientID': patient_id,
+            'medications': [], 'instructions': 'Rest', 'generatedDate': date}
+
+
+@pytest.fixture
+def history_data(temp_data_dir):
+    """Assessments and prescriptions spread over a year."""
+    write_json_file('assessments.json', [
+        assessment('a1', '2024-01-10T09:00:00'),
+        assessment('a2', '2024-02-10T09:00:00'),
+        assessment('a3', '2024-02-20T09:00:00', 'p2'),
+        assessment('a4', '2024-11-10T09:00:00'),
+        assessment('a5', 'unknown'),
+    ])
+    write_json_file('prescriptions.json', [
+        prescription('r1', 'a1', '2024-01-10T09:00:01'),
+        prescription('r4', 'a4', '2024-11-10T09:00:01'),
+    ])
+    return temp_data_dir
+
+
+class TestCutoff:
+    """Tests for month arithmetic."""
+
+    def test_cutoff_month(self):
+        """Test the first month kept live."""
+        assert archive.cutoff_month(0, NOW) == '2024-12'
+        assert archive.cutoff_month(3, NOW) == '2024-09'
+        assert archive.cutoff_month(12, NOW) == '2023-12'
+
+    def test_partition_month(self):
+        """Test that only ISO dates map to a partition."""
+        assert archive.partition_month('2024-02-10T09:00:00Z') == '2024-02'
+        assert archive.partition_month('soon') is None
+        assert archive.partition_month(None) is None
+
+
+class TestArchive:
+    """Tests for moving records to the cold tier."""
+
+    def test_moves_old_records(self, history_data):
+        """Test that old records leave the live file for compressed monthly partitions."""
+        moved = archive.archive_old_records(months=3, now=NOW)
+
+        assert moved == {'assessments.json': 3, 'prescriptions.json': 1}
+        assert [r['assessmentID'] for r in read_json_file('assessments.json')] == ['a4', 'a5']
+        assert archive.cold_partitions('assessments.json') == ['2024-01', '2024-02']
+        path = os.path.join(history_data, 'archive', 'assessments', '2024-02.json.gz')
+        with gzip.open(path, 'rb') as f:
+            assert [r['assessmentID'] for r in json.loads(f.read())] == ['a2', 'a3']
+
+    def test_rerun_appends_to_partition(self, history_data):
+        """Test that a later run merges into an existing partition."""
+        archive.archive_old_records(months=3, now=NOW)
+        add_record('assessments.json', assessment('a6', '2024-02-25T09:00:00'))
+
+        assert archive.archive_old_records(months=3, now=NOW)['assessments.json'] == 1
+        assert [r['assessmentID'] for r in archive.read_partition('assessments.json', '2024-02')] == ['a2', 'a3', 'a6']
+
+    def test_interrupted_run_is_finished(self, history_data):
+        """Test that a crash after writing partitions leaves no duplicates visible."""
+        with patch('data_access.extract_records', side_effect=IOError("disk full")):
+            with pytest.raises(IOError):
+                archive.archive_file('assessments.json', '2024-09')
+
+        assert [r['assessmentID'] for r in find_all_by_field('assessments.json', 'patientID', 'p1',
+                                                             include_archived=True)] == ['a1', 'a2', 'a4', 'a5']
+
+        assert archive.archive_file('assessments.json', '2024-09') == 3
+        assert [r['assessmentID'] for r in archive.read_partition('assessments.json', '2024-02')] == ['a2', 'a3']
+
+    def test_find_all_by_field(self, history_data):
+        """Test that archived records are only returned when asked for."""
+        archive.archive_old_records(months=3, now=NOW)
+
+        assert [r['assessmentID'] for r in find_all_by_field('assessments.json', 'patientID', 'p1')] == ['a4', 'a5']
+        assert [r['assessmentID'] for r in find_all_by_field('assessments.json', 'patientID', 'p1',
+                                                             include_archived=True)] == ['a4', 'a5', 'a1', 'a2']
+
+    def test_live_reads_skip_cold_tier(self, history_data):
+        """Test that reads of live data never open a partition."""
+        archive.archive_old_records(months=3, now=NOW)
+
+        with patch('archive.gzip.open', side_effect=AssertionError("cold partition read")):
+            find_all_by_field('assessments.json', 'patientID', 'p1')
+            HistoryService('memory').get_history('p1')
+
+    def test_history_include_archived(self, history_data):
+        """Test history entries from both tiers, joined and sorted."""
+        archive.archive_old_records(months=3, now=NOW)
+        service = HistoryService('memory')
+
+        assert [e['assessmentID'] for e in service.get_history('p1')] == ['a5', 'a4']
+        history = service.get_history('p1', include_archived=True)
+        assert [e['assessmentID'] for e in history] == ['a5', 'a4', 'a2', 'a1']
+        assert history[3]['prescription']['prescriptionID'] == 'r1'
+        assert HistoryService('mmap').get_history('p1', include_archived=True) == history
+        assert service.count_assessments('p1') == 2
+        assert service.count_assessments('p1', include_archived=True) == 4
+        assert HistoryService('mmap').count_assessments('p1', include_archived=True) == 4
+
+    def test_status_tool(self, history_data, capsys):
+        """Test the command-line tool."""
+        assert archive.main(['--months', '0', '--data-dir', history_data]) == 0
+        assert archive.main(['--status', '--data-dir', history_data]) == 0
+
+        output = capsys.readouterr().out
+        assert 'assessments.json: 4 record(s) archived' in output
+        assert 'assessments.json: 3 partition(s), 4 record(s), 2024-01 to 2024-11' in output
+
+
+def test_history_endpoint_include_archived(history_data):
+    """Test the includeArchived query parameter of the history endpoint."""
+    write_json_file('patients.json', [{'patientID': 'p1', 'firstName': 'John', 'lastName': 'Doe'}])
+    archive.archive_old_records(months=3, now=NOW)
+    token = jwt.encode({'userID': 'p1', 'userType': 'patient',
+                        'exp': datetime.now(timezone.utc) + timedelta(hours=1)}, TEST_SECRET_KEY, algorithm='HS256')
+    app.config['TESTING'] = True
+
+    with app.test_client() as client:
+        live = client.get('/api/patients/p1/history', headers={'Authorization': f'Bearer {token}'})
+        full = client.get('/api/patients/p1/history?includeArchived=true', headers={'Authorization': f'Bearer {token}'})
+
+    assert len(live.get_json()['history']) == 2
+    assert len(full.get_json()['history']) == 4
@@ -0,0 +1,156 @@
+"""
+Unit tests for the ASGI entry point.
+"""
+
+import os
+# Set environment variable BEFORE importing app
+TEST_SECRET_KEY = 'test-secret-key-for-unit-tests-only'
+os.environ['SECRET_KEY'] = TEST_SECRET_KEY
+
+import sys
+import json
+import time
+import asyncio
+import shutil
+import tempfile
+import jwt
+import pytest
+from datetime import datetime, timezone, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+import asgi
+from data_access import write_json_file, read_json_file
+
+
+class SlowStubBedrockService:
+    """Bedrock stand-in whose async generation waits without holding a thread."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def generate_prescription_async(self, symptoms, age, weight, weight_unit, height, height_unit):
+        await asyncio.sleep(self.delay)
+        return {
+            'medications': [{'name': 'Acetaminophen', 'dosage': '500mg', 'frequency': 'Every 6 hours', 'duration': '3 days'}],
+            'instructions': 'Rest and hydrate'
+        }
+
+
+@pytest.fixture
+def data_dir(monkeypatch):
+    """Use a temporary data directory with doctors and a patient."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    monkeypatch.setattr(app_module, 'get_bedrock_service', lambda: SlowStubBedrockService(0.2))
+    write_json_file('patients.json', [{'patientID': 'p1', 'firstName': 'John', 'lastName': 'Doe', 'email': 'john@test.com'}])
+    write_json_file('doctors.json', [
+        {'doctorID': 'd1', 'firstName': 'Ann', 'lastName': 'Lee', 'email': 'ann@test.com', 'specialization': 'General Practice'}
+    ])
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+def token_for(user_id):
+    """Generate a patient JWT."""
+    return jwt.encode({
+        'userID': user_id,
+        'userType': 'patient',
+        'exp': datetime.now(timezone.utc) + timedelta(hours=1)
+    }, TEST_SECRET_KEY, algorithm='HS256')
+
+
+async def call(method, path, body=None, headers=None):
+    """Call the ASGI application directly and collect the response."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode('ascii'),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in (headers or {}).items()],
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+    payload = json.dumps(body).encode('utf-8') if body is not None else b''
+    received = []
+    sent = []
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {'type': 'http.request', 'body': payload, 'more_body': False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi.application(scope, receive, send)
+    status = sent[0]['status']
+    response_body = b''.join(m.get('body', b'') for m in sent[1:])
+    return status, json.loads(response_body) if response_body else None
+
+
+def assessment_body():
+    """Build a valid assessment request body."""
+    return {'patientID': 'p1', 'weight': 70, 'weightUnit': 'kg', 'height': 175, 'heightUnit': 'cm',
+            'age': 30, 'symptoms': ['fever']}
+
+
+def test_create_assessment(data_dir):
+    """Test that the native async endpoint stores the assessment."""
+    status, body = asyncio.run(call('POST', '/api/assessments', assessment_body(),
+                                    {'Authorization': f'Bearer {token_for("p1")}'}))
+
+    assert status == 201
+    assert body['prescription']['instructions'] == 'Rest and hydrate'
+    assert read_json_file('assessments.json')[0]['assessmentID'] == body['assessment']['assessmentID']
+    assert read_json_file('assignments.json')[0]['doctorID'] == 'd1'
+
+
+def test_many_assessments_in_flight(data_dir):
+    """Test that concurrent requests wait on Bedrock together, not one by one."""
+    headers = {'Authorization': f'Bearer {token_for("p1")}'}
+
+    async def main():
+        return await asyncio.gather(*[
+            call('POST', '/api/assessments', assessment_body(), headers) for _ in range(50)
+        ])
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - started
+
+    assert [status for status, _ in results] == [201] * 50
+    assert len(read_json_file('assessments.json')) == 50
+    # Serially this would take 50 x 0.2s = 10s
+    assert elapsed < 5
+
+
+def test_validation_error(data_dir):
+    """Test that validation errors match the Flask view."""
+    status, body = asyncio.run(call('POST', '/api/assessments', dict(assessment_body(), symptoms=[]),
+                                    {'Authorization': f'Bearer {token_for("p1")}'}))
+
+    assert status == 400
+    assert body['message'] == 'Symptoms must be a non-empty list'
+
+
+def test_unauthorized(data_dir):
+    """Test that requests without a token are rejected."""
+    status, _ = asyncio.run(call('POST', '/api/assessments', assessment_body()))
+    assert status == 401
+
+
+def test_other_routes_use_flask(data_dir):
+    """Test that other requests are served by the Flask app."""
+    status, body = asyncio.run(call('GET', '/api/health'))
+
+    assert status == 200
+    assert body['status'] == 'ok'
@@ -0,0 +1,152 @@
+"""
+Unit tests for the assessment creation endpoint.
+
+Tests the POST /api/assessments endpoint.
+"""
+
+import os
+# Set environment variable BEFORE importing app
+TEST_SECRET_KEY = 'test-secret-key-for-unit-tests-only'
+os.environ['SECRET_KEY'] = TEST_SECRET_KEY
+
+import pytest
+import json
+import jwt
+import shutil
+import tempfile
+from datetime import datetime, timezone, timedelta
+import app as app_module
+import data_access
+from app import app
+from data_access import write_json_file, read_json_file
+
+
+class StubBedrockService:
+    """Bedrock stand-in returning a fixed prescription."""
+
+    def generate_prescription(self, symptoms, age, weight, weight_unit, height, height_unit):
+        return {
+            'medications': [{'name': 'Acetaminophen', 'dosage': '500mg', 'frequency': 'Every 6 hours', 'duration': '3 days'}],
+            'instructions': 'Rest and hydrate'
+        }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Create a test client over a temporary data directory."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    monkeypatch.setattr(app_module, 'get_bedrock_service', lambda: StubBedrockService())
+    write_json_file('patients.json', [{'patientID': 'p1', 'firstName': 'John', 'lastName': 'Doe', 'email': 'john@test.com'}])
+    write_json_file('doctors.json', [
+        {'doctorID': 'd1', 'firstName': 'Ann', 'lastName': 'Lee', 'email': 'ann@test.com', 'specialization': 'General Practice'},
+        {'doctorID': 'd2', 'firstName': 'Raj', 'lastName': 'Rao', 'email': 'raj@test.com', 'specialization': 'Cardiology'}
+    ])
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+    shutil.rmtree(temp_dir)
+
+
+def generate_test_token(user_id, user_type='patient'):
+    """Generate a test JWT token for authentication."""
+    token_payload = {
+        'userID': user_id,
+        'email': 'test@test.com',
+        'userType': user_type,
+        'exp': datetime.now(timezone.utc) + timedelta(hours=24)
+    }
+    return jwt.encode(token_payload, TEST_SECRET_KEY, algorithm='HS256')
+
+
+def assessment_body(**overrides):
+    """Build a valid assessment request body."""
+    body = {
+        'patientID': 'p1',
+        'weight': 70,
+        'weightUnit': 'kg',
+        'height': 175,
+        'heightUnit': 'cm',
+        'age': 30,
+        'symptoms': ['fever']
+    }
+    body.update(overrides)
+    return body
+
+
+def test_create_assessment_success(client):
+    """Test that assessment, prescription and assignment are stored together."""
+    response = client.post(
+        '/api/assessments',
+        json=assessment_body(),
+        headers={'Authorization': f'Bearer {generate_test_token("p1")}'}
+    )
+
+    assert response.status_code == 201
+    data = json.loads(response.data)
+    assessment_id = data['assessment']['assessmentID']
+    assert data['prescription']['medications'][0]['name'] == 'Acetaminophen'
+
+    assert [a['assessmentID'] for a in read_json_file('assessments.json')] == [assessment_id]
+    assert read_json_file('prescriptions.json')[0]['assessmentID'] == assessment_id
+    assert read_json_file('assignments.json')[0]['assessmentID'] == assessment_id
+
+
+def test_create_assessment_stores_symptom_ids(client):
+    """Test that canonical symptom IDs are stored next to the original text."""
+    response = client.post(
+        '/api/assessments',
+        json=assessment_body(symptoms=['Feverish', 'sore-throat and headaches']),
+        headers={'Authorization': f'Bearer {generate_test_token("p1")}'}
+    )
+
+    assert response.status_code == 201
+    stored = read_json_file('assessments.json')[0]
+    assert stored['symptoms'] == ['Feverish', 'sore-throat and headaches']
+    assert stored['symptomIDs'] == [1, 6, 3]
+
+
+def test_create_assessment_balances_doctors(client):
+    """Test that consecutive assessments go to different doctors."""
+    token = generate_test_token('p1')
+    for _ in range(4):
+        client.post('/api/assessments', json=assessment_body(), headers={'Authorization': f'Bearer {token}'})
+
+    doctor_ids = [a['doctorID'] for a in read_json_file('assignments.json')]
+    assert sorted(doctor_ids) == ['d1', 'd1', 'd2', 'd2']
+
+
+def test_create_assessment_visible_in_history(client):
+    """Test that a new assessment shows up in the patient history."""
+    token = generate_test_token('p1')
+    response = client.post('/api/assessments', json=assessment_body(), headers={'Authorization': f'Bearer {token}'})
+    assessment_id = json.loads(response.data)['assessment']['assessmentID']
+
+    response = client.get('/api/patients/p1/history', headers={'Authorization': f'Bearer {token}'})
+
+    history = json.loads(response.data)['history']
+    assert [entry['assessmentID'] for entry in history] == [assessment_id]
+    assert history[0]['prescription']['instructions'] == 'Rest and hydrate'
+
+
+def test_create_assessment_validation_error(client):
+    """Test that invalid input stores nothing."""
+    response = client.post(
+        '/api/assessments',
+        json=assessment_body(symptoms=[]),
+        headers={'Authorization': f'Bearer {generate_test_token("p1")}'}
+    )
+
+    assert response.status_code == 400
+    assert not os.path.exists(os.path.join(data_access.DATA_DIR, 'assessments.json'))
+
+
+def test_create_assessment_other_patient_forbidden(client):
+    """Test that patients cannot create assessments for someone else."""
+    response = client.post(
+        '/api/assessments',
+        json=assessment_body(),
+        headers={'Authorization': f'Bearer {generate_test_token("p2")}'}
+    )
+
+    assert response.status_code == 403
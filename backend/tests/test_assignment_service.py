@@ -0,0 +1,178 @@
+"""
+Unit tests for the doctor assignment engine.
+"""
+
+import os
+import sys
+import pytest
+import tempfile
+import shutil
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import archive
+import data_access
+from data_access import write_json_file, add_record, update_record
+from assignment_service import DoctorAssignmentEngine, FALLBACK_DOCTOR, infer_specialization
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory with three doctors."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    write_json_file('doctors.json', [
+        {'doctorID': 'd1', 'firstName': 'Ann', 'lastName': 'Lee', 'specialization': 'General Practice'},
+        {'doctorID': 'd2', 'firstName': 'Raj', 'lastName': 'Rao', 'specialization': 'Cardiology'},
+        {'doctorID': 'd3', 'firstName': 'Mia', 'lastName': 'Kim', 'specialization': 'General Practice'}
+    ])
+    write_json_file('assignments.json', [])
+    write_json_file('prescriptions.json', [])
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def make_engine():
+    """Create engines and unregister their change listeners afterwards."""
+    engines = []
+
+    def factory(strategy):
+        engine = DoctorAssignmentEngine(strategy)
+        engines.append(engine)
+        return engine
+
+    yield factory
+    for engine in engines:
+        data_access.remove_change_listener(engine._on_change)
+
+
+class TestInferSpecialization:
+    """Tests for infer_specialization function."""
+
+    def test_matching_symptom(self):
+        """Test that a known symptom maps to its specialization."""
+        assert infer_specialization(['fever', 'Chest Pain']) == 'Cardiology'
+
+    def test_default(self):
+        """Test that unknown symptoms map to General Practice."""
+        assert infer_specialization(['fever']) == 'General Practice'
+
+    def test_negated_symptom(self):
+        """Test that negated symptoms are not routed."""
+        assert infer_specialization(['no chest pain']) == 'General Practice'
+        assert infer_specialization(['denies chest pain', 'rash']) == 'Dermatology'
+
+
+class TestDoctorAssignmentEngine:
+    """Tests for DoctorAssignmentEngine class."""
+
+    def test_unknown_strategy(self):
+        """Test that an unknown strategy is rejected."""
+        with pytest.raises(ValueError):
+            DoctorAssignmentEngine('random')
+
+    def test_no_doctors_fallback(self, temp_data_dir, make_engine):
+        """Test the fallback doctor when none are registered."""
+        write_json_file('doctors.json', [])
+        engine = make_engine('least_loaded')
+        assert engine.assign('a1') == FALLBACK_DOCTOR
+
+    def test_least_loaded_spreads_evenly(self, temp_data_dir, make_engine):
+        """Test that least-loaded assignment balances caseload."""
+        engine = make_engine('least_loaded')
+        chosen = [engine.assign(f'a{i}')['doctorID'] for i in range(9)]
+
+        assert sorted(chosen[:3]) == ['d1', 'd2', 'd3']
+        assert engine.get_loads() == {'d1': 3, 'd2': 3, 'd3': 3}
+
+    def test_least_loaded_uses_existing_assignments(self, temp_data_dir, make_engine):
+        """Test that open assignments on disk count towards load."""
+        write_json_file('assignments.json', [
+            {'assessmentID': 'old1', 'doctorID': 'd1'},
+            {'assessmentID': 'old2', 'doctorID': 'd2'},
+            {'assessmentID': 'old3', 'doctorID': 'd2'}
+        ])
+        write_json_file('prescriptions.json', [
+            {'prescriptionID': 'rx1', 'assessmentID': 'old1'},
+            {'prescriptionID': 'rx2', 'assessmentID': 'old2'},
+            {'prescriptionID': 'rx3', 'assessmentID': 'old3', 'lastModifiedBy': 'd2'}
+        ])
+        engine = make_engine('least_loaded')
+
+        assert engine.get_loads() == {'d1': 1, 'd2': 1, 'd3': 0}
+        assert engine.assign('a1')['doctorID'] == 'd3'
+
+    def test_review_closes_assignment(self, temp_data_dir, make_engine):
+        """Test that a doctor updating the prescription releases load."""
+        engine = make_engine('least_loaded')
+        doctor_id = engine.assign('a1')['doctorID']
+        add_record('assignments.json', {'assessmentID': 'a1', 'doctorID': doctor_id})
+        add_record('prescriptions.json', {'prescriptionID': 'rx1', 'assessmentID': 'a1'})
+        assert engine.get_loads()[doctor_id] == 1
+
+        update_record('prescriptions.json', 'prescriptionID', 'rx1', {'lastModifiedBy': doctor_id})
+
+        assert engine.get_loads()[doctor_id] == 0
+
+    def test_external_assignment_counted(self, temp_data_dir, make_engine):
+        """Test that assignments written elsewhere count towards load."""
+        engine = make_engine('least_loaded')
+        engine.get_loads()
+
+        add_record('assignments.json', {'assessmentID': 'x1', 'doctorID': 'd1'})
+
+        assert engine.get_loads()['d1'] == 1
+
+    def test_write_by_other_process_reloads(self, temp_data_dir, make_engine):
+        """Test that assignments written without a change notification are picked up."""
+        engine = make_engine('least_loaded')
+        assert engine.get_loads()['d1'] == 0
+
+        # As another server process would, without notifying this one
+        data_access._write_json_file('prescriptions.json', [
+            {'prescriptionID': 'rx1', 'assessmentID': 'x1'},
+            {'prescriptionID': 'rx2', 'assessmentID': 'x2'}
+        ])
+        data_access._write_json_file('assignments.json', [
+            {'assessmentID': 'x1', 'doctorID': 'd1'},
+            {'assessmentID': 'x2', 'doctorID': 'd1'}
+        ])
+
+        assert engine.get_loads()['d1'] == 2
+
+    def test_archived_prescriptions_close_assignments(self, temp_data_dir, make_engine):
+        """Test that archiving reviewed prescriptions does not reopen their assignments."""
+        write_json_file('assignments.json', [
+            {'assessmentID': f'old{i}', 'doctorID': 'd1', 'assignmentDate': '2020-01-10T10:00:00Z'} for i in range(5)
+        ])
+        write_json_file('prescriptions.json', [
+            {'prescriptionID': f'rx{i}', 'assessmentID': f'old{i}', 'generatedDate': '2020-01-10T10:00:00Z',
+             'lastModifiedBy': 'd1'} for i in range(5)
+        ])
+        engine = make_engine('least_loaded')
+        assert engine.get_loads()['d1'] == 0
+
+        assert archive.archive_old_records(months=12)['prescriptions.json'] == 5
+
+        assert engine.get_loads()['d1'] == 0
+        assert engine.assign('a1')['doctorID'] == 'd1'
+
+    def test_round_robin(self, temp_data_dir, make_engine):
+        """Test that round-robin cycles through doctors in order."""
+        engine = make_engine('round_robin')
+        chosen = [engine.assign(f'a{i}')['doctorID'] for i in range(4)]
+        assert chosen == ['d1', 'd2', 'd3', 'd1']
+
+    def test_specialization_match(self, temp_data_dir, make_engine):
+        """Test that symptoms route to a matching specialist."""
+        engine = make_engine('specialization')
+        assert engine.assign('a1', symptoms=['chest pain'])['doctorID'] == 'd2'
+        assert engine.assign('a2', specialization='cardiology')['doctorID'] == 'd2'
+        assert engine.assign('a3', symptoms=['fever'])['doctorID'] in ('d1', 'd3')
+
+    def test_specialization_fallback(self, temp_data_dir, make_engine):
+        """Test fallback to least-loaded when no specialist exists."""
+        engine = make_engine('specialization')
+        assert engine.assign('a1', symptoms=['rash'])['doctorID'] in ('d1', 'd2', 'd3')
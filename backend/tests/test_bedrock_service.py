@@ -0,0 +1,226 @@
+"""
+Unit tests for the Bedrock client pool and service concurrency.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bedrock_service
+from bedrock_service import BedrockClientPool, BedrockService
+from bedrock_stub import StubBedrockClient
+
+
+class Counter:
+    """Client factory counting the clients it builds."""
+
+    def __init__(self):
+        self.built = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.built += 1
+            return object()
+
+
+@pytest.fixture
+def stub_service(monkeypatch):
+    """Create a service backed by fast stub clients."""
+    monkeypatch.setenv('BEDROCK_STUB', '1')
+    monkeypatch.setenv('BEDROCK_STUB_LATENCY_MS', '50')
+    monkeypatch.setenv('BEDROCK_STUB_JITTER_MS', '0')
+    monkeypatch.setenv('BEDROCK_STUB_FAILURE_RATE', '0')
+    return BedrockService(pool_size=4)
+
+
+def assessment(symptom):
+    """Build batch input for one assessment."""
+    return {'symptoms': [symptom], 'age': 30, 'weight': 70, 'weightUnit': 'kg', 'height': 175, 'heightUnit': 'cm'}
+
+
+class TestBedrockClientPool:
+    """Tests for BedrockClientPool."""
+
+    def test_shared_reuses_clients(self):
+        """Test that a released client is lent out again instead of building a new one."""
+        factory = Counter()
+        pool = BedrockClientPool(factory, size=2)
+
+        with pool.lease() as first:
+            pass
+        with pool.lease() as second:
+            pass
+
+        assert first is second
+        assert factory.built == 1
+
+    def test_shared_is_bounded(self):
+        """Test that callers wait once every client is lent out."""
+        factory = Counter()
+        pool = BedrockClientPool(factory, size=2)
+        held = [pool.acquire(), pool.acquire()]
+
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.05)
+
+        pool.release(held[0])
+        assert pool.acquire(timeout=1) is held[0]
+        assert factory.built == 2
+
+    def test_short_lived_threads_share_clients(self):
+        """Test that a new thread per call reuses pooled clients instead of building one each."""
+        factory = Counter()
+        pool = BedrockClientPool(factory, size=4)
+
+        def worker():
+            with pool.lease():
+                pass
+
+        for _ in range(50):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+        assert factory.built == 1
+
+    def test_lease_async(self):
+        """Test async acquisition waits for a released client."""
+        pool = BedrockClientPool(Counter(), size=1)
+        held = pool.acquire()
+
+        async def borrow():
+            async with pool.lease_async(timeout=1) as client:
+                return client
+
+        async def main():
+            task = asyncio.ensure_future(borrow())
+            await asyncio.sleep(0.05)
+            assert not task.done()
+            pool.release(held)
+            return await task
+
+        assert asyncio.run(main()) is held
+
+    def test_cancelled_lease_async_returns_client(self):
+        """Test that a client acquired for a cancelled async waiter goes back to the pool."""
+        pool = BedrockClientPool(Counter(), size=1)
+        held = pool.acquire()
+
+        async def borrow():
+            async with pool.lease_async(timeout=1):
+                pass
+
+        async def main():
+            task = asyncio.ensure_future(borrow())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            pool.release(held)
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # Let the executor hand over the client and the callback give it back
+            await asyncio.sleep(0.1)
+
+        asyncio.run(main())
+        assert pool.acquire(timeout=0) is held
+
+    def test_invalid_configuration(self):
+        """Test that bad sizes are rejected."""
+        with pytest.raises(ValueError):
+            BedrockClientPool(Counter(), size=0)
+
+
+class TestBedrockService:
+    """Tests for BedrockService concurrency."""
+
+    def test_generate_prescriptions_in_parallel(self, stub_service):
+        """Test that a batch runs concurrently and keeps input order."""
+        started = time.perf_counter()
+        prescriptions = stub_service.generate_prescriptions([assessment('fever')] * 8)
+        elapsed = time.perf_counter() - started
+
+        assert len(prescriptions) == 8
+        assert all(p['medications'][0]['name'] == 'Acetaminophen' for p in prescriptions)
+        # 8 calls of 50ms over 4 clients take about 100ms, not 400ms
+        assert elapsed < 0.3
+        assert stub_service.pool.created <= 4
+
+    def test_generate_prescriptions_empty(self, stub_service):
+        """Test an empty batch."""
+        assert stub_service.generate_prescriptions([]) == []
+
+    def test_failed_item_falls_back(self, stub_service):
+        """Test that one failing call only affects its own prescription."""
+        stub_service.client = StubBedrockClient(latency_ms=0, jitter_ms=0, failure_rate=1.0)
+
+        prescriptions = stub_service.generate_prescriptions([assessment('headache'), assessment('cough')])
+
+        assert [p['medications'][0]['name'] for p in prescriptions] == ['Ibuprofen', 'Dextromethorphan']
+
+    def test_generate_prescription_async(self, stub_service):
+        """Test concurrent async generation."""
+        async def main():
+            return await asyncio.gather(*[
+                stub_service.generate_prescription_async(['fever'], 30, 70, 'kg', 175, 'cm')
+                for _ in range(4)
+            ])
+
+        started = time.perf_counter()
+        prescriptions = asyncio.run(main())
+
+        assert len(prescriptions) == 4
+        assert time.perf_counter() - started < 0.2
+
+    def test_no_client_uses_fallback(self, stub_service):
+        """Test that a service without a client still answers."""
+        stub_service.client = None
+
+        prescription = stub_service.generate_prescription(['nausea'], 30, 70, 'kg', 175, 'cm')
+
+        assert prescription['medications'][0]['name'] == 'Ondansetron'
+
+    def test_fallback_matches_canonical_symptoms(self, stub_service):
+        """Test that the fallback recognizes synonyms and phrases, once per medication."""
+        stub_service.client = None
+
+        prescription = stub_service.generate_prescription(['Headaches', 'feverish and a head ache'], 30, 70, 'kg', 175, 'cm')
+
+        assert [m['name'] for m in prescription['medications']] == ['Ibuprofen', 'Acetaminophen']
+
+    def test_fallback_skips_negated_symptoms(self, stub_service):
+        """Test that the fallback prescribes nothing for denied symptoms."""
+        stub_service.client = None
+
+        prescription = stub_service.generate_prescription(['no fever', 'denies chest pain'], 30, 70, 'kg', 175, 'cm')
+
+        assert [m['name'] for m in prescription['medications']] == ['General Rest and Hydration']
+
+
+def test_singleton_built_once(monkeypatch):
+    """Test that concurrent first calls build a single service."""
+    built = []
+
+    class SlowService:
+        def __init__(self):
+            time.sleep(0.05)
+            built.append(self)
+
+    monkeypatch.setattr(bedrock_service, '_bedrock_service', None)
+    monkeypatch.setattr(bedrock_service, 'BedrockService', SlowService)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(bedrock_service.get_bedrock_service()))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(built) == 1
+    assert all(r is built[0] for r in results)
@@ -0,0 +1,50 @@
+"""
+Smoke tests for the data_access benchmark suite.
+"""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_access
+from benchmarks.bench_data_access import run_benchmarks, compare_to_baseline, main
+
+
+def test_run_benchmarks_schema():
+    """Test that a tiny run reports every operation and restores DATA_DIR."""
+    original_dir = data_access.DATA_DIR
+    results = run_benchmarks([20], repeat=2)
+
+    assert data_access.DATA_DIR == original_dir
+    operations = results['results']['20']
+    assert set(operations) == {'read_json_file', 'find_by_id', 'find_all_by_field', 'add_record', 'update_record'}
+    assert operations['find_by_id']['count'] == 2
+    assert operations['add_record']['p95_ms'] >= operations['add_record']['p50_ms']
+
+
+def test_compare_to_baseline_flags_regressions():
+    """Test that slower operations beyond the threshold are flagged."""
+    baseline = {'results': {'100': {'find_by_id': {'p50_ms': 1.0}, 'add_record': {'p50_ms': 10.0}}}}
+    current = {'results': {'100': {'find_by_id': {'p50_ms': 2.0}, 'add_record': {'p50_ms': 10.5}},
+                           '1000': {'find_by_id': {'p50_ms': 5.0}}}}
+
+    rows = {row['operation']: row for row in compare_to_baseline(current, baseline, threshold=1.25)}
+
+    assert set(rows) == {'find_by_id', 'add_record'}
+    assert rows['find_by_id']['regression'] is True
+    assert rows['add_record']['regression'] is False
+
+
+def test_main_saves_baseline(tmp_path):
+    """Test that the CLI writes results and a baseline file."""
+    output = tmp_path / 'results.json'
+    baseline = tmp_path / 'baseline.json'
+
+    exit_code = main(['--sizes', '10', '--repeat', '1', '--output', str(output),
+                      '--baseline', str(baseline), '--save-baseline'])
+
+    assert exit_code == 0
+    assert output.exists()
+    assert baseline.exists()
@@ -0,0 +1,134 @@
+"""
+Unit tests for response compression middleware.
+"""
+
+import os
+import sys
+import gzip
+import json
+import pytest
+from flask import Flask, jsonify
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compression
+from compression import Compressor, choose_encoding, parse_accept_encoding
+
+
+PAYLOAD = {'history': [{'symptoms': ['headache', 'fever'], 'medications': ['Ibuprofen']} for _ in range(50)]}
+
+
+@pytest.fixture
+def client():
+    """Create a test client for a small app using the compressor."""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['COMPRESS_MIN_SIZE'] = 200
+    Compressor(app)
+
+    @app.route('/large')
+    def large():
+        return jsonify(PAYLOAD)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/created', methods=['POST'])
+    def created():
+        return jsonify(PAYLOAD), 201
+
+    with app.test_client() as client:
+        yield client
+
+
+class TestAcceptEncoding:
+    """Tests for Accept-Encoding negotiation."""
+
+    def test_parse_quality_values(self):
+        """Test parsing codings with q-values."""
+        assert parse_accept_encoding('gzip;q=0.5, br, identity;q=0') == {'gzip': 0.5, 'br': 1.0, 'identity': 0.0}
+
+    def test_no_header(self):
+        """Test that no header means no compression."""
+        assert choose_encoding(None) is None
+
+    def test_gzip_rejected(self):
+        """Test that q=0 disables a coding."""
+        assert choose_encoding('gzip;q=0') is None
+
+    def test_wildcard(self, monkeypatch):
+        """Test that a wildcard accepts gzip."""
+        monkeypatch.setattr(compression, 'brotli', None)
+        assert choose_encoding('*') == 'gzip'
+
+
+class TestCompressor:
+    """Tests for the Compressor after_request hook."""
+
+    def test_large_response_gzipped(self, client):
+        """Test that large JSON responses are gzip compressed."""
+        response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data)) == PAYLOAD
+        assert len(response.data) < len(json.dumps(PAYLOAD)) / 3
+
+    def test_below_threshold_not_compressed(self, client):
+        """Test that responses below the minimum size are left alone."""
+        response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+
+        assert 'Content-Encoding' not in response.headers
+        assert json.loads(response.data) == {'status': 'ok'}
+        assert response.headers.get('ETag')
+
+    def test_not_compressed_without_accept_encoding(self, client):
+        """Test that clients without Accept-Encoding get identity bodies."""
+        response = client.get('/large')
+
+        assert 'Content-Encoding' not in response.headers
+        assert json.loads(response.data) == PAYLOAD
+
+    def test_non_get_not_compressed(self, client):
+        """Test that non-GET responses are not compressed."""
+        response = client.post('/created', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 201
+        assert 'Content-Encoding' not in response.headers
+
+    def test_etag_not_modified(self, client):
+        """Test that a matching If-None-Match returns 304 without a body."""
+        first = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+        etag = first.headers['ETag']
+
+        second = client.get('/large', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+        assert second.status_code == 304
+        assert second.data == b''
+        assert second.headers['ETag'] == etag
+
+    def test_etag_differs_per_encoding(self, client):
+        """Test that compressed and identity representations have distinct ETags."""
+        compressed = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+        identity = client.get('/large')
+
+        assert compressed.headers['ETag'] != identity.headers['ETag']
+
+    def test_compressed_body_cached(self, client, monkeypatch):
+        """Test that an unchanged payload is only compressed once."""
+        calls = []
+        original = Compressor.compress
+
+        def counting_compress(self, body, coding, config):
+            calls.append(coding)
+            return original(self, body, coding, config)
+
+        monkeypatch.setattr(Compressor, 'compress', counting_compress)
+
+        client.get('/large', headers={'Accept-Encoding': 'gzip'})
+        response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+
+        assert calls == ['gzip']
+        assert json.loads(gzip.decompress(response.data)) == PAYLOAD
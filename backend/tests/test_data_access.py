@@ -8,6 +8,9 @@ import json
 import pytest
 import tempfile
 import shutil
+import threading
+import time
+import uuid
 from unittest.mock import patch
 
 # Add parent directory to path for imports
@@ -15,15 +18,34 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data_access import (
     read_json_file,
+    read_json_snapshot,
     write_json_file,
     generate_id,
+    id_timestamp,
+    min_id_at,
     find_by_id,
     find_all_by_field,
     add_record,
     update_record,
     delete_record,
+    add_change_listener,
+    remove_change_listener,
+    transaction,
+    recover_journals,
+    Transaction,
+    ReadWriteLock,
+    enable_profiling,
+    get_profile,
+    reset_profile,
+    dump_profile,
+    reshard,
+    shard_count,
+    data_signature,
+    JOURNAL_PREFIX,
     DATA_DIR
 )
+import data_access
+import reshard as reshard_tool
 
 
 @pytest.fixture
@@ -126,7 +148,7 @@ class TestGenerateId:
         id2 = generate_id()
         
         assert id1 != id2
-        assert len(id1) == 36  # UUID4 length
+        assert len(id1) == 36  # UUID length
     
     def test_generate_id_with_prefix(self):
         """Test generating ID with prefix."""
@@ -141,6 +163,62 @@ class TestGenerateId:
         """Test that multiple IDs are unique."""
         ids = [generate_id() for _ in range(100)]
         assert len(ids) == len(set(ids))  # All unique
+    
+    def test_ids_are_uuid7(self):
+        """Test that IDs are valid version 7 UUIDs."""
+        value = uuid.UUID(generate_id())
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+    
+    def test_ids_sort_by_creation(self):
+        """Test that IDs increase strictly, within and across milliseconds."""
+        ids = [generate_id() for _ in range(10000)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+    
+    def test_monotonic_when_clock_stalls_or_steps_back(self):
+        """Test ordering when many IDs share a millisecond or time goes backwards."""
+        with patch('data_access.time.time_ns', return_value=1_700_000_000_000_000_000):
+            ids = [generate_id() for _ in range(5000)]
+        with patch('data_access.time.time_ns', return_value=1_600_000_000_000_000_000):
+            ids.append(generate_id())
+        
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+    
+    def test_unique_across_threads(self):
+        """Test that concurrent generators never collide."""
+        results = []
+        
+        def worker():
+            results.append([generate_id() for _ in range(2000)])
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        ids = [i for batch in results for i in batch]
+        assert len(set(ids)) == len(ids)
+        assert all(batch == sorted(batch) for batch in results)
+    
+    def test_id_timestamp(self):
+        """Test reading the creation time back from an ID."""
+        before = time.time()
+        record_id = generate_id("assessment")
+        
+        assert before - 0.001 <= id_timestamp(record_id) <= time.time() + 0.001
+        assert id_timestamp(str(uuid.uuid4())) is None
+        assert id_timestamp("not-an-id") is None
+    
+    def test_min_id_at_bounds_time_ranges(self):
+        """Test that min_id_at gives a string lower bound for IDs created later."""
+        cutoff = time.time()
+        record_id = generate_id()
+        
+        assert min_id_at(cutoff - 1) <= record_id
+        assert min_id_at(cutoff + 60) > record_id
 
 
 class TestFindById:
@@ -318,3 +396,463 @@ class TestConcurrentAccess:
         assert len(all_patients) == 4
         assert any(p["patientID"] == "patient_003" for p in all_patients)
         assert any(p["patientID"] == "patient_004" for p in all_patients)
+
+
+class TestTransaction:
+    """Tests for multi-file transactions."""
+    
+    def test_commit_writes_all_files(self, temp_data_dir, sample_patients):
+        """Test that staged records are written to every file on commit."""
+        write_json_file('patients.json', sample_patients)
+        
+        with transaction() as txn:
+            txn.add_record('patients.json', {"patientID": "patient_003"})
+            txn.add_record('assessments.json', {"assessmentID": "a1", "patientID": "patient_003"})
+            txn.add_record('assessments.json', {"assessmentID": "a2", "patientID": "patient_003"})
+        
+        assert len(read_json_file('patients.json')) == 3
+        assert [a["assessmentID"] for a in read_json_file('assessments.json')] == ["a1", "a2"]
+        assert not [f for f in os.listdir(temp_data_dir) if f.startswith(JOURNAL_PREFIX)]
+    
+    def test_single_file_commit_skips_journal(self, temp_data_dir, sample_patients):
+        """Test that an insert into one file is a single atomic write, without a journal."""
+        write_json_file('patients.json', sample_patients)
+        real_dump = data_access._dump_json_file
+        
+        with patch('data_access._dump_json_file', side_effect=real_dump) as dump:
+            add_record('patients.json', {"patientID": "patient_003"})
+        
+        assert [os.path.basename(call.args[0]) for call in dump.call_args_list] == ['patients.json']
+        assert len(read_json_file('patients.json')) == 3
+    
+    def test_exception_discards_staged_records(self, temp_data_dir, sample_patients):
+        """Test that nothing is written if the block raises."""
+        write_json_file('patients.json', sample_patients)
+        
+        with pytest.raises(ValueError):
+            with transaction() as txn:
+                txn.add_record('patients.json', {"patientID": "patient_003"})
+                raise ValueError("boom")
+        
+        assert read_json_file('patients.json') == sample_patients
+    
+    def test_commit_twice_fails(self, temp_data_dir):
+        """Test that a transaction can only be committed once."""
+        txn = Transaction()
+        txn.add_record('patients.json', {"patientID": "patient_001"})
+        txn.commit()
+        
+        with pytest.raises(RuntimeError):
+            txn.commit()
+    
+    def test_failed_write_is_recovered(self, temp_data_dir, sample_patients):
+        """Test that a commit interrupted after journaling is finished by recovery."""
+        write_json_file('patients.json', sample_patients)
+        write_json_file('assessments.json', [])
+        real_dump = data_access._dump_json_file
+        
+        def failing_dump(file_path, data):
+            if file_path.endswith('patients.json'):
+                raise IOError("disk full")
+            real_dump(file_path, data)
+        
+        with patch('data_access._dump_json_file', side_effect=failing_dump):
+            with pytest.raises(IOError):
+                with transaction() as txn:
+                    txn.add_record('assessments.json', {"assessmentID": "a1"})
+                    txn.add_record('patients.json', {"patientID": "patient_003"})
+        
+        assert recover_journals() == 1
+        assert len(read_json_file('patients.json')) == 3
+        assert read_json_file('assessments.json') == [{"assessmentID": "a1"}]
+        assert recover_journals() == 0
+    
+    @pytest.mark.skipif(data_access.fcntl is None, reason='needs fcntl')
+    def test_journal_of_live_commit_not_recovered(self, temp_data_dir):
+        """Test that recovery skips a journal still locked by its committer."""
+        write_json_file('assessments.json', [])
+        journal_path, journal = data_access._write_journal(
+            {'assessments.json': {'baseLength': 0, 'records': [{"assessmentID": "a1"}]}})
+        try:
+            assert recover_journals() == 0
+            assert os.path.exists(journal_path)
+        finally:
+            journal.close()
+        
+        assert recover_journals() == 1
+        assert read_json_file('assessments.json') == [{"assessmentID": "a1"}]
+        assert not os.path.exists(journal_path)
+    
+    def test_journal_removed_meanwhile_ignored(self, temp_data_dir):
+        """Test that a journal finished by another process during recovery is not an error."""
+        missing = os.path.join(temp_data_dir, f"{JOURNAL_PREFIX}gone.json")
+        with patch('glob.glob', return_value=[missing]):
+            assert recover_journals() == 0
+    
+    def test_temporary_files_unique_and_removed(self, temp_data_dir, sample_patients):
+        """Test that writes leave no temporary file behind and keep the data file mode."""
+        real_replace = os.replace
+        temp_paths = []
+        
+        def recording_replace(source, target):
+            temp_paths.append(source)
+            real_replace(source, target)
+        
+        with patch('os.replace', side_effect=recording_replace):
+            write_json_file('patients.json', sample_patients)
+            write_json_file('patients.json', sample_patients)
+        
+        assert len(set(temp_paths)) == 2
+        assert os.listdir(temp_data_dir) == ['patients.json']
+        assert os.stat(os.path.join(temp_data_dir, 'patients.json')).st_mode & 0o777 == data_access.FILE_MODE
+    
+    def test_listeners_notified_after_commit(self, temp_data_dir):
+        """Test that change listeners receive one insert per file, with the signatures around it."""
+        events = []
+        signatures = []
+        write_json_file('assessments.json', [])
+        before = data_signature('assessments.json')
+        
+        def listener(filename, operation, records, signature):
+            events.append((filename, operation, len(records)))
+            signatures.append(signature)
+        
+        add_change_listener(listener)
+        try:
+            with transaction() as txn:
+                txn.add_record('assessments.json', {"assessmentID": "a1"})
+                txn.add_record('prescriptions.json', {"prescriptionID": "rx1"})
+        finally:
+            remove_change_listener(listener)
+        
+        assert events == [('assessments.json', 'insert', 1), ('prescriptions.json', 'insert', 1)]
+        assert signatures[0] == (before, data_signature('assessments.json'))
+        assert signatures[1] == (None, data_signature('prescriptions.json'))
+        assert data_signature('patients.json', missing_ok=True) is None
+
+
+class TestReadWriteLock:
+    """Tests for the reader-writer lock."""
+    
+    def test_readers_share_lock(self):
+        """Test that several readers can hold the lock at once."""
+        lock = ReadWriteLock()
+        inside = threading.Barrier(3, timeout=5)
+        
+        def reader():
+            with lock.read_locked():
+                inside.wait()
+        
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for t in threads:
+            t.start()
+        inside.wait()  # Fails with BrokenBarrierError if readers serialize
+        for t in threads:
+            t.join()
+    
+    def test_writer_excludes_readers(self):
+        """Test that a reader waits while a writer holds the lock."""
+        lock = ReadWriteLock()
+        events = []
+        lock.acquire_write()
+        
+        reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append('read'), lock.release_read()))
+        reader.start()
+        time.sleep(0.05)
+        events.append('write done')
+        lock.release_write()
+        reader.join(timeout=5)
+        
+        assert events == ['write done', 'read']
+    
+    def test_waiting_writer_blocks_new_readers(self):
+        """Test writer preference: new readers queue behind a waiting writer."""
+        lock = ReadWriteLock()
+        events = []
+        lock.acquire_read()
+        
+        def writer():
+            with lock.write_locked():
+                events.append('write')
+        
+        def late_reader():
+            with lock.read_locked():
+                events.append('read')
+        
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        time.sleep(0.05)
+        reader_thread = threading.Thread(target=late_reader)
+        reader_thread.start()
+        time.sleep(0.05)
+        assert events == []
+        
+        lock.release_read()
+        writer_thread.join(timeout=5)
+        reader_thread.join(timeout=5)
+        assert events == ['write', 'read']
+
+
+class TestReadJsonSnapshot:
+    """Tests for read_json_snapshot function."""
+    
+    def test_snapshot_matches_file(self, temp_data_dir, sample_patients):
+        """Test that a snapshot holds the file's records."""
+        write_json_file('patients.json', sample_patients)
+        
+        snapshot = read_json_snapshot('patients.json')
+        assert isinstance(snapshot, tuple)
+        assert list(snapshot) == sample_patients
+    
+    def test_snapshot_reused_until_write(self, temp_data_dir, sample_patients):
+        """Test that unchanged files serve the same snapshot and writes swap it."""
+        write_json_file('patients.json', sample_patients)
+        first = read_json_snapshot('patients.json')
+        assert read_json_snapshot('patients.json') is first
+        
+        add_record('patients.json', {"patientID": "patient_003"})
+        
+        second = read_json_snapshot('patients.json')
+        assert second is not first
+        assert len(second) == 3
+        assert len(first) == 2
+    
+    def test_snapshot_detects_external_change(self, temp_data_dir, sample_patients):
+        """Test that files changed outside this module are re-read."""
+        write_json_file('patients.json', sample_patients)
+        read_json_snapshot('patients.json')
+        
+        with open(os.path.join(temp_data_dir, 'patients.json'), 'w') as f:
+            json.dump([{"patientID": "other"}], f)
+        
+        assert read_json_snapshot('patients.json') == ({"patientID": "other"},)
+    
+    def test_snapshot_missing_file(self, temp_data_dir):
+        """Test reading a snapshot of a file that doesn't exist."""
+        with pytest.raises(FileNotFoundError):
+            read_json_snapshot('nonexistent.json')
+
+
+class TestProfiling:
+    """Tests for opt-in per-file profiling."""
+    
+    @pytest.fixture
+    def profiling(self):
+        """Enable profiling with a clean slate for one test."""
+        reset_profile()
+        enable_profiling()
+        yield
+        enable_profiling(False)
+        reset_profile()
+    
+    def test_disabled_by_default_records_nothing(self, temp_data_dir, sample_patients):
+        """Test that nothing is collected while profiling is off."""
+        reset_profile()
+        write_json_file('patients.json', sample_patients)
+        read_json_file('patients.json')
+        
+        assert get_profile()['files'] == {}
+    
+    def test_records_bytes_and_stages(self, temp_data_dir, sample_patients, profiling):
+        """Test byte counts and stage timings per file."""
+        write_json_file('patients.json', sample_patients)
+        read_json_file('patients.json')
+        
+        size = os.path.getsize(os.path.join(temp_data_dir, 'patients.json'))
+        stats = get_profile()['files']['patients.json']
+        assert stats['bytesWritten'] == size
+        assert stats['bytesRead'] == size
+        for kind in ('serialize', 'write', 'read', 'parse', 'lockWaitWrite', 'lockHoldWrite',
+                     'lockWaitRead', 'lockHoldRead'):
+            assert stats['timings'][kind]['count'] == 1
+    
+    def test_lock_wait_measured(self, temp_data_dir, sample_patients, profiling):
+        """Test that time blocked behind a writer shows up as lock wait."""
+        write_json_file('patients.json', sample_patients)
+        lock = data_access._get_file_lock(os.path.join(temp_data_dir, 'patients.json'))
+        lock.acquire_write()
+        reader = threading.Thread(target=read_json_file, args=('patients.json',))
+        reader.start()
+        time.sleep(0.1)
+        lock.release_write()
+        reader.join(timeout=5)
+        
+        timings = get_profile()['files']['patients.json']['timings']
+        assert timings['lockWaitRead']['maxSeconds'] >= 0.05
+        assert timings['lockHoldWrite']['maxSeconds'] >= 0.05
+    
+    def test_dump_profile(self, temp_data_dir, sample_patients, profiling):
+        """Test writing the profile to a JSON file."""
+        write_json_file('patients.json', sample_patients)
+        path = os.path.join(temp_data_dir, 'profile.json')
+        
+        dump_profile(path)
+        
+        with open(path) as f:
+            dumped = json.load(f)
+        assert dumped['enabled'] is True
+        assert 'patients.json' in dumped['files']
+
+
+class TestSharding:
+    """Tests for hash-partitioned collections."""
+    
+    @pytest.fixture
+    def assessments(self):
+        return [{"assessmentID": f"a{i}", "patientID": f"p{i % 10}"} for i in range(40)]
+    
+    @staticmethod
+    def shard_files(temp_data_dir):
+        return sorted(name for name in os.listdir(temp_data_dir) if '.shard-' in name)
+    
+    def test_unsharded_by_default(self, temp_data_dir, assessments):
+        """Test that collections are single files without a manifest."""
+        write_json_file('assessments.json', assessments)
+        
+        assert shard_count('assessments.json') == 1
+        assert os.path.exists(os.path.join(temp_data_dir, 'assessments.json'))
+        assert self.shard_files(temp_data_dir) == []
+    
+    def test_reshard_and_read(self, temp_data_dir, assessments):
+        """Test that a resharded collection reads back with every record."""
+        write_json_file('assessments.json', assessments)
+        
+        assert reshard('assessments.json', 4) == 40
+        
+        assert shard_count('assessments.json') == 4
+        assert not os.path.exists(os.path.join(temp_data_dir, 'assessments.json'))
+        assert len(self.shard_files(temp_data_dir)) == 4
+        key = lambda record: record['assessmentID']
+        assert sorted(read_json_file('assessments.json'), key=key) == sorted(assessments, key=key)
+        assert sorted(read_json_snapshot('assessments.json'), key=key) == sorted(assessments, key=key)
+        assert [r['assessmentID'] for r in find_all_by_field('assessments.json', 'patientID', 'p3')] == \
+            ['a3', 'a13', 'a23', 'a33']
+    
+    def test_patient_records_share_a_shard(self, temp_data_dir, assessments):
+        """Test that each patient's records live in exactly one shard."""
+        write_json_file('assessments.json', assessments)
+        reshard('assessments.json', 4)
+        
+        for name in self.shard_files(temp_data_dir):
+            with open(os.path.join(temp_data_dir, name)) as f:
+                patients = {record['patientID'] for record in json.load(f)}
+            for patient_id in patients:
+                assert all(r['patientID'] in patients
+                           for r in find_all_by_field('assessments.json', 'patientID', patient_id))
+    
+    def test_insert_rewrites_one_shard(self, temp_data_dir, assessments):
+        """Test that an insert leaves the other shards untouched."""
+        write_json_file('assessments.json', assessments)
+        reshard('assessments.json', 4)
+        before = data_access.data_signature('assessments.json')
+        notified = []
+        listener = lambda filename, operation, records, signature: notified.append(signature)
+        
+        add_change_listener(listener)
+        try:
+            add_record('assessments.json', {"assessmentID": "a99", "patientID": "p3"})
+        finally:
+            remove_change_listener(listener)
+        
+        after = data_access.data_signature('assessments.json')
+        assert sum(1 for old, new in zip(before, after) if old != new) == 1
+        assert notified == [(before, after)]
+        assert find_by_id('assessments.json', 'assessmentID', 'a99')['patientID'] == 'p3'
+    
+    def test_writes_to_other_shards_not_blocked(self, temp_data_dir, assessments):
+        """Test that a held shard lock does not block writes for patients in other shards."""
+        write_json_file('assessments.json', assessments)
+        reshard('assessments.json', 4)
+        blocked = data_access._shard_path_for('assessments.json', {"patientID": "p0"}, 4)
+        other = next(f"p{i}" for i in range(1, 10)
+                     if data_access._shard_path_for('assessments.json', {"patientID": f"p{i}"}, 4) != blocked)
+        
+        lock = data_access._get_file_lock(blocked)
+        lock.acquire_write()
+        try:
+            writer = threading.Thread(target=add_record,
+                                      args=('assessments.json', {"assessmentID": "a99", "patientID": other}))
+            writer.start()
+            writer.join(timeout=5)
+            assert not writer.is_alive()
+        finally:
+            lock.release_write()
+    
+    def test_update_and_delete(self, temp_data_dir, assessments):
+        """Test updates and deletes by record ID and by shard key."""
+        write_json_file('assessments.json', assessments)
+        reshard('assessments.json', 4)
+        
+        assert update_record('assessments.json', 'assessmentID', 'a7', {"age": 30})['age'] == 30
+        assert find_by_id('assessments.json', 'assessmentID', 'a7')['age'] == 30
+        assert update_record('assessments.json', 'assessmentID', 'missing', {"age": 30}) is None
+        
+        assert delete_record('assessments.json', 'assessmentID', 'a7') is True
+        assert delete_record('assessments.json', 'patientID', 'p1') is True
+        assert delete_record('assessments.json', 'patientID', 'p1') is False
+        remaining = read_json_file('assessments.json')
+        assert len(remaining) == 35
+        assert all(r['patientID'] != 'p1' for r in remaining)
+    
+    def test_update_cannot_move_record(self, temp_data_dir, assessments):
+        """Test that changing the shard key to another shard is rejected."""
+        write_json_file('assessments.json', assessments)
+        reshard('assessments.json', 4)
+        home = data_access._shard_path_for('assessments.json', {"patientID": "p0"}, 4)
+        elsewhere = next(f"q{i}" for i in range(100)
+                         if data_access._shard_path_for('assessments.json', {"patientID": f"q{i}"}, 4) != home)
+        
+        with pytest.raises(ValueError):
+            update_record('assessments.json', 'assessmentID', 'a0', {"patientID": elsewhere})
+    
+    def test_transaction_recovery(self, temp_data_dir):
+        """Test that an interrupted commit into shards is finished by recovery."""
+        reshard('assessments.json', 4)
+        real_dump = data_access._dump_json_file
+        
+        def failing_dump(file_path, data):
+            if file_path.endswith('patients.json'):
+                raise IOError("disk full")
+            real_dump(file_path, data)
+        
+        with patch('data_access._dump_json_file', side_effect=failing_dump):
+            with pytest.raises(IOError):
+                with transaction() as txn:
+                    txn.add_record('assessments.json', {"assessmentID": "a1", "patientID": "p1"})
+                    txn.add_record('patients.json', {"patientID": "p1"})
+        
+        assert recover_journals() == 1
+        assert read_json_file('assessments.json') == [{"assessmentID": "a1", "patientID": "p1"}]
+        assert read_json_file('patients.json') == [{"patientID": "p1"}]
+    
+    def test_reshard_back_to_single_file(self, temp_data_dir, assessments):
+        """Test resharding to another count and back to one file."""
+        write_json_file('assessments.json', assessments)
+        reshard('assessments.json', 4)
+        reshard('assessments.json', 3)
+        assert len(self.shard_files(temp_data_dir)) == 3
+        
+        reshard('assessments.json', 1)
+        
+        assert shard_count('assessments.json') == 1
+        assert self.shard_files(temp_data_dir) == []
+        assert len(read_json_file('assessments.json')) == 40
+    
+    def test_reshard_rejects_unsharded_collection(self, temp_data_dir):
+        """Test that only collections in SHARD_KEYS can be sharded."""
+        with pytest.raises(ValueError):
+            reshard('patients.json', 4)
+        with pytest.raises(ValueError):
+            reshard('assessments.json', 0)
+    
+    def test_reshard_tool(self, temp_data_dir, assessments, capsys):
+        """Test the command-line tool."""
+        write_json_file('assessments.json', assessments)
+        
+        assert reshard_tool.main(['4', '--data-dir', temp_data_dir]) == 0
+        assert reshard_tool.main(['--status', '--data-dir', temp_data_dir]) == 0
+        
+        output = capsys.readouterr().out
+        assert 'assessments.json: 1 -> 4 shard(s), 40 record(s)' in output
+        assert 'prescriptions.json: 4 shard(s)' in output
+
@@ -0,0 +1,122 @@
+"""
+Unit tests for the sorted date indexes and the data_access range queries.
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_access
+from data_access import (
+    write_json_file, add_record, update_record, delete_record, reshard,
+    find_by_date_range, latest_by_field
+)
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+def assessment(assessment_id, patient_id, date):
+    record = {'assessmentID': assessment_id, 'patientID': patient_id}
+    if date is not None:
+        record['assessmentDate'] = date
+    return record
+
+
+@pytest.fixture
+def assessments(temp_data_dir):
+    """Assessments stored out of date order."""
+    write_json_file('assessments.json', [
+        assessment('a3', 'p1', '2024-03-01T09:00:00+00:00'),
+        assessment('a1', 'p1', '2024-01-01T09:00:00+00:00'),
+        assessment('a2', 'p2', '2024-02-01T09:00:00+00:00'),
+        assessment('a4', 'p2', '2024-03-01T09:00:00+00:00'),
+        assessment('a0', 'p3', None),
+    ])
+
+
+def ids(records):
+    return [record['assessmentID'] for record in records]
+
+
+class TestFindByDateRange:
+    """Tests for find_by_date_range."""
+
+    def test_ranges(self, assessments):
+        """Test inclusive lower and exclusive upper bounds at any precision."""
+        assert ids(find_by_date_range('assessments.json')) == ['a0', 'a1', 'a2', 'a3', 'a4']
+        assert ids(find_by_date_range('assessments.json', since='2024-02')) == ['a2', 'a3', 'a4']
+        assert ids(find_by_date_range('assessments.json', until='2024-02-01T09:00:00+00:00')) == ['a0', 'a1']
+        assert ids(find_by_date_range('assessments.json', since='2024-01-15', until='2024-03')) == ['a2']
+        assert find_by_date_range('assessments.json', since='2025') == []
+
+    def test_latest_first_with_limit(self, assessments):
+        """Test the latest N, with equal dates in reverse storage order."""
+        assert ids(find_by_date_range('assessments.json', limit=3, newest_first=True)) == ['a4', 'a3', 'a2']
+        assert ids(find_by_date_range('assessments.json', limit=0)) == []
+
+    def test_field_filter(self, assessments):
+        """Test combining a range with a field match."""
+        assert ids(find_by_date_range('assessments.json', since='2024', field='patientID', value='p2',
+                                      newest_first=True)) == ['a4', 'a2']
+
+    def test_latest_by_field(self, assessments):
+        """Test the latest assessment per patient."""
+        latest = latest_by_field('assessments.json', 'patientID')
+        assert {patient: record['assessmentID'] for patient, record in latest.items()} == \
+            {'p1': 'a3', 'p2': 'a4', 'p3': 'a0'}
+
+    def test_follows_writes(self, assessments):
+        """Test that inserts, updates and deletes are applied to a built index."""
+        find_by_date_range('assessments.json')
+
+        add_record('assessments.json', assessment('a5', 'p3', '2024-02-15T09:00:00+00:00'))
+        update_record('assessments.json', 'assessmentID', 'a1', {'assessmentDate': '2024-04-01T09:00:00+00:00'})
+        delete_record('assessments.json', 'assessmentID', 'a2')
+
+        assert ids(find_by_date_range('assessments.json', since='2024')) == ['a5', 'a3', 'a4', 'a1']
+
+    def test_rebuilds_after_external_write(self, assessments, temp_data_dir):
+        """Test that a file changed outside data_access is re-indexed."""
+        find_by_date_range('assessments.json')
+
+        with open(os.path.join(temp_data_dir, 'assessments.json'), 'w') as f:
+            json.dump([assessment('a9', 'p1', '2024-05-01T09:00:00+00:00')], f)
+
+        assert ids(find_by_date_range('assessments.json')) == ['a9']
+
+    def test_missed_write_before_notified_write_rebuilds(self, assessments):
+        """Test that a write notified after an unnotified one (e.g., another process) rebuilds the index."""
+        find_by_date_range('assessments.json')
+
+        # As another server process would, without notifying this one
+        data_access._write_json_file('assessments.json', [assessment('a9', 'p1', '2024-05-01T09:00:00+00:00')])
+        add_record('assessments.json', assessment('a5', 'p3', '2024-02-15T09:00:00+00:00'))
+
+        assert ids(find_by_date_range('assessments.json')) == ['a5', 'a9']
+
+    def test_sharded_collection(self, assessments):
+        """Test ranges across shards."""
+        reshard('assessments.json', 3)
+        found = ids(find_by_date_range('assessments.json', since='2024-02'))
+        # a3 and a4 share a date; their order depends on which shards they landed in
+        assert found[0] == 'a2'
+        assert sorted(found[1:]) == ['a3', 'a4']
+
+    def test_missing_file_and_unindexed_file(self, temp_data_dir):
+        """Test a missing data file and a file without a date index."""
+        assert find_by_date_range('assessments.json') == []
+        with pytest.raises(KeyError):
+            find_by_date_range('patients.json')
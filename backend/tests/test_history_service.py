@@ -0,0 +1,191 @@
+"""
+Unit tests for the materialized patient history service.
+"""
+
+import os
+import sys
+import pytest
+import tempfile
+import shutil
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_access
+import history_service as history_service_module
+from data_access import write_json_file, add_record, update_record, delete_record
+from history_service import HistoryService, build_history_entry
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def service(temp_data_dir):
+    """Create a history service over seeded assessments and prescriptions."""
+    write_json_file('assessments.json', [
+        {'assessmentID': 'a1', 'patientID': 'p1', 'symptoms': ['fever'], 'assessmentDate': '2024-01-10T10:00:00Z'},
+        {'assessmentID': 'a2', 'patientID': 'p1', 'symptoms': ['cough'], 'assessmentDate': '2024-01-20T10:00:00Z'},
+        {'assessmentID': 'a3', 'patientID': 'p2', 'symptoms': ['headache'], 'assessmentDate': '2024-01-15T10:00:00Z'}
+    ])
+    write_json_file('prescriptions.json', [
+        {'prescriptionID': 'rx1', 'assessmentID': 'a1', 'patientID': 'p1', 'medications': [{'name': 'Acetaminophen'}],
+         'instructions': 'Rest', 'generatedDate': '2024-01-10T10:05:00Z'}
+    ])
+    history_service = HistoryService()
+    yield history_service
+    data_access.remove_change_listener(history_service._on_change)
+
+
+class TestBuildHistoryEntry:
+    """Tests for build_history_entry function."""
+
+    def test_entry_without_prescription(self):
+        """Test that no prescription key is added without a prescription."""
+        entry = build_history_entry({'assessmentID': 'a1', 'symptoms': ['fever']})
+        assert entry['assessmentID'] == 'a1'
+        assert entry['followUpResponses'] == []
+        assert 'prescription' not in entry
+
+    def test_entry_with_prescription(self):
+        """Test that the prescription summary is joined into the entry."""
+        entry = build_history_entry(
+            {'assessmentID': 'a1'},
+            {'prescriptionID': 'rx1', 'medications': [], 'instructions': 'Rest', 'generatedBy': 'AI-Bedrock'}
+        )
+        assert entry['prescription'] == {
+            'prescriptionID': 'rx1',
+            'medications': [],
+            'instructions': 'Rest',
+            'generatedDate': None
+        }
+
+
+class TestHistoryService:
+    """Tests for HistoryService class."""
+
+    def test_history_sorted_and_joined(self, service):
+        """Test that history is most recent first with prescriptions joined."""
+        history = service.get_history('p1')
+        assert [entry['assessmentID'] for entry in history] == ['a2', 'a1']
+        assert history[1]['prescription']['prescriptionID'] == 'rx1'
+        assert 'prescription' not in history[0]
+
+    def test_unknown_patient(self, service):
+        """Test that an unknown patient has an empty history."""
+        assert service.get_history('nobody') == []
+
+    def test_missing_files(self, temp_data_dir):
+        """Test that missing data files produce an empty history."""
+        history_service = HistoryService()
+        try:
+            assert history_service.get_history('p1') == []
+        finally:
+            data_access.remove_change_listener(history_service._on_change)
+
+    def test_incremental_insert(self, service):
+        """Test that inserted assessments and prescriptions update the view."""
+        service.get_history('p1')
+
+        add_record('assessments.json', {'assessmentID': 'a4', 'patientID': 'p1', 'assessmentDate': '2024-01-15T10:00:00Z'})
+        add_record('prescriptions.json', {'prescriptionID': 'rx4', 'assessmentID': 'a4', 'patientID': 'p1'})
+
+        history = service.get_history('p1')
+        assert [entry['assessmentID'] for entry in history] == ['a2', 'a4', 'a1']
+        assert history[1]['prescription']['prescriptionID'] == 'rx4'
+
+    def test_incremental_prescription_update(self, service):
+        """Test that prescription updates are reflected in the view."""
+        service.get_history('p1')
+
+        update_record('prescriptions.json', 'prescriptionID', 'rx1', {'instructions': 'Drink water'})
+
+        assert service.get_history('p1')[1]['prescription']['instructions'] == 'Drink water'
+
+    def test_replace_and_delete_rebuild(self, service):
+        """Test that full rewrites and deletes are picked up."""
+        service.get_history('p1')
+
+        delete_record('assessments.json', 'assessmentID', 'a2')
+        assert [entry['assessmentID'] for entry in service.get_history('p1')] == ['a1']
+
+        write_json_file('assessments.json', [])
+        assert service.get_history('p1') == []
+
+    def test_data_dir_change_reloads(self, service, monkeypatch):
+        """Test that switching the data directory rebuilds the view."""
+        assert len(service.get_history('p1')) == 2
+
+        other_dir = tempfile.mkdtemp()
+        try:
+            monkeypatch.setattr('data_access.DATA_DIR', other_dir)
+            assert service.get_history('p1') == []
+        finally:
+            shutil.rmtree(other_dir)
+
+    def test_write_by_other_process_reloads(self, service, monkeypatch):
+        """Test that a write without a change notification is detected from the file signature."""
+        service.get_history('p1')
+        reads = []
+        read_or_empty = HistoryService._read_or_empty
+        monkeypatch.setattr(HistoryService, '_read_or_empty', staticmethod(lambda f: reads.append(f) or read_or_empty(f)))
+
+        add_record('assessments.json', {'assessmentID': 'a4', 'patientID': 'p1', 'assessmentDate': '2024-01-15T10:00:00Z'})
+        assert len(service.get_history('p1')) == 3
+        assert reads == []
+
+        # As another server process would, without notifying this one
+        data_access._write_json_file('assessments.json', [
+            {'assessmentID': 'a5', 'patientID': 'p1', 'assessmentDate': '2024-03-01T10:00:00Z'}
+        ])
+        assert [entry['assessmentID'] for entry in service.get_history('p1')] == ['a5']
+        assert reads == ['assessments.json', 'prescriptions.json']
+
+    def test_write_missed_before_notified_write_reloads(self, service):
+        """Test that a notified write does not hide an earlier write by another process."""
+        service.get_history('p1')
+        # Another process appends a5; then this process appends a6 and notifies
+        data_access._write_json_file('assessments.json', list(data_access.read_json_file('assessments.json')) + [
+            {'assessmentID': 'a5', 'patientID': 'p1', 'assessmentDate': '2024-03-01T10:00:00Z'}
+        ])
+        add_record('assessments.json', {'assessmentID': 'a6', 'patientID': 'p1', 'assessmentDate': '2024-03-02T10:00:00Z'})
+        assert [entry['assessmentID'] for entry in service.get_history('p1')][:2] == ['a6', 'a5']
+
+    @pytest.mark.parametrize('store', ['memory', 'mmap'])
+    def test_date_range_and_limit(self, service, store):
+        """Test since/until/limit filtering on both history stores."""
+        add_record('assessments.json', {'assessmentID': 'a4', 'patientID': 'p1', 'assessmentDate': '2024-02-05T10:00:00Z'})
+        add_record('assessments.json', {'assessmentID': 'a5', 'patientID': 'p1'})
+        history_service = HistoryService(store)
+        try:
+            def ids(**kwargs):
+                return [entry['assessmentID'] for entry in history_service.get_history('p1', **kwargs)]
+
+            assert ids() == ['a4', 'a2', 'a1', 'a5']
+            assert ids(since='2024-01-15') == ['a4', 'a2']
+            assert ids(until='2024-01-20T10:00:00') == ['a1', 'a5']
+            assert ids(since='2024-01', until='2024-02') == ['a2', 'a1']
+            assert ids(limit=2) == ['a4', 'a2']
+            assert ids(since='2024-01', limit=1) == ['a4']
+            assert ids(since='2025') == []
+            assert history_service.count_assessments('p1') == 4
+            assert history_service.count_assessments('p9') == 0
+        finally:
+            data_access.remove_change_listener(history_service._on_change)
+
+    def test_limit_builds_only_returned_entries(self, service, monkeypatch):
+        """Test that a limited history converts only the entries it returns."""
+        service.get_history('p1')
+        built = []
+        real_build = history_service_module.build_entry_from_records
+        monkeypatch.setattr(history_service_module, 'build_entry_from_records',
+                            lambda *args: built.append(1) or real_build(*args))
+
+        assert len(service.get_history('p1', limit=1)) == 1
+        assert len(built) == 1
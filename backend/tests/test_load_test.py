@@ -0,0 +1,125 @@
+"""
+Unit tests for the load-testing harness and the local Bedrock stub.
+"""
+
+import os
+import sys
+import json
+import threading
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bedrock_stub import StubBedrockClient, StubBedrockError, stub_enabled
+from bedrock_service import BedrockService
+from benchmarks.load_test import LoadTest, parse_mix, percentile, ResultRecorder
+
+
+class TestParseMix:
+    """Tests for parse_mix function."""
+
+    def test_weights(self):
+        """Test parsing endpoint weights."""
+        assert parse_mix('login=2, history=4,doctor') == {'login': 2.0, 'history': 4.0, 'doctor': 1.0}
+
+    def test_unknown_endpoint(self):
+        """Test that unknown endpoints are rejected."""
+        with pytest.raises(ValueError):
+            parse_mix('login=1,delete=1')
+
+    def test_no_positive_weight(self):
+        """Test that a mix without traffic is rejected."""
+        with pytest.raises(ValueError):
+            parse_mix('login=0')
+
+
+class TestResultRecorder:
+    """Tests for ResultRecorder class."""
+
+    def test_summary(self):
+        """Test per-endpoint percentiles and error rates."""
+        recorder = ResultRecorder()
+        for i in range(1, 101):
+            recorder.record('history', i / 1000, 200, True)
+        recorder.record('login', 0.5, 401, False)
+        recorder.record('login', 0.1, 200, True)
+
+        summary = recorder.summary(elapsed=10)
+
+        assert summary['history']['requests'] == 100
+        assert summary['history']['p50_ms'] == pytest.approx(51, abs=1)
+        assert summary['history']['p99_ms'] == pytest.approx(99, abs=1)
+        assert summary['history']['throughput_rps'] == 10
+        assert summary['login']['error_rate'] == 0.5
+        assert summary['login']['statuses'] == {'401': 1, '200': 1}
+
+    def test_percentile_empty(self):
+        """Test the percentile of no samples."""
+        assert percentile([], 0.95) == 0.0
+
+
+class RecordingClient:
+    """API client that answers every request and records the request bodies."""
+
+    def __init__(self):
+        self.bodies = []
+        self._lock = threading.Lock()
+        self._patients = 0
+
+    def request(self, method, path, body=None, token=None):
+        with self._lock:
+            if path == '/patients/register':
+                self._patients += 1
+                return 201, {'patientID': f'p{self._patients}'}
+            if path == '/login':
+                return 200, {'token': 't', 'userType': 'patient'}
+            self.bodies.append(json.dumps(body, sort_keys=True))
+            return 201, {}
+
+
+class TestLoadTest:
+    """Tests for LoadTest class."""
+
+    def test_seed_reproduces_requests(self):
+        """Test that the same seed sends the same users, vitals and symptoms whatever the worker order."""
+        def run(seed):
+            client = RecordingClient()
+            LoadTest(client, {'assessment': 1}, rate=2000, duration=0.05, concurrency=4, users=5, seed=seed).run()
+            return sorted(client.bodies)
+
+        assert run(7) == run(7)
+        assert run(7) != run(8)
+
+
+class TestStubBedrockClient:
+    """Tests for the local Bedrock stand-in."""
+
+    def test_response_parses_as_prescription(self):
+        """Test that the stub response goes through BedrockService parsing."""
+        service = BedrockService()
+        service.client = StubBedrockClient(latency_ms=0, jitter_ms=0, failure_rate=0)
+
+        prescription = service.generate_prescription(['fever'], 30, 70, 'kg', 175, 'cm')
+
+        assert prescription['medications'][0]['name'] == 'Acetaminophen'
+        assert 'doctor review' in prescription['instructions']
+
+    def test_failures(self):
+        """Test that the configured failure rate raises."""
+        client = StubBedrockClient(latency_ms=0, jitter_ms=0, failure_rate=1.0)
+        with pytest.raises(StubBedrockError):
+            client.invoke_model(modelId='m', body='{}')
+
+    def test_configured_from_environment(self, monkeypatch):
+        """Test that settings come from environment variables."""
+        monkeypatch.setenv('BEDROCK_STUB', '1')
+        monkeypatch.setenv('BEDROCK_STUB_LATENCY_MS', '5')
+        monkeypatch.setenv('BEDROCK_STUB_FAILURE_RATE', '0.25')
+
+        client = StubBedrockClient()
+
+        assert stub_enabled()
+        assert client.latency_ms == 5
+        assert client.failure_rate == 0.25
+        assert isinstance(BedrockService().client, StubBedrockClient)
@@ -0,0 +1,134 @@
+"""
+Unit tests for latency metrics and the /api/metrics exporter.
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+import pytest
+from flask import Flask, jsonify
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+import data_access
+from metrics import Histogram
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    """Start every test with no recorded metrics."""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def client():
+    """Create a test client for a small instrumented app."""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    metrics.init_app(app)
+
+    @app.route('/items/<item_id>')
+    def item(item_id):
+        return jsonify({'id': item_id})
+
+    with app.test_client() as client:
+        yield client
+
+
+class TestHistogram:
+    """Tests for Histogram."""
+
+    def test_observe_fills_bucket(self):
+        """Test that observations land in the first bucket at or above them."""
+        histogram = Histogram((0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(0.5)
+        histogram.observe(3.0)
+
+        counts, total, count = histogram.snapshot()
+        assert counts == [2, 1, 1]
+        assert count == 4
+        assert total == pytest.approx(3.65)
+
+    def test_timer_records_on_exception(self):
+        """Test that timer records the duration even if the block raises."""
+        with pytest.raises(ValueError):
+            with metrics.timer('bcrypt_duration_seconds', operation='check'):
+                raise ValueError('boom')
+
+        assert metrics.get_histogram('bcrypt_duration_seconds', operation='check').count == 1
+
+
+class TestRenderPrometheus:
+    """Tests for render_prometheus."""
+
+    def test_render_format(self):
+        """Test cumulative buckets, sum and count lines."""
+        metrics.observe('jwt_verify_duration_seconds', 0.0002)
+        metrics.observe('jwt_verify_duration_seconds', 0.002)
+
+        text = metrics.render_prometheus()
+
+        assert '# TYPE jwt_verify_duration_seconds histogram' in text
+        assert 'jwt_verify_duration_seconds_bucket{le="0.0001"} 0' in text
+        assert 'jwt_verify_duration_seconds_bucket{le="0.00025"} 1' in text
+        assert 'jwt_verify_duration_seconds_bucket{le="0.0025"} 2' in text
+        assert 'jwt_verify_duration_seconds_bucket{le="+Inf"} 2' in text
+        assert 'jwt_verify_duration_seconds_count 2' in text
+
+    def test_render_labels(self):
+        """Test that label values are rendered and escaped."""
+        metrics.observe('bedrock_stage_duration_seconds', 1.0, stage='in"voke')
+
+        text = metrics.render_prometheus()
+
+        assert 'bedrock_stage_duration_seconds_count{stage="in\\"voke"} 1' in text
+
+
+class TestMetricsEndpoint:
+    """Tests for request instrumentation."""
+
+    def test_route_latency_recorded(self, client):
+        """Test that requests are recorded per route template and status."""
+        client.get('/items/1')
+        client.get('/items/2')
+
+        response = client.get('/api/metrics')
+
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        text = response.get_data(as_text=True)
+        assert 'http_request_duration_seconds_count{method="GET",route="/items/<item_id>",status="200"} 2' in text
+
+    def test_unmatched_route(self, client):
+        """Test that 404s are grouped under a single route label."""
+        client.get('/missing/path')
+
+        text = client.get('/api/metrics').get_data(as_text=True)
+
+        assert 'route="unmatched",status="404"' in text
+
+
+class TestDatastoreMetrics:
+    """Tests for data store stage and lock timing."""
+
+    def test_read_and_write_stages(self, monkeypatch):
+        """Test that writes and reads record their stages per file."""
+        temp_dir = tempfile.mkdtemp()
+        monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+        try:
+            data_access.write_json_file('patients.json', [{'patientID': 'p1'}])
+            data_access.read_json_file('patients.json')
+        finally:
+            shutil.rmtree(temp_dir)
+
+        for stage in ('serialize', 'write', 'read', 'parse'):
+            assert metrics.get_histogram('datastore_stage_duration_seconds', stage=stage, file='patients.json').count == 1
+        assert metrics.get_histogram('datastore_lock_wait_seconds', file='patients.json', mode='write').count == 1
+        assert metrics.get_histogram('datastore_lock_wait_seconds', file='patients.json', mode='read').count == 1
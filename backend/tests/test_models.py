@@ -0,0 +1,129 @@
+"""
+Unit tests for the slotted record models.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import tracemalloc
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Assessment, Prescription, Patient, MODELS
+from data_access import add_record, read_json_file, transaction
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+def assessment_dict(assessment_id='a1', **overrides):
+    record = {
+        'assessmentID': assessment_id,
+        'patientID': 'p1',
+        'weight': 70,
+        'weightUnit': 'kg',
+        'height': 175,
+        'heightUnit': 'cm',
+        'age': 30,
+        'symptoms': ['fever'],
+        'followUpResponses': [],
+        'assessmentDate': '2024-01-01T00:00:00'
+    }
+    record.update(overrides)
+    return record
+
+
+class TestRecord:
+    """Tests for record conversion and validation."""
+
+    def test_round_trip(self):
+        """Test that from_dict and to_dict are inverses, keeping key order."""
+        data = assessment_dict()
+        record = Assessment.from_dict(data)
+
+        assert record.weight_unit == 'kg'
+        assert record.key == 'a1'
+        assert record.to_dict() == data
+        assert list(record.to_dict()) == list(data)
+
+    def test_unknown_keys_preserved(self):
+        """Test that keys outside the model survive a round trip."""
+        data = assessment_dict(notes='seen at clinic')
+        assert Assessment.from_dict(data).to_dict() == data
+
+    def test_missing_fields_omitted(self):
+        """Test that unset optional fields are left out of the dictionary."""
+        record = Prescription(prescription_id='r1', assessment_id='a1', patient_id='p1',
+                              medications=[], instructions='Rest')
+        assert 'lastModifiedBy' not in record.to_dict()
+
+    def test_unknown_attribute_rejected(self):
+        """Test that the constructor rejects attributes the model lacks."""
+        with pytest.raises(TypeError):
+            Patient(patient_id='p1', nickname='JD')
+
+    def test_no_instance_dict(self):
+        """Test that records are slotted."""
+        with pytest.raises(AttributeError):
+            Assessment.from_dict(assessment_dict()).color = 'red'
+
+    @pytest.mark.parametrize('overrides, message', [
+        ({'weight': 0}, 'positive'),
+        ({'weightUnit': 'stone'}, 'Weight unit'),
+        ({'heightUnit': 'feet'}, 'Height unit'),
+        ({'symptoms': []}, 'Symptoms'),
+        ({'patientID': None}, 'patientID'),
+    ])
+    def test_assessment_validation(self, overrides, message):
+        """Test assessment validation errors."""
+        with pytest.raises(ValueError, match=message):
+            Assessment.from_dict(assessment_dict(**overrides)).validate()
+
+    def test_smaller_than_dict(self):
+        """Test that a record takes less memory than the dictionary it replaces."""
+        rows = [assessment_dict(f'a{i}') for i in range(2000)]
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        dicts = [dict(row) for row in rows]
+        dict_size = tracemalloc.get_traced_memory()[0] - before
+        before = tracemalloc.get_traced_memory()[0]
+        records = [Assessment.from_dict(row) for row in rows]
+        record_size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        assert len(dicts) == len(records)
+        assert record_size < dict_size * 0.75
+
+    def test_models_by_file(self):
+        """Test the model registry."""
+        assert MODELS['assessments.json'] is Assessment
+
+
+class TestDataAccess:
+    """Tests for storing record models through data_access."""
+
+    def test_add_record_model(self, temp_data_dir):
+        """Test that a model is stored as its dictionary."""
+        added = add_record('assessments.json', Assessment.from_dict(assessment_dict()))
+
+        assert added == assessment_dict()
+        assert read_json_file('assessments.json') == [assessment_dict()]
+
+    def test_invalid_model_not_stored(self, temp_data_dir):
+        """Test that an invalid model aborts the whole transaction."""
+        with pytest.raises(ValueError):
+            with transaction() as txn:
+                txn.add_record('assessments.json', assessment_dict('a1'))
+                txn.add_record('assessments.json', Assessment.from_dict(assessment_dict('a2', age=-1)))
+
+        assert not os.path.exists(os.path.join(temp_data_dir, 'assessments.json'))
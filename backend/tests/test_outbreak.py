@@ -0,0 +1,147 @@
+"""
+Unit tests for the streaming symptom spike detector and its endpoint.
+"""
+
+import os
+import sys
+# Set environment variable BEFORE importing app
+TEST_SECRET_KEY = 'test-secret-key-for-unit-tests-only'
+os.environ['SECRET_KEY'] = TEST_SECRET_KEY
+
+import pytest
+import json
+import jwt
+import tempfile
+import shutil
+from datetime import datetime, timezone, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_access
+from data_access import add_record
+from outbreak import SpikeDetector
+
+HOUR = 3600
+START = 1704067200  # 2024-01-01T00:00:00Z
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def detector():
+    """Create a detector with a baseline of one fever every 8 hours for six days."""
+    spike_detector = SpikeDetector(window_hours=24, baseline_days=7, min_count=5, threshold=3)
+    for hour in range(0, 144, 8):
+        spike_detector.record(['fever', 'cough'], START + hour * HOUR)
+    yield spike_detector
+    data_access.remove_change_listener(spike_detector._on_change)
+
+
+class TestSpikeDetector:
+    """Tests for SpikeDetector class."""
+
+    def test_steady_rate_does_not_alert(self, detector):
+        """Test that counts at the baseline rate raise no alert."""
+        assert detector.alerts(START + 144 * HOUR) == []
+
+    def test_spike_alerts(self, detector):
+        """Test that a cluster well above the baseline raises an alert."""
+        for minute in range(12):
+            detector.record([' Fever '], START + 150 * HOUR + minute * 60)
+        alerts = detector.alerts(START + 151 * HOUR)
+        assert [alert['symptom'] for alert in alerts] == ['fever']
+        assert alerts[0]['windowCount'] == 14
+        assert alerts[0]['expectedCount'] == 3.0
+        assert alerts[0]['detectedAt'] == '2024-01-07T06:00:00+00:00'
+        assert detector.window_count('cough', START + 151 * HOUR) == 2
+
+    def test_alert_expires(self, detector):
+        """Test that an alert is dropped once the spike leaves the window."""
+        for minute in range(12):
+            detector.record(['fever'], START + 150 * HOUR + minute * 60)
+        assert detector.alerts(START + 151 * HOUR)
+        assert detector.alerts(START + 200 * HOUR) == []
+
+    def test_no_alerts_without_baseline(self):
+        """Test that nothing alerts before a day of baseline was observed."""
+        spike_detector = SpikeDetector(window_hours=24, baseline_days=7, min_count=5, threshold=3)
+        try:
+            for minute in range(20):
+                spike_detector.record(['fever'], START + minute * 60)
+            assert spike_detector.alerts(START + HOUR) == []
+        finally:
+            data_access.remove_change_listener(spike_detector._on_change)
+
+    def test_fixed_memory(self, detector):
+        """Test that distinct symptoms do not grow the sketches."""
+        size = detector._sketches.nbytes
+        for i in range(5000):
+            detector.record([f'symptom {i}'], START + 150 * HOUR)
+        assert detector._sketches.nbytes == size
+        assert detector.window_count('symptom 42', START + 150 * HOUR) >= 1
+
+    def test_counts_stored_assessments(self, temp_data_dir, detector):
+        """Test that assessments stored through data_access are counted."""
+        add_record('assessments.json', {'assessmentID': 'a1', 'symptoms': ['rash'],
+                                        'assessmentDate': '2024-01-07T05:30:00Z'})
+        assert detector.window_count('rash', START + 150 * HOUR) == 1
+
+    def test_backfill_counts_stored_assessments_in_range(self, temp_data_dir):
+        """Test that a new detector counts the stored assessments of its window and baseline period."""
+        data_access.write_json_file('assessments.json', [
+            {'assessmentID': 'a1', 'symptoms': ['rash'], 'assessmentDate': '2024-01-08T05:30:00Z'},
+            {'assessmentID': 'a0', 'symptoms': ['rash'], 'assessmentDate': '2023-12-01T05:30:00Z'},
+            {'assessmentID': 'a2', 'symptoms': ['rash'], 'assessmentDate': '2024-01-01T00:00:00+00:00'},
+            {'assessmentID': 'a3', 'symptoms': ['rash']},
+            {'assessmentID': 'a4', 'symptoms': ['rash'], 'assessmentDate': '2024-01-09T00:00:00Z'},
+        ])
+        spike_detector = SpikeDetector(window_hours=24, baseline_days=7, min_count=5, threshold=3)
+        try:
+            assert spike_detector.backfill(START + 191 * HOUR + 60) == 2
+            assert spike_detector.window_count('rash', START + 191 * HOUR) == 1
+            assert spike_detector.summary(START + 191 * HOUR)['baselineHours'] == 168
+        finally:
+            data_access.remove_change_listener(spike_detector._on_change)
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    from app import app
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def _auth(user_type='doctor'):
+    token = jwt.encode({
+        'userID': 'd1',
+        'userType': user_type,
+        'exp': datetime.now(timezone.utc) + timedelta(hours=1)
+    }, TEST_SECRET_KEY, algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+class TestOutbreakEndpoint:
+    """Tests for GET /api/analytics/outbreaks."""
+
+    def test_summary(self, client):
+        """Test that doctors get the window coverage and alerts."""
+        response = client.get('/api/analytics/outbreaks', headers=_auth())
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['windowHours'] == 24
+        assert isinstance(data['alerts'], list)
+
+    def test_patient_forbidden(self, client):
+        """Test that patients cannot read alerts."""
+        response = client.get('/api/analytics/outbreaks', headers=_auth('patient'))
+        assert response.status_code == 403
@@ -11,12 +11,25 @@ os.environ['SECRET_KEY'] = TEST_SECRET_KEY
 
 import pytest
 import json
+import tempfile
+import shutil
 import jwt
 from datetime import datetime, timezone, timedelta
 from app import app
 from data_access import write_json_file
 
 
+@pytest.fixture(autouse=True)
+def temp_data_dir(monkeypatch):
+    """Point DATA_DIR at a temporary directory with empty collections."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    for filename in ('patients.json', 'assessments.json', 'prescriptions.json'):
+        write_json_file(filename, [])
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
 @pytest.fixture
 def client():
     """Create a test client for the Flask app."""
@@ -296,3 +309,29 @@ def test_get_patient_history_assessment_without_prescription(client):
     # Cleanup
     write_json_file('patients.json', [])
     write_json_file('assessments.json', [])
+
+
+def test_get_patient_history_date_range_and_limit(client, setup_test_data):
+    """Test the since, until and limit query parameters."""
+    patient_id = setup_test_data
+    headers = {'Authorization': f'Bearer {generate_test_token(patient_id)}'}
+
+    since = client.get(f'/api/patients/{patient_id}/history?since=2024-01-16T00:00:00Z', headers=headers)
+    until = client.get(f'/api/patients/{patient_id}/history?until=2024-01-16', headers=headers)
+    latest = client.get(f'/api/patients/{patient_id}/history?limit=1', headers=headers)
+
+    assert [e['assessmentID'] for e in since.get_json()['history']] == ['assessment-2']
+    assert [e['assessmentID'] for e in until.get_json()['history']] == ['assessment-1']
+    assert [e['assessmentID'] for e in latest.get_json()['history']] == ['assessment-2']
+
+
+@pytest.mark.parametrize('query', ['since=yesterday', 'until=2024-13-01x', 'since=2024-02-30', 'limit=0',
+                                   'limit=abc'])
+def test_get_patient_history_invalid_range(client, setup_test_data, query):
+    """Test that invalid since, until and limit values are rejected."""
+    patient_id = setup_test_data
+    response = client.get(f'/api/patients/{patient_id}/history?{query}',
+                          headers={'Authorization': f'Bearer {generate_test_token(patient_id)}'})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Validation error'
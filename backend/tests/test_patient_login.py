@@ -10,6 +10,8 @@ os.environ['SECRET_KEY'] = TEST_SECRET_KEY
 
 import pytest
 import json
+import tempfile
+import shutil
 import bcrypt
 import jwt
 from datetime import datetime, timezone
@@ -17,6 +19,17 @@ from app import app
 from data_access import write_json_file, read_json_file
 
 
+@pytest.fixture(autouse=True)
+def temp_data_dir(monkeypatch):
+    """Point DATA_DIR at a temporary directory with empty collections."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    for filename in ('patients.json', 'assessments.json', 'prescriptions.json'):
+        write_json_file(filename, [])
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
 @pytest.fixture
 def client():
     """Create a test client for the Flask app."""
@@ -8,6 +8,8 @@ os.environ['SECRET_KEY'] = 'test-secret-key-for-unit-tests-only'
 
 import pytest
 import json
+import tempfile
+import shutil
 import sys
 from datetime import datetime
 
@@ -18,6 +20,17 @@ from app import app
 from data_access import read_json_file, write_json_file
 
 
+@pytest.fixture(autouse=True)
+def temp_data_dir(monkeypatch):
+    """Point DATA_DIR at a temporary directory with empty collections."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    for filename in ('patients.json', 'assessments.json', 'prescriptions.json'):
+        write_json_file(filename, [])
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
 @pytest.fixture
 def client():
     """Create a test client for the Flask app."""
@@ -27,7 +40,7 @@ def client():
 
 
 @pytest.fixture(autouse=True)
-def reset_patients_data():
+def reset_patients_data(temp_data_dir):
     """Reset patients.json before each test."""
     write_json_file('patients.json', [])
     yield
@@ -0,0 +1,251 @@
+"""
+Unit tests for the memory-mapped record store and its data file mirrors.
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import record_store
+from record_store import RecordStore, IndexedMirror
+from history_service import HistoryService
+from data_access import write_json_file, add_record, update_record, delete_record, reshard
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def store_path(temp_data_dir):
+    """Path of a fresh record store file."""
+    return os.path.join(temp_data_dir, 'store', 'assessments.jsonl')
+
+
+def open_store(path):
+    return RecordStore(path, 'assessmentID', ('patientID',))
+
+
+def assessment(assessment_id, patient_id, date='2024-01-01T00:00:00', **extra):
+    record = {'assessmentID': assessment_id, 'patientID': patient_id, 'assessmentDate': date, 'symptoms': ['fever']}
+    record.update(extra)
+    return record
+
+
+class TestRecordStore:
+    """Tests for RecordStore."""
+
+    def test_put_get_find(self, store_path):
+        """Test lookups by key and by secondary field."""
+        store = open_store(store_path)
+        store.put_many([assessment('a1', 'p1'), assessment('a2', 'p2'), assessment('a3', 'p1')])
+
+        assert store.get('a2')['patientID'] == 'p2'
+        assert [r['assessmentID'] for r in store.find('patientID', 'p1')] == ['a1', 'a3']
+        assert store.find('patientID', 'missing') == []
+        assert store.get('missing') is None
+        assert len(store) == 3
+
+    def test_update_appends_new_version(self, store_path):
+        """Test that an update supersedes the old line and keeps index order."""
+        store = open_store(store_path)
+        store.put_many([assessment('a1', 'p1'), assessment('a2', 'p1')])
+
+        store.put(assessment('a1', 'p1', age=40))
+
+        assert store.get('a1')['age'] == 40
+        assert [r['assessmentID'] for r in store.find('patientID', 'p1')] == ['a1', 'a2']
+        with open(store_path, 'rb') as f:
+            assert len(f.readlines()) == 3
+
+    def test_update_moves_secondary_value(self, store_path):
+        """Test that changing an indexed field moves the record between values."""
+        store = open_store(store_path)
+        store.put(assessment('a1', 'p1'))
+
+        store.put(assessment('a1', 'p2'))
+
+        assert store.find('patientID', 'p1') == []
+        assert [r['assessmentID'] for r in store.find('patientID', 'p2')] == ['a1']
+
+    def test_delete(self, store_path):
+        """Test that deleted records disappear from every index."""
+        store = open_store(store_path)
+        store.put_many([assessment('a1', 'p1'), assessment('a2', 'p1')])
+
+        assert store.delete('a1') is True
+        assert store.delete('a1') is False
+        assert store.get('a1') is None
+        assert [r['assessmentID'] for r in store.find('patientID', 'p1')] == ['a2']
+
+    def test_reopen_from_checkpoint_and_tail(self, store_path):
+        """Test that a reopened store uses its checkpoint plus lines appended after it."""
+        store = open_store(store_path)
+        store.put(assessment('a1', 'p1'))
+        store.checkpoint()
+        store.put(assessment('a2', 'p1'))
+        store.delete('a1')
+
+        reopened = open_store(store_path)
+
+        assert reopened.get('a1') is None
+        assert [r['assessmentID'] for r in reopened.find('patientID', 'p1')] == ['a2']
+
+    def test_reopen_without_checkpoint(self, store_path):
+        """Test that a store without a sidecar index is indexed by scanning the file."""
+        store = open_store(store_path)
+        store.put_many([assessment('a1', 'p1'), assessment('a2', 'p2')])
+        assert not os.path.exists(store.index_path)
+
+        reopened = open_store(store_path)
+
+        assert reopened.get('a2')['patientID'] == 'p2'
+
+    def test_torn_final_line_discarded(self, store_path):
+        """Test that a partially written last line is dropped on open."""
+        store = open_store(store_path)
+        store.put(assessment('a1', 'p1'))
+        with open(store_path, 'ab') as f:
+            f.write(b'{"assessmentID":"a2","pat')
+
+        reopened = open_store(store_path)
+        reopened.put(assessment('a3', 'p1'))
+
+        assert [r['assessmentID'] for r in reopened.find('patientID', 'p1')] == ['a1', 'a3']
+
+    def test_shared_between_processes(self, store_path):
+        """Test that stores sharing a file see each other's appends and rewrites."""
+        first = open_store(store_path)
+        second = open_store(store_path)
+
+        first.put(assessment('a1', 'p1'))
+        second.put(assessment('a2', 'p1'))
+        assert [r['assessmentID'] for r in first.find('patientID', 'p1')] == ['a1', 'a2']
+
+        second.replace_all([assessment('a3', 'p2')])
+        assert first.get('a1') is None
+        assert first.get('a3')['patientID'] == 'p2'
+        first.put(assessment('a4', 'p2'))
+        assert [r['assessmentID'] for r in second.find('patientID', 'p2')] == ['a3', 'a4']
+
+    def test_reader_leaves_append_in_progress(self, store_path):
+        """Test that a lookup does not cut off a line another process is still appending."""
+        store = open_store(store_path)
+        store.put(assessment('a1', 'p1'))
+        line = json.dumps(assessment('a2', 'p1'), separators=(',', ':')).encode('utf-8') + b'\n'
+        with open(store_path, 'ab') as f:
+            f.write(line[:10])
+
+        assert [r['assessmentID'] for r in store.find('patientID', 'p1')] == ['a1']
+        with open(store_path, 'ab') as f:
+            f.write(line[10:])
+
+        assert store.get('a2')['patientID'] == 'p1'
+
+    def test_compaction(self, store_path, monkeypatch):
+        """Test that superseded lines are dropped once they outnumber live records."""
+        monkeypatch.setattr(record_store, 'COMPACT_MIN_GARBAGE', 5)
+        store = open_store(store_path)
+        store.put(assessment('a1', 'p1'))
+        for age in range(10):
+            store.put(assessment('a1', 'p1', age=age))
+
+        with open(store_path, 'rb') as f:
+            assert len(f.readlines()) < 10
+        assert store.get('a1')['age'] == 9
+
+    def test_lookup_decodes_only_matches(self, store_path, monkeypatch):
+        """Test that a find decodes only the matching lines."""
+        store = open_store(store_path)
+        store.put_many([assessment(f'a{i}', f'p{i % 100}') for i in range(1000)])
+        decoded = []
+        real_loads = json.loads
+        monkeypatch.setattr(record_store.json, 'loads', lambda data: decoded.append(1) or real_loads(data))
+
+        assert len(store.find('patientID', 'p7')) == 10
+        assert len(decoded) == 10
+
+
+class TestIndexedMirror:
+    """Tests for IndexedMirror."""
+
+    def test_follows_data_access_writes(self, temp_data_dir):
+        """Test that inserts, updates and deletes reach the mirror."""
+        write_json_file('assessments.json', [assessment('a1', 'p1')])
+        mirror = IndexedMirror('assessments.json', 'assessmentID', ('patientID',))
+        assert [r['assessmentID'] for r in mirror.find('patientID', 'p1')] == ['a1']
+
+        add_record('assessments.json', assessment('a2', 'p1'))
+        update_record('assessments.json', 'assessmentID', 'a1', {'age': 50})
+        delete_record('assessments.json', 'assessmentID', 'a2')
+
+        assert [r['assessmentID'] for r in mirror.find('patientID', 'p1')] == ['a1']
+        assert mirror.get('a1')['age'] == 50
+
+    def test_rebuilds_after_external_write(self, temp_data_dir):
+        """Test that a data file written outside data_access triggers a rebuild."""
+        write_json_file('assessments.json', [assessment('a1', 'p1')])
+        mirror = IndexedMirror('assessments.json', 'assessmentID', ('patientID',))
+        mirror.find('patientID', 'p1')
+
+        with open(os.path.join(temp_data_dir, 'assessments.json'), 'w') as f:
+            json.dump([assessment('a9', 'p1'), assessment('a8', 'p2')], f)
+
+        assert [r['assessmentID'] for r in mirror.find('patientID', 'p1')] == ['a9']
+
+    def test_rebuilds_after_reshard(self, temp_data_dir):
+        """Test that a sharded collection is mirrored and followed across a reshard."""
+        write_json_file('assessments.json', [assessment('a1', 'p1'), assessment('a2', 'p2')])
+        mirror = IndexedMirror('assessments.json', 'assessmentID', ('patientID',))
+        mirror.find('patientID', 'p1')
+
+        reshard('assessments.json', 4)
+        add_record('assessments.json', assessment('a3', 'p1'))
+
+        assert [r['assessmentID'] for r in mirror.find('patientID', 'p1')] == ['a1', 'a3']
+
+    def test_missing_data_file(self, temp_data_dir):
+        """Test lookups when the data file does not exist."""
+        mirror = IndexedMirror('assessments.json', 'assessmentID', ('patientID',))
+        assert mirror.find('patientID', 'p1') == []
+        assert mirror.get('a1') is None
+
+
+class TestMmapHistory:
+    """Tests for HistoryService backed by the mirrors."""
+
+    def test_matches_memory_store(self, temp_data_dir):
+        """Test that both history stores return the same entries."""
+        write_json_file('assessments.json', [
+            assessment('a1', 'p1', '2024-01-01T00:00:00'),
+            assessment('a2', 'p1', '2024-03-01T00:00:00'),
+            assessment('a3', 'p2', '2024-02-01T00:00:00'),
+            assessment('a4', 'p1', '2024-03-01T00:00:00'),
+        ])
+        write_json_file('prescriptions.json', [
+            {'prescriptionID': 'r1', 'assessmentID': 'a1', 'patientID': 'p1', 'medications': [], 'instructions': 'Rest'},
+            {'prescriptionID': 'r2', 'assessmentID': 'a2', 'patientID': 'p1', 'medications': [], 'instructions': 'Hydrate'},
+        ])
+        add_record('assessments.json', assessment('a5', 'p1', '2024-02-01T00:00:00'))
+
+        memory = HistoryService('memory').get_history('p1')
+        mmap_history = HistoryService('mmap').get_history('p1')
+
+        assert mmap_history == memory
+        assert [e['assessmentID'] for e in mmap_history] == ['a2', 'a4', 'a5', 'a1']
+
+    def test_unknown_store(self):
+        """Test that an unknown store is rejected."""
+        with pytest.raises(ValueError):
+            HistoryService('disk')
@@ -0,0 +1,284 @@
+"""
+Unit tests for the daily rollups and the report endpoint.
+"""
+
+import os
+import sys
+# Set environment variable BEFORE importing app
+TEST_SECRET_KEY = 'test-secret-key-for-unit-tests-only'
+os.environ['SECRET_KEY'] = TEST_SECRET_KEY
+
+import pytest
+import json
+import jwt
+import tempfile
+import shutil
+from datetime import datetime, timezone, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_access
+import rollups
+from data_access import write_json_file, update_record, transaction
+from rollups import RollupStore
+
+
+ASSESSMENTS = [
+    {'assessmentID': 'a1', 'patientID': 'p1', 'symptoms': ['Fever', 'cough'], 'assessmentDate': '2024-01-10T10:00:00Z'},
+    {'assessmentID': 'a2', 'patientID': 'p2', 'symptoms': ['fever'], 'assessmentDate': '2024-01-31T23:00:00Z'},
+]
+PRESCRIPTIONS = [
+    {'prescriptionID': 'rx1', 'assessmentID': 'a1', 'patientID': 'p1', 'medications': [],
+     'generatedDate': '2024-01-10T10:00:00Z', 'lastModifiedBy': 'd1', 'lastModifiedDate': '2024-01-10T12:00:00Z'},
+    {'prescriptionID': 'rx2', 'assessmentID': 'a2', 'patientID': 'p2', 'medications': [],
+     'generatedDate': '2024-01-31T23:00:00Z'},
+]
+ASSIGNMENTS = [
+    {'assignmentID': 's1', 'assessmentID': 'a1', 'patientID': 'p1', 'doctorID': 'd1', 'assignmentDate': '2024-01-10T10:00:00Z'},
+    {'assignmentID': 's2', 'assessmentID': 'a2', 'patientID': 'p2', 'doctorID': 'd2', 'assignmentDate': '2024-01-31T23:00:00Z'},
+]
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory with two assessments."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    write_json_file('assessments.json', ASSESSMENTS)
+    write_json_file('prescriptions.json', PRESCRIPTIONS)
+    write_json_file('assignments.json', ASSIGNMENTS)
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def store(temp_data_dir):
+    """Get the rollup store; a second instance would count the same writes into the same partitions."""
+    rollup_store = rollups.get_rollup_store()
+    yield rollup_store
+    rollup_store.flush()
+
+
+def _metrics(rows):
+    return {(row['day'], row['key']): (row['assessments'], row['prescriptions'], row['reviewed']) for row in rows}
+
+
+class TestBackfill:
+    """Tests for RollupStore.backfill."""
+
+    def test_backfill_rows(self, store):
+        """Test that every dimension is rolled up per day."""
+        counts = store.backfill(ASSESSMENTS, PRESCRIPTIONS, ASSIGNMENTS)
+        assert counts == {'assessments': 2, 'prescriptions': 2, 'assignments': 2, 'partitions': 1}
+
+        assert _metrics(store.rows('2024-01-01', '2024-02-01')) == {
+            ('2024-01-10', ''): (1, 1, 1),
+            ('2024-01-31', ''): (1, 1, 0),
+        }
+        assert _metrics(store.rows('2024-01-01', '2024-02-01', 'symptom', 'fever')) == {
+            ('2024-01-10', 'fever'): (1, 1, 1),
+            ('2024-01-31', 'fever'): (1, 1, 0),
+        }
+        doctor_rows = store.rows('2024-01-10', '2024-01-11', 'doctor')
+        assert _metrics(doctor_rows) == {('2024-01-10', 'd1'): (1, 0, 1)}
+        assert doctor_rows[0]['averageReviewMinutes'] == 120.0
+
+    def test_backfill_replaces_partitions(self, store, temp_data_dir):
+        """Test that a backfill discards previous rollups."""
+        store.backfill(ASSESSMENTS, PRESCRIPTIONS, ASSIGNMENTS)
+        store.backfill(ASSESSMENTS[:1], PRESCRIPTIONS[:1], ASSIGNMENTS[:1])
+        assert _metrics(store.rows('2024-01-01', '2024-02-01')) == {('2024-01-10', ''): (1, 1, 1)}
+        reloaded = RollupStore()
+        try:
+            assert _metrics(reloaded.rows('2024-01-01', '2024-02-01')) == {('2024-01-10', ''): (1, 1, 1)}
+        finally:
+            data_access.remove_change_listener(reloaded._on_change)
+
+    def test_unknown_dimension(self, store):
+        """Test that an unknown dimension is rejected."""
+        with pytest.raises(ValueError):
+            store.rows('2024-01-01', '2024-01-02', 'patient')
+
+    def test_command(self, temp_data_dir, monkeypatch, capsys):
+        """Test the backfill command over the data files."""
+        monkeypatch.setattr('rollups._rollup_store', None)
+        try:
+            assert rollups.main(['--data-dir', temp_data_dir, '--backfill']) == 0
+            assert 'into 1 partition(s)' in capsys.readouterr().out
+            assert os.path.exists(os.path.join(temp_data_dir, 'rollups', '2024-01.json'))
+        finally:
+            data_access.remove_change_listener(rollups._rollup_store._on_change)
+
+
+class TestIncrementalRollups:
+    """Tests for rollups maintained from change notifications."""
+
+    def test_new_assessment(self, store):
+        """Test that a committed assessment, prescription and assignment are rolled up."""
+        store.backfill(ASSESSMENTS, PRESCRIPTIONS, ASSIGNMENTS)
+        with transaction() as txn:
+            txn.add_record('assessments.json', {'assessmentID': 'a3', 'patientID': 'p1', 'symptoms': ['fever'],
+                                                'assessmentDate': '2024-01-10T15:00:00Z'})
+            txn.add_record('prescriptions.json', {'prescriptionID': 'rx3', 'assessmentID': 'a3', 'patientID': 'p1',
+                                                  'medications': [], 'generatedDate': '2024-01-10T15:00:00Z'})
+            txn.add_record('assignments.json', {'assignmentID': 's3', 'assessmentID': 'a3', 'patientID': 'p1',
+                                                'doctorID': 'd1', 'assignmentDate': '2024-01-10T15:00:00Z'})
+        assert _metrics(store.rows('2024-01-10', '2024-01-11', 'symptom', 'fever')) == {('2024-01-10', 'fever'): (2, 2, 1)}
+        assert _metrics(store.rows('2024-01-10', '2024-01-11', 'doctor', 'd1')) == {('2024-01-10', 'd1'): (2, 0, 1)}
+
+    def test_submission_saved_once(self, store, temp_data_dir, monkeypatch):
+        """Test that one submission saves its partition once, without indexing the assessments."""
+        store.backfill(ASSESSMENTS, PRESCRIPTIONS, ASSIGNMENTS)
+        saved = []
+        save = store._save
+        monkeypatch.setattr(store, '_save', lambda month: saved.append(month) or save(month))
+        with transaction() as txn:
+            txn.add_record('assessments.json', {'assessmentID': 'a3', 'patientID': 'p1', 'symptoms': ['rash'],
+                                                'assessmentDate': '2024-01-10T15:00:00Z'})
+            txn.add_record('prescriptions.json', {'prescriptionID': 'rx3', 'assessmentID': 'a3', 'patientID': 'p1',
+                                                  'medications': [], 'generatedDate': '2024-01-10T15:00:00Z'})
+            txn.add_record('assignments.json', {'assignmentID': 's3', 'assessmentID': 'a3', 'patientID': 'p1',
+                                                'doctorID': 'd1', 'assignmentDate': '2024-01-10T15:00:00Z'})
+        assert saved == []
+        store.flush()
+        assert saved == ['2024-01']
+        assert not os.path.exists(os.path.join(temp_data_dir, '.index'))
+
+        reloaded = RollupStore()
+        try:
+            assert _metrics(reloaded.rows('2024-01-10', '2024-01-11', 'symptom', 'rash')) == {
+                ('2024-01-10', 'rash'): (1, 1, 0)}
+        finally:
+            data_access.remove_change_listener(reloaded._on_change)
+
+    def test_review_moves_on_edit(self, store):
+        """Test that a review is counted once, on the day of the latest edit."""
+        store.backfill(ASSESSMENTS, PRESCRIPTIONS, ASSIGNMENTS)
+        update_record('prescriptions.json', 'prescriptionID', 'rx2',
+                      {'lastModifiedBy': 'd2', 'lastModifiedDate': '2024-02-01T01:00:00Z'})
+        update_record('prescriptions.json', 'prescriptionID', 'rx2',
+                      {'lastModifiedBy': 'd2', 'lastModifiedDate': '2024-02-02T23:00:00Z'})
+        rows = store.rows('2024-02-01', '2024-02-03', 'symptom', 'fever')
+        assert _metrics(rows) == {('2024-02-01', 'fever'): (0, 0, 0), ('2024-02-02', 'fever'): (0, 0, 1)}
+        assert rows[1]['averageReviewMinutes'] == 48 * 60.0
+        assert _metrics(store.rows('2024-02-02', '2024-02-03', 'doctor', 'd2')) == {('2024-02-02', 'd2'): (0, 0, 1)}
+
+
+@pytest.fixture
+def other_process(store):
+    """Create a second store standing in for another server process: it only sees the writes passed to it."""
+    store.backfill(ASSESSMENTS, PRESCRIPTIONS, ASSIGNMENTS)
+    other_store = RollupStore()
+    data_access.remove_change_listener(other_store._on_change)
+    other_store.rows('2024-01-01', '2024-02-01')
+    yield other_store
+    other_store.flush()
+
+
+class TestSharedPartitions:
+    """Tests for rollups saved by several processes."""
+
+    def test_saves_merge(self, store, other_process):
+        """Test that saves of two processes keep each other's counts."""
+        data_access.add_record('assessments.json', {'assessmentID': 'a3', 'patientID': 'p1', 'symptoms': ['rash'],
+                                                    'assessmentDate': '2024-01-10T15:00:00Z'})
+        other_process._on_change('assessments.json', 'insert', [
+            {'assessmentID': 'a4', 'patientID': 'p2', 'symptoms': ['rash'], 'assessmentDate': '2024-01-10T16:00:00Z'}
+        ], None)
+        store.flush()
+
+        # The other process reads this one's save together with its unsaved change
+        assert _metrics(other_process.rows('2024-01-10', '2024-01-11', 'symptom', 'rash')) == {
+            ('2024-01-10', 'rash'): (2, 0, 0)}
+        other_process.flush()
+
+        reloaded = RollupStore()
+        try:
+            assert _metrics(reloaded.rows('2024-01-10', '2024-01-11')) == {('2024-01-10', ''): (3, 1, 1)}
+        finally:
+            data_access.remove_change_listener(reloaded._on_change)
+
+    def test_review_saved_elsewhere_is_moved(self, store, other_process):
+        """Test that a review saved by another process is moved, not counted twice."""
+        update_record('prescriptions.json', 'prescriptionID', 'rx2',
+                      {'lastModifiedBy': 'd2', 'lastModifiedDate': '2024-02-01T01:00:00Z'})
+        store.flush()
+        other_process._on_change('prescriptions.json', 'update', [
+            dict(PRESCRIPTIONS[1], lastModifiedBy='d2', lastModifiedDate='2024-02-02T23:00:00Z')
+        ], None)
+        other_process.flush()
+
+        reloaded = RollupStore()
+        try:
+            assert _metrics(reloaded.rows('2024-02-01', '2024-02-03', 'doctor', 'd2')) == {
+                ('2024-02-01', 'd2'): (0, 0, 0), ('2024-02-02', 'd2'): (0, 0, 1)}
+        finally:
+            data_access.remove_change_listener(reloaded._on_change)
+
+    def test_temporary_files_unique_and_removed(self, store, temp_data_dir, monkeypatch):
+        """Test that saves write to unique temporary files and leave none behind."""
+        data_access.add_record('assessments.json', {'assessmentID': 'a3', 'patientID': 'p1', 'symptoms': [],
+                                                    'assessmentDate': '2024-01-10T15:00:00Z'})
+        temp_paths = []
+        mkstemp = rollups.tempfile.mkstemp
+        monkeypatch.setattr(rollups.tempfile, 'mkstemp', lambda **kwargs: temp_paths.append(mkstemp(**kwargs)) or
+                            temp_paths[-1])
+        store.flush()
+
+        assert len(temp_paths) == 1 and temp_paths[0][1] != os.path.join(temp_data_dir, 'rollups', '2024-01.json.tmp')
+        assert [name for name in os.listdir(os.path.join(temp_data_dir, 'rollups')) if name.endswith('.tmp')] == []
+
+    def test_save_after_data_dir_removed(self, store, temp_data_dir, capsys):
+        """Test that changes pending for a removed data directory are dropped quietly."""
+        data_access.add_record('assessments.json', {'assessmentID': 'a3', 'patientID': 'p1', 'symptoms': [],
+                                                    'assessmentDate': '2024-01-10T15:00:00Z'})
+        shutil.rmtree(temp_data_dir)
+        store.flush()
+        os.mkdir(temp_data_dir)
+
+        assert 'Warning' not in capsys.readouterr().out
+        assert not os.path.exists(os.path.join(temp_data_dir, 'rollups'))
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    from app import app
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def _auth(user_type='doctor'):
+    token = jwt.encode({
+        'userID': 'd1',
+        'userType': user_type,
+        'exp': datetime.now(timezone.utc) + timedelta(hours=1)
+    }, TEST_SECRET_KEY, algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+class TestReportEndpoint:
+    """Tests for GET /api/reports/daily."""
+
+    def test_daily_rows(self, client, temp_data_dir):
+        """Test that rolled up rows are returned for the range."""
+        from app import get_rollup_store
+        get_rollup_store().backfill(ASSESSMENTS, PRESCRIPTIONS, ASSIGNMENTS)
+        response = client.get('/api/reports/daily?since=2024-01&until=2024-02&dimension=doctor', headers=_auth())
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['since'] == '2024-01-01'
+        assert [(row['day'], row['key']) for row in data['rows']] == [('2024-01-10', 'd1'), ('2024-01-31', 'd2')]
+
+    @pytest.mark.parametrize('query', ['dimension=patient', 'since=2020-01-01&until=2024-01-01', 'since=soon'])
+    def test_invalid_parameters(self, client, temp_data_dir, query):
+        """Test that unknown dimensions, long ranges and bad dates are rejected."""
+        response = client.get(f'/api/reports/daily?{query}', headers=_auth())
+        assert response.status_code == 400
+
+    def test_patient_forbidden(self, client, temp_data_dir):
+        """Test that patients cannot read reports."""
+        response = client.get('/api/reports/daily', headers=_auth('patient'))
+        assert response.status_code == 403
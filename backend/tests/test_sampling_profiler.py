@@ -0,0 +1,176 @@
+"""
+Unit tests for the sampling profiler and the admin profile endpoint.
+"""
+
+import os
+# Set environment variable BEFORE importing app
+os.environ['SECRET_KEY'] = 'test-secret-key-for-unit-tests-only'
+
+import sys
+import json
+import threading
+import bcrypt
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sampling_profiler
+from sampling_profiler import SamplingProfiler, attribute
+from app import app
+
+
+ADMIN_TOKEN = 'test-admin-token'
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Create a test client with an admin token configured."""
+    monkeypatch.setenv('ADMIN_TOKEN', ADMIN_TOKEN)
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def busy_loop(stop):
+    """Spin until stopped."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def hash_until(stop):
+    """Hash passwords until stopped."""
+    while not stop.is_set():
+        bcrypt.hashpw(b'password', bcrypt.gensalt(rounds=10))
+
+
+def run_profiler_during(target, seconds=0.2):
+    """Profile all threads while target runs in a background thread."""
+    stop = threading.Event()
+    worker = threading.Thread(target=target, args=(stop,))
+    worker.start()
+    profiler = SamplingProfiler(interval=0.002, requests_only=False)
+    profiler.start()
+    stop.wait(seconds)
+    profiler.stop()
+    stop.set()
+    worker.join()
+    return profiler
+
+
+class TestAttribute:
+    """Tests for component attribution."""
+
+    def test_innermost_component_wins(self):
+        """Test that the innermost matching frame decides the component."""
+        stack = ('app:create_assessment', 'bedrock_service:generate_prescription', 'data_access:read_json_file')
+        assert attribute(stack) == 'data_access'
+
+    def test_package_modules_match(self):
+        """Test that submodules count towards their top-level package."""
+        assert attribute(('app:validate_token', 'jwt.api_jwt:decode')) == 'jwt'
+
+    def test_other(self):
+        """Test stacks outside all components."""
+        assert attribute(('threading:run', 'app:health_check')) == 'other'
+
+
+class TestSamplingProfiler:
+    """Tests for SamplingProfiler."""
+
+    def test_samples_busy_thread(self):
+        """Test that a busy thread's function appears in the collapsed stacks."""
+        profiler = run_profiler_during(busy_loop)
+
+        assert profiler.samples > 10
+        collapsed = profiler.collapsed()
+        line = next(line for line in collapsed.splitlines() if 'busy_loop' in line)
+        stack, count = line.rsplit(' ', 1)
+        assert stack.startswith('threading:')
+        assert int(count) > 0
+
+    def test_bcrypt_native_frame(self):
+        """Test that time inside bcrypt is attributed to bcrypt."""
+        profiler = run_profiler_during(hash_until, seconds=0.3)
+
+        assert 'bcrypt:<native>' in profiler.collapsed()
+        assert profiler.summary()['components']['bcrypt']['samples'] > 0
+
+    def test_requests_only_skips_idle_threads(self):
+        """Test that threads not serving a request are left out by default."""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        worker.start()
+        profiler = SamplingProfiler(interval=0.002)
+        profiler.start()
+        stop.wait(0.1)
+        profiler.stop()
+        stop.set()
+        worker.join()
+
+        assert profiler.samples > 0
+        assert profiler.stacks == {}
+
+    def test_excluded_thread_not_sampled(self):
+        """Test that excluded threads are left out of the stacks."""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        worker.start()
+        profiler = SamplingProfiler(interval=0.002, requests_only=False, exclude_threads=(worker.ident,))
+        profiler.start()
+        stop.wait(0.05)
+        profiler.stop()
+        stop.set()
+        worker.join()
+
+        assert profiler.samples > 0
+        assert not any('busy_loop' in ';'.join(stack) for stack in profiler.stacks)
+
+    def test_one_profile_at_a_time(self):
+        """Test that concurrent profiles are refused."""
+        with sampling_profiler._profile_lock:
+            with pytest.raises(RuntimeError):
+                sampling_profiler.profile_for(0.01)
+
+
+class TestProfileEndpoint:
+    """Tests for POST /api/admin/profile."""
+
+    def test_requires_admin_token(self, client):
+        """Test that requests without the admin token are rejected."""
+        response = client.post('/api/admin/profile', json={'seconds': 0.01})
+        assert response.status_code == 403
+
+    def test_disabled_without_configured_token(self, client, monkeypatch):
+        """Test that profiling is unavailable when ADMIN_TOKEN is unset."""
+        monkeypatch.delenv('ADMIN_TOKEN')
+        response = client.post('/api/admin/profile', json={'seconds': 0.01}, headers={'X-Admin-Token': ''})
+        assert response.status_code == 403
+
+    def test_invalid_duration(self, client):
+        """Test that out-of-range durations are rejected."""
+        response = client.post('/api/admin/profile', json={'seconds': 600},
+                               headers={'X-Admin-Token': ADMIN_TOKEN})
+        assert response.status_code == 400
+
+    def test_json_profile(self, client):
+        """Test that the endpoint returns collapsed stacks and a summary."""
+        response = client.post('/api/admin/profile',
+                               json={'seconds': 0.05, 'intervalMs': 5, 'requestsOnly': False, 'format': 'json'},
+                               headers={'X-Admin-Token': ADMIN_TOKEN})
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['summary']['samples'] > 0
+        # The request thread waiting in profile_for is not sampled
+        assert 'sampling_profiler:profile_for' not in data['collapsed']
+
+    def test_collapsed_profile(self, client):
+        """Test the default plain-text collapsed output."""
+        response = client.post('/api/admin/profile', json={'seconds': 0.05},
+                               headers={'X-Admin-Token': ADMIN_TOKEN})
+
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain')
+        # No other request was served while profiling
+        assert 'app:capture_profile' not in response.get_data(as_text=True)
@@ -0,0 +1,189 @@
+"""
+Unit tests for the symptom, medication and name search index and its endpoint.
+"""
+
+import os
+import sys
+# Set environment variable BEFORE importing app
+TEST_SECRET_KEY = 'test-secret-key-for-unit-tests-only'
+os.environ['SECRET_KEY'] = TEST_SECRET_KEY
+
+import pytest
+import json
+import jwt
+import tempfile
+import shutil
+from datetime import datetime, timezone, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_access
+from data_access import write_json_file, add_record, update_record
+from search_service import SearchIndex, normalize_terms, medication_terms
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory with three patients, two assigned to d1."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    write_json_file('patients.json', [
+        {'patientID': 'p1', 'firstName': 'Joan', 'lastName': 'Smith', 'email': 'joan@test.com'},
+        {'patientID': 'p2', 'firstName': 'Mark', 'lastName': 'Johnson', 'email': 'mark@test.com'},
+        {'patientID': 'p3', 'firstName': 'John', 'lastName': 'Doe', 'email': 'john@test.com'},
+    ])
+    write_json_file('assessments.json', [
+        {'assessmentID': 'a1', 'patientID': 'p1', 'symptoms': ['Fever', 'cough'], 'assessmentDate': '2024-01-10T10:00:00Z'},
+        {'assessmentID': 'a2', 'patientID': 'p1', 'symptoms': ['high fever'], 'assessmentDate': '2024-01-20T10:00:00Z'},
+        {'assessmentID': 'a3', 'patientID': 'p2', 'symptoms': ['fever'], 'assessmentDate': '2024-01-25T10:00:00Z'},
+        {'assessmentID': 'a4', 'patientID': 'p3', 'symptoms': ['fever'], 'assessmentDate': '2024-01-26T10:00:00Z'},
+    ])
+    write_json_file('prescriptions.json', [
+        {'prescriptionID': 'rx1', 'assessmentID': 'a1', 'patientID': 'p1', 'medications': [{'name': 'Ibuprofen'}]},
+        {'prescriptionID': 'rx3', 'assessmentID': 'a3', 'patientID': 'p2', 'medications': [{'name': 'Acetaminophen'}]},
+    ])
+    write_json_file('assignments.json', [
+        {'assignmentID': 's1', 'assessmentID': 'a1', 'patientID': 'p1', 'doctorID': 'd1'},
+        {'assignmentID': 's2', 'assessmentID': 'a2', 'patientID': 'p1', 'doctorID': 'd1'},
+        {'assignmentID': 's3', 'assessmentID': 'a3', 'patientID': 'p2', 'doctorID': 'd1'},
+        {'assignmentID': 's4', 'assessmentID': 'a4', 'patientID': 'p3', 'doctorID': 'd2'},
+    ])
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def index(temp_data_dir):
+    """Create a search index and unregister its change listener afterwards."""
+    search_index = SearchIndex()
+    yield search_index
+    data_access.remove_change_listener(search_index._on_change)
+
+
+def _patient_ids(results):
+    return [result['patientID'] for result in results]
+
+
+class TestNormalization:
+    """Tests for term normalization."""
+
+    def test_normalize_terms(self):
+        """Test that text is lowercased and split into unique alphanumeric terms."""
+        assert normalize_terms('Chest-Pain, chest  pain!') == ['chest', 'pain']
+        assert normalize_terms(None) == []
+
+    def test_medication_terms(self):
+        """Test that names are taken from medication dicts or plain strings."""
+        assert medication_terms([{'name': 'Vitamin D3', 'dosage': '1000 IU'}, 'Ibuprofen']) == ['vitamin', 'd3', 'ibuprofen']
+        assert medication_terms(None) == []
+
+
+class TestSearchIndex:
+    """Tests for SearchIndex class."""
+
+    def test_symptom_search_ranked(self, index):
+        """Test that patients with more matching assessments rank first."""
+        results = index.search('d1', 'fever')
+        assert _patient_ids(results) == ['p1', 'p2']
+        assert results[0]['score'] == 2
+        assert results[0]['assessmentIDs'] == ['a2', 'a1']
+        assert results[0]['lastMatchDate'] == '2024-01-20T10:00:00Z'
+
+    def test_scoped_to_doctor(self, index):
+        """Test that other doctors' patients are not found."""
+        assert _patient_ids(index.search('d2', 'fever')) == ['p3']
+        assert index.search('d3', 'fever') == []
+
+    def test_medication_search(self, index):
+        """Test that prescribed medication names are searched."""
+        assert _patient_ids(index.search('d1', 'IBUPROFEN')) == ['p1']
+
+    def test_name_prefix_search(self, index):
+        """Test that name terms match as prefixes."""
+        assert _patient_ids(index.search('d1', 'jo')) == ['p1', 'p2']
+        assert _patient_ids(index.search('d1', 'john')) == ['p2']
+
+    def test_all_terms_must_match(self, index):
+        """Test that terms are combined with AND across names and records."""
+        assert _patient_ids(index.search('d1', 'fever acetaminophen')) == ['p2']
+        assert _patient_ids(index.search('d1', 'smith cough')) == ['p1']
+        assert index.search('d1', 'fever rash') == []
+
+    def test_date_range(self, index):
+        """Test that date bounds apply to assessment matches."""
+        results = index.search('d1', 'fever', since='2024-01-15', until='2024-01-21')
+        assert _patient_ids(results) == ['p1']
+        assert results[0]['assessmentIDs'] == ['a2']
+
+    def test_incremental_updates(self, index):
+        """Test that new records and edited medications are indexed."""
+        index.preload()
+        add_record('patients.json', {'patientID': 'p4', 'firstName': 'Ada', 'lastName': 'Lovelace', 'email': 'ada@test.com'})
+        add_record('assessments.json', {'assessmentID': 'a5', 'patientID': 'p4', 'symptoms': ['rash'],
+                                        'assessmentDate': '2024-02-01T10:00:00Z'})
+        add_record('assignments.json', {'assignmentID': 's5', 'assessmentID': 'a5', 'patientID': 'p4', 'doctorID': 'd1'})
+        assert _patient_ids(index.search('d1', 'rash')) == ['p4']
+        assert _patient_ids(index.search('d1', 'love')) == ['p4']
+
+        update_record('prescriptions.json', 'prescriptionID', 'rx1', {'medications': [{'name': 'Naproxen'}]})
+        assert index.search('d1', 'ibuprofen') == []
+        assert _patient_ids(index.search('d1', 'naproxen')) == ['p1']
+
+    def test_write_by_other_process_is_seen(self, index):
+        """Test that records written without a change notification are indexed."""
+        assert index.search('d1', 'rash') == []
+        assessments = data_access.read_json_file('assessments.json')
+        assessments[2]['symptoms'] = ['rash']
+
+        # As another server process would, without notifying this one
+        data_access._write_json_file('assessments.json', assessments)
+
+        assert _patient_ids(index.search('d1', 'rash')) == ['p2']
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    from app import app
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def _auth(user_id, user_type='doctor'):
+    token = jwt.encode({
+        'userID': user_id,
+        'userType': user_type,
+        'exp': datetime.now(timezone.utc) + timedelta(hours=1)
+    }, TEST_SECRET_KEY, algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+class TestSearchEndpoint:
+    """Tests for GET /api/doctors/search."""
+
+    def test_paginated_results(self, client, temp_data_dir):
+        """Test that results are ranked and paginated."""
+        response = client.get('/api/doctors/search?q=fever&pageSize=1&page=2', headers=_auth('d1'))
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['total'] == 2
+        assert _patient_ids(data['results']) == ['p2']
+        assert data['results'][0]['firstName'] == 'Mark'
+
+    def test_date_range(self, client, temp_data_dir):
+        """Test that since and until narrow the matching assessments."""
+        response = client.get('/api/doctors/search?q=fever&since=2024-01-22', headers=_auth('d1'))
+        assert _patient_ids(json.loads(response.data)['results']) == ['p2']
+
+    @pytest.mark.parametrize('query', ['', 'q=fever&page=0', 'q=fever&pageSize=101', 'q=fever&since=yesterday'])
+    def test_invalid_parameters(self, client, temp_data_dir, query):
+        """Test that a missing query or invalid paging and dates are rejected."""
+        response = client.get(f'/api/doctors/search?{query}', headers=_auth('d1'))
+        assert response.status_code == 400
+
+    def test_patient_forbidden(self, client, temp_data_dir):
+        """Test that patients cannot search."""
+        response = client.get('/api/doctors/search?q=fever', headers=_auth('p1', 'patient'))
+        assert response.status_code == 403
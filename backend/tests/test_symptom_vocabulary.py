@@ -0,0 +1,81 @@
+"""
+Unit tests for the canonical symptom vocabulary.
+"""
+
+import os
+import sys
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from symptom_vocabulary import CONCEPTS, SymptomVocabulary, get_symptom_vocabulary, normalize_words
+
+
+@pytest.fixture
+def vocabulary():
+    """Create a vocabulary of the built-in concepts."""
+    return SymptomVocabulary()
+
+
+def test_normalize_words():
+    """Test that text is lowercased and split on punctuation."""
+    assert normalize_words('  Sore-Throat, since   MONDAY! ') == ['sore', 'throat', 'since', 'monday']
+
+
+class TestSymptomVocabulary:
+    """Tests for SymptomVocabulary class."""
+
+    @pytest.mark.parametrize('text, name', [
+        ('Fever', 'fever'),
+        ('diarrhoea', 'diarrhea'),
+        ('Difficulty breathing', 'shortness of breath'),
+        ('headaches', 'headache'),
+        ("can't sleep", 'insomnia'),
+    ])
+    def test_synonyms_and_variants(self, vocabulary, text, name):
+        """Test that synonyms, spelling variants and plurals map to the canonical name."""
+        assert vocabulary.canonical_names(text) == [name]
+
+    def test_longest_phrase_wins(self, vocabulary):
+        """Test that a longer phrase is preferred over the words it starts with."""
+        assert vocabulary.canonical_names('high fever') == ['high fever']
+        assert vocabulary.canonical_names('mild fever') == ['fever']
+
+    def test_phrases_within_text(self, vocabulary):
+        """Test that several phrases are found in one symptom, skipping other words."""
+        assert vocabulary.canonical_names('mild cough and a bad headache since yesterday') == ['cough', 'severe headache']
+        assert vocabulary.lookup('feeling unwell') == []
+
+    @pytest.mark.parametrize('text, names', [
+        ('no fever', []),
+        ('Denies chest pain, palpitations', []),
+        ("doesn't have a cough", []),
+        ('no fever but a bad cough', ['cough']),
+        ('no fever; headache', ['headache']),
+        ('headache without nausea', ['headache']),
+        ('temperature of 37', []),
+        ('running a temperature', ['fever']),
+    ])
+    def test_negation_and_qualifiers(self, vocabulary, text, names):
+        """Test that negated phrases are skipped up to the end of their clause."""
+        assert vocabulary.canonical_names(text) == names
+
+    def test_encode(self, vocabulary):
+        """Test that a symptom list becomes unique concept IDs in order."""
+        assert vocabulary.encode(['Cough', 'fever', 'coughing']) == [5, 1]
+        assert vocabulary.encode('fever') == []
+        assert vocabulary.name(5) == 'cough'
+        assert vocabulary.name(999) is None
+
+    def test_conflicting_phrase_rejected(self):
+        """Test that a phrase naming two concepts is rejected."""
+        with pytest.raises(ValueError):
+            SymptomVocabulary([(1, 'fever', ()), (2, 'chills', ('Fever',))])
+        with pytest.raises(ValueError):
+            SymptomVocabulary([(1, 'fever', ()), (1, 'chills', ())])
+
+    def test_concept_ids_unique(self):
+        """Test that the built-in concepts load and have distinct IDs."""
+        assert len({concept_id for concept_id, _, _ in CONCEPTS}) == len(CONCEPTS)
+        assert get_symptom_vocabulary() is get_symptom_vocabulary()
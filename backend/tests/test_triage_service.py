@@ -0,0 +1,215 @@
+"""
+Unit tests for the doctor triage queue and its endpoint.
+"""
+
+import os
+import sys
+# Set environment variable BEFORE importing app
+TEST_SECRET_KEY = 'test-secret-key-for-unit-tests-only'
+os.environ['SECRET_KEY'] = TEST_SECRET_KEY
+
+import pytest
+import json
+import jwt
+import tempfile
+import shutil
+from datetime import datetime, timezone, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_access
+from data_access import write_json_file, add_record, update_record, transaction
+from triage_service import TriageQueue, symptom_severity
+
+
+def _assessment(assessment_id, date, symptoms, patient_id='p1'):
+    return {'assessmentID': assessment_id, 'patientID': patient_id, 'symptoms': symptoms, 'assessmentDate': date}
+
+
+def _prescription(assessment_id, patient_id='p1', **fields):
+    return dict({'prescriptionID': f'rx-{assessment_id}', 'assessmentID': assessment_id, 'patientID': patient_id,
+                 'medications': [], 'instructions': 'Rest', 'generatedBy': 'AI-Bedrock'}, **fields)
+
+
+def _assignment(assessment_id, doctor_id, patient_id='p1'):
+    return {'assignmentID': f'as-{assessment_id}', 'assessmentID': assessment_id, 'patientID': patient_id,
+            'doctorID': doctor_id}
+
+
+@pytest.fixture
+def temp_data_dir(monkeypatch):
+    """Create a temporary data directory with three assessments assigned to d1."""
+    temp_dir = tempfile.mkdtemp()
+    monkeypatch.setattr('data_access.DATA_DIR', temp_dir)
+    write_json_file('assessments.json', [
+        _assessment('a1', '2024-01-10T08:00:00Z', ['cough']),
+        _assessment('a2', '2024-01-10T10:00:00Z', ['chest pain'], patient_id='p2'),
+        _assessment('a3', '2024-01-10T09:00:00Z', ['headache'], patient_id='p3'),
+    ])
+    write_json_file('prescriptions.json', [
+        _prescription('a1'),
+        _prescription('a2', patient_id='p2'),
+        _prescription('a3', patient_id='p3', lastModifiedBy='d1'),
+    ])
+    write_json_file('assignments.json', [
+        _assignment('a1', 'd1'),
+        _assignment('a2', 'd1', patient_id='p2'),
+        _assignment('a3', 'd1', patient_id='p3'),
+    ])
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def queue(temp_data_dir):
+    """Create a triage queue and unregister its change listener afterwards."""
+    triage_queue = TriageQueue(severity_hours=1)
+    yield triage_queue
+    data_access.remove_change_listener(triage_queue._on_change)
+
+
+class TestSymptomSeverity:
+    """Tests for symptom_severity function."""
+
+    def test_most_severe_symptom(self):
+        """Test that the most severe symptom sets the severity."""
+        assert symptom_severity(['cough', 'Chest Pain']) == 5
+
+    def test_unknown_and_missing(self):
+        """Test the default for unknown symptoms and zero without symptoms."""
+        assert symptom_severity(['tired']) == 1
+        assert symptom_severity([]) == 0
+        assert symptom_severity(None) == 0
+
+    def test_negated_symptom(self):
+        """Test that a negated symptom does not set the severity."""
+        assert symptom_severity(['no chest pain']) == 1
+        assert symptom_severity(['denies shortness of breath', 'fever']) == 2
+
+
+class TestTriageQueue:
+    """Tests for TriageQueue class."""
+
+    def test_loads_unreviewed_in_priority_order(self, queue):
+        """Test that severity outweighs a shorter wait and reviewed items are left out."""
+        # a2 is 2 hours newer than a1 but 4 severity points (hours) more urgent
+        assert [item['assessmentID'] for item in queue.top('d1', 10)] == ['a2', 'a1']
+        assert queue.pending_count('d1') == 2
+        assert queue.top('d1', 10)[0]['prescriptionID'] == 'rx-a2'
+
+    def test_top_k(self, queue):
+        """Test that only the K most urgent items are returned."""
+        assert [item['assessmentID'] for item in queue.top('d1', 1)] == ['a2']
+        assert queue.top('d1', 0) == []
+        assert queue.top('unknown', 5) == []
+
+    def test_new_assessment_is_queued(self, queue):
+        """Test that a committed assessment, prescription and assignment are queued."""
+        queue.preload()
+        with transaction() as txn:
+            txn.add_record('assessments.json', _assessment('a4', '2024-01-09T00:00:00Z', ['fever']))
+            txn.add_record('prescriptions.json', _prescription('a4'))
+            txn.add_record('assignments.json', _assignment('a4', 'd1'))
+        assert [item['assessmentID'] for item in queue.top('d1', 10)] == ['a4', 'a2', 'a1']
+
+    def test_review_removes_item(self, queue):
+        """Test that a doctor's review takes the item off the queue."""
+        queue.preload()
+        update_record('prescriptions.json', 'prescriptionID', 'rx-a2', {'lastModifiedBy': 'd1'})
+        assert [item['assessmentID'] for item in queue.top('d1', 10)] == ['a1']
+        assert queue.pending_count('d1') == 1
+
+    def test_many_reviews_keep_order(self, queue):
+        """Test that ordering survives many lazily deleted items."""
+        queue.preload()
+        for i in range(40):
+            assessment_id = f'b{i:02d}'
+            add_record('assessments.json', _assessment(assessment_id, f'2024-01-01T00:{i:02d}:00Z', ['cough']))
+            add_record('prescriptions.json', _prescription(assessment_id))
+            add_record('assignments.json', _assignment(assessment_id, 'd2'))
+        for i in range(0, 40, 2):
+            update_record('prescriptions.json', 'prescriptionID', f'rx-b{i:02d}', {'lastModifiedBy': 'd2'})
+        assert [item['assessmentID'] for item in queue.top('d2', 3)] == ['b01', 'b03', 'b05']
+        assert queue.pending_count('d2') == 20
+
+    def test_rewritten_file_is_reloaded(self, queue):
+        """Test that a replaced data file rebuilds the queues."""
+        queue.preload()
+        write_json_file('assignments.json', [_assignment('a1', 'd2')])
+        assert queue.top('d1', 10) == []
+        assert [item['assessmentID'] for item in queue.top('d2', 10)] == ['a1']
+
+
+    def test_review_by_other_process_is_seen(self, queue):
+        """Test that a review written without a change notification is picked up."""
+        assert queue.pending_count('d1') == 2
+        prescriptions = data_access.read_json_file('prescriptions.json')
+        prescriptions[0]['lastModifiedBy'] = 'd1'
+
+        # As another server process would, without notifying this one
+        data_access._write_json_file('prescriptions.json', prescriptions)
+
+        assert [item['assessmentID'] for item in queue.top('d1', 10)] == ['a2']
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    from app import app
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def _token(user_id, user_type):
+    return jwt.encode({
+        'userID': user_id,
+        'userType': user_type,
+        'exp': datetime.now(timezone.utc) + timedelta(hours=1)
+    }, TEST_SECRET_KEY, algorithm='HS256')
+
+
+class TestTriageEndpoint:
+    """Tests for GET /api/doctors/triage."""
+
+    def test_returns_top_items(self, client, temp_data_dir):
+        """Test that the doctor's most urgent items are returned."""
+        response = client.get('/api/doctors/triage?limit=1', headers={'Authorization': f"Bearer {_token('d1', 'doctor')}"})
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['pendingCount'] == 2
+        assert [item['assessmentID'] for item in data['queue']] == ['a2']
+        assert data['queue'][0]['severity'] == 5
+
+    def test_doctor_patients_ordered_by_triage(self, client, temp_data_dir):
+        """Test that patients awaiting review come first, most urgent first."""
+        write_json_file('patients.json', [
+            {'patientID': patient_id, 'firstName': 'Pat', 'lastName': patient_id, 'email': f'{patient_id}@test.com'}
+            for patient_id in ('p1', 'p2', 'p3')
+        ])
+        response = client.get('/api/doctors/patients', headers={'Authorization': f"Bearer {_token('d1', 'doctor')}"})
+        assert response.status_code == 200
+        assert [patient['patientID'] for patient in json.loads(response.data)['patients']] == ['p2', 'p1', 'p3']
+
+    def test_doctor_patients_count_all_assessments(self, client, temp_data_dir):
+        """Test that assessmentCount counts all assessments, not the rows returned for limit."""
+        write_json_file('patients.json', [{'patientID': 'p1', 'firstName': 'Pat', 'lastName': 'p1'}])
+        add_record('assessments.json', _assessment('a4', '2024-01-09T08:00:00Z', ['fever']))
+        response = client.get('/api/doctors/patients?limit=1', headers={'Authorization': f"Bearer {_token('d1', 'doctor')}"})
+        assert response.status_code == 200
+        patient = json.loads(response.data)['patients'][0]
+        assert [entry['assessmentID'] for entry in patient['history']] == ['a1']
+        assert patient['assessmentCount'] == 2
+
+    def test_patient_forbidden(self, client, temp_data_dir):
+        """Test that patients cannot read a triage queue."""
+        response = client.get('/api/doctors/triage', headers={'Authorization': f"Bearer {_token('p1', 'patient')}"})
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize('limit', ['0', '-1', 'ten', '\u00b2'])
+    def test_invalid_limit(self, client, temp_data_dir, limit):
+        """Test that non-positive, non-numeric and non-decimal digit limits are rejected."""
+        response = client.get(f'/api/doctors/triage?limit={limit}',
+                              headers={'Authorization': f"Bearer {_token('d1', 'doctor')}"})
+        assert response.status_code == 400
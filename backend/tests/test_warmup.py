@@ -0,0 +1,124 @@
+"""
+Unit tests for start-up warm-up and the health probes.
+"""
+
+import os
+# Set environment variable BEFORE importing app
+os.environ['SECRET_KEY'] = 'test-secret-key-for-unit-tests-only'
+
+import sys
+import json
+import threading
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import app
+from warmup import Warmup
+
+
+@pytest.fixture
+def client():
+    """Create a test client."""
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+class TestWarmup:
+    """Tests for the Warmup class."""
+
+    def test_sync_runs_steps_in_order(self):
+        """Test that sync mode runs every step before returning."""
+        calls = []
+        warmup = Warmup([('a', lambda: calls.append('a')), ('b', lambda: calls.append('b'))])
+
+        warmup.start('sync')
+
+        assert calls == ['a', 'b']
+        assert warmup.is_ready()
+        assert set(warmup.status()['steps']) == {'a', 'b'}
+
+    def test_background_becomes_ready(self):
+        """Test that background mode is not ready until its steps finish."""
+        release = threading.Event()
+        warmup = Warmup([('slow', lambda: release.wait(5))])
+
+        warmup.start('background')
+        assert not warmup.is_ready()
+
+        release.set()
+        assert warmup.wait(5)
+
+    def test_off_is_ready_immediately(self):
+        """Test that off mode skips the steps."""
+        calls = []
+        warmup = Warmup([('a', lambda: calls.append('a'))])
+
+        warmup.start('off')
+
+        assert warmup.is_ready()
+        assert calls == []
+
+    def test_failing_step_does_not_block_readiness(self):
+        """Test that a failing step is recorded and the rest still run."""
+        calls = []
+
+        def fail():
+            raise RuntimeError('no credentials')
+
+        warmup = Warmup([('bad', fail), ('good', lambda: calls.append('good'))])
+        warmup.start('sync')
+
+        assert warmup.is_ready()
+        assert calls == ['good']
+        assert warmup.status()['steps']['bad']['error'] == 'no credentials'
+
+    def test_start_once(self):
+        """Test that a second start does not rerun the steps."""
+        calls = []
+        warmup = Warmup([('a', lambda: calls.append('a'))])
+
+        warmup.start('sync')
+        warmup.start('sync')
+
+        assert calls == ['a']
+
+    def test_unknown_mode(self):
+        """Test that an unknown mode is rejected."""
+        with pytest.raises(ValueError):
+            Warmup([]).start('eager')
+
+
+class TestHealthProbes:
+    """Tests for the liveness and readiness endpoints."""
+
+    def test_liveness(self, client):
+        """Test that liveness does not depend on warm-up."""
+        response = client.get('/api/health/live')
+        assert response.status_code == 200
+
+    def test_readiness_while_warming_up(self, client, monkeypatch):
+        """Test that readiness fails until warm-up finishes."""
+        release = threading.Event()
+        warmup = Warmup([('slow', lambda: release.wait(5))])
+        monkeypatch.setattr(app_module, 'get_warmup', lambda: warmup)
+        warmup.start('background')
+
+        response = client.get('/api/health/ready')
+        assert response.status_code == 503
+        assert json.loads(response.data)['status'] == 'warming_up'
+
+        release.set()
+        warmup.wait(5)
+        response = client.get('/api/health/ready')
+        assert response.status_code == 200
+        assert 'slow' in json.loads(response.data)['warmup']['steps']
+
+    def test_legacy_health_unchanged(self, client):
+        """Test that /api/health still responds as before."""
+        response = client.get('/api/health')
+        assert response.status_code == 200
+        assert json.loads(response.data)['status'] == 'ok'
@@ -0,0 +1,313 @@
+"""
+Per-doctor triage queues of unreviewed AI prescriptions.
+
+Each doctor has a queue of the assessments assigned to them whose
+AI-generated prescription has not been reviewed yet (no lastModifiedBy).
+Items are ranked by how long they have been waiting, boosted by the
+severity of the patient's symptoms: each severity point counts as
+TRIAGE_SEVERITY_HOURS of extra waiting time. Since every item ages at the
+same rate, the ranking never changes over time and each item gets a fixed
+priority key (its assessment time minus the severity boost).
+
+Queues are binary min-heaps with lazy deletion, kept in memory and updated
+from data_access change notifications, so new assessments and doctor
+reviews are reflected without rereading the data files. Writes by other
+processes send no notification; they are detected from the data files'
+signatures (data_access.data_signature) and force a reload. top() walks the
+heap from its root with a second, candidate heap, so the K most urgent
+items cost O(K log K) on top of the reviewed items it skips, and the full
+queue is never sorted.
+
+Configuration (environment variable TRIAGE_SEVERITY_HOURS):
+    Waiting hours one severity point is worth (default 4)
+"""
+
+import heapq
+import itertools
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import data_access
+from symptom_vocabulary import get_symptom_vocabulary
+
+
+ASSESSMENTS_FILE = 'assessments.json'
+PRESCRIPTIONS_FILE = 'prescriptions.json'
+ASSIGNMENTS_FILE = 'assignments.json'
+
+SOURCE_FILES = (ASSESSMENTS_FILE, PRESCRIPTIONS_FILE, ASSIGNMENTS_FILE)
+
+# Severity points of canonical symptom names; symptoms not listed count as DEFAULT_SEVERITY
+SYMPTOM_SEVERITY = {
+    'chest pain': 5,
+    'shortness of breath': 5,
+    'fainting': 5,
+    'seizure': 5,
+    'confusion': 4,
+    'palpitations': 4,
+    'severe headache': 4,
+    'high fever': 4,
+    'vomiting': 3,
+    'dizziness': 3,
+    'fever': 2,
+    'stomach pain': 2,
+    'diarrhea': 2,
+    'headache': 1,
+    'cough': 1,
+    'sore throat': 1,
+    'rash': 1,
+}
+
+DEFAULT_SEVERITY = 1
+
+
+def symptom_severity(symptoms: Any) -> int:
+    """
+    Get the severity of a list of symptoms: the points of the most severe one.
+
+    Args:
+        symptoms: List of patient symptoms
+
+    Returns:
+        Severity points (0 if there are no symptoms)
+    """
+    if not isinstance(symptoms, list):
+        return 0
+    vocabulary = get_symptom_vocabulary()
+    severity = 0
+    for symptom in symptoms:
+        names = vocabulary.canonical_names(symptom)
+        severity = max([severity] + [SYMPTOM_SEVERITY.get(name, DEFAULT_SEVERITY) for name in names or [None]])
+    return severity
+
+
+def _timestamp(value: Any) -> float:
+    """Get the POSIX time of an ISO 8601 date, or 0 (oldest) if it is not one."""
+    if not isinstance(value, str):
+        return 0.0
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return 0.0
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class _DoctorQueue:
+    """
+    Min-heap of (priority key, sequence, assessmentID) with lazy deletion.
+
+    Removing an item only drops it from the live set; its heap entry is
+    skipped when reached and the heap is rebuilt once stale entries
+    outnumber live ones.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._live = {}
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def push(self, entry: tuple) -> None:
+        self._live[entry[2]] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, assessment_id: str) -> None:
+        if self._live.pop(assessment_id, None) is not None and len(self._heap) > 2 * len(self._live) + 16:
+            self._heap = list(self._live.values())
+            heapq.heapify(self._heap)
+
+    def top(self, k: int) -> List[tuple]:
+        """Get the k smallest live entries in order, leaving the heap untouched."""
+        heap = self._heap
+        results = []
+        candidates = [(heap[0], 0)] if heap else []
+        while candidates and len(results) < k:
+            entry, position = heapq.heappop(candidates)
+            if self._live.get(entry[2]) is entry:
+                results.append(entry)
+            # Children of a heap node are never smaller than it
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(candidates, (heap[child], child))
+        return results
+
+
+class TriageQueue:
+    """Ranks each doctor's unreviewed AI prescriptions, kept current via change notifications."""
+
+    def __init__(self, severity_hours: Optional[float] = None):
+        """
+        Initialize the queues; they are loaded on first use.
+
+        Args:
+            severity_hours: Waiting hours one severity point is worth (defaults
+                to the TRIAGE_SEVERITY_HOURS environment variable, then 4)
+        """
+        if severity_hours is None:
+            severity_hours = float(os.getenv('TRIAGE_SEVERITY_HOURS', '4'))
+        self.severity_seconds = severity_hours * 3600
+        self._lock = threading.RLock()
+        self._loaded_dir = None
+        # Signatures of the data files the queues match
+        self._signatures = {}
+        self._queues = {}
+        # Queued items by assessmentID
+        self._items = {}
+        # Parts of items whose assessment, prescription and assignment have not all been seen yet
+        self._pending = {}
+        self._sequence = itertools.count()
+        data_access.add_change_listener(self._on_change)
+
+    def top(self, doctor_id: str, k: int) -> List[Dict[str, Any]]:
+        """
+        Get a doctor's most urgent unreviewed prescriptions.
+
+        Args:
+            doctor_id: ID of the doctor
+            k: Maximum number of items to return
+
+        Returns:
+            Queue items, most urgent first, each with assessmentID, patientID,
+            prescriptionID, assessmentDate, symptoms and severity
+        """
+        with self._lock:
+            self._ensure_loaded()
+            queue = self._queues.get(doctor_id)
+            if queue is None or k <= 0:
+                return []
+            return [dict(self._items[entry[2]]) for entry in queue.top(k)]
+
+    def pending_count(self, doctor_id: str) -> int:
+        """
+        Get the number of unreviewed prescriptions queued for a doctor.
+
+        Args:
+            doctor_id: ID of the doctor
+
+        Returns:
+            Number of queued items
+        """
+        with self._lock:
+            self._ensure_loaded()
+            queue = self._queues.get(doctor_id)
+            return len(queue) if queue is not None else 0
+
+    def preload(self) -> None:
+        """Load the queues now rather than on first use (e.g., during warm-up)."""
+        with self._lock:
+            self._ensure_loaded()
+
+    def invalidate(self) -> None:
+        """Drop the queues so they are reloaded on next use."""
+        with self._lock:
+            self._loaded_dir = None
+
+    def _ensure_loaded(self) -> None:
+        """Build the queues from the data files if missing or stale."""
+        data_dir = data_access.DATA_DIR
+        signatures = {filename: data_access.data_signature(filename, missing_ok=True) for filename in SOURCE_FILES}
+        if self._loaded_dir == data_dir and self._signatures == signatures:
+            return
+
+        self._queues = {}
+        self._items = {}
+        self._pending = {}
+        for filename in SOURCE_FILES:
+            self._apply_inserts(filename, self._read_or_empty(filename))
+        # Parts that never completed (e.g., reviewed or unassigned assessments) are not kept
+        self._pending = {}
+        # The directory and signatures read at the start, so a switch or write mid-load forces a reload
+        self._loaded_dir = data_dir
+        self._signatures = signatures
+
+    @staticmethod
+    def _read_or_empty(filename: str) -> List[Dict[str, Any]]:
+        try:
+            return data_access.read_json_snapshot(filename)
+        except FileNotFoundError:
+            return []
+
+    def _apply_inserts(self, filename: str, records: List[Dict[str, Any]]) -> None:
+        """Record the parts carried by new records and queue the items they complete."""
+        for record in records:
+            assessment_id = record.get('assessmentID')
+            if assessment_id is None or assessment_id in self._items:
+                continue
+            if filename == PRESCRIPTIONS_FILE and record.get('lastModifiedBy'):
+                self._pending.pop(assessment_id, None)
+                continue
+            parts = self._pending.setdefault(assessment_id, {})
+            parts[filename] = record
+            if len(parts) == 3:
+                del self._pending[assessment_id]
+                self._queue_item(parts[ASSESSMENTS_FILE], parts[PRESCRIPTIONS_FILE], parts[ASSIGNMENTS_FILE])
+
+    def _queue_item(self, assessment: Dict[str, Any], prescription: Dict[str, Any],
+                    assignment: Dict[str, Any]) -> None:
+        doctor_id = assignment.get('doctorID')
+        if doctor_id is None:
+            return
+        severity = symptom_severity(assessment.get('symptoms'))
+        item = {
+            'assessmentID': assessment['assessmentID'],
+            'patientID': assessment.get('patientID'),
+            'prescriptionID': prescription.get('prescriptionID'),
+            'assessmentDate': assessment.get('assessmentDate'),
+            'symptoms': assessment.get('symptoms'),
+            'severity': severity,
+            'doctorID': doctor_id,
+        }
+        key = _timestamp(item['assessmentDate']) - severity * self.severity_seconds
+        self._items[item['assessmentID']] = item
+        self._queues.setdefault(doctor_id, _DoctorQueue()).push((key, next(self._sequence), item['assessmentID']))
+
+    def _dequeue(self, assessment_id: str) -> None:
+        self._pending.pop(assessment_id, None)
+        item = self._items.pop(assessment_id, None)
+        if item is not None:
+            self._queues[item['doctorID']].remove(assessment_id)
+
+    def _on_change(self, filename: str, operation: str, records: List[Dict[str, Any]],
+                   signature: data_access.WriteSignature) -> None:
+        """Apply a data_access change notification to the queues."""
+        if filename not in SOURCE_FILES:
+            return
+
+        with self._lock:
+            if self._loaded_dir is None:
+                return
+            if self._loaded_dir == data_access.DATA_DIR and self._signatures.get(filename) == signature.after:
+                # Already loaded from the files this write produced
+                return
+            # Another signature than the one before the write means a write the queues have not seen
+            if self._loaded_dir != data_access.DATA_DIR or self._signatures.get(filename) != signature.before:
+                self.invalidate()
+            elif operation == 'insert':
+                self._apply_inserts(filename, records)
+            elif filename == PRESCRIPTIONS_FILE and operation == 'update':
+                for prescription in records:
+                    if prescription.get('lastModifiedBy'):
+                        self._dequeue(prescription.get('assessmentID'))
+            else:
+                self.invalidate()
+            if self._loaded_dir is not None:
+                self._signatures[filename] = signature.after
+
+
+# Global instance
+_triage_queue = None
+_triage_queue_lock = threading.Lock()
+
+
+def get_triage_queue() -> TriageQueue:
+    """Get or create the triage queue instance."""
+    global _triage_queue
+    with _triage_queue_lock:
+        if _triage_queue is None:
+            _triage_queue = TriageQueue()
+        return _triage_queue
@@ -0,0 +1,180 @@
+"""
+Start-up warm-up and readiness tracking.
+
+Work that would otherwise land on the first requests is done ahead of time:
+building the Bedrock client (importing boto3, resolving credentials and
+creating its connection pool), loading the data file snapshots used for
+logins, and building the history, doctor assignment and search indexes, the
+triage queues and the analytics column store. The app reports ready once
+warm-up has finished.
+
+Configuration (environment variable WARMUP):
+    background: Warm up in a background thread while already serving (default)
+    sync: Warm up before the app module finishes importing
+    off: Skip warm-up; the app is ready immediately
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import data_access
+
+
+WARMUP_MODES = ('background', 'sync', 'off')
+
+# Data files read through snapshots on the hot path (logins, doctor lookups)
+SNAPSHOT_FILES = ('patients.json', 'doctors.json', 'assignments.json')
+
+
+def _warm_bedrock() -> None:
+    from bedrock_service import get_bedrock_service
+    get_bedrock_service()
+
+
+def _warm_snapshots() -> None:
+    for filename in SNAPSHOT_FILES:
+        try:
+            data_access.read_json_snapshot(filename)
+        except FileNotFoundError:
+            pass
+
+
+def _warm_history() -> None:
+    from history_service import get_history_service
+    get_history_service().preload()
+
+
+def _warm_assignments() -> None:
+    from assignment_service import get_assignment_engine
+    get_assignment_engine().preload()
+
+
+def _warm_triage() -> None:
+    from triage_service import get_triage_queue
+    get_triage_queue().preload()
+
+
+def _warm_search() -> None:
+    from search_service import get_search_index
+    get_search_index().preload()
+
+
+def _warm_analytics() -> None:
+    from analytics import get_analytics
+    get_analytics().preload()
+
+
+DEFAULT_STEPS = [
+    ('bedrock_client', _warm_bedrock),
+    ('data_snapshots', _warm_snapshots),
+    ('history_index', _warm_history),
+    ('assignment_index', _warm_assignments),
+    ('triage_queue', _warm_triage),
+    ('search_index', _warm_search),
+    ('analytics_columns', _warm_analytics),
+]
+
+
+class Warmup:
+    """Runs warm-up steps once and tracks readiness."""
+
+    def __init__(self, steps: Optional[List[Tuple[str, Callable[[], None]]]] = None):
+        """
+        Initialize warm-up.
+
+        Args:
+            steps: (name, callable) pairs to run in order (default DEFAULT_STEPS)
+        """
+        self.steps = list(DEFAULT_STEPS if steps is None else steps)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._started = False
+        self._results = {}
+        self._thread = None
+
+    def start(self, mode: str = 'background') -> None:
+        """
+        Start warm-up; calling it again has no effect.
+
+        Args:
+            mode: One of WARMUP_MODES
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in WARMUP_MODES:
+            raise ValueError(f"Unknown warm-up mode: {mode}")
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        if mode == 'off':
+            self._ready.set()
+        elif mode == 'sync':
+            self.run()
+        else:
+            self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+            self._thread.start()
+
+    def run(self) -> None:
+        """Run every step, recording its duration; a failing step does not stop the others."""
+        for name, step in self.steps:
+            started = time.perf_counter()
+            try:
+                step()
+                error = None
+            except Exception as e:
+                print(f"Warning: Warm-up step {name} failed: {e}")
+                error = str(e)
+            self._results[name] = {
+                'seconds': time.perf_counter() - started,
+                'error': error
+            }
+        self._ready.set()
+
+    def is_ready(self) -> bool:
+        """Check whether warm-up has finished."""
+        return self._ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for warm-up to finish.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if warm-up finished
+        """
+        return self._ready.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get readiness and per-step results.
+
+        Returns:
+            Dictionary with 'ready' and 'steps' (name -> seconds and error)
+        """
+        return {'ready': self.is_ready(), 'steps': dict(self._results)}
+
+
+# Global instance
+_warmup = None
+_warmup_lock = threading.Lock()
+
+
+def get_warmup() -> Warmup:
+    """Get or create the warm-up instance."""
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = Warmup()
+        return _warmup
+
+
+def warmup_mode() -> str:
+    """Read the warm-up mode from the WARMUP environment variable."""
+    return os.getenv('WARMUP', 'background').lower()